@@ -0,0 +1,74 @@
+"""Add unified search inverted index
+
+Revision ID: i9d0e1f2g3h4
+Revises: h8c9d0e1f2g3
+Create Date: 2026-02-05
+
+Adds:
+- search_documents: one row per indexed entity with display fields
+- search_postings: term -> entity postings partitioned by tenant (or owning user)
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'i9d0e1f2g3h4'
+down_revision = 'h8c9d0e1f2g3'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'workspace'
+
+
+def upgrade() -> None:
+    # ===== Search Documents =====
+    op.create_table(
+        'search_documents',
+        sa.Column('partition_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True)),
+        sa.Column('title', sa.Text),
+        sa.Column('snippet', sa.Text),
+        sa.Column('mime_type', sa.String(255)),
+        sa.Column('extra', postgresql.JSONB, server_default='{}'),
+        sa.Column('created_at', sa.DateTime),
+        sa.Column('updated_at', sa.DateTime),
+        sa.Column('indexed_at', sa.DateTime, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('entity_type', 'entity_id'),
+        schema=SCHEMA
+    )
+    op.create_index('idx_search_documents_partition', 'search_documents', ['partition_id', 'entity_type'], schema=SCHEMA)
+    op.create_index('idx_search_documents_owner', 'search_documents', ['owner_id'], schema=SCHEMA)
+
+    # ===== Search Postings =====
+    op.create_table(
+        'search_postings',
+        sa.Column('partition_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('term', sa.String(64), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('weight', sa.Float, nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('partition_id', 'term', 'entity_type', 'entity_id'),
+        schema=SCHEMA
+    )
+    # text_pattern_ops lets prefix queries (term LIKE 'abc%') use the index
+    op.create_index(
+        'idx_search_postings_term_prefix',
+        'search_postings',
+        ['partition_id', 'term'],
+        postgresql_ops={'term': 'text_pattern_ops'},
+        schema=SCHEMA
+    )
+    op.create_index('idx_search_postings_entity', 'search_postings', ['entity_type', 'entity_id'], schema=SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_search_postings_entity', table_name='search_postings', schema=SCHEMA)
+    op.drop_index('idx_search_postings_term_prefix', table_name='search_postings', schema=SCHEMA)
+    op.drop_table('search_postings', schema=SCHEMA)
+
+    op.drop_index('idx_search_documents_owner', table_name='search_documents', schema=SCHEMA)
+    op.drop_index('idx_search_documents_partition', table_name='search_documents', schema=SCHEMA)
+    op.drop_table('search_documents', schema=SCHEMA)
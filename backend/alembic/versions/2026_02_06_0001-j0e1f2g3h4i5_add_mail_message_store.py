@@ -0,0 +1,109 @@
+"""Add mail message metadata store and threads
+
+Revision ID: j0e1f2g3h4i5
+Revises: i9d0e1f2g3h4
+Create Date: 2026-02-06
+
+Adds:
+- mail_folder_sync_state: persisted IMAP cursor per mailbox folder
+- mail_message_meta: header metadata per message with thread membership
+- mail_threads: conversation aggregates for paginated listing
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'j0e1f2g3h4i5'
+down_revision = 'i9d0e1f2g3h4'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'workspace'
+
+
+def upgrade() -> None:
+    # ===== Folder Sync State =====
+    op.create_table(
+        'mail_folder_sync_state',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('mailbox', sa.String(255), nullable=False),
+        sa.Column('folder', sa.String(255), nullable=False),
+        sa.Column('uidvalidity', sa.BigInteger),
+        sa.Column('uidnext', sa.BigInteger),
+        sa.Column('highestmodseq', sa.BigInteger),
+        sa.Column('last_synced_at', sa.DateTime),
+        sa.Column('created_at', sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint('mailbox', 'folder', name='uq_mail_folder_sync_state'),
+        schema=SCHEMA
+    )
+
+    # ===== Message Metadata =====
+    op.create_table(
+        'mail_message_meta',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('mailbox', sa.String(255), nullable=False),
+        sa.Column('folder', sa.String(255), nullable=False),
+        sa.Column('uid', sa.BigInteger, nullable=False),
+        sa.Column('message_id', sa.String(500)),
+        sa.Column('in_reply_to', sa.String(500)),
+        sa.Column('references', postgresql.JSONB, server_default='[]'),
+        sa.Column('subject_key', sa.String(500)),
+        sa.Column('thread_id', sa.String(500), nullable=False),
+        sa.Column('subject', sa.Text, server_default=''),
+        sa.Column('from_address', sa.Text, server_default=''),
+        sa.Column('to_addresses', sa.Text, server_default=''),
+        sa.Column('cc_addresses', sa.Text, server_default=''),
+        sa.Column('date_header', sa.String(255), server_default=''),
+        sa.Column('sent_at', sa.DateTime),
+        sa.Column('preview', sa.Text, server_default=''),
+        sa.Column('size', sa.Integer, server_default='0'),
+        sa.Column('flags', postgresql.JSONB, server_default='[]'),
+        sa.Column('is_read', sa.Boolean, server_default='false'),
+        sa.Column('is_flagged', sa.Boolean, server_default='false'),
+        sa.Column('has_attachments', sa.Boolean, server_default='false'),
+        sa.Column('created_at', sa.DateTime, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint('mailbox', 'folder', 'uid', name='uq_mail_message_meta_uid'),
+        schema=SCHEMA
+    )
+    op.create_index('idx_mail_message_meta_thread', 'mail_message_meta', ['mailbox', 'folder', 'thread_id'], schema=SCHEMA)
+    op.create_index('idx_mail_message_meta_message_id', 'mail_message_meta', ['mailbox', 'folder', 'message_id'], schema=SCHEMA)
+    op.create_index('idx_mail_message_meta_in_reply_to', 'mail_message_meta', ['mailbox', 'folder', 'in_reply_to'], schema=SCHEMA)
+
+    # ===== Threads =====
+    op.create_table(
+        'mail_threads',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('mailbox', sa.String(255), nullable=False),
+        sa.Column('folder', sa.String(255), nullable=False),
+        sa.Column('thread_id', sa.String(500), nullable=False),
+        sa.Column('subject', sa.Text, server_default=''),
+        sa.Column('subject_key', sa.String(500)),
+        sa.Column('message_count', sa.Integer, server_default='0'),
+        sa.Column('unread_count', sa.Integer, server_default='0'),
+        sa.Column('participants', postgresql.JSONB, server_default='[]'),
+        sa.Column('preview', sa.Text, server_default=''),
+        sa.Column('latest_date', sa.String(255), server_default=''),
+        sa.Column('oldest_date', sa.String(255), server_default=''),
+        sa.Column('latest_at', sa.DateTime),
+        sa.Column('oldest_at', sa.DateTime),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint('mailbox', 'folder', 'thread_id', name='uq_mail_threads_thread'),
+        schema=SCHEMA
+    )
+    op.create_index('idx_mail_threads_latest', 'mail_threads', ['mailbox', 'folder', 'latest_at'], schema=SCHEMA)
+    op.create_index('idx_mail_threads_subject', 'mail_threads', ['mailbox', 'folder', 'subject_key'], schema=SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_mail_threads_subject', table_name='mail_threads', schema=SCHEMA)
+    op.drop_index('idx_mail_threads_latest', table_name='mail_threads', schema=SCHEMA)
+    op.drop_table('mail_threads', schema=SCHEMA)
+
+    op.drop_index('idx_mail_message_meta_in_reply_to', table_name='mail_message_meta', schema=SCHEMA)
+    op.drop_index('idx_mail_message_meta_message_id', table_name='mail_message_meta', schema=SCHEMA)
+    op.drop_index('idx_mail_message_meta_thread', table_name='mail_message_meta', schema=SCHEMA)
+    op.drop_table('mail_message_meta', schema=SCHEMA)
+
+    op.drop_table('mail_folder_sync_state', schema=SCHEMA)
@@ -0,0 +1,59 @@
+"""Turn workflow_runs into a durable run queue
+
+Revision ID: k1f2g3h4i5j6
+Revises: j0e1f2g3h4i5
+Create Date: 2026-02-07
+
+Adds:
+- tenant_id on workflow_runs for per-tenant concurrency limits
+- next_run_at / current_step / context so delayed steps resume later
+- attempts / max_attempts for retries with backoff
+- locked_by / locked_until leases so a crashed worker's runs are picked up again
+- idx_workflow_runs_due for claiming due runs
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'k1f2g3h4i5j6'
+down_revision = 'j0e1f2g3h4i5'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'workspace'
+
+
+def upgrade() -> None:
+    op.add_column('workflow_runs', sa.Column('tenant_id', postgresql.UUID(as_uuid=True)), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('next_run_at', sa.DateTime), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('current_step', sa.Integer, server_default='0', nullable=False), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('context', postgresql.JSONB), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('attempts', sa.Integer, server_default='0', nullable=False), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('max_attempts', sa.Integer, server_default='3', nullable=False), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('locked_by', sa.String(100)), schema=SCHEMA)
+    op.add_column('workflow_runs', sa.Column('locked_until', sa.DateTime), schema=SCHEMA)
+
+    # Existing runs belong to the tenant of their workflow
+    op.execute(f"""
+        UPDATE {SCHEMA}.workflow_runs r
+        SET tenant_id = w.tenant_id
+        FROM {SCHEMA}.workflows w
+        WHERE w.id = r.workflow_id
+    """)
+
+    op.create_index(
+        'idx_workflow_runs_due',
+        'workflow_runs',
+        ['status', 'next_run_at'],
+        schema=SCHEMA,
+        postgresql_where=sa.text("status IN ('queued', 'waiting', 'running')")
+    )
+    op.create_index('idx_workflow_runs_tenant', 'workflow_runs', ['tenant_id', 'status'], schema=SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_workflow_runs_tenant', table_name='workflow_runs', schema=SCHEMA)
+    op.drop_index('idx_workflow_runs_due', table_name='workflow_runs', schema=SCHEMA)
+    for column in ('locked_until', 'locked_by', 'max_attempts', 'attempts', 'context', 'current_step', 'next_run_at', 'tenant_id'):
+        op.drop_column('workflow_runs', column, schema=SCHEMA)
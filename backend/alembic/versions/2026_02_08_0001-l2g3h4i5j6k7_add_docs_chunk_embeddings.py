@@ -0,0 +1,41 @@
+"""Add persisted chunk embeddings for Docs semantic search
+
+Revision ID: l2g3h4i5j6k7
+Revises: k1f2g3h4i5j6
+Create Date: 2026-02-08
+
+Adds:
+- docs_chunk_embeddings: float32 embedding per document chunk, per tenant
+  partition and embedding model, loaded into the in-memory vector index
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'l2g3h4i5j6k7'
+down_revision = 'k1f2g3h4i5j6'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'workspace'
+
+
+def upgrade() -> None:
+    op.create_table(
+        'docs_chunk_embeddings',
+        sa.Column('tenant_key', sa.String(64), nullable=False),
+        sa.Column('document_id', sa.String(64), nullable=False),
+        sa.Column('chunk_index', sa.Integer, nullable=False),
+        sa.Column('model', sa.String(100), nullable=False),
+        sa.Column('content_hash', sa.String(32), nullable=False),
+        sa.Column('embedding', sa.LargeBinary, nullable=False),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('tenant_key', 'model', 'document_id', 'chunk_index', name='pk_docs_chunk_embeddings'),
+        schema=SCHEMA
+    )
+    op.create_index('idx_docs_chunk_embeddings_document', 'docs_chunk_embeddings', ['document_id'], schema=SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_docs_chunk_embeddings_document', table_name='docs_chunk_embeddings', schema=SCHEMA)
+    op.drop_table('docs_chunk_embeddings', schema=SCHEMA)
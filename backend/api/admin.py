@@ -25,7 +25,8 @@ from core.security import (
     is_internal_user,
     has_permission,
     Permission,
-    get_user_tenant_role
+    get_user_tenant_role,
+    get_auth_cache_stats
 )
 from models.admin_models import (
     Tenant, TenantUser, Domain, DomainDNSRecord,
@@ -2057,6 +2058,37 @@ async def get_docs_stats(
         "usage_percent": (float(tenant.docs_used_mb or 0) / tenant.docs_quota_mb * 100) if tenant.docs_quota_mb else 0
     }
 
+# ==================== AUTH CACHE ====================
+
+@router.get("/auth/cache-stats")
+async def auth_cache_stats(
+    current_user: dict = Depends(require_superadmin())
+):
+    """Hit/miss counters of this worker's authentication caches (SuperAdmin only)"""
+    from services.permission_resolver import permission_resolver
+    return {**get_auth_cache_stats(), "admin_permissions": permission_resolver.get_stats()}
+
+
+# ==================== NEXTCLOUD CLIENT ====================
+
+@router.get("/nextcloud/client-stats")
+async def nextcloud_client_stats(
+    current_user: dict = Depends(require_superadmin())
+):
+    """Connection pool usage, retries and per-operation latency histograms for Nextcloud (SuperAdmin only)"""
+    from services.nextcloud_client import get_nextcloud_client_stats
+    return get_nextcloud_client_stats()
+
+
+@router.get("/calendar/cache-stats")
+async def calendar_cache_stats(
+    current_user: dict = Depends(require_superadmin())
+):
+    """Sync and hit counters of this worker's CalDAV event cache (SuperAdmin only)"""
+    from services.caldav_sync import calendar_cache
+    return calendar_cache.get_stats()
+
+
 # ==================== DEVELOPER ENDPOINTS ====================
 
 @router.get("/developers")
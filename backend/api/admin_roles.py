@@ -12,6 +12,7 @@ import uuid
 
 from core.database import get_db
 from core.security import get_current_user, require_tenant_admin
+from services.permission_resolver import permission_resolver
 import logging
 
 logger = logging.getLogger(__name__)
@@ -119,6 +120,23 @@ class RoleAssignment(BaseModel):
     expires_at: Optional[str] = None
 
 
+class PermissionCheckItem(BaseModel):
+    permission: str
+    scope_type: Optional[str] = None  # org_unit, group
+    scope_id: Optional[str] = None
+
+
+class PermissionCheckRequest(BaseModel):
+    user_id: Optional[str] = None  # Defaults to the caller
+    checks: List[PermissionCheckItem]
+
+    @validator('checks')
+    def validate_checks(cls, v):
+        if len(v) > 1000:
+            raise ValueError('At most 1000 checks per request')
+        return v
+
+
 # =============================================
 # Endpoints
 # =============================================
@@ -606,3 +624,44 @@ async def get_user_roles(
         ],
         "effective_permissions": list(all_permissions)
     }
+
+
+# =============================================
+# Permission Checks
+# =============================================
+
+@router.post("/check")
+async def check_permissions(
+    data: PermissionCheckRequest,
+    current_user: dict = Depends(require_tenant_admin()),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Check many permissions for one user in a single call.
+
+    Meant for list pages that filter rows by permission: all checks are
+    answered from the user's compiled grants instead of one query per row.
+    """
+    tenant_id = current_user.get("tenant_id")
+    user_id = data.user_id or current_user.get("id") or current_user.get("user_id")
+
+    try:
+        allowed = await permission_resolver.check_many(db, user_id, tenant_id, [
+            (check.permission, (check.scope_type, check.scope_id) if check.scope_type and check.scope_id else None)
+            for check in data.checks
+        ])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user or tenant id")
+
+    return {
+        "user_id": user_id,
+        "results": [
+            {
+                "permission": check.permission,
+                "scope_type": check.scope_type,
+                "scope_id": check.scope_id,
+                "allowed": result
+            }
+            for check, result in zip(data.checks, allowed)
+        ]
+    }
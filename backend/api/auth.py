@@ -3,6 +3,7 @@ Bheem Workspace - Authentication API
 Uses Bheem Passport for centralized authentication with fallback to local auth
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel, EmailStr
@@ -12,7 +13,7 @@ from datetime import timedelta
 from core.database import get_db
 from core.security import (
     verify_password, get_password_hash, create_access_token,
-    get_current_user, decode_token
+    get_current_user, decode_token, revoke_token, security
 )
 from core.config import settings
 from services.passport_client import get_passport_client, BheemPassportClient
@@ -449,9 +450,13 @@ async def list_companies():
 
 
 @router.post("/logout")
-async def logout(current_user: dict = Depends(get_current_user)):
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
     """Logout (client should discard tokens)"""
-    # In a stateless JWT system, logout is handled client-side
+    # Tokens are stateless JWTs; also refuse this one for the rest of its lifetime
+    await revoke_token(credentials.credentials)
     return {"message": "Successfully logged out"}
 
 
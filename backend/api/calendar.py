@@ -14,8 +14,10 @@ from services.caldav_service import (
     caldav_service,
     CalDAVRateLimitError,
     CalDAVAuthError,
-    CalDAVNotFoundError
+    CalDAVNotFoundError,
+    CalDAVError
 )
+from services.caldav_sync import get_cached_events, search_cached_events
 from services.mail_session_service import mail_session_service
 from services.nextcloud_user_service import nextcloud_user_service
 from services.erp_client import erp_client
@@ -316,7 +318,7 @@ async def get_events(
         username, password = await get_nextcloud_credentials(current_user, nc_user, nc_pass)
         if password:
             try:
-                nc_events = await caldav_service.get_events(username, password, calendar_id, start, end)
+                nc_events = await get_cached_events(username, password, calendar_id, start, end)
                 expanded_events = caldav_service.expand_recurring_events(nc_events, start, end)
 
                 # Add source metadata to each event
@@ -936,19 +938,28 @@ async def get_today_events(
     tomorrow = today + timedelta(days=1)
 
     try:
-        events = await caldav_service.get_events(username, password, calendar_id, today, tomorrow)
+        events = await get_cached_events(username, password, calendar_id, today, tomorrow)
         expanded_events = caldav_service.expand_recurring_events(events, today, tomorrow)
-
-        return {
-            "date": today.date().isoformat(),
-            "count": len(expanded_events),
-            "events": expanded_events
-        }
     except CalDAVAuthError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid calendar credentials."
         )
+    except CalDAVRateLimitError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please wait a moment and try again."
+        )
+    except (CalDAVNotFoundError, CalDAVError) as e:
+        # Quick views show an empty day rather than failing
+        logger.warning(f"Today's events unavailable for {username}/{calendar_id}: {e}")
+        expanded_events = []
+
+    return {
+        "date": today.date().isoformat(),
+        "count": len(expanded_events),
+        "events": expanded_events
+    }
 
 @router.get("/week")
 async def get_week_events(
@@ -975,20 +986,29 @@ async def get_week_events(
     end_of_week = start_of_week + timedelta(days=7)
 
     try:
-        events = await caldav_service.get_events(username, password, calendar_id, start_of_week, end_of_week)
+        events = await get_cached_events(username, password, calendar_id, start_of_week, end_of_week)
         expanded_events = caldav_service.expand_recurring_events(events, start_of_week, end_of_week)
-
-        return {
-            "week_start": start_of_week.date().isoformat(),
-            "week_end": end_of_week.date().isoformat(),
-            "count": len(expanded_events),
-            "events": expanded_events
-        }
     except CalDAVAuthError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid calendar credentials."
         )
+    except CalDAVRateLimitError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please wait a moment and try again."
+        )
+    except (CalDAVNotFoundError, CalDAVError) as e:
+        # Quick views show an empty week rather than failing
+        logger.warning(f"Week's events unavailable for {username}/{calendar_id}: {e}")
+        expanded_events = []
+
+    return {
+        "week_start": start_of_week.date().isoformat(),
+        "week_end": end_of_week.date().isoformat(),
+        "count": len(expanded_events),
+        "events": expanded_events
+    }
 
 
 # Recurring event instance management
@@ -1421,34 +1441,8 @@ async def search_events(
         calendars = await caldav_service.get_calendars(username, password)
         calendar_id_list = [c.get("id", "personal") for c in calendars]
 
-    # Search across all specified calendars
-    all_events = []
-    query_lower = query.lower()
-
-    for calendar_id in calendar_id_list:
-        try:
-            events = await caldav_service.get_events(username, password, calendar_id, start, end)
-            # Expand recurring events
-            expanded = caldav_service.expand_recurring_events(events, start, end)
-
-            # Filter by search query
-            for event in expanded:
-                title = (event.get("title") or "").lower()
-                description = (event.get("description") or "").lower()
-                location = (event.get("location") or "").lower()
-
-                if (query_lower in title or
-                    query_lower in description or
-                    query_lower in location):
-                    event["calendar_id"] = calendar_id
-                    all_events.append(event)
-        except Exception as e:
-            # Continue searching other calendars if one fails
-            print(f"Error searching calendar {calendar_id}: {e}")
-            continue
-
-    # Sort by start date
-    all_events.sort(key=lambda e: e.get("start", ""))
+    # Search the local event cache; cold calendars are synced concurrently
+    all_events = await search_cached_events(username, password, calendar_id_list, query, start, end)
 
     return {
         "query": query,
@@ -9,7 +9,7 @@ from typing import Optional, List
 import io
 
 from core.security import get_current_user
-from services.nextcloud_service import nextcloud_service
+from services.nextcloud_service import nextcloud_service, WebDAVUploadError
 
 router = APIRouter(prefix="/docs", tags=["Bheem Docs"])
 
@@ -111,12 +111,13 @@ async def upload_file(
             detail="Nextcloud credentials required"
         )
     
-    content = await file.read()
     full_path = f"{path.rstrip('/')}/{file.filename}"
     
-    success = await nextcloud_service.upload_file(username, password, full_path, content)
-    
-    if not success:
+    try:
+        result = await nextcloud_service.upload_stream(
+            username, password, full_path, file, content_type=file.content_type
+        )
+    except WebDAVUploadError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to upload file"
@@ -126,7 +127,7 @@ async def upload_file(
         "success": True,
         "filename": file.filename,
         "path": full_path,
-        "size": len(content)
+        "size": result["size"]
     }
 
 @router.get("/download")
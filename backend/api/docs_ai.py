@@ -88,6 +88,11 @@ def get_ai_service() -> DocsAIService:
     return get_docs_ai_service()
 
 
+def _index_tenant(current_user: dict) -> str:
+    """Partition of the document vector index the user searches in"""
+    return current_user.get('tenant_id') or current_user.get('company_id') or current_user['id']
+
+
 # =============================================================================
 # SUMMARIZATION ENDPOINTS
 # =============================================================================
@@ -250,7 +255,8 @@ async def semantic_search(
     results = await service.semantic_search(
         query=request.query,
         documents=documents,
-        top_k=request.top_k
+        top_k=request.top_k,
+        tenant_id=_index_tenant(current_user)
     )
 
     return {
@@ -280,7 +286,8 @@ async def find_similar_documents(
         document_id=UUID(request.document_id),
         document_content=request.document_content,
         candidates=candidates,
-        top_k=request.top_k
+        top_k=request.top_k,
+        tenant_id=_index_tenant(current_user)
     )
 
     return {
@@ -357,7 +364,7 @@ async def get_ai_status(
             "summarization": True,
             "keywords": True,
             "analysis": True,
-            "semantic_search": service.ai_enabled,
+            "semantic_search": service.vector_store is not None,
             "writing_assistance": service.ai_enabled,
             "content_generation": service.ai_enabled
         },
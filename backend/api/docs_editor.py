@@ -28,6 +28,7 @@ from services.docs_export_service import (
     get_docs_export_service,
     DocsExportService
 )
+from services.docs_export_engine import ExportQueueFull
 from services.docs_editor_service import (
     get_docs_editor_service,
     DocsEditorService
@@ -414,7 +415,8 @@ async def save_editor_content(
             document_id=UUID(document_id),
             content=request.content.model_dump(),
             user_id=user_id,
-            create_version=request.create_version
+            create_version=request.create_version,
+            tenant_id=current_user.get('tenant_id') or current_user.get('company_id') or current_user['id']
         )
 
         return result
@@ -678,12 +680,15 @@ async def export_document(
     if isinstance(content, str):
         content = json.loads(content)
 
+    tenant_id = current_user.get('tenant_id') or current_user.get('company_id') or current_user['id']
+
     try:
         if request.format == 'pdf':
             data = await export_service.export_to_pdf(
                 content=content,
                 title=title,
-                include_header=request.include_header
+                include_header=request.include_header,
+                tenant_id=tenant_id
             )
             media_type = 'application/pdf'
             filename = f"{title}.pdf"
@@ -691,7 +696,8 @@ async def export_document(
         elif request.format == 'docx':
             data = await export_service.export_to_docx(
                 content=content,
-                title=title
+                title=title,
+                tenant_id=tenant_id
             )
             media_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
             filename = f"{title}.docx"
@@ -743,6 +749,12 @@ async def export_document(
             status_code=501,
             detail=f"Export format not supported: {str(e)}"
         )
+    except ExportQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={'Retry-After': '5'}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -10,7 +10,8 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, Field, EmailStr
 
-from core.security import get_current_user
+from core.security import get_current_user, require_superadmin
+from services.audit_sink import get_audit_sink_stats
 from services.docs_audit_service import (
     get_docs_audit_service,
     DocsAuditService,
@@ -324,6 +325,18 @@ async def export_audit_logs(
     return result
 
 
+@router.get("/audit/sink-stats")
+async def get_audit_sink_status(
+    current_user: dict = Depends(require_superadmin())
+):
+    """
+    Audit writer health for this worker.
+
+    Queue depth, flush latency, and spilled/rejected/dropped event counters.
+    """
+    return get_audit_sink_stats()
+
+
 # =============================================================================
 # SIGNATURE ENDPOINTS
 # =============================================================================
@@ -12,7 +12,7 @@ from fastapi.responses import JSONResponse
 import json
 import logging
 
-from core.security import get_current_user, decode_token
+from core.security import get_current_user, decode_token, is_token_revoked
 from services.docs_collaboration_service import (
     get_docs_collaboration_service,
     DocsCollaborationService,
@@ -49,6 +49,8 @@ async def authenticate_websocket(
         return None
 
     try:
+        if await is_token_revoked(token):
+            return None
         user = decode_token(token)
         return user
     except Exception as e:
@@ -80,7 +82,7 @@ async def collaboration_websocket(
     - join: Initial connection (automatic)
     - leave: Disconnect (automatic)
     - sync_step1: Client sends state vector
-    - sync_step2: Server sends missing updates
+    - sync_step2: Missing updates (server reply to sync_step1, or client reply to the join state vector)
     - sync_update: Document changes
     - awareness_update: Cursor/selection changes
     - doc_save: Manual save request
@@ -14,7 +14,7 @@ import io
 import logging
 
 from core.database import get_db
-from core.security import get_current_user, get_optional_user, decode_token, validate_token_via_passport
+from core.security import get_current_user, get_optional_user, decode_token, is_token_revoked, verify_passport_token
 from services.drive_service import DriveService
 from services.mailgun_service import mailgun_service
 
@@ -27,6 +27,10 @@ async def get_user_from_token_string(token: str) -> Optional[Dict[str, Any]]:
         logger.warning("Token param is empty")
         return None
 
+    if await is_token_revoked(token):
+        logger.warning("Token has been revoked")
+        return None
+
     logger.info(f"Attempting to decode token (first 50 chars): {token[:50]}...")
 
     # Try local decode first
@@ -47,20 +51,10 @@ async def get_user_from_token_string(token: str) -> Optional[Dict[str, Any]]:
 
     # Try Passport validation for tokens issued by Passport
     logger.info("Trying Passport validation...")
-    passport_payload = await validate_token_via_passport(token)
-    if passport_payload:
+    passport_user = await verify_passport_token(token)
+    if passport_user and passport_user.get("id"):
         logger.info("Token validated via Passport")
-        user_id = passport_payload.get("user_id") or passport_payload.get("sub")
-        if user_id:
-            return {
-                "id": user_id,
-                "user_id": user_id,
-                "username": passport_payload.get("username"),
-                "email": passport_payload.get("email"),
-                "role": passport_payload.get("role"),
-                "company_id": passport_payload.get("company_id"),
-                "company_code": passport_payload.get("company_code"),
-            }
+        return passport_user
 
     logger.warning("Token validation failed")
     return None
@@ -320,24 +314,28 @@ async def list_root_contents(
 async def upload_file(
     file: UploadFile = File(...),
     parent_id: Optional[UUID] = Form(None),
+    upload_id: Optional[str] = Form(None),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upload a file to Drive (stored in Nextcloud)"""
+    """
+    Upload a file to Drive (stored in Nextcloud).
+
+    The file is streamed to storage in chunks; resending a failed large
+    upload with the same upload_id resumes it.
+    """
     tenant_id, owner_id = await get_user_ids_with_ensure(current_user, db)
     service = DriveService(db)
 
-    # Read file content
-    content = await file.read()
-
-    # Create file record and upload to Nextcloud
+    # Create file record and stream the upload to Nextcloud
     drive_file = await service.create_file(
         tenant_id=tenant_id,
         owner_id=owner_id,
         name=file.filename,
-        content=content,
+        content=file,
         mime_type=file.content_type,
-        parent_id=parent_id
+        parent_id=parent_id,
+        upload_id=upload_id
     )
 
     return drive_file
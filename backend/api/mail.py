@@ -8,10 +8,14 @@ Security:
 - Rate limiting protects against abuse
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File, Form
-from pydantic import BaseModel, EmailStr
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+import json
 from core.security import get_current_user
+from core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.mailcow_service import mailcow_service
 from services.mail_session_service import mail_session_service, get_mail_session, MailSessionService
 from services.mail_threading_service import mail_threading_service
@@ -147,7 +151,7 @@ async def create_mail_session(
 
     # Validate credentials with Mailcow
     try:
-        folders = mailcow_service.get_folders(login_data.email, login_data.password)
+        folders = await mailcow_service.get_folders(login_data.email, login_data.password)
         if not folders:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -318,7 +322,7 @@ async def auto_create_mail_session(
     try:
         credentials = mail_session_service.get_credentials(user_id)
         if credentials:
-            folders = mailcow_service.get_folders(credentials["email"], credentials["password"])
+            folders = await mailcow_service.get_folders(credentials["email"], credentials["password"])
         else:
             folders = None
     except Exception:
@@ -377,11 +381,12 @@ async def get_inbox(
     # Calculate offset for pagination
     offset = (page - 1) * limit
 
-    messages = mailcow_service.get_inbox(
+    messages = await mailcow_service.get_inbox(
         credentials["email"],
         credentials["password"],
         folder,
-        limit
+        limit,
+        offset
     )
 
     return {
@@ -411,11 +416,12 @@ async def get_messages(
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    messages = mailcow_service.get_inbox(
+    messages = await mailcow_service.get_inbox(
         credentials["email"],
         credentials["password"],
         folder,
-        limit
+        limit,
+        (page - 1) * limit
     )
 
     return {
@@ -443,7 +449,7 @@ async def get_message(
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    message = mailcow_service.get_email(
+    message = await mailcow_service.get_email(
         credentials["email"],
         credentials["password"],
         message_id,
@@ -787,7 +793,7 @@ async def get_folders(
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    folders = mailcow_service.get_folders(
+    folders = await mailcow_service.get_folders(
         credentials["email"],
         credentials["password"]
     )
@@ -811,7 +817,7 @@ async def move_message(
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    success = mailcow_service.move_email(
+    success = await mailcow_service.move_email(
         credentials["email"],
         credentials["password"],
         message_id,
@@ -844,7 +850,7 @@ async def delete_message(
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    success = mailcow_service.move_email(
+    success = await mailcow_service.move_email(
         credentials["email"],
         credentials["password"],
         message_id,
@@ -870,43 +876,48 @@ async def delete_message(
 async def get_conversations(
     request: Request,
     folder: str = Query("INBOX", description="Mail folder"),
-    limit: int = Query(50, ge=1, le=200, description="Number of messages to fetch for threading"),
+    limit: int = Query(50, ge=1, le=200, description="Number of conversations per page"),
     page: int = Query(1, ge=1, description="Page number"),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get emails grouped into threaded conversations.
 
-    Returns a list of conversation threads, each containing related messages
-    grouped by Message-ID/In-Reply-To/References headers.
+    Returns a page of conversation threads, each containing related messages
+    grouped by Message-ID/In-Reply-To/References headers. Threads are kept
+    in the mail metadata store, which is synced incrementally from IMAP, so
+    pagination covers the whole folder.
 
     Requires an active mail session.
     """
+    from services.mail_store_service import mail_store_service
+
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    # Fetch messages with threading headers
-    messages = mailcow_service.get_inbox(
+    sync_complete = await mail_store_service.sync_folder(
+        db,
         credentials["email"],
         credentials["password"],
-        folder,
-        limit * 2  # Fetch more to ensure we get complete threads
+        folder
     )
 
-    # Group into threads
-    conversations = mail_threading_service.group_into_threads(messages)
-
-    # Apply pagination to conversations
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated_conversations = conversations[start_idx:end_idx]
+    total, conversations = await mail_store_service.list_conversations(
+        db,
+        credentials["email"],
+        folder,
+        limit,
+        (page - 1) * limit
+    )
 
     return {
         "folder": folder,
-        "total_conversations": len(conversations),
+        "total_conversations": total,
         "page": page,
         "limit": limit,
-        "conversations": paginated_conversations
+        "conversations": conversations,
+        "sync_complete": bool(sync_complete)
     }
 
 
@@ -916,7 +927,8 @@ async def get_conversation(
     request: Request,
     thread_id: str,
     folder: str = Query("INBOX", description="Mail folder"),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a single conversation thread by ID.
@@ -925,44 +937,36 @@ async def get_conversation(
 
     Requires an active mail session.
     """
+    from services.mail_store_service import mail_store_service
+
     user_id = current_user.get("id") or current_user.get("user_id")
     credentials = get_mail_credentials(user_id)
 
-    # Fetch messages
-    messages = mailcow_service.get_inbox(
-        credentials["email"],
-        credentials["password"],
-        folder,
-        200  # Fetch enough to find the thread
-    )
+    await mail_store_service.sync_folder(db, credentials["email"], credentials["password"], folder)
+    conversation = await mail_store_service.get_conversation(db, credentials["email"], folder, thread_id)
 
-    # Group into threads
-    conversations = mail_threading_service.group_into_threads(messages)
-
-    # Find the requested thread
-    for conversation in conversations:
-        if conversation.get("thread_id") == thread_id:
-            # Fetch full content for each message in the thread
-            full_messages = []
-            for msg in conversation.get("messages", []):
-                full_msg = mailcow_service.get_email(
-                    credentials["email"],
-                    credentials["password"],
-                    msg.get("id"),
-                    folder
-                )
-                if full_msg:
-                    full_messages.append(full_msg)
-                else:
-                    full_messages.append(msg)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation thread not found"
+        )
 
-            conversation["messages"] = full_messages
-            return conversation
+    # Fetch full content for each message in the thread
+    full_messages = []
+    for msg in conversation.get("messages", []):
+        full_msg = await mailcow_service.get_email(
+            credentials["email"],
+            credentials["password"],
+            msg.get("id"),
+            folder
+        )
+        if full_msg:
+            full_messages.append(full_msg)
+        else:
+            full_messages.append(msg)
 
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail="Conversation thread not found"
-    )
+    conversation["messages"] = full_messages
+    return conversation
 
 
 @router.get("/messages/{message_id}/thread")
@@ -971,7 +975,8 @@ async def get_message_thread(
     request: Request,
     message_id: str,
     folder: str = Query("INBOX", description="Mail folder"),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all messages in the same thread as the specified message.
@@ -984,7 +989,7 @@ async def get_message_thread(
     credentials = get_mail_credentials(user_id)
 
     # Get the target message first
-    target_message = mailcow_service.get_email(
+    target_message = await mailcow_service.get_email(
         credentials["email"],
         credentials["password"],
         message_id,
@@ -997,24 +1002,23 @@ async def get_message_thread(
             detail="Message not found"
         )
 
-    # Fetch all messages in folder
-    all_messages = mailcow_service.get_inbox(
-        credentials["email"],
-        credentials["password"],
-        folder,
-        200
-    )
+    # Look up the thread in the metadata store
+    from services.mail_store_service import mail_store_service
 
-    # Get thread for this message
-    thread_messages = mail_threading_service.get_thread_for_message(
-        target_message,
-        all_messages
-    )
+    await mail_store_service.sync_folder(db, credentials["email"], credentials["password"], folder)
+    thread_id = await mail_store_service.find_thread_id(db, credentials["email"], folder, message_id)
+    conversation = None
+    if thread_id:
+        conversation = await mail_store_service.get_conversation(db, credentials["email"], folder, thread_id)
+    thread_messages = conversation["messages"] if conversation else [target_message]
 
     # Fetch full content for each message
     full_messages = []
     for msg in thread_messages:
-        full_msg = mailcow_service.get_email(
+        if msg.get("id") == message_id:
+            full_messages.append(target_message)
+            continue
+        full_msg = await mailcow_service.get_email(
             credentials["email"],
             credentials["password"],
             msg.get("id"),
@@ -1026,7 +1030,7 @@ async def get_message_thread(
             full_messages.append(msg)
 
     return {
-        "thread_id": target_message.get("message_id", message_id),
+        "thread_id": thread_id or target_message.get("message_id", message_id),
         "message_count": len(full_messages),
         "messages": full_messages
     }
@@ -1041,6 +1045,63 @@ class SearchRequest(BaseModel):
     folder: Optional[str] = None  # None = search all folders
     search_in: Optional[List[str]] = None  # ['subject', 'from', 'to', 'body', 'all']
     limit: Optional[int] = 50
+    stream: Optional[str] = Field(None, pattern="^(ndjson|sse)$")  # Stream all-folder hits as they arrive
+
+
+SEARCH_STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _stream_search_all_folders(
+    credentials: dict,
+    query: str,
+    search_fields: List[str],
+    limit: int,
+    stream_format: str
+) -> StreamingResponse:
+    """
+    Stream an all-folder search, one event per folder as it completes.
+
+    Emits ``folder`` events ({"folder", "results"}) followed by a single
+    ``done`` event with the totals, either as NDJSON lines (each with a
+    "type" key) or as Server-Sent Events.
+    """
+    def encode(event_type: str, payload: dict) -> str:
+        if stream_format == "sse":
+            return f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
+        return json.dumps({"type": event_type, **payload}, default=str) + "\n"
+
+    async def events():
+        by_folder = {}
+        try:
+            async for folder_name, messages in mailcow_service.iter_search_all_folders(
+                credentials["email"],
+                credentials["password"],
+                query,
+                search_fields,
+                limit
+            ):
+                by_folder[folder_name] = len(messages)
+                yield encode("folder", {"folder": folder_name, "results": messages})
+        except Exception as e:
+            print(f"IMAP Search Stream Error: {e}")
+            yield encode("error", {"detail": "Search failed"})
+
+        count = sum(by_folder.values())
+        yield encode("done", {
+            "query": query,
+            "count": count,
+            "by_folder": by_folder,
+            "truncated": count >= limit
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type=SEARCH_STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/search")
@@ -1051,13 +1112,16 @@ async def search_emails(
     folder: Optional[str] = Query(None, description="Folder to search (null for all)"),
     search_in: Optional[str] = Query("all", description="Fields to search: subject,from,to,body,all"),
     limit: int = Query(50, ge=1, le=100, description="Max results"),
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$", description="Stream all-folder hits as each folder completes"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Search emails using IMAP SEARCH.
 
     Searches in specified folder or all folders if folder is not provided.
-    Can filter by fields: subject, from, to, body, or all.
+    Can filter by fields: subject, from, to, body, or all. With ``stream``
+    set, an all-folder search returns hits as NDJSON or SSE events while
+    the remaining folders are still being searched.
 
     Requires an active mail session.
     """
@@ -1069,7 +1133,7 @@ async def search_emails(
 
     if folder:
         # Search single folder
-        results = mailcow_service.search_emails(
+        results = await mailcow_service.search_emails(
             credentials["email"],
             credentials["password"],
             query,
@@ -1083,9 +1147,11 @@ async def search_emails(
             "count": len(results),
             "results": results
         }
+    elif stream:
+        return _stream_search_all_folders(credentials, query, search_fields, limit, stream)
     else:
         # Search all folders
-        results = mailcow_service.search_all_folders(
+        results = await mailcow_service.search_all_folders(
             credentials["email"],
             credentials["password"],
             query,
@@ -1128,7 +1194,7 @@ async def search_emails_post(
     search_fields = search_data.search_in or ["all"]
 
     if search_data.folder:
-        results = mailcow_service.search_emails(
+        results = await mailcow_service.search_emails(
             credentials["email"],
             credentials["password"],
             search_data.query,
@@ -1142,8 +1208,16 @@ async def search_emails_post(
             "count": len(results),
             "results": results
         }
+    elif search_data.stream:
+        return _stream_search_all_folders(
+            credentials,
+            search_data.query,
+            search_fields,
+            search_data.limit or 50,
+            search_data.stream
+        )
     else:
-        results = mailcow_service.search_all_folders(
+        results = await mailcow_service.search_all_folders(
             credentials["email"],
             credentials["password"],
             search_data.query,
@@ -1184,7 +1258,7 @@ async def search_conversations(
     credentials = get_mail_credentials(user_id)
 
     if folder:
-        results = mailcow_service.search_emails(
+        results = await mailcow_service.search_emails(
             credentials["email"],
             credentials["password"],
             query,
@@ -1193,7 +1267,7 @@ async def search_conversations(
             limit * 2  # Fetch more for complete threads
         )
     else:
-        all_folder_results = mailcow_service.search_all_folders(
+        all_folder_results = await mailcow_service.search_all_folders(
             credentials["email"],
             credentials["password"],
             query,
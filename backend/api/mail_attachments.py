@@ -242,7 +242,7 @@ async def get_attachment_preview(
 
 
 @router.get("/{message_id}/download/{attachment_index}")
-def download_attachment(
+async def download_attachment(
     message_id: str,
     attachment_index: int,
     folder: str = Query("INBOX"),
@@ -259,7 +259,7 @@ def download_attachment(
 
     try:
         # Fetch the email with full attachment content
-        email_content = mailcow_service.get_email_with_attachments(
+        email_content = await mailcow_service.get_email_with_attachments(
             credentials["email"],
             credentials["password"],
             message_id,
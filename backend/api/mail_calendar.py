@@ -80,7 +80,7 @@ async def detect_calendar_events(
         email = None
         max_retries = 3
         for attempt in range(max_retries):
-            email = mailcow_service.get_email(
+            email = await mailcow_service.get_email(
                 credentials["email"],
                 credentials["password"],
                 message_id,
@@ -252,7 +252,7 @@ async def add_email_event_to_calendar(
 
     try:
         # Fetch the email (synchronous method)
-        email = mailcow_service.get_email(
+        email = await mailcow_service.get_email(
             credentials["email"],
             credentials["password"],
             message_id,
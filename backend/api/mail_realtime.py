@@ -8,6 +8,7 @@ import json
 import asyncio
 from datetime import datetime
 from services.mail_realtime_service import mail_connection_manager
+from services.imap_idle_service import imap_idle_pool
 from services.mail_session_service import mail_session_service
 from core.logging import get_logger
 
@@ -23,10 +24,12 @@ async def validate_ws_token(token: str) -> Optional[dict]:
     Returns user dict if valid, None otherwise.
     Uses same validation as main auth: local decode first, then Passport API.
     """
-    from core.security import decode_token, validate_token_via_passport, get_user_from_passport
-    from core.config import settings
+    from core.security import decode_token, is_token_revoked, verify_passport_token
 
     try:
+        if await is_token_revoked(token):
+            return None
+
         # Step 1: Try local decode first (faster)
         payload = decode_token(token)
         if payload:
@@ -37,24 +40,13 @@ async def validate_ws_token(token: str) -> Optional[dict]:
                     "email": payload.get("email") or payload.get("username")
                 }
 
-        # Step 2: Try Passport validation if local decode failed
-        if settings.USE_PASSPORT_AUTH:
-            passport_payload = await validate_token_via_passport(token)
-            if passport_payload:
-                user_id = passport_payload.get("user_id") or passport_payload.get("sub")
-                return {
-                    "id": user_id,
-                    "email": passport_payload.get("email") or passport_payload.get("username")
-                }
-
-            # Step 3: Try /me endpoint as fallback
-            user_info = await get_user_from_passport(token)
-            if user_info:
-                user_id = user_info.get("user_id") or user_info.get("sub")
-                return {
-                    "id": user_id,
-                    "email": user_info.get("email") or user_info.get("username")
-                }
+        # Step 2: Try Passport validation (cached, /me fallback) if local decode failed
+        user = await verify_passport_token(token)
+        if user:
+            return {
+                "id": user["id"],
+                "email": user["email"]
+            }
 
     except Exception as e:
         logger.warning(f"WebSocket token validation failed: {e}")
@@ -253,5 +245,6 @@ async def get_realtime_status():
         "total_connections": sum(
             mail_connection_manager.get_connection_count(u)
             for u in connected_users
-        )
+        ),
+        "imap_watchers": imap_idle_pool.get_stats()
     }
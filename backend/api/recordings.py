@@ -2,7 +2,7 @@
 Bheem Meet - Recording API
 Full-featured recording management with transcription, watermarks, and storage
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Request
 from fastapi.responses import StreamingResponse, FileResponse
 from pydantic import BaseModel
 from typing import Optional, List
@@ -19,6 +19,7 @@ from sqlalchemy import text
 
 from services.livekit_egress_service import livekit_egress_service
 from services.recording_storage_service import recording_storage_service
+from services.media_stream_service import stream_from_nextcloud, stream_local_file
 from services.transcription_service import transcription_service
 from services.watermark_service import watermark_service
 
@@ -774,11 +775,15 @@ async def create_share_link(
 @router.get("/{recording_id}/view")
 async def view_recording(
     recording_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
-    View/stream a recording - redirects to the actual file URL.
+    View/stream a recording.
     This endpoint is used for share links.
+
+    S3 recordings redirect to a pre-signed URL (S3 serves ranges itself);
+    Nextcloud and local recordings are streamed with Range support.
     """
     from fastapi.responses import RedirectResponse
 
@@ -806,9 +811,21 @@ async def view_recording(
         if expires_at < now:
             raise HTTPException(status_code=410, detail="Share link has expired")
 
+    storage_type = recording.storage_type or "s3"
+    if storage_type == "nextcloud":
+        return await stream_from_nextcloud(
+            settings.NEXTCLOUD_ADMIN_USER,
+            settings.NEXTCLOUD_ADMIN_PASSWORD,
+            recording.storage_path,
+            request.headers,
+            media_type="video/mp4"
+        )
+    if storage_type == "local":
+        return stream_local_file(recording.storage_path, request.headers, media_type="video/mp4")
+
     # Get the actual file URL
     download_url = await recording_storage_service.get_recording_url(
-        recording.storage_type or "s3",
+        storage_type,
         recording.storage_path,
         None
     )
@@ -7,12 +7,15 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, date, time, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 from uuid import UUID
 
 from core.database import get_db
 from core.security import get_current_user, require_tenant_admin, require_tenant_member
-from models.admin_models import Resource, ResourceBooking
+from models.admin_models import Resource, ResourceBooking, TenantUser
+from services.availability_engine import (
+    find_common_slot, invalidate_resource, parse_hhmm, resource_busy, slot_grid, to_naive_utc
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -168,6 +171,80 @@ async def create_resource(
     )
 
 
+@router.get("/common-availability")
+async def get_common_availability(
+    start: datetime = Query(..., description="Search from (ISO datetime)"),
+    end: datetime = Query(..., description="Search until (ISO datetime)"),
+    duration_minutes: int = Query(30, ge=5, le=1440),
+    resource_ids: Optional[str] = Query(None, description="Comma-separated resource IDs"),
+    user_ids: Optional[str] = Query(None, description="Comma-separated tenant user IDs"),
+    step_minutes: int = Query(15, ge=5, le=240),
+    current_user: dict = Depends(require_tenant_member()),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Find the first slot where all listed resources and people are free.
+
+    Resources are free within their bookable hours and outside their
+    bookings; people are free outside the appointments they host.
+    """
+    tenant_id = current_user.get("tenant_id")
+
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    if end <= start or end - start > timedelta(days=31):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start and within 31 days of it"
+        )
+
+    try:
+        resource_id_list = [UUID(r.strip()) for r in (resource_ids or "").split(",") if r.strip()]
+        user_id_list = [UUID(u.strip()) for u in (user_ids or "").split(",") if u.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid resource or user ID")
+
+    resources = []
+    if resource_id_list:
+        result = await db.execute(
+            select(Resource).where(
+                Resource.id.in_(resource_id_list),
+                Resource.tenant_id == tenant_id,
+                Resource.is_active == True
+            )
+        )
+        resources = result.scalars().all()
+        if len(resources) != len(set(resource_id_list)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found")
+
+    if user_id_list:
+        result = await db.execute(
+            select(TenantUser.user_id).where(
+                TenantUser.user_id.in_(user_id_list),
+                TenantUser.tenant_id == tenant_id
+            )
+        )
+        if set(result.scalars().all()) != set(user_id_list):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    slot = await find_common_slot(
+        db,
+        start,
+        end,
+        timedelta(minutes=duration_minutes),
+        host_ids=user_id_list,
+        resources=resources,
+        step=timedelta(minutes=step_minutes)
+    )
+
+    return {
+        "available": slot is not None,
+        "start": slot[0].isoformat() if slot else None,
+        "end": slot[1].isoformat() if slot else None,
+        "resource_ids": [str(r.id) for r in resources],
+        "user_ids": [str(u) for u in user_id_list]
+    }
+
+
 @router.get("/{resource_id}")
 async def get_resource(
     resource_id: str,
@@ -254,45 +331,34 @@ async def get_availability(
             "slots": []
         }
 
-    # Get existing bookings for this date
-    start_of_day = datetime.combine(check_date, time.min)
-    end_of_day = datetime.combine(check_date, time.max)
+    # Busy time for this date (cached per day, dropped when the resource's bookings change)
+    busy = (await resource_busy(db, [resource.id], check_date, check_date))[str(resource.id)]
 
+    # Busy time merges adjacent bookings, so count the bookings themselves
+    start_of_day = datetime.combine(check_date, time.min)
     bookings_result = await db.execute(
-        select(ResourceBooking).where(
-            ResourceBooking.resource_id == resource_id,
+        select(func.count(ResourceBooking.id)).where(
+            ResourceBooking.resource_id == resource.id,
             ResourceBooking.status != "cancelled",
-            ResourceBooking.start_time >= start_of_day,
-            ResourceBooking.end_time <= end_of_day
+            ResourceBooking.start_time < start_of_day + timedelta(days=1),
+            ResourceBooking.end_time > start_of_day
         )
     )
-    bookings = bookings_result.scalars().all()
 
     # Generate time slots
-    slots = []
-    available_from = datetime.strptime(resource.available_from or "09:00", "%H:%M").time()
-    available_until = datetime.strptime(resource.available_until or "18:00", "%H:%M").time()
-
-    current_time = datetime.combine(check_date, available_from)
-    end_time = datetime.combine(check_date, available_until)
-
-    while current_time < end_time:
-        slot_end = current_time + timedelta(minutes=30)
-
-        # Check if slot is booked
-        is_booked = False
-        for booking in bookings:
-            if booking.start_time < slot_end and booking.end_time > current_time:
-                is_booked = True
-                break
-
-        slots.append({
-            "start": current_time.strftime("%H:%M"),
+    slots = [
+        {
+            "start": slot_start.strftime("%H:%M"),
             "end": slot_end.strftime("%H:%M"),
-            "available": not is_booked
-        })
-
-        current_time = slot_end
+            "available": free
+        }
+        for slot_start, slot_end, free in slot_grid(
+            datetime.combine(check_date, parse_hhmm(resource.available_from, "09:00")),
+            datetime.combine(check_date, parse_hhmm(resource.available_until, "18:00")),
+            timedelta(minutes=30),
+            busy
+        )
+    ]
 
     return {
         "resource_id": resource_id,
@@ -301,7 +367,7 @@ async def get_availability(
         "available_from": resource.available_from,
         "available_until": resource.available_until,
         "slots": slots,
-        "existing_bookings": len(bookings)
+        "existing_bookings": bookings_result.scalar() or 0
     }
 
 
@@ -343,30 +409,17 @@ async def book_resource(
             detail="End time must be after start time"
         )
 
-    # Check for conflicts
+    # Check for conflicts (any overlap; one row is enough to refuse)
     conflicts_result = await db.execute(
-        select(ResourceBooking).where(
+        select(ResourceBooking.id).where(
             ResourceBooking.resource_id == resource_id,
             ResourceBooking.status != "cancelled",
-            or_(
-                and_(
-                    ResourceBooking.start_time <= booking.start_time,
-                    ResourceBooking.end_time > booking.start_time
-                ),
-                and_(
-                    ResourceBooking.start_time < booking.end_time,
-                    ResourceBooking.end_time >= booking.end_time
-                ),
-                and_(
-                    ResourceBooking.start_time >= booking.start_time,
-                    ResourceBooking.end_time <= booking.end_time
-                )
-            )
-        )
+            ResourceBooking.start_time < booking.end_time,
+            ResourceBooking.end_time > booking.start_time
+        ).limit(1)
     )
-    conflicts = conflicts_result.scalars().all()
 
-    if conflicts:
+    if conflicts_result.scalar_one_or_none() is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Time slot is already booked"
@@ -396,6 +449,7 @@ async def book_resource(
 
     db.add(new_booking)
     await db.commit()
+    invalidate_resource(resource.id)
     await db.refresh(new_booking)
 
     return {
@@ -522,6 +576,7 @@ async def cancel_booking(
     booking.updated_at = datetime.utcnow()
 
     await db.commit()
+    invalidate_resource(booking.resource_id)
 
     return {
         "success": True,
@@ -9,8 +9,9 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 
 from core.database import get_db
-from core.security import get_current_user
+from core.security import get_current_user, require_tenant_admin
 from services.search_service import SearchService
+from services.search_index_service import search_index_service
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
@@ -51,6 +52,14 @@ class SearchResponse(BaseModel):
     query: str
     total: int
     results: List[SearchResultItem]
+    next_cursor: Optional[str] = None
+    partial: bool = False
+    failed_apps: List[str] = []
+
+
+class IndexRebuildResponse(BaseModel):
+    tenant_id: str
+    indexed: int
 
 
 class SuggestionItem(BaseModel):
@@ -67,6 +76,21 @@ class RecentItem(BaseModel):
     updated_at: Optional[str] = None
 
 
+# =============================================
+# Helper Functions
+# =============================================
+
+async def _run_search(service: SearchService, **kwargs) -> dict:
+    """Run a unified search, mapping a bad cursor to 400"""
+    try:
+        return await service.search(**kwargs)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 # =============================================
 # Search Endpoints
 # =============================================
@@ -76,6 +100,7 @@ async def search(
     data: SearchRequest,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
@@ -96,7 +121,8 @@ async def search(
     """
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=data.query,
@@ -107,7 +133,8 @@ async def search(
         owner_id=data.owner_id,
         shared_with_me=data.shared_with_me,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -124,6 +151,7 @@ async def search_get(
     shared_with_me: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
@@ -144,7 +172,8 @@ async def search_get(
     apps_list = apps.split(",") if apps else None
     file_types_list = file_types.split(",") if file_types else None
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -155,7 +184,8 @@ async def search_get(
         owner_id=owner_id,
         shared_with_me=shared_with_me,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -204,6 +234,29 @@ async def get_recent_items(
     return items
 
 
+@router.post("/index/rebuild", response_model=IndexRebuildResponse)
+async def rebuild_search_index(
+    current_user: dict = Depends(require_tenant_admin()),
+    db = Depends(get_db)
+):
+    """
+    Rebuild the tenant's search index from source tables.
+
+    The index is normally kept current as items change; use this after
+    bulk imports or to backfill existing data.
+    """
+    tenant_id = current_user.get("tenant_id")
+    if not tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No workspace associated with this user"
+        )
+
+    indexed = await search_index_service.rebuild_tenant(db, UUID(str(tenant_id)))
+
+    return {"tenant_id": str(tenant_id), "indexed": indexed}
+
+
 # =============================================
 # Quick Search Endpoints (by app)
 # =============================================
@@ -215,13 +268,15 @@ async def search_mail(
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search mail only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -229,7 +284,8 @@ async def search_mail(
         date_from=date_from,
         date_to=date_to,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -245,6 +301,7 @@ async def search_drive(
     shared_with_me: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
@@ -253,7 +310,8 @@ async def search_drive(
 
     file_types_list = file_types.split(",") if file_types else None
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -264,7 +322,8 @@ async def search_drive(
         owner_id=owner_id,
         shared_with_me=shared_with_me,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -279,13 +338,15 @@ async def search_docs(
     shared_with_me: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search documents only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -295,7 +356,8 @@ async def search_docs(
         owner_id=owner_id,
         shared_with_me=shared_with_me,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -310,13 +372,15 @@ async def search_sheets(
     shared_with_me: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search spreadsheets only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -326,7 +390,8 @@ async def search_sheets(
         owner_id=owner_id,
         shared_with_me=shared_with_me,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -341,13 +406,15 @@ async def search_slides(
     shared_with_me: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search presentations only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -357,7 +424,8 @@ async def search_slides(
         owner_id=owner_id,
         shared_with_me=shared_with_me,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -371,13 +439,15 @@ async def search_forms(
     owner_id: Optional[UUID] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search forms only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -386,7 +456,8 @@ async def search_forms(
         date_to=date_to,
         owner_id=owner_id,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -399,13 +470,15 @@ async def search_meetings(
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search meetings only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -413,7 +486,8 @@ async def search_meetings(
         date_from=date_from,
         date_to=date_to,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -424,19 +498,22 @@ async def search_contacts(
     q: str = Query(..., min_length=1, max_length=500),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search contacts only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
         apps=["contacts"],
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -449,13 +526,15 @@ async def search_notes(
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search notes only"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -463,7 +542,8 @@ async def search_notes(
         date_from=date_from,
         date_to=date_to,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
@@ -476,13 +556,15 @@ async def search_sites(
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
     """Search sites and wiki pages"""
     service = SearchService(db)
 
-    results = await service.search(
+    results = await _run_search(
+        service,
         tenant_id=current_user["tenant_id"],
         user_id=current_user["user_id"],
         query=q,
@@ -490,7 +572,8 @@ async def search_sites(
         date_from=date_from,
         date_to=date_to,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
     return results
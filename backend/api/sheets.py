@@ -22,6 +22,8 @@ from core.database import get_db
 from core.security import get_current_user, require_tenant_admin, require_tenant_member
 from core.config import settings
 from services.spreadsheet_service import SpreadsheetService, SpreadsheetMode, get_spreadsheet_service
+from services.sheets_formula_engine import parse_cell_ref
+from services.sheets_service import apply_cell_edits
 import logging
 from uuid import UUID
 
@@ -205,6 +207,14 @@ class CellUpdate(BaseModel):
     formula: Optional[str] = None
     format: Optional[Dict[str, Any]] = None
 
+    @validator('cell_ref')
+    def validate_cell_ref(cls, v):
+        for part in v.split(':'):
+            cell = parse_cell_ref(part)
+            if cell is not None and cell[0] > settings.SHEETS_MAX_ROWS:
+                raise ValueError(f'Row is past the last row ({settings.SHEETS_MAX_ROWS})')
+        return v
+
 
 class BulkCellUpdate(BaseModel):
     worksheet_id: str
@@ -824,45 +834,35 @@ async def update_cells(
     if not sheet:
         raise HTTPException(status_code=404, detail="Spreadsheet not found or no edit permission")
 
-    # Get current worksheet data
-    result = await db.execute(text("""
-        SELECT data FROM workspace.worksheets
-        WHERE id = CAST(:worksheet_id AS uuid)
-        AND spreadsheet_id = CAST(:sheet_id AS uuid)
-    """), {"worksheet_id": worksheet_id, "sheet_id": sheet_id})
-
-    worksheet = result.fetchone()
-    if not worksheet:
-        raise HTTPException(status_code=404, detail="Worksheet not found")
-
-    current_data = worksheet.data or {"cells": {}, "row_heights": {}, "column_widths": {}, "merged_cells": []}
-
     # Apply updates
+    edits = {}
     for update in data.updates:
-        cell_data = {
+        edits[update.cell_ref.upper()] = {
             "value": update.value,
             "formula": update.formula,
             "format": update.format or {}
         }
-        current_data["cells"][update.cell_ref] = cell_data
 
-    # Save updated data
-    await db.execute(text("""
-        UPDATE workspace.worksheets
-        SET data = :data, updated_at = NOW()
-        WHERE id = CAST(:worksheet_id AS uuid)
-    """), {"worksheet_id": worksheet_id, "data": json.dumps(current_data)})
-
-    # Update spreadsheet timestamp
-    await db.execute(text("""
-        UPDATE workspace.spreadsheets SET updated_at = NOW() WHERE id = CAST(:id AS uuid)
-    """), {"id": sheet_id})
+    async def touch_spreadsheet():
+        # Update spreadsheet timestamp
+        await db.execute(text("""
+            UPDATE workspace.spreadsheets SET updated_at = NOW() WHERE id = CAST(:id AS uuid)
+        """), {"id": sheet_id})
 
-    await db.commit()
+    # Recalculate formulas downstream of the edited cells and save only the changed cells
+    applied = await apply_cell_edits(
+        db, sheet_id, worksheet_id, edits, cells_key="cells", before_commit=touch_spreadsheet
+    )
+    if applied is None:
+        raise HTTPException(status_code=404, detail="Worksheet not found")
+    recalculated, _ = applied
 
+    edited = {update.cell_ref.upper() for update in data.updates}
     return {
         "worksheet_id": worksheet_id,
         "cells_updated": len(data.updates),
+        "cells": {ref: value for ref, value in recalculated.items() if ref in edited},
+        "recalculated": {ref: value for ref, value in recalculated.items() if ref not in edited},
         "message": "Cells updated successfully"
     }
 
@@ -2,7 +2,7 @@
 Bheem Workspace - Videos API
 Manages video uploads, processing, and playback
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func, text
 from typing import Dict, Any, List, Optional
@@ -15,7 +15,8 @@ from core.database import get_db
 from core.security import get_current_user, require_tenant_member
 from core.config import settings
 from models.productivity_models import Video, VideoShare
-from services.nextcloud_service import nextcloud_service
+from services.nextcloud_service import nextcloud_service, upload_size, WebDAVUploadError
+from services.media_stream_service import stream_from_nextcloud
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/videos", tags=["Bheem Videos"])
@@ -235,10 +236,16 @@ async def upload_video(
     file: UploadFile = File(...),
     title: str = Form(...),
     description: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
     current_user: Dict[str, Any] = Depends(require_tenant_member()),
     db: AsyncSession = Depends(get_db),
 ):
-    """Upload a video file to Nextcloud and create video record"""
+    """
+    Upload a video file to Nextcloud and create video record.
+
+    The video is streamed to storage in chunks; resending a failed upload
+    with the same upload_id resumes it.
+    """
     # Use get_user_ids_with_tenant to ensure tenant and user records exist
     tenant_id, owner_id = await get_user_ids_with_tenant(current_user, db)
 
@@ -250,9 +257,8 @@ async def upload_video(
             detail=f"Invalid file type. Allowed types: MP4, WebM, MOV, AVI"
         )
 
-    # Read file content
-    content = await file.read()
-    file_size = len(content)
+    # The upload is streamed to storage below; the size comes from the spooled upload
+    file_size = upload_size(file)
 
     # Get file extension
     original_name = file.filename or "video.mp4"
@@ -301,22 +307,27 @@ async def upload_video(
 
         # Upload file to Nextcloud - store with video ID in admin's Videos folder
         file_path = f"{videos_folder}/{video.id}.{ext}"
-        logger.info(f"Uploading to path: {file_path}, size: {len(content)} bytes")
-
-        upload_success = await nextcloud_service.upload_file(
-            settings.NEXTCLOUD_ADMIN_USER,
-            settings.NEXTCLOUD_ADMIN_PASSWORD,
-            file_path,
-            content
-        )
-        logger.info(f"Upload result: {upload_success}")
-
-        if not upload_success:
+        logger.info(f"Uploading to path: {file_path}, size: {file_size} bytes")
+
+        try:
+            result = await nextcloud_service.upload_stream(
+                settings.NEXTCLOUD_ADMIN_USER,
+                settings.NEXTCLOUD_ADMIN_PASSWORD,
+                file_path,
+                file,
+                content_type=file.content_type,
+                upload_id=upload_id,
+                owner=f"{tenant_id}:{owner_id}"
+            )
+        except WebDAVUploadError as e:
             # If upload failed, mark video as error
+            logger.error(f"Video upload to storage failed: {e}")
             video.status = "error"
             video.error_message = "Failed to upload to storage"
             await db.commit()
             raise HTTPException(status_code=500, detail="Failed to upload video to storage")
+        video.file_size = result["size"]
+        logger.info(f"Upload result: {result}")
 
         # Create share link for playback
         logger.info(f"Creating share link for: {file_path}")
@@ -390,13 +401,11 @@ async def get_video(
 @router.get("/{video_id}/stream")
 async def stream_video(
     video_id: UUID,
+    request: Request,
     current_user: Dict[str, Any] = Depends(require_tenant_member()),
     db: AsyncSession = Depends(get_db),
 ):
-    """Stream video content from Nextcloud storage"""
-    from fastapi.responses import StreamingResponse
-    import httpx
-
+    """Stream video content from Nextcloud storage (supports Range requests for seeking)"""
     tenant_id, owner_id = get_user_ids(current_user)
 
     query = select(Video).where(
@@ -413,34 +422,27 @@ async def stream_video(
     if not video.file_path:
         raise HTTPException(status_code=404, detail="Video file not found")
 
-    # Download from Nextcloud and stream
+    # Determine content type
+    format_to_mime = {
+        "MP4": "video/mp4",
+        "WEBM": "video/webm",
+        "MOV": "video/quicktime",
+        "AVI": "video/x-msvideo",
+    }
+    content_type = format_to_mime.get(video.format or "MP4", "video/mp4")
+
+    # Relay from Nextcloud as it arrives
     try:
-        content = await nextcloud_service.download_file(
+        return await stream_from_nextcloud(
             settings.NEXTCLOUD_ADMIN_USER,
             settings.NEXTCLOUD_ADMIN_PASSWORD,
-            video.file_path
-        )
-
-        if not content:
-            raise HTTPException(status_code=404, detail="Video file not available")
-
-        # Determine content type
-        format_to_mime = {
-            "MP4": "video/mp4",
-            "WEBM": "video/webm",
-            "MOV": "video/quicktime",
-            "AVI": "video/x-msvideo",
-        }
-        content_type = format_to_mime.get(video.format or "MP4", "video/mp4")
-
-        return StreamingResponse(
-            iter([content]),
+            video.file_path,
+            request.headers,
             media_type=content_type,
-            headers={
-                "Content-Disposition": f'inline; filename="{video.title}.{(video.format or "mp4").lower()}"',
-                "Content-Length": str(len(content)),
-            }
+            filename=f"{video.title}.{(video.format or 'mp4').lower()}"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to stream video {video_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to stream video")
@@ -10,6 +10,7 @@ from pydantic import BaseModel
 from datetime import datetime
 
 from core.database import get_db
+from core.security import require_superadmin
 from services.workflow_service import WorkflowService
 
 router = APIRouter(prefix="/workflows", tags=["Workflows"])
@@ -164,6 +165,15 @@ async def get_available_actions():
     return {"actions": WorkflowService.get_available_actions()}
 
 
+@router.get("/engine/stats")
+async def get_engine_stats(
+    current_user: dict = Depends(require_superadmin())
+):
+    """Queue throughput and worker usage of this process's workflow engine (SuperAdmin only)"""
+    from services.workflow_engine import workflow_engine
+    return workflow_engine.get_stats()
+
+
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(
     workflow_id: UUID,
@@ -257,7 +267,7 @@ async def trigger_workflow(
     tenant_id: UUID = Query(...),
     db: AsyncSession = Depends(get_db)
 ):
-    """Manually trigger a workflow"""
+    """Manually trigger a workflow (the run is queued and executes in the background)"""
     service = WorkflowService(db)
     run = await service.trigger_workflow(
         workflow_id=workflow_id,
@@ -380,7 +390,7 @@ async def process_trigger_event(
     tenant_id: UUID = Query(...),
     db: AsyncSession = Depends(get_db)
 ):
-    """Process a trigger event and execute matching workflows"""
+    """Process a trigger event and queue runs of matching workflows"""
     service = WorkflowService(db)
     runs = await service.process_trigger_event(
         tenant_id=tenant_id,
@@ -12,6 +12,13 @@ class Settings(BaseSettings):
     # Bheem Passport (Centralized Authentication)
     BHEEM_PASSPORT_URL: str = "https://platform.bheem.co.uk"
     USE_PASSPORT_AUTH: bool = True  # Set to False to use local auth
+    PASSPORT_TOKEN_CACHE_SIZE: int = 10000  # Passport-verified tokens kept per worker
+    PASSPORT_TOKEN_CACHE_TTL_SECONDS: int = 300  # Re-verify with Passport after this (or at token exp, if sooner)
+    PASSPORT_TOKEN_NEGATIVE_TTL_SECONDS: int = 30  # Remember rejected tokens this long
+    TOKEN_REVOCATION_SHARED: bool = True  # Share logout revocations across workers through REDIS_URL
+    TENANT_ROLE_CACHE_SIZE: int = 10000  # Tenant memberships kept per worker
+    TENANT_ROLE_CACHE_TTL_SECONDS: int = 30  # Bounds how long other workers see a stale role/suspension
+    TENANT_ROLE_NEGATIVE_TTL_SECONDS: int = 5  # Remember "not a member" this long
 
     # JWT Configuration (MUST match Bheem Passport settings for SSO)
     # This should be identical to Bheem Platform's SECRET_KEY for token validation
@@ -95,6 +102,17 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/1"
     MAIL_ENCRYPTION_KEY: Optional[str] = None  # Fernet key for encrypting mail credentials
     MAIL_SESSION_TTL_HOURS: int = 24
+
+    # IMAP connection pool (per mail session)
+    MAIL_IMAP_POOL_SIZE_PER_USER: int = 3  # Concurrent IMAP connections per mailbox
+    MAIL_IMAP_POOL_IDLE_SECONDS: int = 300  # Close pooled connections idle longer than this
+    MAIL_IMAP_POOL_WORKERS: int = 32  # Threads running blocking IMAP I/O
+    # Realtime IMAP IDLE watchers (one socket each, no threads; thousands per worker)
+    MAIL_IDLE_MAX_WATCHERS: int = 5000
+    MAIL_IDLE_CONNECT_CONCURRENCY: int = 50  # Simultaneous logins when watchers (re)connect
+    MAIL_IDLE_REFRESH_SECONDS: int = 1500  # Re-issue IDLE before the 29 minute server timeout
+    MAIL_IDLE_POLL_SECONDS: int = 60  # NOOP interval for servers without IDLE
+
     UNDO_SEND_DELAY_SECONDS: int = 30
 
     # ============================================
@@ -157,6 +175,13 @@ class Settings(BaseSettings):
     # Collaboration
     DOCS_COLLAB_WEBSOCKET_URL: str = "wss://workspace.bheem.cloud/docs/collab"
     DOCS_AUTO_SAVE_INTERVAL_MS: int = 3000  # 3 seconds
+    DOCS_COLLAB_BACKPLANE: str = "memory"  # "memory" (single worker) or "redis" (uses REDIS_URL) to share rooms across workers
+
+    # Export rendering (PDF/DOCX run in a process pool per API worker)
+    DOCS_EXPORT_WORKERS: int = 2  # Render processes
+    DOCS_EXPORT_MAX_QUEUE: int = 16  # Renders allowed to wait for a process before new ones are rejected
+    DOCS_EXPORT_TENANT_CONCURRENCY: int = 1  # Renders one tenant may run at once
+    DOCS_EXPORT_CACHE_MB: int = 64  # Rendered exports kept in memory, keyed by content hash
 
     # AI Features
     DOCS_AI_ENABLED: bool = True
@@ -186,6 +211,99 @@ class Settings(BaseSettings):
     # Generate with: python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
     ENCRYPTION_KEY: str = "your-fernet-encryption-key-here"
 
+    # ============================================
+    # UNIFIED SEARCH
+    # ============================================
+    SEARCH_APP_TIMEOUT_SECONDS: float = 2.0  # Per-app budget before results are returned as partial
+
+    # ============================================
+    # DATA LOSS PREVENTION
+    # ============================================
+    DLP_RULE_CACHE_TTL_SECONDS: int = 60  # Compiled rule sets are reloaded after this (rule edits on this worker apply at once)
+
+    # ============================================
+    # AUDIT LOGGING (batched, write-behind)
+    # ============================================
+    AUDIT_QUEUE_MAX_EVENTS: int = 10000  # Events buffered per sink before callers wait / events spill to disk
+    AUDIT_FLUSH_BATCH_SIZE: int = 500  # Rows per bulk INSERT (a full batch triggers a flush)
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0  # Flush at least this often
+    AUDIT_SPILL_DIR: str = "/tmp/bheem-audit-spill"  # Events the database could not take; replayed automatically
+
+    # ============================================
+    # WORKFLOW ENGINE (background run queue)
+    # ============================================
+    WORKFLOW_WORKERS: int = 16  # Runs executed concurrently per process
+    WORKFLOW_TENANT_CONCURRENCY: int = 4  # Running runs per tenant across all workers
+    WORKFLOW_CONCURRENCY_PER_WORKFLOW: int = 2  # Running runs per workflow across all workers
+    WORKFLOW_MAX_ATTEMPTS: int = 3  # A failing step is retried until the run has failed this often
+    WORKFLOW_RETRY_BASE_SECONDS: float = 10.0  # First retry delay; doubles per attempt
+    WORKFLOW_RETRY_MAX_SECONDS: float = 900.0
+    WORKFLOW_POLL_INTERVAL_SECONDS: float = 1.0  # How often idle workers look for due runs (new runs wake them at once)
+    WORKFLOW_STEP_TIMEOUT_SECONDS: float = 60.0  # A single action taking longer fails (and is retried)
+    WORKFLOW_LEASE_SECONDS: int = 300  # Runs held longer than this by a silent worker are picked up again
+
+    # ============================================
+    # DOCS SEMANTIC SEARCH (chunk embeddings)
+    # ============================================
+    DOCS_EMBEDDING_PROVIDER: str = "auto"  # auto (openai when OPENAI_API_KEY is set), openai, hashing (local, deterministic), none
+    DOCS_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    DOCS_EMBEDDING_DIMENSIONS: int = 512  # Stored as float32, 2 KB per chunk
+    DOCS_EMBEDDING_CHUNK_CHARS: int = 2000
+    DOCS_EMBEDDING_MAX_CHUNKS: int = 32  # Text beyond this many chunks is not embedded
+    DOCS_VECTOR_INDEX_MAX_TENANTS: int = 64  # Tenant indexes kept in memory per worker
+
+    # ============================================
+    # MEDIA STREAMING
+    # ============================================
+    MEDIA_STREAM_CHUNK_KB: int = 256  # Bytes buffered per video/recording stream at a time
+
+    # ============================================
+    # STREAMING UPLOADS
+    # ============================================
+    NEXTCLOUD_CHUNKED_UPLOAD_THRESHOLD_MB: int = 32  # Larger uploads use Nextcloud chunked upload v2
+    NEXTCLOUD_UPLOAD_CHUNK_MB: int = 10  # Chunk size for chunked uploads (Nextcloud minimum is 5)
+    NEXTCLOUD_UPLOAD_PARALLELISM: int = 4  # Chunk PUTs in flight per upload
+
+    # ============================================
+    # NEXTCLOUD HTTP CLIENT
+    # ============================================
+    NEXTCLOUD_HTTP_MAX_CONNECTIONS: int = 50  # Per Nextcloud host, per worker
+    NEXTCLOUD_HTTP_MAX_KEEPALIVE: int = 20
+    NEXTCLOUD_HTTP_KEEPALIVE_SECONDS: float = 60.0
+    NEXTCLOUD_HTTP_TIMEOUT_SECONDS: float = 30.0
+    NEXTCLOUD_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    NEXTCLOUD_HTTP_RETRIES: int = 2  # Extra attempts for idempotent requests
+    NEXTCLOUD_HTTP_RETRY_BASE_SECONDS: float = 0.2
+    NEXTCLOUD_HTTP_RETRY_MAX_SECONDS: float = 2.0
+    NEXTCLOUD_HTTP2: bool = False  # Requires the h2 package (httpx[http2])
+    NEXTCLOUD_HTTP_STREAM_MAX_CONNECTIONS: int = 100  # Streaming downloads, kept apart from the shared pool
+
+    # ============================================
+    # SHEETS FORMULA ENGINE
+    # ============================================
+    SHEETS_ENGINE_CACHE_SIZE: int = 32  # Worksheet dependency graphs kept in memory per worker
+    SHEETS_DENSE_ROW_LIMIT: int = 65536  # Rows per column held in the dense numeric array; later rows stay sparse
+    SHEETS_MAX_ROWS: int = 1048576  # Highest row a cell edit may address
+
+    # ============================================
+    # ADMIN PERMISSION RESOLVER
+    # ============================================
+    PERMISSION_CACHE_SIZE: int = 10000  # Compiled per-user admin grants kept per worker
+    PERMISSION_CACHE_TTL_SECONDS: int = 60  # Bounds how long other workers see stale role/assignment changes
+
+    # ============================================
+    # AVAILABILITY ENGINE
+    # ============================================
+    AVAILABILITY_CACHE_SIZE: int = 20000  # Cached (host/resource, day) busy lists per worker
+    AVAILABILITY_CACHE_TTL_SECONDS: int = 30  # Bounds staleness for bookings made on other workers
+
+    # ============================================
+    # CALDAV EVENT CACHE
+    # ============================================
+    CALDAV_CACHE_SIZE: int = 5000  # Cached (user, calendar) collections per worker
+    CALDAV_CACHE_FRESH_SECONDS: int = 30  # Serve without a sync-collection round trip for this long
+    CALDAV_MULTIGET_BATCH: int = 100  # Hrefs per calendar-multiget REPORT
+
     class Config:
         env_file = ".env"
         case_sensitive = True
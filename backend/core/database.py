@@ -4,6 +4,7 @@ Bheem Workspace - Database Connection (ERP)
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import text
+from sqlalchemy.engine import URL
 from .config import settings
 
 # Create async engine for ERP database
@@ -56,6 +57,42 @@ async def test_connection():
 async_session_maker = AsyncSessionLocal
 
 
+def _erp_database_url():
+    """ERP database URL for asyncpg, from ERP_DATABASE_URL or the ERP_DB_* settings"""
+    if settings.ERP_DATABASE_URL:
+        url = settings.ERP_DATABASE_URL
+        for prefix in ("postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                url = "postgresql+asyncpg://" + url[len(prefix):]
+        return url
+    return URL.create(
+        "postgresql+asyncpg",
+        username=settings.ERP_DB_USER,
+        password=settings.ERP_DB_PASSWORD,
+        host=settings.ERP_DB_HOST,
+        port=settings.ERP_DB_PORT,
+        database=settings.ERP_DB_NAME
+    )
+
+
+# Async engine for the ERP database (dms.* and the ERP-side workspace.docs_* tables)
+erp_engine = create_async_engine(
+    _erp_database_url(),
+    echo=False,
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True
+)
+
+ERPSessionLocal = async_sessionmaker(
+    erp_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
+
 def get_db_connection():
     """
     Get a synchronous database connection using psycopg2.
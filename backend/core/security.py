@@ -2,17 +2,25 @@
 Bheem Workspace - Security & JWT Authentication
 Supports Bheem Passport token validation with local fallback
 """
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import event, text
 from .config import settings
-from .database import get_db
+from .database import engine, get_db
 import httpx
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -69,6 +77,73 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+# ═══════════════════════════════════════════════════════════════════
+# BHEEM PASSPORT VERIFICATION
+# One pooled HTTP client for all Passport calls, plus a per-worker cache of
+# verification results so a Passport-issued token costs one round trip per
+# TTL instead of one (or two) per request.
+# ═══════════════════════════════════════════════════════════════════
+
+class PassportUnavailable(Exception):
+    """Passport could not give an answer (network error, 5xx); never cached"""
+
+
+_passport_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_passport_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for Bheem Passport"""
+    global _passport_http_client
+    if _passport_http_client is None or _passport_http_client.is_closed:
+        _passport_http_client = httpx.AsyncClient(
+            base_url=settings.BHEEM_PASSPORT_URL,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+        )
+    return _passport_http_client
+
+
+async def close_passport_http_client():
+    """Close the shared Passport client (application shutdown)"""
+    global _passport_http_client
+    if _passport_http_client is not None:
+        await _passport_http_client.aclose()
+        _passport_http_client = None
+
+
+async def _passport_validate(token: str) -> Optional[Dict[str, Any]]:
+    """Claims for a valid token, None if Passport rejects it"""
+    try:
+        response = await get_passport_http_client().post("/api/v1/auth/validate", json={"token": token})
+    except httpx.HTTPError as e:
+        raise PassportUnavailable(f"validate: {e}") from e
+    if response.status_code >= 500:
+        raise PassportUnavailable(f"validate: HTTP {response.status_code}")
+
+    if response.status_code == 200:
+        result = response.json()
+        if result.get("valid"):
+            return result.get("payload")
+    return None
+
+
+async def _passport_me(token: str) -> Optional[Dict[str, Any]]:
+    """User info for a valid token, None if Passport rejects it"""
+    try:
+        response = await get_passport_http_client().get(
+            "/api/v1/auth/me",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    except httpx.HTTPError as e:
+        raise PassportUnavailable(f"me: {e}") from e
+    if response.status_code >= 500:
+        raise PassportUnavailable(f"me: HTTP {response.status_code}")
+
+    if response.status_code == 200:
+        return response.json()
+    return None
+
+
 async def validate_token_via_passport(token: str) -> Optional[Dict[str, Any]]:
     """
     Validate token via Bheem Passport service
@@ -77,19 +152,7 @@ async def validate_token_via_passport(token: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{settings.BHEEM_PASSPORT_URL}/api/v1/auth/validate",
-                json={"token": token}
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("valid"):
-                    return result.get("payload")
-
-            return None
-
+        return await _passport_validate(token)
     except Exception as e:
         print(f"[Security] Passport validation error: {e}")
         return None
@@ -103,20 +166,348 @@ async def get_user_from_passport(token: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{settings.BHEEM_PASSPORT_URL}/api/v1/auth/me",
-                headers={"Authorization": f"Bearer {token}"}
+        return await _passport_me(token)
+    except Exception as e:
+        print(f"[Security] Passport get user error: {e}")
+        return None
+
+
+def _passport_user(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Current-user dict from Passport claims or /me info"""
+    user_id = claims.get("user_id") or claims.get("sub")
+    # Use email if available, otherwise fallback to username (which is often the email)
+    email = claims.get("email") or claims.get("username")
+    return {
+        "id": user_id,
+        "user_id": user_id,
+        "username": claims.get("username"),
+        "email": email,
+        "role": claims.get("role"),
+        "company_id": claims.get("company_id"),
+        "company_code": claims.get("company_code"),
+        "companies": claims.get("companies", []),
+        "person_id": claims.get("person_id")
+    }
+
+
+async def _verify_via_passport(token: str) -> Optional[Tuple[Dict[str, Any], Optional[float]]]:
+    """
+    /validate, then /me as fallback.
+
+    Returns the user and the token's exp claim, None when Passport rejects
+    the token, and raises PassportUnavailable when it could not tell.
+    """
+    unavailable = None
+    try:
+        claims = await _passport_validate(token)
+        if claims is not None:
+            return _passport_user(claims), claims.get("exp")
+    except PassportUnavailable as e:
+        unavailable = e
+
+    user_info = await _passport_me(token)
+    if user_info is not None:
+        return _passport_user(user_info), user_info.get("exp")
+    if unavailable:
+        raise unavailable
+    return None
+
+
+def _unverified_exp(token: str) -> Optional[float]:
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+        return float(exp) if exp is not None else None
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+class SharedRevocations:
+    """
+    Revoked token hashes shared through Redis, so a logout on one worker is
+    refused by all.
+
+    Revocations are stored as keys that expire with their token and published
+    on a channel. Each worker follows the channel in the background and keeps
+    a local copy, so checking a token never waits on Redis; on (re)connect the
+    stored keys are read once to pick up revocations made in the meantime. If
+    Redis is unreachable the listener retries every retry_seconds and
+    revocation falls back to the local worker.
+    """
+
+    PREFIX = "auth:revoked:"
+    CHANNEL = "auth:revocations"
+
+    def __init__(self, redis_url: str, retry_seconds: float = 30.0, timeout: float = 0.5):
+        self.redis_url = redis_url
+        self.retry_seconds = retry_seconds
+        self.timeout = timeout
+        self._redis = None
+        self._subscriber = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(
+                self.redis_url, decode_responses=True,
+                socket_connect_timeout=self.timeout, socket_timeout=self.timeout
+            )
+        return self._redis
+
+    def _subscriber_client(self):
+        # No read timeout: the subscription sits idle between revocations
+        if self._subscriber is None:
+            import redis.asyncio as redis
+            self._subscriber = redis.from_url(
+                self.redis_url, decode_responses=True,
+                socket_connect_timeout=self.timeout, health_check_interval=self.retry_seconds
             )
+        return self._subscriber
+
+    async def add(self, key: str, until: float):
+        ttl = int(until - time.time()) + 1
+        if ttl <= 0:
+            return
+        try:
+            client = self._client()
+            await client.set(self.PREFIX + key, 1, ex=ttl)
+            await client.publish(self.CHANNEL, key)
+        except Exception as e:
+            logger.warning(f"Could not share token revocation: {e}")
+
+    def follow(self, on_revoked: Callable[[str, float], None]):
+        """Start feeding revocations from every worker to on_revoked(key, until); idempotent"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen(on_revoked))
+
+    async def _listen(self, on_revoked: Callable[[str, float], None]):
+        while True:
+            pubsub = None
+            try:
+                client = self._subscriber_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.CHANNEL)
+                # Revocations made before this subscription
+                async for name in client.scan_iter(match=self.PREFIX + "*", count=500):
+                    await self._load(client, name[len(self.PREFIX):], on_revoked)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._load(client, message["data"], on_revoked)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Shared token revocations unavailable, retrying in {self.retry_seconds}s: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+            await asyncio.sleep(self.retry_seconds)
+
+    async def _load(self, client, key: str, on_revoked: Callable[[str, float], None]):
+        ttl = await client.ttl(self.PREFIX + key)
+        if ttl > 0:
+            on_revoked(key, time.time() + ttl)
+
+    async def close(self):
+        """Stop following revocations (application shutdown)"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        for client in (self._subscriber, self._redis):
+            if client is not None:
+                await client.close()
+        self._subscriber = self._redis = None
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of Passport verification results, keyed by token hash.
 
-            if response.status_code == 200:
-                return response.json()
+    - Positive entries live for ttl_seconds, never past the token's exp
+    - Rejected tokens are remembered for negative_ttl_seconds
+    - Concurrent lookups of the same uncached token share one verification
+    - Revoked tokens are refused until they expire, by every worker when
+      revocations are shared
+    """
 
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        revocations: Optional[SharedRevocations] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.revocations = revocations
+        self._entries: "OrderedDict[str, Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0, "verifications": 0}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def resolve(
+        self,
+        token: str,
+        verify: Callable[[str], Awaitable[Optional[Tuple[Dict[str, Any], Optional[float]]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Cached user for the token, verifying it (once across concurrent callers) on a miss"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            user, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits" if user is not None else "negative_hits"] += 1
+                return user
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(self._verify_and_store(key, token, verify))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded so one caller's cancellation does not fail the others
+        return await asyncio.shield(task)
+
+    async def _verify_and_store(self, key: str, token: str, verify) -> Optional[Dict[str, Any]]:
+        self.stats["verifications"] += 1
+        try:
+            result = await verify(token)
+        except PassportUnavailable as e:
+            logger.warning(f"Passport unavailable: {e}")
             return None
 
-    except Exception as e:
-        print(f"[Security] Passport get user error: {e}")
+        if result is None:
+            self._store(key, None, self.negative_ttl_seconds)
+            return None
+
+        user, exp = result
+        exp = exp if exp is not None else _unverified_exp(token)
+        ttl = self.ttl_seconds
+        if exp is not None:
+            ttl = min(ttl, float(exp) - time.time())
+        if ttl > 0:
+            self._store(key, user, ttl)
+        return user
+
+    def _finish(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller went away
+
+    def _store(self, key: str, user: Optional[Dict[str, Any]], ttl: float):
+        if key in self._revoked:
+            user = None
+        self._entries[key] = (user, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def is_revoked(self, token: str) -> bool:
+        if not self._revoked:
+            return False
+        key = self._key(token)
+        until = self._revoked.get(key)
+        if until is None:
+            return False
+        if until <= time.time():
+            del self._revoked[key]
+            return False
+        return True
+
+    async def is_revoked_anywhere(self, token: str) -> bool:
+        """is_revoked, also covering revocations made by other workers (pushed in the background)"""
+        if self.revocations is not None:
+            self.revocations.follow(self._revoked_elsewhere)
+        return self.is_revoked(token)
+
+    def _revoked_elsewhere(self, key: str, until: float):
+        self._revoked[key] = max(until, self._revoked.get(key, 0.0))
+        self._entries.pop(key, None)
+        self._prune_revoked()
+
+    def revoke(self, token: str) -> float:
+        """Refuse this token in this worker from now until it expires; returns that time"""
+        key = self._key(token)
+        exp = _unverified_exp(token)
+        until = self._revoked[key] = exp if exp is not None else time.time() + self.ttl_seconds
+        self._entries.pop(key, None)
+        self._prune_revoked()
+        return until
+
+    def _prune_revoked(self):
+        """Drop revocations that have expired on their own"""
+        now = time.time()
+        for revoked_key in [k for k, until in self._revoked.items() if until <= now]:
+            del self._revoked[revoked_key]
+
+    async def revoke_everywhere(self, token: str):
+        """Refuse this token in every worker until it expires (logout)"""
+        until = self.revoke(token)
+        if self.revocations is not None:
+            await self.revocations.add(self._key(token), until)
+
+    def invalidate_user(self, user_id: str):
+        """Forget cached verifications for a user (role or account changes)"""
+        for key in [k for k, (user, _) in self._entries.items() if user and user.get("id") == user_id]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "revoked": len(self._revoked)}
+
+
+passport_token_cache = VerifiedTokenCache(
+    max_entries=settings.PASSPORT_TOKEN_CACHE_SIZE,
+    ttl_seconds=settings.PASSPORT_TOKEN_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.PASSPORT_TOKEN_NEGATIVE_TTL_SECONDS,
+    revocations=SharedRevocations(settings.REDIS_URL) if settings.TOKEN_REVOCATION_SHARED else None
+)
+
+
+async def verify_passport_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Current-user dict for a Passport-issued token, served from the
+    verification cache when possible. Returns None if the token is invalid.
+    """
+    if not settings.USE_PASSPORT_AUTH:
         return None
+    user = await passport_token_cache.resolve(token, _verify_via_passport)
+    # Callers add tenant info to the dict; keep the cached copy clean
+    return dict(user) if user is not None else None
+
+
+async def revoke_token(token: str):
+    """Revocation hook: reject this token in every worker until it expires"""
+    await passport_token_cache.revoke_everywhere(token)
+
+
+async def close_token_revocations():
+    """Stop following shared revocations (application shutdown)"""
+    if passport_token_cache.revocations is not None:
+        await passport_token_cache.revocations.close()
+
+
+async def is_token_revoked(token: str) -> bool:
+    """Whether the token was revoked on any worker; checked before trusting a decoded token"""
+    return await passport_token_cache.is_revoked_anywhere(token)
 
 
 async def get_current_user(
@@ -135,6 +526,9 @@ async def get_current_user(
 
     token = credentials.credentials
 
+    if await is_token_revoked(token):
+        raise credentials_exception
+
     # Step 1: Try local decode first (faster)
     payload = decode_token(token)
 
@@ -155,44 +549,12 @@ async def get_current_user(
                 "person_id": payload.get("person_id")
             }
 
-    # Step 2: Try Bheem Passport validation (for tokens issued by Passport)
+    # Step 2: Try Bheem Passport validation (for tokens issued by Passport),
+    # with /me as fallback; cached per token
     if settings.USE_PASSPORT_AUTH:
-        passport_payload = await validate_token_via_passport(token)
-
-        if passport_payload is not None:
-            user_id = passport_payload.get("user_id") or passport_payload.get("sub")
-            # Use email if available, otherwise fallback to username (which is often the email)
-            email = passport_payload.get("email") or passport_payload.get("username")
-            return {
-                "id": user_id,
-                "user_id": user_id,
-                "username": passport_payload.get("username"),
-                "email": email,
-                "role": passport_payload.get("role"),
-                "company_id": passport_payload.get("company_id"),
-                "company_code": passport_payload.get("company_code"),
-                "companies": passport_payload.get("companies", []),
-                "person_id": passport_payload.get("person_id")
-            }
-
-        # Step 3: Try /me endpoint as fallback
-        user_info = await get_user_from_passport(token)
-
-        if user_info is not None:
-            user_id = user_info.get("user_id") or user_info.get("sub")
-            # Use email if available, otherwise fallback to username (which is often the email)
-            email = user_info.get("email") or user_info.get("username")
-            return {
-                "id": user_id,
-                "user_id": user_id,
-                "username": user_info.get("username"),
-                "email": email,
-                "role": user_info.get("role"),
-                "company_id": user_info.get("company_id"),
-                "company_code": user_info.get("company_code"),
-                "companies": user_info.get("companies", []),
-                "person_id": user_info.get("person_id")
-            }
+        user = await verify_passport_token(token)
+        if user is not None:
+            return user
 
     # All validation methods failed
     raise credentials_exception
@@ -363,16 +725,16 @@ ROLE_PERMISSIONS = {
 }
 
 
+# Role grants as sets, built once instead of scanning lists on every check
+_ROLE_PERMISSION_SETS = {role: frozenset(perms) for role, perms in ROLE_PERMISSIONS.items()}
+
+
 def has_permission(user: Dict[str, Any], permission: str) -> bool:
     """Check if user has a specific permission"""
-    role = user.get("role", "Member")
-    role_perms = ROLE_PERMISSIONS.get(role, ROLE_PERMISSIONS["Member"])
+    role_perms = _ROLE_PERMISSION_SETS.get(user.get("role", "Member"), _ROLE_PERMISSION_SETS["Member"])
 
     # SuperAdmin has all permissions
-    if "*" in role_perms:
-        return True
-
-    return permission in role_perms
+    return "*" in role_perms or permission in role_perms
 
 
 def require_permission(permission: str):
@@ -510,11 +872,139 @@ def require_internal_admin_or_superadmin():
     return internal_admin_checker
 
 
+# ═══════════════════════════════════════════════════════════════════
+# TENANT MEMBERSHIP CACHE
+# get_user_tenant_role() runs on nearly every request. Results are memoized
+# per request (on the request's db session) and cached per worker for a short
+# TTL. Any write to tenant_users/tenants through this worker's engine drops
+# the worker cache; other workers catch up within the TTL.
+# ═══════════════════════════════════════════════════════════════════
+
+_TENANT_MEMBERSHIP_WRITE = re.compile(
+    r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(?:\"?workspace\"?\.)?\"?(?:tenant_users|tenants)\"?\b",
+    re.IGNORECASE
+)
+
+_REQUEST_MEMO_KEY = "tenant_role_memo"
+
+
+class TenantRoleCache:
+    """
+    Bounded LRU of tenant membership lookups, keyed by (user_id, email).
+
+    - Memberships live for ttl_seconds, "not a member" for negative_ttl_seconds
+    - invalidate() bumps a generation so lookups already in flight when a
+      write lands are not stored
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self.stats = {"hits": 0, "negative_hits": 0, "request_hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(user_id: str, email: Optional[str]) -> Tuple[str, str]:
+        return str(user_id), (email or "").lower()
+
+    def get(self, key: Tuple[str, str]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(found, tenant_info) for a cached lookup"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            info, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits" if info is not None else "negative_hits"] += 1
+                return True, info
+            del self._entries[key]
+        self.stats["misses"] += 1
+        return False, None
+
+    def store(self, key: Tuple[str, str], info: Optional[Dict[str, Any]], generation: int):
+        if generation != self.generation:
+            return
+        ttl = self.ttl_seconds if info is not None else self.negative_ttl_seconds
+        if ttl <= 0:
+            return
+        self._entries[key] = (info, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str] = None, tenant_id: Optional[str] = None):
+        """Drop entries for a user or tenant, or everything if neither is given"""
+        self.generation += 1
+        self.stats["invalidations"] += 1
+        if user_id is None and tenant_id is None:
+            self._entries.clear()
+            return
+        for key in [
+            k for k, (info, _) in self._entries.items()
+            if (user_id is not None and k[0] == str(user_id))
+            or (tenant_id is not None and info is not None and info["tenant_id"] == str(tenant_id))
+        ]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["request_hits"] + self.stats["misses"]
+        hit_rate = (lookups - self.stats["misses"]) / lookups if lookups else 0.0
+        return {**self.stats, "entries": len(self._entries), "hit_rate": round(hit_rate, 4)}
+
+
+tenant_role_cache = TenantRoleCache(
+    max_entries=settings.TENANT_ROLE_CACHE_SIZE,
+    ttl_seconds=settings.TENANT_ROLE_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.TENANT_ROLE_NEGATIVE_TTL_SECONDS
+)
+
+
+def invalidate_tenant_role_cache(user_id: Optional[str] = None, tenant_id: Optional[str] = None):
+    """Forget cached tenant memberships (all of them if no filter is given)"""
+    tenant_role_cache.invalidate(user_id=user_id, tenant_id=tenant_id)
+
+
+def get_auth_cache_stats() -> Dict[str, Any]:
+    """Counters of the per-worker authentication caches"""
+    return {
+        "passport_tokens": passport_token_cache.get_stats(),
+        "tenant_roles": tenant_role_cache.get_stats()
+    }
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _watch_tenant_membership_writes(conn, cursor, statement, parameters, context, executemany):
+    if _TENANT_MEMBERSHIP_WRITE.match(statement):
+        conn.info["tenant_membership_written"] = True
+        # Same-transaction reads must not see the pre-write memo either
+        tenant_role_cache.invalidate()
+
+
+@event.listens_for(engine.sync_engine, "commit")
+@event.listens_for(engine.sync_engine, "rollback")
+def _invalidate_after_tenant_membership_write(conn):
+    if conn.info.pop("tenant_membership_written", False):
+        # Again at transaction end: lookups made mid-transaction may hold uncommitted state
+        tenant_role_cache.invalidate()
+
+
+def _request_memo(db: AsyncSession) -> Optional[Dict[Tuple[str, str], Tuple[int, Optional[Dict[str, Any]]]]]:
+    # get_db is cached per request by FastAPI, so the session is request-scoped
+    info = getattr(db, "info", None)
+    if not isinstance(info, dict):
+        return None
+    return info.setdefault(_REQUEST_MEMO_KEY, {})
+
+
 async def get_user_tenant_role(user_id: str, db: AsyncSession, email: str = None) -> Optional[Dict[str, Any]]:
     """
     Get user's tenant role and tenant_id from tenant_users table.
     This is separate from JWT role - it's the workspace-specific role.
 
+    Lookups are memoized for the request and cached per worker
+    (see TENANT MEMBERSHIP CACHE above).
+
     Args:
         user_id: User ID from JWT
         db: Database session
@@ -523,6 +1013,27 @@ async def get_user_tenant_role(user_id: str, db: AsyncSession, email: str = None
     Returns:
         Dict with tenant_id and role, or None if not found
     """
+    key = TenantRoleCache.key(user_id, email)
+    memo = _request_memo(db)
+    if memo is not None and key in memo:
+        generation, info = memo[key]
+        if generation == tenant_role_cache.generation:
+            tenant_role_cache.stats["request_hits"] += 1
+            return dict(info) if info is not None else None
+
+    found, info = tenant_role_cache.get(key)
+    if not found:
+        generation = tenant_role_cache.generation
+        info = await _query_user_tenant_role(user_id, db, email)
+        tenant_role_cache.store(key, info, generation)
+
+    if memo is not None:
+        memo[key] = (tenant_role_cache.generation, info)
+    # Callers copy fields out of the dict; keep the cached copy clean
+    return dict(info) if info is not None else None
+
+
+async def _query_user_tenant_role(user_id: str, db: AsyncSession, email: str = None) -> Optional[Dict[str, Any]]:
     # First try to find by user_id
     query = text("""
         SELECT
@@ -61,8 +61,32 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Could not initialize calendar reminder scheduler: {e}", action="calendar_reminder_failed")
 
+    # Register incremental search index hooks
+    try:
+        from services.search_index_service import search_index_service
+        search_index_service.initialize()
+        logger.info("Search index hooks registered", action="search_index_started")
+    except Exception as e:
+        logger.warning(f"Could not register search index hooks: {e}", action="search_index_failed")
+
+    # Start background workflow workers
+    try:
+        from services.workflow_engine import workflow_engine
+        workflow_engine.start()
+        logger.info("Workflow engine started", action="workflow_engine_started")
+    except Exception as e:
+        logger.warning(f"Could not start workflow engine: {e}", action="workflow_engine_failed")
+
     yield
 
+    # Stop workflow workers (interrupted runs go back to the queue)
+    try:
+        from services.workflow_engine import workflow_engine
+        await workflow_engine.stop()
+        logger.info("Workflow engine stopped", action="workflow_engine_stopped")
+    except Exception as e:
+        logger.warning(f"Error stopping workflow engine: {e}", action="workflow_engine_shutdown_error")
+
     # Shutdown email scheduler
     try:
         from services.email_scheduler_service import email_scheduler_service
@@ -79,6 +103,72 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Error shutting down calendar reminder scheduler: {e}", action="calendar_reminder_shutdown_error")
 
+    # Stop IMAP IDLE watchers
+    try:
+        from services.imap_idle_service import imap_idle_pool
+        await imap_idle_pool.shutdown()
+        logger.info("IMAP IDLE watchers stopped", action="imap_idle_stopped")
+    except Exception as e:
+        logger.warning(f"Error stopping IMAP IDLE watchers: {e}", action="imap_idle_shutdown_error")
+
+    # Close pooled IMAP connections
+    try:
+        from services.imap_pool_service import imap_pool
+        await imap_pool.shutdown()
+        logger.info("IMAP connection pool closed", action="imap_pool_stopped")
+    except Exception as e:
+        logger.warning(f"Error closing IMAP connection pool: {e}", action="imap_pool_shutdown_error")
+
+    # Flush buffered docs presence and autosaves
+    try:
+        from services.docs_collaboration_service import get_docs_collaboration_service
+        await get_docs_collaboration_service().shutdown()
+        logger.info("Docs collaboration writes flushed", action="docs_collab_stopped")
+    except Exception as e:
+        logger.warning(f"Error flushing docs collaboration writes: {e}", action="docs_collab_shutdown_error")
+
+    # Close the shared Passport HTTP client
+    try:
+        from core.security import close_passport_http_client
+        await close_passport_http_client()
+    except Exception as e:
+        logger.warning(f"Error closing Passport client: {e}", action="passport_client_shutdown_error")
+
+    # Stop following shared token revocations
+    try:
+        from core.security import close_token_revocations
+        await close_token_revocations()
+    except Exception as e:
+        logger.warning(f"Error closing token revocations: {e}", action="token_revocations_shutdown_error")
+
+    # Close pooled Nextcloud connections
+    try:
+        from services.nextcloud_client import close_nextcloud_clients
+        await close_nextcloud_clients()
+    except Exception as e:
+        logger.warning(f"Error closing Nextcloud connections: {e}", action="nextcloud_client_shutdown_error")
+
+    # Write out buffered audit events (spilled to disk if the database is unavailable)
+    try:
+        from services.audit_sink import close_audit_sinks
+        await close_audit_sinks()
+    except Exception as e:
+        logger.warning(f"Error flushing audit events: {e}", action="audit_sink_shutdown_error")
+
+    # Finish background document indexing
+    try:
+        from services.docs_vector_index import close_docs_vector_store
+        await close_docs_vector_store()
+    except Exception as e:
+        logger.warning(f"Error closing docs vector store: {e}", action="docs_vector_shutdown_error")
+
+    # Stop docs export render processes
+    try:
+        from services.docs_export_engine import shutdown_export_engine
+        shutdown_export_engine()
+    except Exception as e:
+        logger.warning(f"Error stopping docs export workers: {e}", action="docs_export_shutdown_error")
+
     logger.info("Bheem Workspace shutting down...", action="app_shutdown")
 
 app = FastAPI(
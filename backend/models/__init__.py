@@ -27,7 +27,10 @@ from .mail_models import (
     MailFilter,
     MailContact,
     ScheduledEmail,
-    Mail2FALog
+    Mail2FALog,
+    MailFolderSyncState,
+    MailMessageMeta,
+    MailThread
 )
 
 from .productivity_models import (
@@ -97,7 +100,9 @@ from .calendar_models import (
     ScheduledAppointment,
     SnoozedEmail,
     EmailTemplate,
-    SearchIndexLog
+    SearchIndexLog,
+    SearchDocument,
+    SearchPosting
 )
 
 from .enterprise_models import (
@@ -162,6 +167,9 @@ __all__ = [
     "MailContact",
     "ScheduledEmail",
     "Mail2FALog",
+    "MailFolderSyncState",
+    "MailMessageMeta",
+    "MailThread",
     # Productivity models - Sheets
     "Spreadsheet",
     "Worksheet",
@@ -212,6 +220,8 @@ __all__ = [
     "SnoozedEmail",
     "EmailTemplate",
     "SearchIndexLog",
+    "SearchDocument",
+    "SearchPosting",
     # Enterprise models (Phase 4)
     "DLPRule",
     "DLPIncident",
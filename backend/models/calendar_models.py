@@ -4,7 +4,7 @@ Database models for calendar reminders, appointments, and scheduling
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, Text, Index, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index, Boolean, ForeignKey, UniqueConstraint, Float, PrimaryKeyConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -487,3 +487,54 @@ class SearchIndexLog(Base):
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     processed_at = Column(DateTime)
+
+
+class SearchDocument(Base):
+    """Searchable entity registered in the unified search index"""
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        PrimaryKeyConstraint('entity_type', 'entity_id'),
+        Index('idx_search_documents_partition', 'partition_id', 'entity_type'),
+        Index('idx_search_documents_owner', 'owner_id'),
+        {"schema": "workspace"}
+    )
+
+    # Tenant for tenant-scoped entities; owning user for user-scoped ones
+    # (mail drafts, contacts and meetings carry no tenant_id)
+    partition_id = Column(UUID(as_uuid=True), nullable=False)
+
+    # Entity reference
+    entity_type = Column(String(50), nullable=False)  # mail, drive, sheets, slides, forms, meet, contacts, notes, site, site_page
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    owner_id = Column(UUID(as_uuid=True))
+
+    # Display fields served straight from the index
+    title = Column(Text)
+    snippet = Column(Text)
+    mime_type = Column(String(255))
+    extra = Column(JSONB, default={})
+
+    # Timestamps
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    indexed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SearchPosting(Base):
+    """Inverted index posting: one row per (term, entity)"""
+    __tablename__ = "search_postings"
+    __table_args__ = (
+        PrimaryKeyConstraint('partition_id', 'term', 'entity_type', 'entity_id'),
+        Index('idx_search_postings_term_prefix', 'partition_id', 'term',
+              postgresql_ops={'term': 'text_pattern_ops'}),
+        Index('idx_search_postings_entity', 'entity_type', 'entity_id'),
+        {"schema": "workspace"}
+    )
+
+    partition_id = Column(UUID(as_uuid=True), nullable=False)
+    term = Column(String(64), nullable=False)
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+
+    # Field-boosted, log-scaled term frequency
+    weight = Column(Float, nullable=False, default=0)
@@ -2,7 +2,7 @@
 Bheem Workspace - Mail Module Database Models
 Models for mail drafts, signatures, filters, contacts, and 2FA
 """
-from sqlalchemy import Column, String, Boolean, Integer, Text, DateTime, ForeignKey, Index, ARRAY
+from sqlalchemy import Column, String, Boolean, Integer, BigInteger, Text, DateTime, ForeignKey, Index, ARRAY, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, INET, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -711,3 +711,111 @@ class EmailNudgeSettings(Base):
 
     def __repr__(self):
         return f"<EmailNudgeSettings(user_id={self.user_id}, enabled={self.nudges_enabled})>"
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Message Metadata Store & Threading
+# ═══════════════════════════════════════════════════════════════════
+
+class MailFolderSyncState(Base):
+    """Persisted IMAP sync cursor per mailbox folder"""
+    __tablename__ = "mail_folder_sync_state"
+    __table_args__ = (
+        UniqueConstraint('mailbox', 'folder', name='uq_mail_folder_sync_state'),
+        {"schema": "workspace"}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    mailbox = Column(String(255), nullable=False)  # Lower-cased mailbox address
+    folder = Column(String(255), nullable=False)
+
+    # IMAP cursor
+    uidvalidity = Column(BigInteger)
+    uidnext = Column(BigInteger)
+    highestmodseq = Column(BigInteger)
+
+    # Timestamps
+    last_synced_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MailFolderSyncState(mailbox={self.mailbox}, folder={self.folder})>"
+
+
+class MailMessageMeta(Base):
+    """Header metadata for a message, kept current by folder sync"""
+    __tablename__ = "mail_message_meta"
+    __table_args__ = (
+        UniqueConstraint('mailbox', 'folder', 'uid', name='uq_mail_message_meta_uid'),
+        Index('idx_mail_message_meta_thread', 'mailbox', 'folder', 'thread_id'),
+        Index('idx_mail_message_meta_message_id', 'mailbox', 'folder', 'message_id'),
+        Index('idx_mail_message_meta_in_reply_to', 'mailbox', 'folder', 'in_reply_to'),
+        {"schema": "workspace"}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    mailbox = Column(String(255), nullable=False)
+    folder = Column(String(255), nullable=False)
+    uid = Column(BigInteger, nullable=False)
+
+    # Threading headers (normalized, without angle brackets)
+    message_id = Column(String(500))
+    in_reply_to = Column(String(500))
+    references = Column(JSONB, default=[])
+    subject_key = Column(String(500))
+    thread_id = Column(String(500), nullable=False)
+
+    # Listing fields
+    subject = Column(Text, default="")
+    from_address = Column(Text, default="")
+    to_addresses = Column(Text, default="")
+    cc_addresses = Column(Text, default="")
+    date_header = Column(String(255), default="")
+    sent_at = Column(DateTime)
+    preview = Column(Text, default="")
+    size = Column(Integer, default=0)
+    flags = Column(JSONB, default=[])
+    is_read = Column(Boolean, default=False)
+    is_flagged = Column(Boolean, default=False)
+    has_attachments = Column(Boolean, default=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MailMessageMeta(folder={self.folder}, uid={self.uid}, thread_id={self.thread_id})>"
+
+
+class MailThread(Base):
+    """Conversation aggregate maintained as messages are synced"""
+    __tablename__ = "mail_threads"
+    __table_args__ = (
+        UniqueConstraint('mailbox', 'folder', 'thread_id', name='uq_mail_threads_thread'),
+        Index('idx_mail_threads_latest', 'mailbox', 'folder', 'latest_at'),
+        Index('idx_mail_threads_subject', 'mailbox', 'folder', 'subject_key'),
+        {"schema": "workspace"}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    mailbox = Column(String(255), nullable=False)
+    folder = Column(String(255), nullable=False)
+    thread_id = Column(String(500), nullable=False)
+
+    # Aggregates
+    subject = Column(Text, default="")
+    subject_key = Column(String(500))
+    message_count = Column(Integer, default=0)
+    unread_count = Column(Integer, default=0)
+    participants = Column(JSONB, default=[])
+    preview = Column(Text, default="")
+    latest_date = Column(String(255), default="")
+    oldest_date = Column(String(255), default="")
+    latest_at = Column(DateTime)
+    oldest_at = Column(DateTime)
+
+    # Timestamps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MailThread(thread_id={self.thread_id}, messages={self.message_count})>"
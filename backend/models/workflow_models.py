@@ -2,7 +2,7 @@
 Bheem Workspace - Workflow Automation Models
 Models for Bheem Flows - workflow automation engine
 """
-from sqlalchemy import Column, String, Boolean, Integer, Text, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, Boolean, Integer, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -65,14 +65,27 @@ class WorkflowRun(Base):
         Index('idx_workflow_runs_workflow', 'workflow_id'),
         Index('idx_workflow_runs_status', 'status'),
         Index('idx_workflow_runs_started', 'started_at'),
+        Index('idx_workflow_runs_due', 'status', 'next_run_at',
+              postgresql_where=text("status IN ('queued', 'waiting', 'running')")),
+        Index('idx_workflow_runs_tenant', 'tenant_id', 'status'),
         {"schema": "workspace"}
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     workflow_id = Column(UUID(as_uuid=True), ForeignKey("workspace.workflows.id", ondelete="CASCADE"), nullable=False)
+    tenant_id = Column(UUID(as_uuid=True))  # Copied from the workflow for per-tenant concurrency limits
 
     # Status
-    status = Column(String(20), default='running')  # running, completed, failed
+    status = Column(String(20), default='queued')  # queued, running, waiting, completed, failed
+
+    # Queue state
+    next_run_at = Column(DateTime, default=datetime.utcnow)  # When a queued/waiting run is due
+    current_step = Column(Integer, default=0)  # Index of the next action to execute
+    context = Column(JSONB)  # Results of completed actions, for resuming after a delay or retry
+    attempts = Column(Integer, default=0)  # Failed attempts so far
+    max_attempts = Column(Integer, default=3)
+    locked_by = Column(String(100))  # Worker holding the run
+    locked_until = Column(DateTime)  # Lease; an expired lease means the worker died
 
     # Data
     trigger_data = Column(JSONB)  # Data that triggered the workflow
@@ -16,6 +16,7 @@ from models.org_models import (
     AdminRole, UserAdminRole, SSOConfiguration,
     SecurityPolicy, UserImportJob
 )
+from services.permission_resolver import PermissionCheck, Scope, permission_resolver
 
 logger = logging.getLogger(__name__)
 
@@ -300,49 +301,38 @@ class AdminRoleService:
         tenant_id: str
     ) -> List[str]:
         """Get effective permissions for a user"""
-        result = await self.db.execute(
-            select(AdminRole).join(UserAdminRole).where(
-                and_(
-                    UserAdminRole.user_id == uuid.UUID(user_id),
-                    AdminRole.tenant_id == uuid.UUID(tenant_id),
-                    or_(
-                        UserAdminRole.expires_at.is_(None),
-                        UserAdminRole.expires_at > datetime.utcnow()
-                    )
-                )
-            )
-        )
-
-        permissions = set()
-        for role in result.scalars().all():
-            if role.permissions:
-                permissions.update(role.permissions)
-
-        return list(permissions)
+        compiled = await permission_resolver.resolve(self.db, user_id, tenant_id)
+        return list(compiled.permissions)
 
     async def check_permission(
         self,
         user_id: str,
         tenant_id: str,
-        required_permission: str
+        required_permission: str,
+        scope: Optional[Scope] = None
     ) -> bool:
-        """Check if user has a specific permission"""
-        permissions = await self.get_user_permissions(user_id, tenant_id)
+        """
+        Check if user has a specific permission.
 
-        # Wildcard grants all permissions
-        if "*" in permissions:
-            return True
-
-        # Check specific permission
-        if required_permission in permissions:
-            return True
-
-        # Check wildcard for category (e.g., "users.*" matches "users.read")
-        category = required_permission.split(".")[0]
-        if f"{category}.*" in permissions:
-            return True
+        "*" grants everything and "users.*" grants every users permission.
+        scope is an optional (scope_type, scope_id) for org unit or group
+        scoped assignments.
+        """
+        return await permission_resolver.check(self.db, user_id, tenant_id, required_permission, scope)
 
-        return False
+    async def check_many(
+        self,
+        user_id: str,
+        tenant_id: str,
+        checks: List[PermissionCheck]
+    ) -> List[bool]:
+        """
+        Check many permissions at once, e.g. one per row of a list page.
+
+        Each check is a permission or a (permission, scope) pair; answers
+        come back in the same order from one cached resolution.
+        """
+        return await permission_resolver.check_many(self.db, user_id, tenant_id, checks)
 
     async def create_default_roles(
         self,
@@ -2,7 +2,7 @@
 Bheem Workspace - Appointment Scheduling Service
 Business logic for Calendly-like appointment booking
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta, date, time
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,6 +10,9 @@ from sqlalchemy import select, update, delete, and_, or_
 from sqlalchemy.orm import selectinload
 
 from models.calendar_models import AppointmentType, ScheduledAppointment
+from services.availability_engine import (
+    aligned_slots, host_busy, invalidate_host, parse_hhmm, working_windows
+)
 
 
 class AppointmentService:
@@ -247,106 +250,50 @@ class AppointmentService:
         end_date: date,
         timezone: str = 'UTC'
     ) -> Dict[str, List[Dict[str, str]]]:
-        """Get available time slots for booking"""
-        appointment_type = await self.get_appointment_type(appointment_type_id)
-        if not appointment_type or not appointment_type.is_active:
-            return {}
+        """
+        Get available time slots for booking.
 
-        # Get existing appointments in the date range
-        existing_appointments = await self._get_appointments_in_range(
-            appointment_type.user_id,
-            datetime.combine(start_date, time.min),
-            datetime.combine(end_date, time.max)
+        Working hours minus the host's buffered bookings are swept once to
+        produce the slots.
+        """
+        result = await self.db.execute(
+            select(AppointmentType).where(AppointmentType.id == appointment_type_id)
         )
+        appointment_type = result.scalar_one_or_none()
+        if not appointment_type or not appointment_type.is_active:
+            return {}
 
-        # Build blocked time slots
-        blocked_slots = []
-        for apt in existing_appointments:
-            buffer_start = apt.start_time - timedelta(
-                minutes=appointment_type.buffer_before_minutes
-            )
-            buffer_end = apt.end_time + timedelta(
-                minutes=appointment_type.buffer_after_minutes
-            )
-            blocked_slots.append((buffer_start, buffer_end))
+        # Bookings just outside the range can still reach into it through their buffers
+        buffer_before = timedelta(minutes=appointment_type.buffer_before_minutes or 0)
+        buffer_after = timedelta(minutes=appointment_type.buffer_after_minutes or 0)
+        pad = timedelta(days=1) if buffer_before or buffer_after else timedelta(0)
+        busy = (await host_busy(
+            self.db, [appointment_type.user_id], start_date - pad, end_date + pad
+        ))[str(appointment_type.user_id)].expand(buffer_before, buffer_after)
 
-        # Generate available slots
         availability = appointment_type.availability or {}
-        duration = appointment_type.duration_minutes
-        min_notice = timedelta(hours=appointment_type.min_notice_hours)
-        now = datetime.utcnow()
-
-        available_slots = {}
-        current_date = start_date
-
-        while current_date <= end_date:
-            day_name = current_date.strftime('%A').lower()
-            day_config = availability.get(day_name, {})
-
-            if day_config.get('enabled', False):
-                day_slots = []
-                start_time_str = day_config.get('start', '09:00')
-                end_time_str = day_config.get('end', '17:00')
-
-                start_hour, start_min = map(int, start_time_str.split(':'))
-                end_hour, end_min = map(int, end_time_str.split(':'))
-
-                slot_start = datetime.combine(
-                    current_date,
-                    time(start_hour, start_min)
-                )
-                day_end = datetime.combine(
-                    current_date,
-                    time(end_hour, end_min)
-                )
-
-                while slot_start + timedelta(minutes=duration) <= day_end:
-                    slot_end = slot_start + timedelta(minutes=duration)
 
-                    # Check minimum notice
-                    if slot_start < now + min_notice:
-                        slot_start = slot_end
-                        continue
+        def day_window(day: date) -> Optional[Tuple[time, time]]:
+            day_config = availability.get(day.strftime('%A').lower(), {})
+            if not day_config.get('enabled', False):
+                return None
+            return parse_hhmm(day_config.get('start'), '09:00'), parse_hhmm(day_config.get('end'), '17:00')
 
-                    # Check if slot conflicts with existing appointments
-                    is_blocked = False
-                    for blocked_start, blocked_end in blocked_slots:
-                        if (slot_start < blocked_end and slot_end > blocked_start):
-                            is_blocked = True
-                            break
-
-                    if not is_blocked:
-                        day_slots.append({
-                            'start': slot_start.isoformat(),
-                            'end': slot_end.isoformat()
-                        })
-
-                    slot_start = slot_end
-
-                if day_slots:
-                    available_slots[current_date.isoformat()] = day_slots
-
-            current_date += timedelta(days=1)
+        min_notice = timedelta(hours=appointment_type.min_notice_hours)
+        available_slots: Dict[str, List[Dict[str, str]]] = {}
+        for slot_start, slot_end in aligned_slots(
+            working_windows(start_date, end_date, day_window),
+            busy,
+            timedelta(minutes=appointment_type.duration_minutes),
+            not_before=datetime.utcnow() + min_notice
+        ):
+            available_slots.setdefault(slot_start.date().isoformat(), []).append({
+                'start': slot_start.isoformat(),
+                'end': slot_end.isoformat()
+            })
 
         return available_slots
 
-    async def _get_appointments_in_range(
-        self,
-        host_id: UUID,
-        start: datetime,
-        end: datetime
-    ) -> List[ScheduledAppointment]:
-        """Get all appointments for a host in a date range"""
-        result = await self.db.execute(
-            select(ScheduledAppointment).where(
-                ScheduledAppointment.host_id == host_id,
-                ScheduledAppointment.status == 'confirmed',
-                ScheduledAppointment.start_time >= start,
-                ScheduledAppointment.end_time <= end
-            )
-        )
-        return list(result.scalars().all())
-
     # =============================================
     # Appointment Bookings
     # =============================================
@@ -399,6 +346,7 @@ class AppointmentService:
 
         self.db.add(appointment)
         await self.db.commit()
+        invalidate_host(appointment_type.user_id)
         await self.db.refresh(appointment)
 
         # TODO: Send confirmation emails, create calendar event, etc.
@@ -411,27 +359,24 @@ class AppointmentService:
         start_time: datetime,
         end_time: datetime,
         buffer_before: int,
-        buffer_after: int
+        buffer_after: int,
+        exclude_appointment_id: Optional[UUID] = None
     ) -> bool:
         """Check if a time slot is available"""
         check_start = start_time - timedelta(minutes=buffer_before)
         check_end = end_time + timedelta(minutes=buffer_after)
 
-        result = await self.db.execute(
-            select(ScheduledAppointment).where(
-                ScheduledAppointment.host_id == host_id,
-                ScheduledAppointment.status == 'confirmed',
-                or_(
-                    and_(
-                        ScheduledAppointment.start_time < check_end,
-                        ScheduledAppointment.end_time > check_start
-                    )
-                )
-            )
+        query = select(ScheduledAppointment.id).where(
+            ScheduledAppointment.host_id == host_id,
+            ScheduledAppointment.status == 'confirmed',
+            ScheduledAppointment.start_time < check_end,
+            ScheduledAppointment.end_time > check_start
         )
+        if exclude_appointment_id is not None:
+            query = query.where(ScheduledAppointment.id != exclude_appointment_id)
 
-        conflicts = result.scalars().all()
-        return len(list(conflicts)) == 0
+        result = await self.db.execute(query.limit(1))
+        return result.scalar_one_or_none() is None
 
     async def get_appointment(
         self,
@@ -498,6 +443,7 @@ class AppointmentService:
         appointment.cancellation_reason = f"[{cancelled_by}] {reason}" if reason else f"Cancelled by {cancelled_by}"
 
         await self.db.commit()
+        invalidate_host(appointment.host_id)
         await self.db.refresh(appointment)
 
         # TODO: Send cancellation emails, remove calendar event, etc.
@@ -530,7 +476,8 @@ class AppointmentService:
             new_start_time,
             new_end_time,
             appointment_type.buffer_before_minutes,
-            appointment_type.buffer_after_minutes
+            appointment_type.buffer_after_minutes,
+            exclude_appointment_id=appointment.id
         )
 
         if not is_available:
@@ -540,6 +487,7 @@ class AppointmentService:
         appointment.end_time = new_end_time
 
         await self.db.commit()
+        invalidate_host(appointment.host_id)
         await self.db.refresh(appointment)
 
         # TODO: Update calendar event, send notification emails
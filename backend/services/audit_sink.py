@@ -0,0 +1,357 @@
+"""
+Bheem Workspace - Audit Log Sink
+================================
+Non-blocking, batched writer for audit events.
+
+Callers hand events to a sink and return immediately. Events wait in a
+bounded in-memory queue and are written in bulk when the batch size is
+reached or the flush interval passes. If the database is slow or down:
+
+- a full queue first applies backpressure (the caller waits briefly for a
+  flush to make room)
+- events that still do not fit, and batches that fail to write, are
+  appended to a spill file on disk (fsynced) and replayed once writes
+  succeed again - including spill files left by a previous process
+- rows the database keeps refusing (bad data rather than an outage) are
+  isolated into a dead-letter file so they cannot block the queue
+
+Events are JSON-compatible dicts; each sink's writer turns a list of them
+into one bulk INSERT.
+"""
+
+import asyncio
+import glob
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AuditWriter = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+# After this many failed writes in a row, rows are retried one by one so a
+# single bad event cannot block the queue
+ISOLATE_AFTER_FAILED_BATCHES = 3
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class AuditSink:
+    """Bounded queue of audit events flushed in bulk by a background task"""
+
+    def __init__(
+        self,
+        name: str,
+        writer: AuditWriter,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        spill_dir: str,
+        backpressure_timeout: float = 0.05
+    ):
+        self.name = name
+        self.writer = writer
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self.backpressure_timeout = backpressure_timeout
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._spill_file = os.path.join(spill_dir, f"{name}-{os.getpid()}-{uuid4().hex[:8]}.jsonl")
+        self._has_spill = bool(self._spill_files())
+        self._retry_at = 0.0
+        self._backoff = 1.0
+        self._failed_batches = 0
+        self.stats = {
+            "submitted": 0, "written": 0, "batches": 0, "flush_failures": 0,
+            "backpressure_waits": 0, "spilled": 0, "replayed": 0, "rejected": 0, "dropped": 0, "discarded": 0,
+            "last_flush_ms": 0.0, "max_flush_ms": 0.0
+        }
+
+    # =============================================
+    # Producer side
+    # =============================================
+
+    async def submit(self, event: Dict[str, Any]):
+        """Queue an event; never raises and only waits when the queue is full"""
+        self.stats["submitted"] += 1
+        self._ensure_flusher()
+        if len(self._queue) >= self.max_queue:
+            self.stats["backpressure_waits"] += 1
+            self._wakeup.set()
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), self.backpressure_timeout)
+            except asyncio.TimeoutError:
+                pass
+            if len(self._queue) >= self.max_queue:
+                self._spill([event])
+                return
+
+        self._queue.append(event)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def discard(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        """
+        Drop queued events matching predicate (e.g. for a record being purged).
+
+        Waits for an in-flight write to finish, so once this returns no
+        matching event from the queue can still reach the database. Events
+        already spilled to disk are not touched.
+        """
+        if self._write_lock is None:
+            return 0
+        async with self._write_lock:
+            kept = [event for event in self._queue if not predicate(event)]
+            dropped = len(self._queue) - len(kept)
+            self._queue = deque(kept)
+        self.stats["discarded"] += dropped
+        return dropped
+
+    def _ensure_flusher(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._drained = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    # =============================================
+    # Flushing
+    # =============================================
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if time.monotonic() < self._retry_at:
+                continue
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Audit sink {self.name} flush loop error: {e}")
+
+    async def flush(self) -> bool:
+        """Write everything queued (and any spilled events); False if a write failed"""
+        if self._write_lock is None:
+            return not self._queue
+        async with self._write_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._drained.set()
+                if not await self._write_batch(batch):
+                    # Keep order; whatever no longer fits goes to disk
+                    room = max(self.max_queue - len(self._queue), 0)
+                    self._queue.extendleft(reversed(batch[:room]))
+                    self._spill(batch[room:])
+                    return False
+            if self._has_spill:
+                return await self._replay_spilled()
+            return True
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write a batch; after repeated failures, isolate rows the database rejects"""
+        if await self._write(batch):
+            self._failed_batches = 0
+            return True
+        self._failed_batches += 1
+        if self._failed_batches < ISOLATE_AFTER_FAILED_BATCHES or len(batch) == 1:
+            return False
+
+        written = 0
+        rejected: List[Dict[str, Any]] = []
+        for event in batch:
+            if await self._write([event]):
+                written += 1
+            elif not written and len(rejected) >= 2:
+                return False  # Nothing gets through: the database is down, not the data
+            else:
+                rejected.append(event)
+        self._failed_batches = 0
+        if rejected:
+            self._dead_letter(rejected)
+        return True
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        try:
+            await self.writer(batch)
+        except Exception as e:
+            self.stats["flush_failures"] += 1
+            self._retry_at = time.monotonic() + self._backoff
+            logger.warning(f"Audit sink {self.name} write of {len(batch)} events failed, retrying in {self._backoff:.0f}s: {e}")
+            self._backoff = min(self._backoff * 2, 60)
+            return False
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._backoff = 1.0
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["last_flush_ms"] = round(elapsed_ms, 2)
+        self.stats["max_flush_ms"] = round(max(self.stats["max_flush_ms"], elapsed_ms), 2)
+        return True
+
+    # =============================================
+    # Spill file
+    # =============================================
+
+    def _spill_files(self) -> List[str]:
+        """Spill files waiting for replay, including replays abandoned by a dead process"""
+        pattern = os.path.join(self.spill_dir, f"{self.name}-*.jsonl")
+        files = glob.glob(pattern)
+        for claimed in glob.glob(pattern + ".replay-*"):
+            if not _pid_alive(int(claimed.rsplit("-", 1)[1])):
+                files.append(claimed)
+        return sorted(files)
+
+    def _spill(self, events: List[Dict[str, Any]], more: Iterable[Dict[str, Any]] = ()) -> bool:
+        """Append events to this process's spill file; False if the disk write failed"""
+        count = 0
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_file, "a", encoding="utf-8") as f:
+                for event in itertools.chain(events, more):
+                    f.write(json.dumps(event, default=str) + "\n")
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            self.stats["dropped"] += max(len(events) - count, 0)
+            logger.error(f"Audit sink {self.name} could not spill events: {e}")
+            return False
+        finally:
+            if count:
+                self._has_spill = True
+                self.stats["spilled"] += count
+        return True
+
+    def _dead_letter(self, events: List[Dict[str, Any]]):
+        """Keep events the database refuses (bad data) out of the replay cycle"""
+        self.stats["rejected"] += len(events)
+        path = os.path.join(self.spill_dir, f"{self.name}-rejected-{os.getpid()}.jsonl.dead")
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(event, default=str) + "\n" for event in events)
+        except OSError as e:
+            self.stats["dropped"] += len(events)
+            logger.error(f"Audit sink {self.name} dropped {len(events)} rejected events: {e}")
+            return
+        logger.error(f"Audit sink {self.name} moved {len(events)} rejected events to {path}")
+
+    async def _replay_spilled(self) -> bool:
+        """Write spilled events back in batches; claims files so only one process replays each"""
+        for path in self._spill_files():
+            claimed = f"{path.split('.replay-')[0]}.replay-{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue  # Another process got it
+
+            written = True
+            with open(claimed, encoding="utf-8") as f:
+                events = (json.loads(line) for line in f if line.strip())
+                batch: List[Dict[str, Any]] = []
+                for event in events:
+                    batch.append(event)
+                    if len(batch) >= self.batch_size:
+                        if not await self._write_batch(batch):
+                            written = False
+                            break
+                        self.stats["replayed"] += len(batch)
+                        batch = []
+                if written and batch:
+                    written = await self._write_batch(batch)
+                    if written:
+                        self.stats["replayed"] += len(batch)
+                # Re-spill the unwritten remainder and retry later; if even that
+                # fails keep the whole file (duplicates beat losing audit events)
+                if written or self._spill(batch, events):
+                    os.remove(claimed)
+            if not written:
+                return False
+
+        self._has_spill = bool(self._spill_files())
+        return not self._has_spill
+
+    # =============================================
+    # Lifecycle
+    # =============================================
+
+    async def close(self):
+        """Stop the flusher and write (or spill) what is left"""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._flusher = None
+        self._retry_at = 0.0
+        if not await self.flush():
+            self._spill(list(self._queue))
+            self._queue.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "spill_pending": self._has_spill
+        }
+
+
+# =============================================
+# Registry
+# =============================================
+
+_sinks: Dict[str, AuditSink] = {}
+
+
+def get_audit_sink(name: str, writer: AuditWriter) -> AuditSink:
+    """Get or create the named sink, configured from settings"""
+    sink = _sinks.get(name)
+    if sink is None:
+        sink = _sinks[name] = AuditSink(
+            name=name,
+            writer=writer,
+            max_queue=settings.AUDIT_QUEUE_MAX_EVENTS,
+            batch_size=settings.AUDIT_FLUSH_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+            spill_dir=settings.AUDIT_SPILL_DIR
+        )
+    return sink
+
+
+def get_audit_sink_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: sink.get_stats() for name, sink in _sinks.items()}
+
+
+async def close_audit_sinks():
+    for sink in list(_sinks.values()):
+        await sink.close()
@@ -0,0 +1,455 @@
+"""
+Bheem Workspace - Availability Engine
+Interval arithmetic for appointment and resource booking availability
+
+Busy time (bookings plus buffers) and working hours are
+kept as sorted, merged interval sets, so free time is one linear sweep
+instead of testing every candidate slot against every booking.
+
+- IntervalSet: sorted disjoint [start, end) intervals with union,
+  subtraction, intersection and O(log n) overlap tests
+- working_windows(): working hours over a date range as an IntervalSet
+- aligned_slots() / slot_grid(): bookable slots from free time
+- AvailabilityCache: busy intervals per owner per day, dropped when that
+  owner's bookings change and bounded by a TTL for other workers
+- host_busy() / resource_busy(): cached busy time for many hosts or
+  resources, loaded with one query per kind
+"""
+import bisect
+import logging
+import time as monotonic_time
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[datetime, datetime]
+# Working window of one day (start, end), or None when the day is off
+DayWindow = Callable[[date], Optional[Tuple[time, time]]]
+
+HOST = "host"
+RESOURCE = "resource"
+
+
+# =============================================
+# Interval sets
+# =============================================
+
+class IntervalSet:
+    """Sorted, non-overlapping half-open intervals; touching intervals are merged"""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        for start, end in sorted(interval for interval in intervals if interval[0] < interval[1]):
+            if self.ends and start <= self.ends[-1]:
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def _sorted(cls, starts: List[datetime], ends: List[datetime]) -> "IntervalSet":
+        merged = cls()
+        merged.starts, merged.ends = starts, ends
+        return merged
+
+    def __iter__(self) -> Iterator[Interval]:
+        return zip(self.starts, self.ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self)!r})"
+
+    def union(self, *others: "IntervalSet") -> "IntervalSet":
+        return IntervalSet([interval for interval_set in (self, *others) for interval in interval_set])
+
+    def expand(self, before: timedelta, after: timedelta) -> "IntervalSet":
+        """Grow every interval (e.g. bookings by their buffers)"""
+        if not before and not after:
+            return self
+        return IntervalSet((start - before, end + after) for start, end in self)
+
+    def subtract(self, other: "IntervalSet") -> "IntervalSet":
+        """Parts of self not covered by other, in one sweep over both"""
+        starts, ends = [], []
+        j = 0
+        for start, end in self:
+            while j < len(other.ends) and other.ends[j] <= start:
+                j += 1
+            k = j
+            while start < end and k < len(other.starts) and other.starts[k] < end:
+                if other.starts[k] > start:
+                    starts.append(start)
+                    ends.append(other.starts[k])
+                start = max(start, other.ends[k])
+                k += 1
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+        return IntervalSet._sorted(starts, ends)
+
+    def intersect(self, other: "IntervalSet") -> "IntervalSet":
+        starts, ends = [], []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            start = max(self.starts[i], other.starts[j])
+            end = min(self.ends[i], other.ends[j])
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet._sorted(starts, ends)
+
+    def clip(self, start: datetime, end: datetime) -> "IntervalSet":
+        return self.intersect(IntervalSet([(start, end)]))
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """Whether [start, end) meets any interval"""
+        index = bisect.bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+
+def intersect_all(interval_sets: Sequence[IntervalSet]) -> IntervalSet:
+    """Time covered by every set (e.g. when all attendees and the room are free)"""
+    if not interval_sets:
+        return IntervalSet()
+    common = interval_sets[0]
+    for interval_set in sorted(interval_sets[1:], key=len):
+        if not common:
+            break
+        common = common.intersect(interval_set)
+    return common
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, the form booking times are stored in"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_hhmm(value: Optional[str], default: str) -> time:
+    hour, minute = map(int, (value or default).split(':'))
+    return time(hour, minute)
+
+
+def working_windows(start_date: date, end_date: date, day_window: DayWindow) -> IntervalSet:
+    """Working hours of every day from start_date to end_date (inclusive)"""
+    windows = []
+    current = start_date
+    while current <= end_date:
+        window = day_window(current)
+        if window is not None:
+            windows.append((datetime.combine(current, window[0]), datetime.combine(current, window[1])))
+        current += timedelta(days=1)
+    return IntervalSet(windows)
+
+
+def resource_windows(resource, start_date: date, end_date: date) -> IntervalSet:
+    """Bookable hours of a Resource (available_days are ISO weekdays, 1 = Monday)"""
+    days = set(resource.available_days or [1, 2, 3, 4, 5])
+    opens = parse_hhmm(resource.available_from, "09:00")
+    closes = parse_hhmm(resource.available_until, "18:00")
+    return working_windows(start_date, end_date, lambda day: (opens, closes) if day.isoweekday() in days else None)
+
+
+# =============================================
+# Slots
+# =============================================
+
+def _align(value: datetime, anchor: datetime, step: timedelta) -> datetime:
+    """First point of the step grid from anchor at or after value"""
+    offset = value - anchor
+    if offset <= timedelta(0):
+        return anchor
+    return anchor + -(-offset // step) * step
+
+
+def aligned_slots(
+    windows: IntervalSet,
+    busy: IntervalSet,
+    duration: timedelta,
+    step: Optional[timedelta] = None,
+    not_before: Optional[datetime] = None
+) -> Iterator[Interval]:
+    """
+    Free slots of length duration inside windows, in order.
+
+    Slot starts stay on the step grid anchored at each window's start
+    (step defaults to duration), so results match walking the window
+    slot by slot and skipping blocked ones.
+    """
+    step = step or duration
+    window = 0
+    for free_start, free_end in windows.subtract(busy):
+        # Each free piece lies inside one window; its start anchors the grid
+        while windows.ends[window] < free_end:
+            window += 1
+        if not_before is not None and free_start < not_before:
+            free_start = not_before
+        slot_start = _align(free_start, windows.starts[window], step)
+        while slot_start + duration <= free_end:
+            yield slot_start, slot_start + duration
+            slot_start += step
+
+
+def slot_grid(window_start: datetime, window_end: datetime, step: timedelta, busy: IntervalSet) -> List[Tuple[datetime, datetime, bool]]:
+    """Every step-sized slot of the window with whether it is free, in one sweep over busy"""
+    slots = []
+    index = bisect.bisect_right(busy.ends, window_start)
+    slot_start = window_start
+    while slot_start < window_end:
+        slot_end = slot_start + step
+        while index < len(busy.ends) and busy.ends[index] <= slot_start:
+            index += 1
+        free = index >= len(busy.starts) or busy.starts[index] >= slot_end
+        slots.append((slot_start, slot_end, free))
+        slot_start = slot_end
+    return slots
+
+
+def first_slot(free: IntervalSet, duration: timedelta, step: timedelta, anchor: datetime) -> Optional[Interval]:
+    """Earliest slot of length duration, on the step grid from anchor, that lies inside free"""
+    for free_start, free_end in free:
+        if free_end <= anchor:
+            continue
+        slot_start = _align(max(free_start, anchor), anchor, step)
+        if slot_start + duration <= free_end:
+            return slot_start, slot_start + duration
+    return None
+
+
+# =============================================
+# Per-day busy cache
+# =============================================
+
+class AvailabilityCache:
+    """
+    Busy intervals per (kind, owner, day).
+
+    Booking writes invalidate their owner; the TTL bounds how long other
+    workers (and bookings changed outside this process) stay stale.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple[str, str, date], Tuple[List[Interval], float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+    def get(self, key: Tuple[str, str, date]) -> Optional[List[Interval]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            intervals, expires_at = entry
+            if expires_at > monotonic_time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return intervals
+            del self._entries[key]
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, key: Tuple[str, str, date], intervals: List[Interval], generation: int):
+        if generation != self.generation or self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (intervals, monotonic_time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def busy(
+        self,
+        kind: str,
+        owner_ids: Sequence[Any],
+        start_date: date,
+        end_date: date,
+        loader: Callable[[List[str], datetime, datetime], Any]
+    ) -> Dict[str, IntervalSet]:
+        """
+        Busy time of each owner over the days, loading only uncached days.
+
+        loader(owner_ids, start, end) returns (owner_id, start, end) rows
+        overlapping [start, end); all misses are fetched with one call.
+        """
+        days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+        owners = [str(owner_id) for owner_id in owner_ids]
+        per_owner: Dict[str, List[Interval]] = {owner: [] for owner in owners}
+        missing: Dict[str, List[date]] = {}
+        for owner in owners:
+            for day in days:
+                intervals = self.get((kind, owner, day))
+                if intervals is None:
+                    missing.setdefault(owner, []).append(day)
+                else:
+                    per_owner[owner].extend(intervals)
+
+        if missing:
+            generation = self.generation
+            first = min(day for owner_days in missing.values() for day in owner_days)
+            last = max(day for owner_days in missing.values() for day in owner_days)
+            range_start = datetime.combine(first, time.min)
+            range_end = datetime.combine(last + timedelta(days=1), time.min)
+            rows = await loader(list(missing), range_start, range_end)
+            self.stats["loads"] += 1
+
+            by_day: Dict[Tuple[str, date], List[Interval]] = {}
+            for owner_id, start, end in rows:
+                owner = str(owner_id)
+                day = max(start.date(), first)
+                while day <= last and datetime.combine(day, time.min) < end:
+                    day_start = datetime.combine(day, time.min)
+                    day_end = day_start + timedelta(days=1)
+                    by_day.setdefault((owner, day), []).append((max(start, day_start), min(end, day_end)))
+                    day += timedelta(days=1)
+
+            for owner, owner_days in missing.items():
+                for day in owner_days:
+                    intervals = by_day.get((owner, day), [])
+                    self.store((kind, owner, day), intervals, generation)
+                    per_owner[owner].extend(intervals)
+
+        return {owner: IntervalSet(intervals) for owner, intervals in per_owner.items()}
+
+    def invalidate(self, kind: Optional[str] = None, owner_id: Optional[Any] = None):
+        """Drop cached days of one owner, one kind, or everything"""
+        self.generation += 1
+        self.stats["invalidations"] += 1
+        if kind is None:
+            self._entries.clear()
+            return
+        for key in [
+            k for k in self._entries
+            if k[0] == kind and (owner_id is None or k[1] == str(owner_id))
+        ]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+availability_cache = AvailabilityCache(
+    max_entries=settings.AVAILABILITY_CACHE_SIZE,
+    ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS
+)
+
+
+# =============================================
+# Busy time loaders
+# =============================================
+
+async def host_busy(
+    db: AsyncSession,
+    host_ids: Sequence[Any],
+    start_date: date,
+    end_date: date
+) -> Dict[str, IntervalSet]:
+    """Confirmed appointments of each host over the days"""
+    from models.calendar_models import ScheduledAppointment
+
+    async def load(owner_ids: List[str], start: datetime, end: datetime):
+        result = await db.execute(
+            select(
+                ScheduledAppointment.host_id,
+                ScheduledAppointment.start_time,
+                ScheduledAppointment.end_time
+            ).where(
+                and_(
+                    ScheduledAppointment.host_id.in_([UUID(owner_id) for owner_id in owner_ids]),
+                    ScheduledAppointment.status == 'confirmed',
+                    ScheduledAppointment.start_time < end,
+                    ScheduledAppointment.end_time > start
+                )
+            )
+        )
+        return result.all()
+
+    return await availability_cache.busy(HOST, host_ids, start_date, end_date, load)
+
+
+async def resource_busy(
+    db: AsyncSession,
+    resource_ids: Sequence[Any],
+    start_date: date,
+    end_date: date
+) -> Dict[str, IntervalSet]:
+    """Pending and confirmed bookings of each resource over the days"""
+    from models.admin_models import ResourceBooking
+
+    async def load(owner_ids: List[str], start: datetime, end: datetime):
+        result = await db.execute(
+            select(
+                ResourceBooking.resource_id,
+                ResourceBooking.start_time,
+                ResourceBooking.end_time
+            ).where(
+                and_(
+                    ResourceBooking.resource_id.in_([UUID(owner_id) for owner_id in owner_ids]),
+                    ResourceBooking.status != "cancelled",
+                    ResourceBooking.start_time < end,
+                    ResourceBooking.end_time > start
+                )
+            )
+        )
+        return result.all()
+
+    return await availability_cache.busy(RESOURCE, resource_ids, start_date, end_date, load)
+
+
+def invalidate_host(host_id: Any):
+    availability_cache.invalidate(HOST, host_id)
+
+
+def invalidate_resource(resource_id: Any):
+    availability_cache.invalidate(RESOURCE, resource_id)
+
+
+async def find_common_slot(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+    host_ids: Sequence[Any] = (),
+    resources: Sequence[Any] = (),
+    step: timedelta = timedelta(minutes=15)
+) -> Optional[Interval]:
+    """
+    First slot in [start, end) where every host and every resource is free.
+
+    Hosts are free outside their confirmed appointments; resources only
+    within their bookable hours and outside their bookings.
+    """
+    start_date, end_date = start.date(), end.date()
+    window = IntervalSet([(start, end)])
+    free_sets = []
+    if host_ids:
+        for busy in (await host_busy(db, host_ids, start_date, end_date)).values():
+            free_sets.append(window.subtract(busy))
+    if resources:
+        busy_by_resource = await resource_busy(db, [r.id for r in resources], start_date, end_date)
+        for resource in resources:
+            hours = resource_windows(resource, start_date, end_date).intersect(window)
+            free_sets.append(hours.subtract(busy_by_resource[str(resource.id)]))
+    return first_slot(intersect_all(free_sets) if free_sets else window, duration, step, start)
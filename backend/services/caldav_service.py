@@ -5,12 +5,14 @@ Supports recurring events with RRULE (RFC 5545)
 """
 import httpx
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime, timedelta
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape as xml_escape
 from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY, YEARLY, weekday
 from dateutil.rrule import MO, TU, WE, TH, FR, SA, SU
 from core.config import settings
+from services.nextcloud_client import get_nextcloud_client, NextcloudOperation
 
 
 # CalDAV Exception Classes
@@ -30,6 +32,10 @@ class CalDAVNotFoundError(CalDAVError):
     """Raised when resource not found (404)"""
     pass
 
+class CalDAVSyncTokenError(CalDAVError):
+    """Raised when the server no longer accepts a sync token (RFC 6578 valid-sync-token)"""
+    pass
+
 
 # Frequency mapping for dateutil.rrule
 FREQ_MAP = {
@@ -50,6 +56,25 @@ class CalDAVService:
     
     def _get_caldav_url(self, username: str) -> str:
         return f"{self.base_url}/remote.php/dav/calendars/{username}"
+
+    def _client(self, operation: str) -> NextcloudOperation:
+        """Shared keep-alive connection pool, labelled for per-operation latency stats"""
+        return get_nextcloud_client(self.base_url).operation(operation)
+
+    def _changed(self, username: str, calendar_id: str):
+        """Make the next cached read of this calendar sync with the server"""
+        from services.caldav_sync import calendar_cache
+        calendar_cache.mark_stale(username, calendar_id)
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.status_code == 429:
+            raise CalDAVRateLimitError("Too many requests to Nextcloud. Please wait a moment and try again.")
+        if response.status_code == 401:
+            raise CalDAVAuthError("Invalid Nextcloud credentials")
+        if response.status_code == 404:
+            raise CalDAVNotFoundError("Calendar not found or user doesn't exist in Nextcloud")
+        raise CalDAVError(f"CalDAV request failed with status {response.status_code}")
     
     async def get_calendars(self, username: str, password: str) -> List[Dict[str, Any]]:
         """Get list of calendars for a user"""
@@ -165,6 +190,121 @@ class CalDAVService:
             
             return events
     
+    async def sync_collection(
+        self,
+        username: str,
+        password: str,
+        calendar_id: str,
+        sync_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Changes to a calendar since sync_token (RFC 6578 sync-collection).
+
+        Returns {"sync_token", "changed": {href: etag}, "removed": [href]};
+        without a token every event is reported as changed. Raises
+        CalDAVSyncTokenError when the server has forgotten the token.
+        """
+        caldav_url = f"{self._get_caldav_url(username)}/{calendar_id}/"
+        token_elem = f"<d:sync-token>{xml_escape(sync_token)}</d:sync-token>" if sync_token else "<d:sync-token/>"
+
+        report_body = f'''<?xml version="1.0"?>
+        <d:sync-collection xmlns:d="DAV:">
+            {token_elem}
+            <d:sync-level>1</d:sync-level>
+            <d:prop>
+                <d:getetag/>
+            </d:prop>
+        </d:sync-collection>'''
+
+        async with self._client("caldav_sync") as client:
+            response = await client.request(
+                "REPORT",
+                caldav_url,
+                content=report_body,
+                auth=(username, password),
+                headers={"Depth": "1", "Content-Type": "application/xml"}
+            )
+
+        if response.status_code != 207:
+            if sync_token and response.status_code in (400, 403, 409):
+                raise CalDAVSyncTokenError(f"Sync token rejected for calendar {calendar_id}")
+            self._raise_for_status(response)
+
+        root = ET.fromstring(response.content)
+        ns = {"d": "DAV:"}
+        changed: Dict[str, Optional[str]] = {}
+        removed: List[str] = []
+
+        for response_elem in root.findall("d:response", ns):
+            href_elem = response_elem.find("d:href", ns)
+            if href_elem is None or not href_elem.text or href_elem.text.endswith("/"):
+                continue
+            status_elem = response_elem.find("d:status", ns)
+            if status_elem is not None and " 404" in (status_elem.text or ""):
+                removed.append(href_elem.text)
+                continue
+            etag_elem = response_elem.find(".//d:getetag", ns)
+            changed[href_elem.text] = etag_elem.text if etag_elem is not None else None
+
+        token_elem = root.find("d:sync-token", ns)
+        return {
+            "sync_token": token_elem.text if token_elem is not None else None,
+            "changed": changed,
+            "removed": removed
+        }
+
+    async def multiget(
+        self,
+        username: str,
+        password: str,
+        calendar_id: str,
+        hrefs: Sequence[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch several events by href in one calendar-multiget REPORT: {href: {"etag", "calendar_data"}}"""
+        if not hrefs:
+            return {}
+        caldav_url = f"{self._get_caldav_url(username)}/{calendar_id}/"
+        href_elems = "".join(f"<d:href>{xml_escape(href)}</d:href>" for href in hrefs)
+
+        report_body = f'''<?xml version="1.0"?>
+        <c:calendar-multiget xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+            <d:prop>
+                <d:getetag/>
+                <c:calendar-data/>
+            </d:prop>
+            {href_elems}
+        </c:calendar-multiget>'''
+
+        async with self._client("caldav_multiget") as client:
+            response = await client.request(
+                "REPORT",
+                caldav_url,
+                content=report_body,
+                auth=(username, password),
+                headers={"Depth": "1", "Content-Type": "application/xml"}
+            )
+
+        if response.status_code != 207:
+            self._raise_for_status(response)
+
+        root = ET.fromstring(response.content)
+        ns = {
+            "d": "DAV:",
+            "c": "urn:ietf:params:xml:ns:caldav"
+        }
+        fetched = {}
+        for response_elem in root.findall("d:response", ns):
+            href_elem = response_elem.find("d:href", ns)
+            cal_data = response_elem.find(".//c:calendar-data", ns)
+            if href_elem is None or cal_data is None or not cal_data.text:
+                continue
+            etag_elem = response_elem.find(".//d:getetag", ns)
+            fetched[href_elem.text] = {
+                "etag": etag_elem.text if etag_elem is not None else None,
+                "calendar_data": cal_data.text
+            }
+        return fetched
+
     def _parse_ical_event(self, ical_text: str) -> Optional[Dict[str, Any]]:
         """Parse iCal event data including recurrence rules"""
         try:
@@ -293,6 +433,7 @@ class CalDAVService:
                 auth=(username, password),
                 headers={"Content-Type": "text/calendar; charset=utf-8"}
             )
+            self._changed(username, calendar_id)
 
             if response.status_code in [201, 204]:
                 return event_uid
@@ -322,6 +463,7 @@ class CalDAVService:
                 url=caldav_url,
                 auth=(username, password)
             )
+            self._changed(username, calendar_id)
             return response.status_code in [204, 200]
 
     async def get_event(
@@ -478,6 +620,7 @@ class CalDAVService:
                 auth=(username, password),
                 headers={"Content-Type": "text/calendar; charset=utf-8"}
             )
+            self._changed(username, calendar_id)
 
             return response.status_code in [200, 201, 204]
 
@@ -689,7 +832,7 @@ class CalDAVService:
 
                 # Generate occurrences within the range
                 # Expand a bit before start to catch events that span into our range
-                search_start = start - event_duration if start > event_duration else datetime.min
+                search_start = start - event_duration if start - datetime.min > event_duration else datetime.min
                 search_end = end
 
                 for occurrence in rr.between(search_start, search_end, inc=True):
@@ -801,6 +944,7 @@ class CalDAVService:
                 auth=(username, password),
                 headers={"Content-Type": "text/calendar; charset=utf-8"}
             )
+            self._changed(username, calendar_id)
 
             if response.status_code in [201, 204]:
                 return exception_uid
@@ -925,6 +1069,7 @@ class CalDAVService:
                 auth=(username, password),
                 headers={"Content-Type": "text/calendar; charset=utf-8"}
             )
+            self._changed(username, calendar_id)
 
             return response.status_code in [200, 201, 204]
 
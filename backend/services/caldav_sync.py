@@ -0,0 +1,267 @@
+"""
+Bheem Workspace - CalDAV Event Cache
+Incremental calendar sync with a local per-user event cache
+
+Each (user, calendar) collection is mirrored in memory: parsed events by
+href, their ETags, and the RFC 6578 sync token of the last sync. A refresh
+asks the server only what changed since that token (sync-collection) and
+downloads just those events with calendar-multiget, so views no longer
+re-transfer the whole calendar on every request.
+
+- Reads within CALDAV_CACHE_FRESH_SECONDS of a sync are served locally;
+  writes through CalDAVService mark the calendar stale immediately
+- Time-range filtering and search run against the cached events
+- Several calendars refresh concurrently when the cache is cold
+- Entries are keyed by a digest of the credentials, so a cached calendar
+  is only served to callers the server has accepted for it
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from core.config import settings
+from services.caldav_service import caldav_service, CalDAVSyncTokenError
+
+logger = logging.getLogger(__name__)
+
+# (username, credential digest, calendar_id)
+CacheKey = Tuple[str, str, str]
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return _naive_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+def in_range(event: Dict[str, Any], start: datetime, end: datetime) -> bool:
+    """
+    Whether an event belongs in [start, end), like a calendar-query time-range.
+
+    Recurring masters are kept if the series starts before end; which
+    occurrences fall in the range is left to expand_recurring_events().
+    """
+    event_start = _parse_datetime(event.get("start"))
+    if event_start is None:
+        return True
+    if event.get("recurrence") and not event.get("recurrence_id"):
+        return event_start < end
+    event_end = _parse_datetime(event.get("end")) or event_start
+    if event_end <= event_start:
+        return start <= event_start < end
+    return event_start < end and event_end > start
+
+
+def matches(event: Dict[str, Any], query_lower: str) -> bool:
+    return any(
+        query_lower in (event.get(field) or "").lower()
+        for field in ("title", "description", "location")
+    )
+
+
+class CalendarState:
+    """Local mirror of one calendar collection"""
+
+    __slots__ = ("sync_token", "etags", "events", "fresh_until", "changes", "lock")
+
+    def __init__(self):
+        self.sync_token: Optional[str] = None
+        self.etags: Dict[str, Optional[str]] = {}
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.fresh_until = 0.0
+        # Bumped by mark_stale() so a sync that overlapped a write is not trusted
+        self.changes = 0
+        self.lock = asyncio.Lock()
+
+
+class CalendarEventCache:
+    """
+    Bounded LRU of calendar mirrors, keyed by (username, credentials, calendar).
+
+    - refresh() syncs a stale mirror with sync-collection + calendar-multiget;
+      concurrent refreshes of one calendar share a single sync
+    - A rejected sync token falls back to a full resync of that calendar
+    """
+
+    def __init__(self, max_entries: int, fresh_seconds: float, multiget_batch: int):
+        self.max_entries = max_entries
+        self.fresh_seconds = fresh_seconds
+        self.multiget_batch = max(1, multiget_batch)
+        self._entries: "OrderedDict[CacheKey, CalendarState]" = OrderedDict()
+        self.stats = {
+            "hits": 0, "syncs": 0, "full_syncs": 0, "token_resets": 0,
+            "events_fetched": 0, "events_removed": 0, "stale_marks": 0, "invalidations": 0
+        }
+
+    @staticmethod
+    def key(username: str, password: str, calendar_id: str) -> CacheKey:
+        digest = hashlib.sha256(f"{username}\0{password}".encode()).hexdigest()
+        return username, digest, calendar_id
+
+    def _state(self, key: CacheKey) -> CalendarState:
+        state = self._entries.get(key)
+        if state is None:
+            state = self._entries[key] = CalendarState()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return state
+
+    async def refresh(self, username: str, password: str, calendar_id: str) -> CalendarState:
+        """The calendar's mirror, synced with the server unless it is still fresh"""
+        state = self._state(self.key(username, password, calendar_id))
+        if state.fresh_until > time.monotonic():
+            self.stats["hits"] += 1
+            return state
+
+        async with state.lock:
+            # Another request may have synced while this one waited
+            if state.fresh_until > time.monotonic():
+                self.stats["hits"] += 1
+                return state
+            changes = state.changes
+            await self._sync(state, username, password, calendar_id)
+            if changes == state.changes:
+                state.fresh_until = time.monotonic() + self.fresh_seconds
+        return state
+
+    async def _sync(self, state: CalendarState, username: str, password: str, calendar_id: str):
+        sync_token = state.sync_token
+        try:
+            delta = await caldav_service.sync_collection(username, password, calendar_id, sync_token)
+        except CalDAVSyncTokenError:
+            logger.info(f"Sync token for calendar {calendar_id} of {username} expired, resyncing")
+            self.stats["token_resets"] += 1
+            sync_token = None
+            delta = await caldav_service.sync_collection(username, password, calendar_id, None)
+
+        changed: Dict[str, Optional[str]] = delta["changed"]
+        removed = set(delta["removed"])
+        if sync_token is None:
+            # A full listing: anything not in it is gone
+            removed.update(href for href in state.etags if href not in changed)
+            self.stats["full_syncs"] += 1
+        self.stats["syncs"] += 1
+
+        stale = [href for href, etag in changed.items() if etag is None or state.etags.get(href) != etag]
+        batches = [stale[i:i + self.multiget_batch] for i in range(0, len(stale), self.multiget_batch)]
+        fetched_batches = await asyncio.gather(*(
+            caldav_service.multiget(username, password, calendar_id, batch) for batch in batches
+        ))
+
+        # Apply only once every request has succeeded, so a failed sync leaves the mirror intact
+        for href in removed:
+            state.etags.pop(href, None)
+            state.events.pop(href, None)
+        for fetched in fetched_batches:
+            for href, item in fetched.items():
+                state.etags[href] = item["etag"] or changed.get(href)
+                event = caldav_service._parse_ical_event(item["calendar_data"])
+                if event:
+                    state.events[href] = event
+                else:
+                    state.events.pop(href, None)
+            self.stats["events_fetched"] += len(fetched)
+        self.stats["events_removed"] += len(removed)
+        state.sync_token = delta["sync_token"]
+
+    def mark_stale(self, username: str, calendar_id: Optional[str] = None):
+        """Sync one calendar (or all of a user's) on next read; the sync token is kept"""
+        self.stats["stale_marks"] += 1
+        for key, state in self._entries.items():
+            if key[0] == username and (calendar_id is None or key[2] == calendar_id):
+                state.fresh_until = 0.0
+                state.changes += 1
+
+    def invalidate(self, username: Optional[str] = None):
+        """Drop the mirrors of one user, or everything"""
+        self.stats["invalidations"] += 1
+        if username is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == username]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "calendars": len(self._entries),
+            "events": sum(len(state.events) for state in self._entries.values())
+        }
+
+
+calendar_cache = CalendarEventCache(
+    max_entries=settings.CALDAV_CACHE_SIZE,
+    fresh_seconds=settings.CALDAV_CACHE_FRESH_SECONDS,
+    multiget_batch=settings.CALDAV_MULTIGET_BATCH
+)
+
+
+async def get_cached_events(
+    username: str,
+    password: str,
+    calendar_id: str,
+    start: datetime,
+    end: datetime
+) -> List[Dict[str, Any]]:
+    """Cached equivalent of CalDAVService.get_events(); returns copies callers may annotate"""
+    state = await calendar_cache.refresh(username, password, calendar_id)
+    start, end = _naive_utc(start), _naive_utc(end)
+    return [dict(event) for event in state.events.values() if in_range(event, start, end)]
+
+
+async def get_cached_events_many(
+    username: str,
+    password: str,
+    calendar_ids: Iterable[str],
+    start: datetime,
+    end: datetime
+) -> Dict[str, Union[List[Dict[str, Any]], Exception]]:
+    """Events of several calendars, refreshed concurrently; a failing calendar maps to its exception"""
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+    results = await asyncio.gather(
+        *(get_cached_events(username, password, calendar_id, start, end) for calendar_id in calendar_ids),
+        return_exceptions=True
+    )
+    return dict(zip(calendar_ids, results))
+
+
+async def search_cached_events(
+    username: str,
+    password: str,
+    calendar_ids: Iterable[str],
+    query: str,
+    start: datetime,
+    end: datetime
+) -> List[Dict[str, Any]]:
+    """Expanded events whose title, description or location contain query, sorted by start"""
+    query_lower = query.lower()
+    start, end = _naive_utc(start), _naive_utc(end)
+    found = []
+    for calendar_id, events in (await get_cached_events_many(username, password, calendar_ids, start, end)).items():
+        if isinstance(events, Exception):
+            # Continue searching other calendars if one fails
+            logger.warning(f"Error searching calendar {calendar_id}: {events}")
+            continue
+        # Instances share their master's text, so only matching masters are expanded
+        matching = [event for event in events if matches(event, query_lower)]
+        for event in caldav_service.expand_recurring_events(matching, start, end):
+            event["calendar_id"] = calendar_id
+            found.append(event)
+
+    found.sort(key=lambda e: e.get("start", ""))
+    return found
@@ -0,0 +1,229 @@
+"""
+Bheem Workspace - DLP Scanner
+Compiled, cached per-tenant DLP rule sets and a chunked single-sweep scanner
+"""
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Matches longer than this may be missed when they straddle a chunk boundary
+MAX_MATCH_CHARS = 1024
+SCAN_CHUNK_CHARS = 64 * 1024
+SAMPLE_LIMIT = 5
+
+# Numbered/named backreferences and inline global flags cannot be combined
+# into one alternation without changing their meaning
+_UNCOMBINABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+
+def _redact_match(match: str) -> str:
+    """Redact sensitive match for logging"""
+    if len(match) <= 4:
+        return '*' * len(match)
+    return match[:2] + '*' * (len(match) - 4) + match[-2:]
+
+
+@dataclass
+class CompiledRule:
+    """A DLP rule detached from the ORM session, with its regex compiled once"""
+    rule_id: Any
+    name: str
+    pattern: str
+    regex: "re.Pattern"
+    action: str
+    severity: str
+    custom_message: Optional[str] = None
+    apps: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def from_rule(cls, rule) -> Optional["CompiledRule"]:
+        try:
+            regex = re.compile(rule.pattern, re.IGNORECASE)
+        except re.error as e:
+            logger.warning(f"Skipping DLP rule {rule.id} with invalid pattern: {e}")
+            return None
+        scope = rule.scope or {}
+        return cls(
+            rule_id=rule.id,
+            name=rule.name,
+            pattern=rule.pattern,
+            regex=regex,
+            action=rule.action,
+            severity=rule.severity,
+            custom_message=rule.custom_message,
+            apps=frozenset(scope.get('apps') or ())
+        )
+
+    def in_scope(self, content_type: str) -> bool:
+        return not self.apps or content_type in self.apps
+
+
+@dataclass
+class RuleHit:
+    """Matches of one rule in a scanned piece of content"""
+    rule: CompiledRule
+    match_count: int = 0
+    samples: List[str] = field(default_factory=list)
+
+    @property
+    def redacted_samples(self) -> List[str]:
+        return [_redact_match(sample) for sample in self.samples]
+
+
+class CompiledRuleSet:
+    """
+    All enabled DLP rules of a tenant, compiled.
+
+    For each content type the in-scope rules are also combined into one
+    alternation (the gate). One gate search finds the first position where
+    any rule matches, so content without sensitive data costs a single pass
+    and rules are only run from that position on.
+    """
+
+    def __init__(self, rules: List[CompiledRule]):
+        self.rules = rules
+        self._scoped: Dict[str, Tuple[List[CompiledRule], Optional["re.Pattern"]]] = {}
+
+    def for_content_type(self, content_type: str) -> Tuple[List[CompiledRule], Optional["re.Pattern"]]:
+        scoped = self._scoped.get(content_type)
+        if scoped is None:
+            rules = [rule for rule in self.rules if rule.in_scope(content_type)]
+            scoped = self._scoped[content_type] = (rules, self._build_gate(rules))
+        return scoped
+
+    @staticmethod
+    def _build_gate(rules: List[CompiledRule]) -> Optional["re.Pattern"]:
+        if not rules or any(_UNCOMBINABLE.search(rule.pattern) for rule in rules):
+            return None
+        try:
+            return re.compile('|'.join(f'(?:{rule.pattern})' for rule in rules), re.IGNORECASE)
+        except re.error:
+            # e.g. the same group name in two rules
+            return None
+
+    def start_scan(self, content_type: str) -> "DLPScan":
+        rules, gate = self.for_content_type(content_type)
+        return DLPScan(rules, gate)
+
+    def scan(self, content_type: str, content: str) -> List[RuleHit]:
+        """Scan a whole string at once"""
+        scan = self.start_scan(content_type)
+        for start in range(0, len(content), SCAN_CHUNK_CHARS):
+            scan.feed(content[start:start + SCAN_CHUNK_CHARS])
+        return scan.finish()
+
+
+class DLPScan:
+    """
+    Incremental scan over content fed in chunks.
+
+    Only a MAX_MATCH_CHARS tail is carried between chunks and each rule keeps
+    a match count plus a few samples, so memory stays flat however large the
+    content is. Counts follow re.findall (non-overlapping per rule).
+    """
+
+    def __init__(self, rules: List[CompiledRule], gate: Optional["re.Pattern"]):
+        self.rules = rules
+        self.gate = gate
+        self._hits = [RuleHit(rule) for rule in rules]
+        self._resume = [0] * len(rules)
+        self._carry = ''
+        self._offset = 0
+
+    def feed(self, chunk: str):
+        if self.rules:
+            self._process(self._carry + chunk, final=False)
+
+    def finish(self) -> List[RuleHit]:
+        if self.rules:
+            self._process(self._carry, final=True)
+        return [hit for hit in self._hits if hit.match_count]
+
+    def _process(self, buffer: str, final: bool):
+        offset = self._offset
+        # Matches starting at or after the cut wait for the next chunk
+        cut = len(buffer) if final else len(buffer) - MAX_MATCH_CHARS
+        if cut <= 0:
+            self._carry = buffer
+            return
+
+        start = max(min(self._resume) - offset, 0)
+        first = start
+        if self.gate is not None:
+            found = self.gate.search(buffer, start)
+            first = found.start() if found and found.start() < cut else cut
+
+        for index, rule in enumerate(self.rules):
+            pos = max(self._resume[index] - offset, first)
+            if pos < cut:
+                hit = self._hits[index]
+                for match in rule.regex.finditer(buffer, pos):
+                    if match.start() >= cut:
+                        break
+                    hit.match_count += 1
+                    if len(hit.samples) < SAMPLE_LIMIT:
+                        hit.samples.append(match.group(0))
+                    self._resume[index] = offset + max(match.end(), match.start() + 1)
+            self._resume[index] = max(self._resume[index], offset + cut)
+
+        if not final:
+            # Keep one character before the cut for lookbehinds such as \b
+            keep = cut - 1
+            self._carry = buffer[keep:]
+            self._offset = offset + keep
+
+
+# =============================================
+# Rule set cache
+# =============================================
+
+class DLPRuleCache:
+    """
+    Compiled rule sets per tenant.
+
+    Rule CRUD invalidates the tenant's entry; the TTL bounds how long other
+    workers keep scanning with an outdated rule set.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[CompiledRuleSet, float]] = {}
+        self.stats = {"hits": 0, "loads": 0, "invalidations": 0}
+
+    def get(self, tenant_id) -> Optional[CompiledRuleSet]:
+        entry = self._entries.get(str(tenant_id))
+        if entry is None:
+            return None
+        rule_set, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[str(tenant_id)]
+            return None
+        self.stats["hits"] += 1
+        return rule_set
+
+    def put(self, tenant_id, rules) -> CompiledRuleSet:
+        """Compile ORM rules and cache the result"""
+        compiled = [c for c in (CompiledRule.from_rule(rule) for rule in rules) if c is not None]
+        rule_set = CompiledRuleSet(compiled)
+        self._entries[str(tenant_id)] = (rule_set, time.monotonic() + self.ttl_seconds)
+        self.stats["loads"] += 1
+        return rule_set
+
+    def invalidate(self, tenant_id=None):
+        self.stats["invalidations"] += 1
+        if tenant_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(tenant_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "tenants": len(self._entries)}
+
+
+dlp_rule_cache = DLPRuleCache(ttl_seconds=settings.DLP_RULE_CACHE_TTL_SECONDS)
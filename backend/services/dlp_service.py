@@ -5,12 +5,14 @@ Business logic for detecting and handling sensitive data
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 from datetime import datetime
+import asyncio
 import re
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, and_, func
 from sqlalchemy.orm import selectinload
 
 from models.enterprise_models import DLPRule, DLPIncident, DLP_PREDEFINED_PATTERNS
+from services.dlp_scanner import SCAN_CHUNK_CHARS, CompiledRuleSet, RuleHit, dlp_rule_cache
 
 
 class DLPService:
@@ -65,6 +67,7 @@ class DLPService:
 
         self.db.add(rule)
         await self.db.commit()
+        dlp_rule_cache.invalidate(tenant_id)
         await self.db.refresh(rule)
         return rule
 
@@ -127,6 +130,7 @@ class DLPService:
 
         rule.updated_at = datetime.utcnow()
         await self.db.commit()
+        dlp_rule_cache.invalidate(tenant_id)
         await self.db.refresh(rule)
         return rule
 
@@ -143,6 +147,7 @@ class DLPService:
             )
         )
         await self.db.commit()
+        dlp_rule_cache.invalidate(tenant_id)
         return result.rowcount > 0
 
     async def enable_rule(
@@ -177,51 +182,50 @@ class DLPService:
         user_agent: Optional[str] = None
     ) -> Dict[str, Any]:
         """Scan content for DLP violations"""
-        # Get all enabled rules for tenant
-        rules = await self.list_rules(tenant_id, is_enabled=True)
+        rule_set = await self._get_rule_set(tenant_id)
+
+        scan = rule_set.start_scan(content_type)
+        for start in range(0, len(content) if scan.rules else 0, SCAN_CHUNK_CHARS):
+            if start:
+                # Let other requests run between chunks of large content
+                await asyncio.sleep(0)
+            scan.feed(content[start:start + SCAN_CHUNK_CHARS])
+        hits = scan.finish()
 
         violations = []
         should_block = False
         max_severity = None
-
-        for rule in rules:
-            # Check if content matches rule scope
-            if not self._matches_scope(rule.scope, content_type):
-                continue
-
-            # Check for pattern match
-            matches = self._find_matches(rule.pattern, content)
-            if matches:
-                violation = {
-                    'rule_id': rule.id,
-                    'rule_name': rule.name,
-                    'severity': rule.severity,
-                    'action': rule.action,
-                    'match_count': len(matches),
-                    'message': rule.custom_message or f"Sensitive data detected: {rule.name}"
-                }
-                violations.append(violation)
-
-                # Create incident
-                await self._create_incident(
-                    tenant_id=tenant_id,
-                    rule=rule,
-                    user_id=user_id,
-                    content_type=content_type,
-                    content_id=content_id,
-                    content_title=content_title,
-                    matches=matches,
-                    ip_address=ip_address,
-                    user_agent=user_agent
-                )
-
-                if rule.action == 'block':
-                    should_block = True
-
-                # Track max severity
-                severity_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-                if max_severity is None or severity_order.get(rule.severity, 0) > severity_order.get(max_severity, 0):
-                    max_severity = rule.severity
+        severity_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+        for hit in hits:
+            rule = hit.rule
+            violations.append({
+                'rule_id': rule.rule_id,
+                'rule_name': rule.name,
+                'severity': rule.severity,
+                'action': rule.action,
+                'match_count': hit.match_count,
+                'message': rule.custom_message or f"Sensitive data detected: {rule.name}"
+            })
+
+            if rule.action == 'block':
+                should_block = True
+
+            # Track max severity
+            if max_severity is None or severity_order.get(rule.severity, 0) > severity_order.get(max_severity, 0):
+                max_severity = rule.severity
+
+        if hits:
+            await self._create_incidents(
+                tenant_id=tenant_id,
+                hits=hits,
+                user_id=user_id,
+                content_type=content_type,
+                content_id=content_id,
+                content_title=content_title,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
 
         return {
             'has_violations': len(violations) > 0,
@@ -230,68 +234,62 @@ class DLPService:
             'violations': violations
         }
 
-    def _matches_scope(self, scope: Dict, content_type: str) -> bool:
-        """Check if content type matches rule scope"""
-        if not scope:
-            return True
-
-        apps = scope.get('apps', [])
-        if apps and content_type not in apps:
-            return False
-
-        return True
+    async def _get_rule_set(self, tenant_id: UUID) -> CompiledRuleSet:
+        """Compiled enabled rules for the tenant, loaded once per cache TTL"""
+        rule_set = dlp_rule_cache.get(tenant_id)
+        if rule_set is None:
+            result = await self.db.execute(
+                select(DLPRule).where(
+                    DLPRule.tenant_id == tenant_id,
+                    DLPRule.is_enabled == True
+                ).order_by(DLPRule.created_at.desc())
+            )
+            rule_set = dlp_rule_cache.put(tenant_id, result.scalars().all())
+        return rule_set
 
-    def _find_matches(self, pattern: str, content: str) -> List[str]:
-        """Find all pattern matches in content"""
-        try:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            return matches
-        except re.error:
-            return []
-
-    def _redact_match(self, match: str) -> str:
-        """Redact sensitive match for logging"""
-        if len(match) <= 4:
-            return '*' * len(match)
-        return match[:2] + '*' * (len(match) - 4) + match[-2:]
-
-    async def _create_incident(
+    async def _create_incidents(
         self,
         tenant_id: UUID,
-        rule: DLPRule,
+        hits: List[RuleHit],
         user_id: UUID,
         content_type: str,
         content_id: Optional[UUID],
         content_title: Optional[str],
-        matches: List[str],
         ip_address: Optional[str],
         user_agent: Optional[str]
     ):
-        """Create a DLP incident"""
-        # Redact matches for storage
-        redacted_matches = [self._redact_match(m) for m in matches[:5]]
-
-        incident = DLPIncident(
-            tenant_id=tenant_id,
-            rule_id=rule.id,
-            user_id=user_id,
-            content_type=content_type,
-            content_id=content_id,
-            content_title=content_title,
-            matched_pattern=rule.pattern[:200],
-            matched_content=', '.join(redacted_matches),
-            match_count=len(matches),
-            action_taken=rule.action,
-            was_blocked=(rule.action == 'block'),
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-
-        self.db.add(incident)
+        """Create DLP incidents for all matched rules in one transaction"""
+        now = datetime.utcnow()
+
+        self.db.add_all([
+            DLPIncident(
+                tenant_id=tenant_id,
+                rule_id=hit.rule.rule_id,
+                user_id=user_id,
+                content_type=content_type,
+                content_id=content_id,
+                content_title=content_title,
+                matched_pattern=hit.rule.pattern[:200],
+                # Matches are redacted for storage
+                matched_content=', '.join(hit.redacted_samples),
+                match_count=hit.match_count,
+                action_taken=hit.rule.action,
+                was_blocked=(hit.rule.action == 'block'),
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            for hit in hits
+        ])
 
         # Update rule stats
-        rule.trigger_count += 1
-        rule.last_triggered_at = datetime.utcnow()
+        await self.db.execute(
+            update(DLPRule)
+            .where(DLPRule.id.in_([hit.rule.rule_id for hit in hits]))
+            .values(
+                trigger_count=func.coalesce(DLPRule.trigger_count, 0) + 1,
+                last_triggered_at=now
+            )
+        )
 
         await self.db.commit()
 
@@ -11,10 +11,10 @@ from datetime import datetime
 import logging
 import json
 import re
-import hashlib
 import httpx
 
 from core.config import settings
+from services.docs_vector_index import get_docs_vector_store
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +38,8 @@ class DocsAIService:
         self.anthropic_api_key = getattr(settings, "ANTHROPIC_API_KEY", None)
         self.ai_enabled = bool(self.openai_api_key or self.anthropic_api_key)
 
-        # Cache for embeddings
-        self._embedding_cache: Dict[str, List[float]] = {}
+        # Chunk embeddings and vector index (None without an embedding provider)
+        self.vector_store = get_docs_vector_store()
 
     # =========================================================================
     # DOCUMENT SUMMARIZATION
@@ -464,7 +464,8 @@ Suggested tags (comma-separated):"""
         self,
         query: str,
         documents: List[Dict[str, Any]],
-        top_k: int = 10
+        top_k: int = 10,
+        tenant_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Semantic search across documents.
@@ -473,6 +474,7 @@ Suggested tags (comma-separated):"""
             query: Search query
             documents: List of documents with 'id', 'title', 'content'
             top_k: Number of results
+            tenant_id: Vector index partition the documents belong to
 
         Returns:
             Ranked search results
@@ -480,82 +482,58 @@ Suggested tags (comma-separated):"""
         if not documents:
             return []
 
-        # If AI available, use embeddings
-        if self.ai_enabled and self.openai_api_key:
+        # If an embedding provider is configured, use the vector index
+        if self.vector_store is not None:
             try:
-                return await self._embedding_search(query, documents, top_k)
+                matches = await self.vector_store.search(
+                    self._index_key(tenant_id), query, self._index_documents(documents), top_k
+                )
+                return self._ranked_results(documents, matches)
             except Exception as e:
                 logger.warning(f"Embedding search failed: {e}")
 
         # Fallback: keyword-based search
         return self._keyword_search(query, documents, top_k)
 
-    async def _embedding_search(
+    def _index_key(self, tenant_id: Optional[str]) -> str:
+        return str(tenant_id) if tenant_id else "shared"
+
+    def _index_documents(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Documents as the vector index sees them: id, title and plain text"""
+        return [
+            {"id": str(doc.get('id')), "title": doc.get('title', ''), "text": self._clean_html(doc.get('content', ''))}
+            for doc in documents
+        ]
+
+    def _ranked_results(
         self,
-        query: str,
         documents: List[Dict[str, Any]],
-        top_k: int
+        matches: List[tuple]
     ) -> List[Dict[str, Any]]:
-        """Search using embeddings."""
-        # Get query embedding
-        query_embedding = await self._get_embedding(query)
-
-        # Get document embeddings
+        by_id = {str(doc.get('id')): doc for doc in documents}
         results = []
-        for doc in documents:
+        for doc_id, score in matches:
+            doc = by_id[doc_id]
             content = f"{doc.get('title', '')} {self._clean_html(doc.get('content', ''))}"
-            doc_embedding = await self._get_embedding(content[:2000])
-
-            # Calculate cosine similarity
-            similarity = self._cosine_similarity(query_embedding, doc_embedding)
-
             results.append({
                 "id": doc.get('id'),
                 "title": doc.get('title'),
-                "score": similarity,
+                "score": score,
                 "snippet": content[:200]
             })
+        return results
 
-        # Sort by similarity
-        results.sort(key=lambda x: x['score'], reverse=True)
-
-        return results[:top_k]
-
-    async def _get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text."""
-        # Check cache
-        cache_key = hashlib.md5(text.encode()).hexdigest()
-        if cache_key in self._embedding_cache:
-            return self._embedding_cache[cache_key]
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/embeddings",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "input": text[:8000],
-                    "model": "text-embedding-3-small"
-                },
-                timeout=30.0
+    def index_document(self, tenant_id: Optional[str], document_id, title: str, html: str):
+        """Embed a saved document in the background so searches need not"""
+        if self.vector_store is not None:
+            self.vector_store.schedule_index(
+                self._index_key(tenant_id), str(document_id), title or '', self._clean_html(html)
             )
-            response.raise_for_status()
-            data = response.json()
-            embedding = data['data'][0]['embedding']
 
-            # Cache result
-            self._embedding_cache[cache_key] = embedding
-
-            return embedding
-
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        dot_product = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-        return dot_product / (norm_a * norm_b) if norm_a and norm_b else 0
+    async def remove_document(self, document_id):
+        """Drop a deleted document's embeddings"""
+        if self.vector_store is not None:
+            await self.vector_store.remove_document(str(document_id))
 
     def _keyword_search(
         self,
@@ -591,7 +569,8 @@ Suggested tags (comma-separated):"""
         document_id: UUID,
         document_content: str,
         candidates: List[Dict[str, Any]],
-        top_k: int = 5
+        top_k: int = 5,
+        tenant_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Find documents similar to a given document.
@@ -601,6 +580,7 @@ Suggested tags (comma-separated):"""
             document_content: Source document content
             candidates: List of candidate documents
             top_k: Number of similar documents
+            tenant_id: Vector index partition the documents belong to
 
         Returns:
             List of similar documents with scores
@@ -611,19 +591,20 @@ Suggested tags (comma-separated):"""
         if not candidates:
             return []
 
-        # Extract keywords from source
-        keywords = self._extract_keywords(self._clean_html(document_content))
-
-        if self.ai_enabled and self.openai_api_key:
+        # Compare whole documents in the vector index when available
+        if self.vector_store is not None:
             try:
-                return await self._embedding_search(
-                    " ".join(keywords[:10]),
-                    candidates,
-                    top_k
+                # An indexed source is compared by its stored vectors; the content is a fallback
+                source = {"id": str(document_id), "text": self._clean_html(document_content)}
+                matches = await self.vector_store.similar(
+                    self._index_key(tenant_id), source, self._index_documents(candidates), top_k
                 )
+                return self._ranked_results(candidates, matches)
             except Exception as e:
                 logger.warning(f"Similarity search failed: {e}")
 
+        # Extract keywords from source
+        keywords = self._extract_keywords(self._clean_html(document_content))
         return self._keyword_search(" ".join(keywords[:10]), candidates, top_k)
 
     # =========================================================================
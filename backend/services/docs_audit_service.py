@@ -13,8 +13,11 @@ import logging
 import json
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from sqlalchemy import text
 
 from core.config import settings
+from core.database import AsyncSessionLocal
+from services.audit_sink import get_audit_sink
 
 logger = logging.getLogger(__name__)
 
@@ -143,55 +146,31 @@ class DocsAuditService:
             session_id: Session ID
 
         Returns:
-            Created audit log entry
+            Audit log entry (queued for writing)
         """
-        try:
-            conn = self._get_connection()
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                audit_id = uuid4()
-
-                cur.execute("""
-                    INSERT INTO workspace.document_audit_logs (
-                        id, document_id, action, user_id, tenant_id,
-                        details, old_value, new_value,
-                        ip_address, user_agent, session_id,
-                        created_at
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW()
-                    )
-                    RETURNING *
-                """, (
-                    str(audit_id),
-                    str(document_id),
-                    action.value,
-                    str(user_id),
-                    str(tenant_id) if tenant_id else None,
-                    json.dumps(details) if details else None,
-                    json.dumps(old_value) if old_value else None,
-                    json.dumps(new_value) if new_value else None,
-                    ip_address,
-                    user_agent,
-                    session_id
-                ))
-
-                result = cur.fetchone()
-                conn.commit()
-
-                logger.info(
-                    f"Audit log: {action.value} on document {document_id} by user {user_id}"
-                )
-
-                return dict(result)
-
-        except Exception as e:
-            logger.error(f"Failed to create audit log: {e}")
-            # Don't raise - audit logging should not break operations
-            return {
-                "id": str(uuid4()),
-                "document_id": str(document_id),
-                "action": action.value,
-                "error": str(e)
-            }
+        entry = {
+            "id": str(uuid4()),
+            "document_id": str(document_id),
+            "action": action.value,
+            "user_id": str(user_id),
+            "tenant_id": str(tenant_id) if tenant_id else None,
+            "details": json.dumps(details) if details else None,
+            "old_value": json.dumps(old_value) if old_value else None,
+            "new_value": json.dumps(new_value) if new_value else None,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "session_id": session_id,
+            "created_at": datetime.utcnow().isoformat()
+        }
+
+        # Written in bulk by the audit sink; never blocks or breaks the operation
+        await get_audit_sink("document_audit", _write_audit_events).submit(entry)
+
+        logger.debug(
+            f"Audit log: {action.value} on document {document_id} by user {user_id}"
+        )
+
+        return entry
 
     async def get_document_history(
         self,
@@ -670,6 +649,26 @@ class DocsAuditService:
             }
 
 
+async def _write_audit_events(events: List[Dict[str, Any]]):
+    """Bulk insert queued audit events"""
+    rows = [{**event, "created_at": datetime.fromisoformat(event["created_at"])} for event in events]
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("""
+            INSERT INTO workspace.document_audit_logs (
+                id, document_id, action, user_id, tenant_id,
+                details, old_value, new_value,
+                ip_address, user_agent, session_id,
+                created_at
+            ) VALUES (
+                :id, :document_id, :action, :user_id, :tenant_id,
+                :details, :old_value, :new_value,
+                :ip_address, :user_agent, :session_id,
+                :created_at
+            )
+        """), rows)
+        await session.commit()
+
+
 # Singleton instance
 _audit_service: Optional[DocsAuditService] = None
 
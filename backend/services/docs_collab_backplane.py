@@ -0,0 +1,261 @@
+"""
+Bheem Docs - Collaboration Backplane
+====================================
+Fan-out of collaboration room traffic between workers.
+
+Each worker keeps its own rooms and websockets. The backplane carries room
+messages (Yjs updates, awareness, presence, inter-node sync) to every other
+worker holding the same document and shares per-node room statistics.
+
+Implementations:
+- InProcessBackplane: nodes in one process (single worker, tests)
+- RedisBackplane: one pub/sub channel per room; Redis delivers a channel's
+  messages in publish order, which gives per-room ordering across workers
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from uuid import uuid4
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+SnapshotProvider = Callable[[], Dict[str, Any]]
+
+# Node snapshots are refreshed this often and ignored once this old
+HEARTBEAT_INTERVAL_SECONDS = 10
+NODE_STALE_AFTER_SECONDS = 30
+
+
+def _new_node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+
+
+class RoomBackplane:
+    """
+    Interface for cross-worker room messaging.
+
+    Messages are dicts; the backplane stamps them with the sending ``node``
+    and never delivers a node's own messages back to it.
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or _new_node_id()
+        self._handler: Optional[MessageHandler] = None
+        self._snapshot: Optional[SnapshotProvider] = None
+
+    async def start(self, handler: MessageHandler, snapshot: SnapshotProvider) -> None:
+        """Begin delivering remote messages to ``handler``"""
+        self._handler = handler
+        self._snapshot = snapshot
+
+    async def subscribe(self, document_id: str) -> None:
+        raise NotImplementedError
+
+    async def unsubscribe(self, document_id: str) -> None:
+        raise NotImplementedError
+
+    async def publish(self, document_id: str, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def node_snapshots(self) -> List[Dict[str, Any]]:
+        """Latest room snapshot of every live node, this one included"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def _local_snapshot(self) -> Dict[str, Any]:
+        snapshot = self._snapshot() if self._snapshot else {}
+        return {**snapshot, "node_id": self.node_id, "reported_at": time.time()}
+
+
+# =============================================
+# In-process
+# =============================================
+
+class _InProcessHub:
+    """Routes messages between in-process backplanes"""
+
+    def __init__(self):
+        self.nodes: Dict[str, "InProcessBackplane"] = {}
+        self.rooms: Dict[str, Set[str]] = {}
+
+
+_default_hub = _InProcessHub()
+
+
+class InProcessBackplane(RoomBackplane):
+    """Backplane for nodes living in the same process"""
+
+    def __init__(self, node_id: Optional[str] = None, hub: Optional[_InProcessHub] = None):
+        super().__init__(node_id)
+        self.hub = hub or _default_hub
+        self.hub.nodes[self.node_id] = self
+
+    async def subscribe(self, document_id: str) -> None:
+        self.hub.rooms.setdefault(document_id, set()).add(self.node_id)
+
+    async def unsubscribe(self, document_id: str) -> None:
+        nodes = self.hub.rooms.get(document_id)
+        if nodes:
+            nodes.discard(self.node_id)
+            if not nodes:
+                del self.hub.rooms[document_id]
+
+    async def publish(self, document_id: str, message: Dict[str, Any]) -> None:
+        envelope = {**message, "node": self.node_id}
+        for node_id in list(self.hub.rooms.get(document_id, ())):
+            node = self.hub.nodes.get(node_id)
+            if node_id == self.node_id or node is None or node._handler is None:
+                continue
+            try:
+                await node._handler(document_id, envelope)
+            except Exception as e:
+                logger.warning(f"Backplane delivery to {node_id} failed: {e}")
+
+    async def node_snapshots(self) -> List[Dict[str, Any]]:
+        return [node._local_snapshot() for node in self.hub.nodes.values() if node._handler]
+
+    async def close(self) -> None:
+        for document_id in list(self.hub.rooms):
+            await self.unsubscribe(document_id)
+        self.hub.nodes.pop(self.node_id, None)
+
+
+# =============================================
+# Redis
+# =============================================
+
+class RedisBackplane(RoomBackplane):
+    """Backplane over Redis pub/sub, one channel per document"""
+
+    CHANNEL_PREFIX = "docs:collab:room:"
+    NODES_KEY = "docs:collab:nodes"
+
+    def __init__(self, redis_url: str, node_id: Optional[str] = None):
+        super().__init__(node_id)
+        self.redis_url = redis_url
+        self._redis = None
+        self._pubsub = None
+        self._channels: Set[str] = set()
+        self._reader: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def start(self, handler: MessageHandler, snapshot: SnapshotProvider) -> None:
+        import redis.asyncio as redis
+
+        await super().start(handler, snapshot)
+        self._redis = redis.from_url(self.redis_url, decode_responses=True)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        loop = asyncio.get_running_loop()
+        self._reader = loop.create_task(self._read_loop())
+        self._heartbeat = loop.create_task(self._heartbeat_loop())
+        logger.info(f"Collaboration backplane connected to Redis as {self.node_id}")
+
+    async def subscribe(self, document_id: str) -> None:
+        channel = self.CHANNEL_PREFIX + document_id
+        if channel not in self._channels:
+            self._channels.add(channel)
+            await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, document_id: str) -> None:
+        channel = self.CHANNEL_PREFIX + document_id
+        if channel in self._channels:
+            self._channels.discard(channel)
+            await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, document_id: str, message: Dict[str, Any]) -> None:
+        envelope = json.dumps({**message, "node": self.node_id})
+        try:
+            await self._redis.publish(self.CHANNEL_PREFIX + document_id, envelope)
+        except Exception as e:
+            # Local users still get the message; remote workers miss it
+            logger.warning(f"Backplane publish for {document_id} failed: {e}")
+
+    async def node_snapshots(self) -> List[Dict[str, Any]]:
+        local = self._local_snapshot()
+        snapshots = [local]
+        try:
+            entries = await self._redis.hgetall(self.NODES_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read collaboration node stats: {e}")
+            return snapshots
+
+        cutoff = time.time() - NODE_STALE_AFTER_SECONDS
+        for node_id, raw in entries.items():
+            if node_id == self.node_id:
+                continue
+            try:
+                snapshot = json.loads(raw)
+            except ValueError:
+                continue
+            if snapshot.get("reported_at", 0) >= cutoff:
+                snapshots.append(snapshot)
+        return snapshots
+
+    async def close(self) -> None:
+        for task in (self._reader, self._heartbeat):
+            if task:
+                task.cancel()
+        self._reader = self._heartbeat = None
+        if self._redis is None:
+            return
+        try:
+            await self._redis.hdel(self.NODES_KEY, self.node_id)
+            await self._pubsub.aclose()
+            await self._redis.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing collaboration backplane: {e}")
+
+    async def _read_loop(self) -> None:
+        """Deliver remote messages one at a time, preserving channel order"""
+        backoff = 1
+        while True:
+            try:
+                if not self._channels:
+                    await asyncio.sleep(0.2)
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                backoff = 1
+                if not message or message.get("type") != "message":
+                    continue
+                envelope = json.loads(message["data"])
+                if envelope.get("node") == self.node_id:
+                    continue
+                document_id = message["channel"][len(self.CHANNEL_PREFIX):]
+                await self._handler(document_id, envelope)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Backplane read failed, retrying in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                # Re-subscribe in case the connection was dropped
+                try:
+                    if self._channels:
+                        await self._pubsub.subscribe(*self._channels)
+                except Exception:
+                    pass
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            try:
+                await self._redis.hset(self.NODES_KEY, self.node_id, json.dumps(self._local_snapshot()))
+            except Exception as e:
+                logger.warning(f"Backplane heartbeat failed: {e}")
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+
+
+def create_backplane() -> RoomBackplane:
+    """Backplane selected by DOCS_COLLAB_BACKPLANE"""
+    if settings.DOCS_COLLAB_BACKPLANE == "redis":
+        return RedisBackplane(settings.REDIS_URL)
+    return InProcessBackplane()
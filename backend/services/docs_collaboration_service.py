@@ -18,13 +18,15 @@ import logging
 import json
 import asyncio
 import hashlib
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from sqlalchemy import bindparam, text
 
-from core.config import settings
+from core.database import ERPSessionLocal
+from services.docs_collab_backplane import RoomBackplane, create_backplane
+from services.yjs_document import YDocument, YjsDecodeError, merge_updates
 
 logger = logging.getLogger(__name__)
 
@@ -77,11 +79,17 @@ class CollaborationRoom:
     document_id: str
     session_id: str
     users: Dict[str, ConnectedUser] = field(default_factory=dict)
-    document_state: Optional[bytes] = None  # Yjs document state
+    remote_users: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # Users on other workers
+    document: YDocument = field(default_factory=YDocument)  # Merged Yjs document
     created_at: datetime = field(default_factory=datetime.utcnow)
     last_activity: datetime = field(default_factory=datetime.utcnow)
-    pending_updates: List[bytes] = field(default_factory=list)
-    save_scheduled: bool = False
+
+    @property
+    def document_state(self) -> Optional[bytes]:
+        """Full Yjs state as a single update, or None for an empty document"""
+        if self.document.is_empty:
+            return None
+        return self.document.encode_state()
 
 
 # Cursor colors for users
@@ -101,17 +109,21 @@ class DocsCollaborationService:
     - User connections and awareness
     - Document state synchronization
     - Periodic auto-save
+
+    Database writes go through the shared async ERP engine and are batched:
+    presence changes are buffered and flushed every few seconds, and
+    autosave writes every room edited since the last run in one transaction.
+
+    Rooms are per worker. Updates, awareness and presence are relayed to
+    other workers holding the same document through the room backplane, and
+    a worker opening a room pulls the edits it lacks from its peers.
     """
 
-    def __init__(self):
+    def __init__(self, backplane: Optional[RoomBackplane] = None):
         """Initialize collaboration service."""
-        self.db_config = {
-            'host': settings.ERP_DB_HOST,
-            'port': settings.ERP_DB_PORT,
-            'database': settings.ERP_DB_NAME,
-            'user': settings.ERP_DB_USER,
-            'password': settings.ERP_DB_PASSWORD,
-        }
+        # Cross-worker fan-out (in-process unless DOCS_COLLAB_BACKPLANE=redis)
+        self.backplane = backplane or create_backplane()
+        self._backplane_started = False
 
         # Active collaboration rooms
         self.rooms: Dict[str, CollaborationRoom] = {}
@@ -125,9 +137,14 @@ class DocsCollaborationService:
         # Cleanup interval for stale rooms
         self.cleanup_interval = 300  # 5 minutes
 
-    def _get_connection(self):
-        """Get database connection."""
-        return psycopg2.connect(**self.db_config)
+        # Presence flush interval (seconds)
+        self.presence_flush_interval = 2
+
+        # Write-behind buffers, drained by the flush loop
+        self._dirty_rooms: Set[str] = set()
+        self._presence_upserts: Dict[tuple, Dict[str, Any]] = {}
+        self._presence_deletes: Set[tuple] = set()
+        self._flusher: Optional[asyncio.Task] = None
 
     def _assign_color(self, user_id: str, existing_colors: Set[str]) -> str:
         """Assign a unique color to a user."""
@@ -168,15 +185,33 @@ class DocsCollaborationService:
         # Load existing session state from database
         document_state = await self._load_session_state(document_id)
 
+        document = YDocument()
+        if document_state:
+            try:
+                document = YDocument(document_state)
+            except YjsDecodeError as e:
+                logger.error(f"Stored Yjs state for document {document_id} is unreadable: {e}")
+
         room = CollaborationRoom(
             document_id=document_id,
             session_id=session_id or str(uuid4()),
-            document_state=document_state
+            document=document
         )
 
         self.rooms[document_id] = room
         self.connections[document_id] = {}
 
+        # Join the room on other workers and ask them for edits not yet saved
+        try:
+            await self._ensure_backplane()
+            await self.backplane.subscribe(document_id)
+            await self._publish(document_id, {
+                "kind": "sync_request",
+                "state_vector": room.document.encode_state_vector().hex()
+            })
+        except Exception as e:
+            logger.warning(f"Room {document_id} is not shared with other workers: {e}")
+
         logger.info(f"Created collaboration room for document {document_id}")
 
         return room
@@ -193,14 +228,19 @@ class DocsCollaborationService:
 
         room = self.rooms[document_id]
 
-        # Save final state
-        if room.document_state:
-            await self._save_session_state(document_id, room.document_state)
+        # Save final state if it changed since the last autosave
+        if document_id in self._dirty_rooms and room.document_state:
+            self._dirty_rooms.discard(document_id)
+            await self._save_document_content(document_id, room.document_state)
 
         # Clean up
         del self.rooms[document_id]
         if document_id in self.connections:
             del self.connections[document_id]
+        try:
+            await self.backplane.unsubscribe(document_id)
+        except Exception as e:
+            logger.warning(f"Failed to leave backplane room {document_id}: {e}")
 
         logger.info(f"Closed collaboration room for document {document_id}")
 
@@ -235,6 +275,7 @@ class DocsCollaborationService:
 
         # Assign color
         existing_colors = {u.color for u in room.users.values()}
+        existing_colors.update(u["color"] for u in room.remote_users.values())
         color = self._assign_color(user_id, existing_colors)
 
         # Create user
@@ -266,24 +307,18 @@ class DocsCollaborationService:
             },
             exclude_user=user_id
         )
+        await self._publish(document_id, {"kind": "user_joined", "user": self._user_payload(user)})
 
         logger.info(f"User {user_name} joined document {document_id}")
 
         return {
             "type": MessageType.JOIN,
             "session_id": room.session_id,
-            "document_state": room.document_state.hex() if room.document_state else None,
+            # Clients fetch content with sync_step1 so they only download what they lack
+            "state_vector": room.document.encode_state_vector().hex(),
             "users": [
-                {
-                    "id": u.user_id,
-                    "name": u.user_name,
-                    "avatar": u.user_avatar,
-                    "color": u.color,
-                    "cursor": u.cursor_position,
-                    "selection": u.selection
-                }
-                for u in room.users.values()
-            ],
+                self._user_payload(u) for u in room.users.values()
+            ] + list(room.remote_users.values()),
             "your_color": color
         }
 
@@ -323,6 +358,11 @@ class DocsCollaborationService:
                 },
                 exclude_user=user_id
             )
+            await self._publish(document_id, {
+                "kind": "user_left",
+                "user_id": user_id,
+                "user_name": user.user_name
+            })
 
             logger.info(f"User {user.user_name} left document {document_id}")
 
@@ -343,7 +383,8 @@ class DocsCollaborationService:
         """
         Handle Yjs sync step 1 (state vector exchange).
 
-        Client sends their state vector, server responds with missing updates.
+        Client sends their state vector, server responds with only the
+        updates that vector does not cover (all of them for an empty vector).
 
         Args:
             document_id: Document ID
@@ -357,13 +398,14 @@ class DocsCollaborationService:
         if not room:
             return {"type": MessageType.ERROR, "message": "Room not found"}
 
-        # In a real implementation, we would compute the diff
-        # between client state and server state using y-py
-        # For now, return full document state
+        try:
+            update = room.document.diff(state_vector)
+        except YjsDecodeError:
+            return {"type": MessageType.ERROR, "message": "Invalid state vector"}
 
         return {
             "type": MessageType.SYNC_STEP2,
-            "update": room.document_state.hex() if room.document_state else None
+            "update": update.hex()
         }
 
     async def handle_sync_update(
@@ -381,19 +423,17 @@ class DocsCollaborationService:
             document_id: Document ID
             user_id: User ID
             update: Yjs update bytes
+
+        Raises:
+            YjsDecodeError: If the update is malformed (it is not applied or broadcast)
         """
         room = self.rooms.get(document_id)
         if not room:
             return
 
-        # In a real implementation with y-py:
-        # 1. Apply update to server Y.Doc
-        # 2. Get merged state
-        # For now, we just store the latest update
-
-        room.document_state = update
+        room.document.apply_update(update)
         room.last_activity = datetime.utcnow()
-        room.pending_updates.append(update)
+        self._dirty_rooms.add(document_id)
 
         # Update user activity
         if user_id in room.users:
@@ -409,27 +449,10 @@ class DocsCollaborationService:
             },
             exclude_user=user_id
         )
+        await self._publish(document_id, {"kind": "update", "update": update.hex(), "from_user": user_id})
 
-        # Schedule auto-save
-        if not room.save_scheduled:
-            room.save_scheduled = True
-            asyncio.create_task(self._schedule_auto_save(document_id))
-
-    async def _schedule_auto_save(self, document_id: str) -> None:
-        """Schedule auto-save after delay."""
-        await asyncio.sleep(self.auto_save_interval)
-
-        room = self.rooms.get(document_id)
-        if room and room.pending_updates:
-            await self._save_document_content(document_id, room.document_state)
-            room.pending_updates.clear()
-            room.save_scheduled = False
-
-            # Notify users of save
-            await self._broadcast(
-                document_id,
-                {"type": MessageType.DOC_SAVED, "saved_at": datetime.utcnow().isoformat()}
-            )
+        # Auto-save is picked up by the flush loop
+        self._ensure_flusher()
 
     # =========================================================================
     # AWARENESS (CURSORS/PRESENCE)
@@ -472,6 +495,13 @@ class DocsCollaborationService:
             },
             exclude_user=user_id
         )
+        await self._publish(document_id, {
+            "kind": "awareness",
+            "user_id": user_id,
+            "cursor": cursor_position,
+            "selection": selection,
+            "color": user.color
+        })
 
     async def get_awareness(self, document_id: str) -> List[Dict]:
         """Get current awareness state for all users in a room."""
@@ -490,6 +520,17 @@ class DocsCollaborationService:
                 "last_activity": u.last_activity.isoformat()
             }
             for u in room.users.values()
+        ] + [
+            {
+                "user_id": u["id"],
+                "user_name": u["name"],
+                "avatar": u["avatar"],
+                "color": u["color"],
+                "cursor": u["cursor"],
+                "selection": u["selection"],
+                "last_activity": None
+            }
+            for u in room.remote_users.values()
         ]
 
     # =========================================================================
@@ -522,9 +563,13 @@ class DocsCollaborationService:
             state_vector = bytes.fromhex(message.get("state_vector", ""))
             return await self.handle_sync_step1(document_id, user_id, state_vector)
 
-        elif msg_type == MessageType.SYNC_UPDATE:
-            update = bytes.fromhex(message.get("update", ""))
-            await self.handle_sync_update(document_id, user_id, update)
+        elif msg_type in (MessageType.SYNC_UPDATE, MessageType.SYNC_STEP2):
+            # Step 2 from a client carries the edits the server is missing
+            try:
+                update = bytes.fromhex(message.get("update") or "")
+                await self.handle_sync_update(document_id, user_id, update)
+            except (ValueError, YjsDecodeError):
+                return {"type": MessageType.ERROR, "message": "Invalid update"}
 
         elif msg_type == MessageType.AWARENESS_UPDATE:
             await self.handle_awareness_update(
@@ -538,6 +583,7 @@ class DocsCollaborationService:
             # Manual save request
             room = self.rooms.get(document_id)
             if room and room.document_state:
+                self._dirty_rooms.discard(document_id)
                 await self._save_document_content(document_id, room.document_state)
                 return {
                     "type": MessageType.DOC_SAVED,
@@ -598,59 +644,156 @@ class DocsCollaborationService:
             return False
 
     # =========================================================================
-    # DATABASE OPERATIONS
+    # CROSS-WORKER BACKPLANE
     # =========================================================================
 
-    async def _load_session_state(self, document_id: str) -> Optional[bytes]:
-        """Load Yjs state from database."""
-        conn = self._get_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+    async def _ensure_backplane(self) -> None:
+        if not self._backplane_started:
+            self._backplane_started = True
+            await self.backplane.start(self._on_backplane_message, self._node_snapshot)
 
+    async def _publish(self, document_id: str, message: Dict[str, Any]) -> None:
+        """Relay a room message to other workers; local delivery never depends on it."""
+        if not self._backplane_started:
+            return
         try:
-            cur.execute("""
-                SELECT yjs_state
-                FROM workspace.docs_sessions
-                WHERE document_id = %s AND expires_at > NOW()
-                ORDER BY created_at DESC
-                LIMIT 1
-            """, (document_id,))
+            await self.backplane.publish(document_id, message)
+        except Exception as e:
+            logger.warning(f"Failed to relay {message.get('kind')} for {document_id}: {e}")
 
-            row = cur.fetchone()
-            return row['yjs_state'] if row and row['yjs_state'] else None
+    @staticmethod
+    def _user_payload(user: ConnectedUser) -> Dict[str, Any]:
+        return {
+            "id": user.user_id,
+            "name": user.user_name,
+            "avatar": user.user_avatar,
+            "color": user.color,
+            "cursor": user.cursor_position,
+            "selection": user.selection
+        }
 
-        except Exception as e:
-            logger.warning(f"Failed to load session state: {e}")
-            return None
-        finally:
-            cur.close()
-            conn.close()
+    async def _on_backplane_message(self, document_id: str, message: Dict[str, Any]) -> None:
+        """
+        Apply a message relayed from another worker.
 
-    async def _save_session_state(
-        self,
-        document_id: str,
-        yjs_state: bytes
-    ) -> bool:
-        """Save Yjs state to database."""
-        conn = self._get_connection()
-        cur = conn.cursor()
+        Messages for one room arrive in publish order and are handled one at
+        a time, so local clients see remote edits in the order they were made.
+        """
+        room = self.rooms.get(document_id)
+        if not room:
+            return
 
-        try:
-            cur.execute("""
-                UPDATE workspace.docs_sessions
-                SET yjs_state = %s, updated_at = NOW()
-                WHERE document_id = %s AND expires_at > NOW()
-            """, (yjs_state, document_id))
+        kind = message.get("kind")
+
+        if kind == "update":
+            try:
+                room.document.apply_update(bytes.fromhex(message["update"]))
+            except (ValueError, YjsDecodeError) as e:
+                logger.warning(f"Dropped malformed relayed update for {document_id}: {e}")
+                return
+            room.last_activity = datetime.utcnow()
+            # Every worker holding the edit persists it, so a lost relay or save is repaired
+            self._dirty_rooms.add(document_id)
+            await self._broadcast(document_id, {
+                "type": MessageType.SYNC_UPDATE,
+                "update": message["update"],
+                "from_user": message.get("from_user")
+            })
+
+        elif kind == "awareness":
+            remote = room.remote_users.get(message.get("user_id"))
+            if remote:
+                remote["cursor"] = message.get("cursor")
+                remote["selection"] = message.get("selection")
+            await self._broadcast(document_id, {
+                "type": MessageType.AWARENESS_UPDATE,
+                "user_id": message.get("user_id"),
+                "cursor": message.get("cursor"),
+                "selection": message.get("selection"),
+                "color": message.get("color")
+            })
+
+        elif kind == "user_joined":
+            user = message["user"]
+            room.remote_users[user["id"]] = user
+            await self._broadcast(document_id, {
+                "type": MessageType.USER_JOINED,
+                "user": {key: user.get(key) for key in ("id", "name", "avatar", "color")}
+            })
+
+        elif kind == "user_left":
+            room.remote_users.pop(message.get("user_id"), None)
+            await self._broadcast(document_id, {
+                "type": MessageType.USER_LEFT,
+                "user_id": message.get("user_id"),
+                "user_name": message.get("user_name")
+            })
+
+        elif kind == "sync_request":
+            # A worker just opened this room; send what it is missing and who is here
+            try:
+                update = room.document.diff(bytes.fromhex(message.get("state_vector", "")))
+            except (ValueError, YjsDecodeError):
+                return
+            await self._publish(document_id, {
+                "kind": "sync_reply",
+                "to": message.get("node"),
+                "update": update.hex(),
+                "users": [self._user_payload(u) for u in room.users.values()]
+            })
+
+        elif kind == "sync_reply" and message.get("to") == self.backplane.node_id:
+            for user in message.get("users", []):
+                room.remote_users[user["id"]] = user
+            try:
+                room.document.apply_update(bytes.fromhex(message["update"]))
+            except (ValueError, YjsDecodeError) as e:
+                logger.warning(f"Dropped malformed sync reply for {document_id}: {e}")
+                return
+            # Clients that synced before the reply arrived pick up the difference
+            await self._broadcast(document_id, {
+                "type": MessageType.SYNC_UPDATE,
+                "update": message["update"],
+                "from_user": None
+            })
 
-            conn.commit()
-            return True
+    def _node_snapshot(self) -> Dict[str, Any]:
+        """This worker's rooms, as shared with the other workers"""
+        return {
+            "rooms": [
+                {
+                    "document_id": doc_id,
+                    "user_count": len(room.users),
+                    "document": room.document.get_stats(),
+                    "created_at": room.created_at.isoformat(),
+                    "last_activity": room.last_activity.isoformat()
+                }
+                for doc_id, room in self.rooms.items()
+            ]
+        }
+
+    # =========================================================================
+    # DATABASE OPERATIONS
+    # =========================================================================
+
+    async def _load_session_state(self, document_id: str) -> Optional[bytes]:
+        """Load Yjs state from database."""
+        try:
+            async with ERPSessionLocal() as session:
+                result = await session.execute(text("""
+                    SELECT yjs_state
+                    FROM workspace.docs_sessions
+                    WHERE document_id = :document_id AND expires_at > NOW()
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                """), {"document_id": document_id})
+
+                row = result.first()
+                return bytes(row.yjs_state) if row and row.yjs_state else None
 
         except Exception as e:
-            conn.rollback()
-            logger.error(f"Failed to save session state: {e}")
-            return False
-        finally:
-            cur.close()
-            conn.close()
+            logger.warning(f"Failed to load session state: {e}")
+            return None
 
     async def _save_document_content(
         self,
@@ -663,90 +806,188 @@ class DocsCollaborationService:
         Note: In a real implementation, we would decode the Yjs state
         to get the Tiptap JSON content. For now, we just save the raw state.
         """
-        conn = self._get_connection()
-        cur = conn.cursor()
-
-        try:
-            # Save Yjs state to session
-            await self._save_session_state(document_id, yjs_state)
-
-            # Update document's updated_at
-            cur.execute("""
-                UPDATE dms.documents
-                SET updated_at = NOW()
-                WHERE id = %s
-            """, (document_id,))
+        saved = await self._save_documents({document_id: yjs_state})
+        if saved:
+            logger.info(f"Saved document {document_id}")
+        return saved
 
-            conn.commit()
+    async def _save_documents(self, states: Dict[str, bytes]) -> bool:
+        """
+        Write the Yjs state of several documents in one transaction.
 
-            logger.info(f"Auto-saved document {document_id}")
-            return True
+        Other workers save the same documents, so the stored state is locked
+        and merged with ours rather than overwritten: edits only another
+        worker has seen are kept.
+        """
+        try:
+            async with ERPSessionLocal() as session:
+                result = await session.execute(text("""
+                    SELECT document_id, yjs_state
+                    FROM workspace.docs_sessions
+                    WHERE document_id IN :document_ids AND expires_at > NOW()
+                    ORDER BY document_id
+                    FOR UPDATE
+                """).bindparams(bindparam("document_ids", expanding=True)), {"document_ids": list(states)})
+
+                stored: Dict[str, List[bytes]] = {}
+                for row in result:
+                    if row.yjs_state:
+                        stored.setdefault(str(row.document_id), []).append(bytes(row.yjs_state))
+
+                params = [
+                    {"document_id": document_id, "yjs_state": self._merge_stored(document_id, yjs_state, stored)}
+                    for document_id, yjs_state in states.items()
+                ]
+
+                await session.execute(text("""
+                    UPDATE workspace.docs_sessions
+                    SET yjs_state = :yjs_state, updated_at = NOW()
+                    WHERE document_id = :document_id AND expires_at > NOW()
+                """), params)
+
+                # Update documents' updated_at
+                await session.execute(text("""
+                    UPDATE dms.documents
+                    SET updated_at = NOW()
+                    WHERE id = :document_id
+                """), [{"document_id": p["document_id"]} for p in params])
+
+                await session.commit()
+                return True
 
         except Exception as e:
-            conn.rollback()
-            logger.error(f"Failed to save document content: {e}")
+            logger.error(f"Failed to save {len(states)} document(s): {e}")
             return False
-        finally:
-            cur.close()
-            conn.close()
+
+    @staticmethod
+    def _merge_stored(document_id: str, yjs_state: bytes, stored: Dict[str, List[bytes]]) -> bytes:
+        """Our state merged with the states saved for the document"""
+        others = [state for state in stored.get(document_id, []) if state != yjs_state]
+        if not others:
+            return yjs_state
+        try:
+            return merge_updates(others + [yjs_state])
+        except YjsDecodeError as e:
+            logger.warning(f"Overwriting unreadable saved state of {document_id}: {e}")
+            return yjs_state
 
     async def _update_db_presence(
         self,
         document_id: str,
         user: ConnectedUser
     ) -> None:
-        """Update user presence in database."""
-        conn = self._get_connection()
-        cur = conn.cursor()
-
-        try:
-            cur.execute("""
-                INSERT INTO workspace.docs_presence (
-                    document_id, user_id, user_name, user_avatar,
-                    color, last_seen_at
-                ) VALUES (%s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (document_id, user_id) DO UPDATE SET
-                    user_name = EXCLUDED.user_name,
-                    user_avatar = EXCLUDED.user_avatar,
-                    color = EXCLUDED.color,
-                    last_seen_at = NOW()
-            """, (
-                document_id, user.user_id, user.user_name,
-                user.user_avatar, user.color
-            ))
-
-            conn.commit()
-
-        except Exception as e:
-            conn.rollback()
-            logger.warning(f"Failed to update presence: {e}")
-        finally:
-            cur.close()
-            conn.close()
+        """Queue a presence upsert for the next flush."""
+        key = (document_id, user.user_id)
+        self._presence_deletes.discard(key)
+        self._presence_upserts[key] = {
+            "document_id": document_id,
+            "user_id": user.user_id,
+            "user_name": user.user_name,
+            "user_avatar": user.user_avatar,
+            "color": user.color
+        }
+        self._ensure_flusher()
 
     async def _remove_db_presence(
         self,
         document_id: str,
         user_id: str
     ) -> None:
-        """Remove user presence from database."""
-        conn = self._get_connection()
-        cur = conn.cursor()
+        """Queue a presence removal for the next flush."""
+        key = (document_id, user_id)
+        self._presence_upserts.pop(key, None)
+        self._presence_deletes.add(key)
+        self._ensure_flusher()
 
-        try:
-            cur.execute("""
-                DELETE FROM workspace.docs_presence
-                WHERE document_id = %s AND user_id = %s
-            """, (document_id, user_id))
+    # =========================================================================
+    # WRITE-BEHIND FLUSHING
+    # =========================================================================
 
-            conn.commit()
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        """Flush presence every few seconds and autosave every auto_save_interval."""
+        last_autosave = time.monotonic()
+        while True:
+            await asyncio.sleep(self.presence_flush_interval)
+            await self._flush_presence()
+            if time.monotonic() - last_autosave >= self.auto_save_interval:
+                last_autosave = time.monotonic()
+                await self._flush_autosaves()
+
+    async def _flush_presence(self) -> None:
+        """Write all buffered presence changes in one transaction."""
+        upserts = list(self._presence_upserts.values())
+        deletes = [
+            {"document_id": document_id, "user_id": user_id}
+            for document_id, user_id in self._presence_deletes
+        ]
+        if not upserts and not deletes:
+            return
+        self._presence_upserts = {}
+        self._presence_deletes = set()
+
+        try:
+            async with ERPSessionLocal() as session:
+                if upserts:
+                    await session.execute(text("""
+                        INSERT INTO workspace.docs_presence (
+                            document_id, user_id, user_name, user_avatar,
+                            color, last_seen_at
+                        ) VALUES (:document_id, :user_id, :user_name, :user_avatar, :color, NOW())
+                        ON CONFLICT (document_id, user_id) DO UPDATE SET
+                            user_name = EXCLUDED.user_name,
+                            user_avatar = EXCLUDED.user_avatar,
+                            color = EXCLUDED.color,
+                            last_seen_at = NOW()
+                    """), upserts)
+                if deletes:
+                    await session.execute(text("""
+                        DELETE FROM workspace.docs_presence
+                        WHERE document_id = :document_id AND user_id = :user_id
+                    """), deletes)
+                await session.commit()
 
         except Exception as e:
-            conn.rollback()
-            logger.warning(f"Failed to remove presence: {e}")
-        finally:
-            cur.close()
-            conn.close()
+            # Presence is advisory; the next join/leave writes it again
+            logger.warning(f"Failed to flush presence ({len(upserts)} upserts, {len(deletes)} removals): {e}")
+
+    async def _flush_autosaves(self) -> None:
+        """Save every room edited since the last autosave in one bulk write."""
+        states = {}
+        for document_id in self._dirty_rooms:
+            room = self.rooms.get(document_id)
+            if room and room.document_state:
+                states[document_id] = room.document_state
+        self._dirty_rooms.clear()
+        if not states:
+            return
+
+        if not await self._save_documents(states):
+            # Retry on the next run unless newer edits already re-marked them
+            self._dirty_rooms.update(states)
+            return
+
+        logger.info(f"Auto-saved {len(states)} document(s)")
+        saved_at = datetime.utcnow().isoformat()
+        for document_id in states:
+            await self._broadcast(
+                document_id,
+                {"type": MessageType.DOC_SAVED, "saved_at": saved_at}
+            )
+
+    async def shutdown(self) -> None:
+        """Stop the flush loop and write out everything still buffered."""
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        await self._flush_presence()
+        await self._flush_autosaves()
+        if self._backplane_started:
+            self._backplane_started = False
+            await self.backplane.close()
 
     # =========================================================================
     # CLEANUP
@@ -767,18 +1008,37 @@ class DocsCollaborationService:
         return len(stale_rooms)
 
     async def get_room_stats(self) -> Dict[str, Any]:
-        """Get statistics about active rooms."""
+        """Get statistics about active rooms across all workers."""
+        await self._ensure_backplane()
+        try:
+            snapshots = await self.backplane.node_snapshots()
+        except Exception as e:
+            logger.warning(f"Falling back to local room stats: {e}")
+            snapshots = [{"node_id": self.backplane.node_id, **self._node_snapshot()}]
+
+        rooms: Dict[str, Dict[str, Any]] = {}
+        for snapshot in snapshots:
+            for room in snapshot.get("rooms", []):
+                merged = rooms.get(room["document_id"])
+                if merged is None:
+                    rooms[room["document_id"]] = {**room, "nodes": [snapshot["node_id"]]}
+                    continue
+                merged["user_count"] += room["user_count"]
+                merged["nodes"].append(snapshot["node_id"])
+                merged["created_at"] = min(merged["created_at"], room["created_at"])
+                merged["last_activity"] = max(merged["last_activity"], room["last_activity"])
+
         return {
-            "total_rooms": len(self.rooms),
-            "total_users": sum(len(r.users) for r in self.rooms.values()),
-            "rooms": [
+            "total_rooms": len(rooms),
+            "total_users": sum(room["user_count"] for room in rooms.values()),
+            "rooms": list(rooms.values()),
+            "nodes": [
                 {
-                    "document_id": doc_id,
-                    "user_count": len(room.users),
-                    "created_at": room.created_at.isoformat(),
-                    "last_activity": room.last_activity.isoformat()
+                    "node_id": snapshot["node_id"],
+                    "rooms": len(snapshot.get("rooms", [])),
+                    "users": sum(room["user_count"] for room in snapshot.get("rooms", []))
                 }
-                for doc_id, room in self.rooms.items()
+                for snapshot in snapshots
             ]
         }
 
@@ -16,12 +16,16 @@ from typing import Optional, List, Dict, Any
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
+import asyncio
+import json
 import mimetypes
 import logging
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
 from core.config import settings
+from services.audit_sink import get_audit_sink
+from services.docs_ai_service import get_docs_ai_service
 from services.docs_storage_service import get_docs_storage_service, DocsStorageService
 
 logger = logging.getLogger(__name__)
@@ -309,14 +313,14 @@ class DocsDocumentService:
                     )
                 """, (str(document_id), entity_type, str(entity_id), str(created_by)))
 
+            conn.commit()
+
             # Log audit
             await self._log_audit(
-                conn, document_id, AuditAction.UPLOAD, created_by,
+                document_id, AuditAction.UPLOAD, created_by,
                 details={'filename': filename, 'size': storage_result['file_size']}
             )
 
-            conn.commit()
-
             logger.info(f"Created document: {document_id} - {title}")
 
             return {
@@ -374,8 +378,8 @@ class DocsDocumentService:
                     WHERE id = %s
                 """, (str(user_id), str(document_id)))
 
-                await self._log_audit(conn, document_id, AuditAction.VIEW, user_id)
                 conn.commit()
+                await self._log_audit(document_id, AuditAction.VIEW, user_id)
 
             return dict(row)
 
@@ -631,8 +635,8 @@ class DocsDocumentService:
             if not row:
                 raise ValueError(f"Document not found: {document_id}")
 
-            await self._log_audit(conn, document_id, AuditAction.UPDATE, updated_by)
             conn.commit()
+            await self._log_audit(document_id, AuditAction.UPDATE, updated_by)
 
             return dict(row)
 
@@ -681,6 +685,11 @@ class DocsDocumentService:
                         if version['storage_path'] != row['storage_path']:
                             await self.storage.delete_file(version['storage_path'])
 
+                    # Queued audit events would re-insert rows after the purge
+                    await get_audit_sink("dms_audit", _write_dms_audit_events).discard(
+                        lambda event: event['document_id'] == str(document_id)
+                    )
+
                     # Delete from database
                     cur.execute("DELETE FROM dms.document_versions WHERE document_id = %s", (str(document_id),))
                     cur.execute("DELETE FROM dms.document_comments WHERE document_id = %s", (str(document_id),))
@@ -699,9 +708,12 @@ class DocsDocumentService:
                     WHERE id = %s
                 """, (str(deleted_by), str(document_id)))
 
-                await self._log_audit(conn, document_id, AuditAction.DELETE, deleted_by)
-
             conn.commit()
+
+            if not hard_delete:
+                await self._log_audit(document_id, AuditAction.DELETE, deleted_by)
+            else:
+                await get_docs_ai_service().remove_document(document_id)
             return True
 
         except Exception as e:
@@ -808,13 +820,13 @@ class DocsDocumentService:
                 str(uploaded_by), str(document_id)
             ))
 
+            conn.commit()
+
             await self._log_audit(
-                conn, document_id, AuditAction.VERSION_CREATE, uploaded_by,
+                document_id, AuditAction.VERSION_CREATE, uploaded_by,
                 details={'version': new_version, 'change_notes': change_notes}
             )
 
-            conn.commit()
-
             return {
                 'id': str(version_row['id']),
                 'document_id': str(document_id),
@@ -906,8 +918,8 @@ class DocsDocumentService:
                     WHERE id = %s
                 """, (str(document_id),))
 
-                await self._log_audit(conn, document_id, AuditAction.DOWNLOAD, user_id)
                 conn.commit()
+                await self._log_audit(document_id, AuditAction.DOWNLOAD, user_id)
 
             # Get file from storage (from the creator's Nextcloud folder)
             # Pass both the creator's user_id (for credentials lookup) and nextcloud_user
@@ -926,27 +938,20 @@ class DocsDocumentService:
 
     async def _log_audit(
         self,
-        conn,
         document_id: UUID,
         action: AuditAction,
         user_id: UUID,
         details: Optional[Dict] = None
     ):
-        """Log document action to audit trail."""
-        import json
-        cur = conn.cursor()
-        try:
-            # Convert details dict to JSON string for PostgreSQL
-            details_json = json.dumps(details) if details else '{}'
-            cur.execute("""
-                INSERT INTO dms.document_audit_logs (
-                    document_id, action, action_details, user_id, timestamp
-                ) VALUES (
-                    %s, %s::dms.auditaction, %s::jsonb, %s, NOW()
-                )
-            """, (str(document_id), action.value, details_json, str(user_id)))
-        finally:
-            cur.close()
+        """Queue document action for the audit trail (written in bulk)."""
+        await get_audit_sink("dms_audit", _write_dms_audit_events).submit({
+            'document_id': str(document_id),
+            'action': action.value,
+            # JSON string for PostgreSQL
+            'details': json.dumps(details) if details else '{}',
+            'user_id': str(user_id),
+            'timestamp': datetime.utcnow().isoformat()
+        })
 
     async def get_audit_logs(
         self,
@@ -976,6 +981,28 @@ class DocsDocumentService:
             conn.close()
 
 
+def _insert_dms_audit_events(db_config: Dict[str, Any], events: List[Dict[str, Any]]):
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO dms.document_audit_logs (
+                    document_id, action, action_details, user_id, timestamp
+                ) VALUES %s
+            """, [
+                (e['document_id'], e['action'], e['details'], e['user_id'], datetime.fromisoformat(e['timestamp']))
+                for e in events
+            ], template="(%s, %s::dms.auditaction, %s::jsonb, %s, %s)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+async def _write_dms_audit_events(events: List[Dict[str, Any]]):
+    """Bulk insert queued DMS audit events (one multi-row INSERT)"""
+    await asyncio.to_thread(_insert_dms_audit_events, get_docs_document_service().db_config, events)
+
+
 # Singleton instance
 _document_service: Optional[DocsDocumentService] = None
 
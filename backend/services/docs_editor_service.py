@@ -20,6 +20,7 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 
 from core.config import settings
+from services.docs_ai_service import get_docs_ai_service
 from services.docs_export_service import DocsExportService
 
 logger = logging.getLogger(__name__)
@@ -127,7 +128,8 @@ class DocsEditorService:
         document_id: UUID,
         content: Dict[str, Any],
         user_id: UUID,
-        create_version: bool = False
+        create_version: bool = False,
+        tenant_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Save Tiptap content to document.
@@ -137,6 +139,7 @@ class DocsEditorService:
             content: Tiptap JSON content
             user_id: User saving the document
             create_version: Whether to create a new version
+            tenant_id: Search index partition of the document
 
         Returns:
             Updated document info
@@ -218,6 +221,10 @@ class DocsEditorService:
                 document_id, user_id, 'EDITED', cur, conn
             )
 
+            get_docs_ai_service().index_document(
+                tenant_id or user_id, document_id, row['title'], html_content
+            )
+
             logger.info(f"Saved editor content for document {document_id}")
 
             return result
@@ -305,6 +312,10 @@ class DocsEditorService:
                 UUID(row['id']), created_by, 'CREATED', cur, conn
             )
 
+            get_docs_ai_service().index_document(
+                tenant_id or company_id or created_by, row['id'], title, html_content
+            )
+
             logger.info(f"Created editable document: {title} (ID: {row['id']})")
 
             return dict(row)
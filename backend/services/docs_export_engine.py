@@ -0,0 +1,211 @@
+"""
+Bheem Docs - Export Engine
+==========================
+Runs CPU-heavy export renders (WeasyPrint PDF, python-docx) off the event
+loop in a bounded process pool.
+
+- A queue depth limit rejects new jobs instead of letting them pile up
+- Each tenant may only occupy a few render slots at a time
+- Rendered artifacts are cached by content hash, so re-exporting an
+  unchanged document is served from memory
+- Identical jobs already running are shared rather than rendered twice
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Union
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Artifact = Union[bytes, str]
+
+
+class ExportQueueFull(Exception):
+    """Raised when the export queue is at capacity"""
+
+
+def _default_executor(max_workers: int) -> Executor:
+    # Spawned, not forked: the API process runs an event loop and threads
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class ExportEngine:
+    """
+    Bounded executor for export renders with a content-addressed result cache.
+
+    Jobs are top-level functions (picklable) whose return value is the
+    rendered artifact. A job keeps its slots until the render finishes,
+    even if the request that started it goes away; its result is cached
+    for the next caller.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        per_tenant_limit: int,
+        cache_max_bytes: int,
+        executor_factory: Callable[[int], Executor] = _default_executor
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.per_tenant_limit = per_tenant_limit
+        self.cache_max_bytes = cache_max_bytes
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tenant_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tenant_jobs: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cache: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._cache_bytes = 0
+        self._jobs = 0
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "rejected": 0, "renders": 0, "failures": 0}
+
+    @staticmethod
+    def content_key(*parts: Any) -> str:
+        """Stable hash of the export format, options and document content"""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def run(
+        self,
+        job: Callable[..., Artifact],
+        *args: Any,
+        tenant_id: Optional[str] = None,
+        cache_key: Optional[str] = None
+    ) -> Artifact:
+        """
+        Render via ``job(*args)`` in the pool, or return the cached artifact.
+
+        Raises:
+            ExportQueueFull: too many renders running or waiting
+        """
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self.stats["hits"] += 1
+                return cached
+            task = self._inflight.get(cache_key)
+            if task is not None:
+                self.stats["coalesced"] += 1
+                return await asyncio.shield(task)
+
+        if self._jobs >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise ExportQueueFull("Too many exports in progress, please retry shortly")
+
+        self.stats["misses"] += 1
+        self._jobs += 1
+        tenant = str(tenant_id or "")
+        self._tenant_jobs[tenant] = self._tenant_jobs.get(tenant, 0) + 1
+        task = asyncio.ensure_future(self._render(job, args, tenant, cache_key))
+        if cache_key is not None:
+            self._inflight[cache_key] = task
+        task.add_done_callback(lambda done: self._finish(tenant, cache_key, done))
+        # Shielded so a cancelled request does not abort a shared render
+        return await asyncio.shield(task)
+
+    async def _render(self, job, args, tenant: str, cache_key: Optional[str]) -> Artifact:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        tenant_slots = self._tenant_slots.get(tenant)
+        if tenant_slots is None:
+            tenant_slots = self._tenant_slots[tenant] = asyncio.Semaphore(self.per_tenant_limit)
+
+        async with tenant_slots, self._slots:
+            if self._executor is None:
+                self._executor = self._executor_factory(self.max_workers)
+            executor = self._executor
+            self.stats["renders"] += 1
+            try:
+                artifact = await asyncio.get_running_loop().run_in_executor(executor, job, *args)
+            except BrokenProcessPool:
+                # A render process died (OOM, segfault); start a fresh pool for later jobs
+                self.stats["failures"] += 1
+                logger.error("Export worker process crashed, restarting pool")
+                if self._executor is executor:
+                    self._executor = None
+                    executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            except Exception:
+                self.stats["failures"] += 1
+                raise
+
+        if cache_key is not None:
+            self._store(cache_key, artifact)
+        return artifact
+
+    def _finish(self, tenant: str, cache_key: Optional[str], task: asyncio.Future):
+        self._jobs -= 1
+        self._tenant_jobs[tenant] -= 1
+        if not self._tenant_jobs[tenant]:
+            del self._tenant_jobs[tenant]
+            self._tenant_slots.pop(tenant, None)
+        if cache_key is not None and self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller went away
+
+    def _store(self, key: str, artifact: Artifact):
+        size = len(artifact)
+        if size > self.cache_max_bytes:
+            return
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cache_bytes -= len(previous)
+        self._cache[key] = artifact
+        self._cache_bytes += size
+        while self._cache_bytes > self.cache_max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    def shutdown(self):
+        """Stop the render processes (running renders are abandoned)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active_jobs": self._jobs,
+            "tenants": len(self._tenant_jobs),
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cache_bytes
+        }
+
+
+# Singleton instance
+_export_engine: Optional[ExportEngine] = None
+
+
+def get_export_engine() -> ExportEngine:
+    """Get or create the export engine"""
+    global _export_engine
+    if _export_engine is None:
+        _export_engine = ExportEngine(
+            max_workers=settings.DOCS_EXPORT_WORKERS,
+            max_queue=settings.DOCS_EXPORT_MAX_QUEUE,
+            per_tenant_limit=settings.DOCS_EXPORT_TENANT_CONCURRENCY,
+            cache_max_bytes=settings.DOCS_EXPORT_CACHE_MB * 1024 * 1024
+        )
+    return _export_engine
+
+
+def shutdown_export_engine():
+    if _export_engine is not None:
+        _export_engine.shutdown()
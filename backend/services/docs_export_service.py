@@ -21,6 +21,7 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 
 from core.config import settings
+from services.docs_export_engine import ExportEngine, get_export_engine
 
 logger = logging.getLogger(__name__)
 
@@ -426,11 +427,15 @@ class DocsExportService:
         include_header: bool = True,
         include_footer: bool = True,
         page_size: str = 'A4',
-        margins: str = '2cm'
+        margins: str = '2cm',
+        tenant_id: Optional[str] = None
     ) -> bytes:
         """
         Export Tiptap content to PDF.
 
+        Rendering runs in the export process pool; unchanged documents are
+        served from the export cache.
+
         Args:
             content: Tiptap JSON content
             title: Document title
@@ -438,10 +443,31 @@ class DocsExportService:
             include_footer: Add page numbers
             page_size: Paper size (A4, Letter)
             margins: Page margins
+            tenant_id: Tenant to count against the per-tenant render limit
 
         Returns:
             PDF bytes
+
+        Raises:
+            ExportQueueFull: Export queue is at capacity
         """
+        args = (content, title, include_header, include_footer, page_size, margins)
+        return await get_export_engine().run(
+            _render_pdf_job, *args,
+            tenant_id=tenant_id,
+            cache_key=ExportEngine.content_key('pdf', *args)
+        )
+
+    def render_pdf(
+        self,
+        content: Dict[str, Any],
+        title: str,
+        include_header: bool = True,
+        include_footer: bool = True,
+        page_size: str = 'A4',
+        margins: str = '2cm'
+    ) -> bytes:
+        """Render PDF bytes synchronously (runs in an export worker process)."""
         try:
             from weasyprint import HTML, CSS
         except ImportError:
@@ -562,18 +588,34 @@ class DocsExportService:
     async def export_to_docx(
         self,
         content: Dict[str, Any],
-        title: str
+        title: str,
+        tenant_id: Optional[str] = None
     ) -> bytes:
         """
         Export Tiptap content to DOCX.
 
+        Rendering runs in the export process pool; unchanged documents are
+        served from the export cache.
+
         Args:
             content: Tiptap JSON content
             title: Document title
+            tenant_id: Tenant to count against the per-tenant render limit
 
         Returns:
             DOCX bytes
+
+        Raises:
+            ExportQueueFull: Export queue is at capacity
         """
+        return await get_export_engine().run(
+            _render_docx_job, content, title,
+            tenant_id=tenant_id,
+            cache_key=ExportEngine.content_key('docx', content, title)
+        )
+
+    def render_docx(self, content: Dict[str, Any], title: str) -> bytes:
+        """Render DOCX bytes synchronously (runs in an export worker process)."""
         try:
             from docx import Document
             from docx.shared import Inches, Pt, RGBColor
@@ -901,6 +943,19 @@ date: {datetime.utcnow().isoformat()}
             conn.close()
 
 
+# =============================================================================
+# EXPORT WORKER JOBS
+# Top-level so the process pool can pickle them
+# =============================================================================
+
+def _render_pdf_job(*args) -> bytes:
+    return DocsExportService().render_pdf(*args)
+
+
+def _render_docx_job(*args) -> bytes:
+    return DocsExportService().render_docx(*args)
+
+
 # Singleton instance
 _export_service: Optional[DocsExportService] = None
 
@@ -13,13 +13,12 @@ Falls back to S3 for legacy files not yet migrated to Nextcloud.
 """
 
 import io
-import hashlib
+import inspect
 import logging
 import mimetypes
 from typing import BinaryIO, Dict, Any, Optional, Tuple, List
 from uuid import UUID
 from datetime import datetime
-import httpx
 import xml.etree.ElementTree as ET
 
 import boto3
@@ -27,6 +26,8 @@ from botocore.config import Config
 
 from core.config import settings
 from services.nextcloud_credentials_service import get_nextcloud_credentials_service
+from services.nextcloud_client import get_nextcloud_client, NextcloudOperation
+from services.nextcloud_service import nextcloud_service, upload_size, WebDAVUploadError
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +78,10 @@ class DocsStorageService:
 
         logger.info(f"DocsStorageService initialized with Nextcloud at {self.nextcloud_url}")
 
+    def _client(self, operation: str, timeout: float) -> NextcloudOperation:
+        """Shared keep-alive connection pool, labelled for per-operation latency stats"""
+        return get_nextcloud_client(self.nextcloud_url).operation(operation, timeout)
+
     def _get_webdav_url(self, target_user: str = None) -> str:
         """
         Get WebDAV base URL for a target user's files.
@@ -159,7 +164,7 @@ class DocsStorageService:
         parts = path.strip('/').split('/')
         current_path = ""
 
-        async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
+        async with self._client("docs_ensure_folder_exists", timeout=30.0) as client:
             for part in parts:
                 if not part:
                     continue
@@ -202,13 +207,17 @@ class DocsStorageService:
         username: str = None,
         password: str = None,
         nextcloud_user: str = None,
-        user_id: UUID = None
+        user_id: UUID = None,
+        upload_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Upload file to Nextcloud via WebDAV using user's own credentials.
+        Stream a file to Nextcloud via WebDAV using user's own credentials.
+
+        The file is read in chunks and hashed as it is sent, so memory use
+        does not grow with its size; large files use chunked upload.
 
         Args:
-            file: File-like object to upload
+            file: File-like object (sync or async read) or bytes to upload
             filename: Original filename
             company_id: ERP company ID (for internal mode)
             tenant_id: SaaS tenant ID (for external mode)
@@ -219,19 +228,16 @@ class DocsStorageService:
             password: Auth password (overrides user credentials if provided)
             nextcloud_user: Target user's Nextcloud username (e.g., user's email)
             user_id: User's UUID to look up credentials
+            upload_id: Client-chosen id that makes a large upload resumable
 
         Returns:
             Dict with storage details
         """
-        # Read file content
-        file_content = file.read() if hasattr(file, 'read') else file
-        if isinstance(file_content, str):
-            file_content = file_content.encode('utf-8')
+        if isinstance(file, str):
+            file = file.encode('utf-8')
 
-        file_size = len(file_content)
-
-        # Validate
-        is_valid, error = self.validate_file(filename, file_size)
+        # Validate what can be known up front; the size limit is also enforced while streaming
+        is_valid, error = self.validate_file(filename, upload_size(file) or 0)
         if not is_valid:
             raise ValueError(error)
 
@@ -244,9 +250,6 @@ class DocsStorageService:
             content_type, _ = mimetypes.guess_type(filename)
             content_type = content_type or "application/octet-stream"
 
-        # Calculate checksum
-        checksum = hashlib.sha256(file_content).hexdigest()
-
         # Get user's Nextcloud credentials
         storage_user = nextcloud_user
         auth_user = username or self.admin_user
@@ -285,56 +288,36 @@ class DocsStorageService:
             logger.error(f"Failed to ensure folder exists: {e}")
             # Continue anyway - the upload will fail if there's really an issue
 
-        # Upload to user's Nextcloud folder with their credentials
-        auth = (auth_user, auth_pass)
-        webdav_url = f"{self._get_webdav_url(storage_user)}{storage_path}"
-
-        logger.info(f"Uploading to WebDAV URL: {webdav_url}")
-
+        logger.info(f"Streaming upload to {storage_user}:{storage_path}")
+
+        upload = dict(
+            username=auth_user,
+            password=auth_pass,
+            path=storage_path,
+            content_type=content_type,
+            target_user=storage_user,
+            upload_id=upload_id,
+            max_size=self.max_file_size,
+            owner=f"{tenant_id or company_id}:{user_id}"
+        )
         try:
-            async with httpx.AsyncClient(verify=False, timeout=120.0) as client:
-                headers = {"Content-Type": content_type} if content_type else {}
-
-                response = await client.put(
-                    url=webdav_url,
-                    content=file_content,
-                    auth=auth,
-                    headers=headers
-                )
-
-                if response.status_code not in [201, 204]:
-                    # If 404, try creating the folder again and retry upload
-                    if response.status_code == 404:
-                        logger.warning(f"Got 404, attempting to create folder and retry: {storage_prefix}")
-                        await self.ensure_folder_exists(storage_prefix, auth_user, auth_pass, storage_user)
-
-                        response = await client.put(
-                            url=webdav_url,
-                            content=file_content,
-                            auth=auth,
-                            headers=headers
-                        )
-
-                        if response.status_code in [201, 204]:
-                            logger.info(f"Uploaded file after folder retry: {storage_path} ({file_size} bytes)")
-                            return {
-                                'storage_path': storage_path,
-                                'storage_bucket': 'nextcloud',
-                                'checksum': checksum,
-                                'file_size': file_size,
-                                'content_type': content_type,
-                                'nextcloud_user': storage_user
-                            }
-
-                    raise Exception(f"Upload failed with status {response.status_code}: {response.text}")
-
-            logger.info(f"Uploaded file to Nextcloud: {storage_user}:{storage_path} ({file_size} bytes)")
+            try:
+                result = await nextcloud_service.upload_stream(source=file, **upload)
+            except WebDAVUploadError as e:
+                # Missing parent folder: create it and retry if the source can be replayed
+                if e.status_code not in (404, 409) or not await self._rewind(file):
+                    raise
+                logger.warning(f"Got {e.status_code}, attempting to create folder and retry: {storage_prefix}")
+                await self.ensure_folder_exists(storage_prefix, auth_user, auth_pass, storage_user)
+                result = await nextcloud_service.upload_stream(source=file, **upload)
+
+            logger.info(f"Uploaded file to Nextcloud: {storage_user}:{storage_path} ({result['size']} bytes)")
 
             return {
                 'storage_path': storage_path,
                 'storage_bucket': 'nextcloud',
-                'checksum': checksum,
-                'file_size': file_size,
+                'checksum': result['checksum'],
+                'file_size': result['size'],
                 'content_type': content_type,
                 'nextcloud_user': storage_user
             }
@@ -342,6 +325,19 @@ class DocsStorageService:
             logger.error(f"Failed to upload to Nextcloud: {e}")
             raise
 
+    @staticmethod
+    async def _rewind(file) -> bool:
+        """Seek an upload source back to the start; False if it cannot be replayed"""
+        if isinstance(file, (bytes, bytearray)):
+            return True
+        try:
+            result = file.seek(0)
+            if inspect.isawaitable(result):
+                await result
+            return True
+        except (AttributeError, OSError, ValueError):
+            return False
+
     async def download_file(
         self,
         storage_path: str,
@@ -399,7 +395,7 @@ class DocsStorageService:
                 webdav_url = f"{self._get_webdav_url(user)}{path}"
 
                 try:
-                    async with httpx.AsyncClient(verify=False, timeout=120.0) as client:
+                    async with self._client("docs_download_file", timeout=120.0) as client:
                         response = await client.get(
                             url=webdav_url,
                             auth=auth
@@ -468,7 +464,7 @@ class DocsStorageService:
         webdav_url = f"{self._get_webdav_url(username)}{storage_path}"
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
+            async with self._client("docs_delete_file", timeout=30.0) as client:
                 response = await client.delete(
                     url=webdav_url,
                     auth=auth
@@ -501,7 +497,7 @@ class DocsStorageService:
         await self.ensure_folder_exists(dest_folder, username, password)
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=60.0) as client:
+            async with self._client("docs_copy_file", timeout=60.0) as client:
                 response = await client.request(
                     method="COPY",
                     url=source_url,
@@ -535,7 +531,7 @@ class DocsStorageService:
         await self.ensure_folder_exists(dest_folder, username, password)
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=60.0) as client:
+            async with self._client("docs_move_file", timeout=60.0) as client:
                 response = await client.request(
                     method="MOVE",
                     url=source_url,
@@ -563,7 +559,7 @@ class DocsStorageService:
         webdav_url = f"{self._get_webdav_url(username)}{storage_path}"
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=15.0) as client:
+            async with self._client("docs_file_exists", timeout=15.0) as client:
                 response = await client.request(
                     method="PROPFIND",
                     url=webdav_url,
@@ -595,7 +591,7 @@ class DocsStorageService:
         </d:propfind>'''
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=15.0) as client:
+            async with self._client("docs_get_file_info", timeout=15.0) as client:
                 response = await client.request(
                     method="PROPFIND",
                     url=webdav_url,
@@ -652,7 +648,7 @@ class DocsStorageService:
         </d:propfind>'''
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
+            async with self._client("docs_list_files", timeout=30.0) as client:
                 response = await client.request(
                     method="PROPFIND",
                     url=webdav_url,
@@ -733,7 +729,7 @@ class DocsStorageService:
         ocs_url = f"{self.nextcloud_url}/ocs/v2.php/apps/files_sharing/api/v1/shares"
 
         try:
-            async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
+            async with self._client("docs_generate_presigned_url", timeout=30.0) as client:
                 response = await client.post(
                     url=ocs_url,
                     auth=auth,
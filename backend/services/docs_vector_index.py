@@ -0,0 +1,659 @@
+"""
+Bheem Docs - Vector Index
+=========================
+Chunk embeddings and nearest-neighbour search for Docs semantic search.
+
+Documents are split into chunks that are embedded once, when the document
+is saved. Embeddings are kept as normalized float32 rows:
+
+- in memory, one VectorIndex matrix per tenant, so a query is a single
+  matrix-vector product instead of one embedding call per document
+- in workspace.docs_chunk_embeddings, so a restarted worker reloads them
+  instead of re-embedding
+
+Only save-time content is written to the index. Content supplied with a
+search (unsaved, or differing from what is stored) is embedded into a
+per-worker cache keyed by its hash and never persisted.
+
+A document's score is the best cosine similarity of any of its chunks.
+Embedding providers are pluggable; HashingEmbeddingProvider is a local,
+deterministic stand-in that needs no API.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+from sqlalchemy import text
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_SIZE = 1024
+TRANSIENT_CACHE_SIZE = 4096  # Documents embedded from request content
+OPENAI_BATCH_SIZE = 256  # Inputs per embeddings request
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def chunk_text(text: str, chunk_chars: int, max_chunks: int) -> List[str]:
+    """Split text into chunks of about chunk_chars, breaking between words"""
+    text = text.strip()
+    if not text:
+        return [""]
+    chunks = []
+    start = 0
+    while start < len(text) and len(chunks) < max_chunks:
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + chunk_chars // 2, end)
+            if space > start:
+                end = space
+        chunks.append(text[start:end].strip())
+        start = end
+    return chunks
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# =============================================
+# Embedding providers
+# =============================================
+
+class EmbeddingProvider:
+    """Turns a batch of texts into a (len(texts), dim) float32 array"""
+
+    model: str = ""
+    dim: int = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Local, deterministic embeddings from hashed word and word-pair counts.
+
+    Captures word overlap rather than meaning; used in tests and where no
+    embedding API is configured.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN_RE.findall(text.lower())
+        for token in tokens:
+            index, sign = self._bucket(token)
+            vector[index] += sign
+        for first, second in zip(tokens, tokens[1:]):
+            index, sign = self._bucket(f"{first} {second}")
+            vector[index] += 0.5 * sign
+        return vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(t) for t in texts])
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API; a batch of texts costs one request per OPENAI_BATCH_SIZE inputs"""
+
+    def __init__(self, api_key: str, model: str, dim: int):
+        self.api_key = api_key
+        self.dim = dim
+        self.model = f"{model}:{dim}"
+        self._api_model = model
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30.0)
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), OPENAI_BATCH_SIZE):
+            batch = [t[:8000] or " " for t in texts[start:start + OPENAI_BATCH_SIZE]]
+            response = await self._client.post(
+                "https://api.openai.com/v1/embeddings",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={"input": batch, "model": self._api_model, "dimensions": self.dim}
+            )
+            response.raise_for_status()
+            data = sorted(response.json()["data"], key=lambda item: item["index"])
+            rows.extend(item["embedding"] for item in data)
+        return np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# =============================================
+# In-memory index
+# =============================================
+
+class VectorIndex:
+    """
+    Chunk vectors of one tenant's documents in a single float32 matrix.
+
+    Rows are appended on add; removed or replaced documents leave free rows
+    that are compacted away once they make up half the matrix.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._row_slot = np.empty(0, dtype=np.int64)  # Document slot per row, -1 if free
+        self._size = 0
+        self._free = 0
+        self._slots: Dict[str, int] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._rows: Dict[str, np.ndarray] = {}
+        self._hashes: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def rows(self) -> int:
+        return self._size - self._free
+
+    def content_hash(self, doc_id: str) -> Optional[str]:
+        return self._hashes.get(doc_id)
+
+    def add(self, doc_id: str, doc_hash: str, vectors: np.ndarray):
+        """Add or replace a document's chunk vectors"""
+        vectors = _normalize(vectors).reshape(-1, self.dim)
+        self.remove(doc_id)
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            slot = self._slots[doc_id] = len(self._slot_ids)
+            self._slot_ids.append(doc_id)
+
+        start, end = self._size, self._size + len(vectors)
+        if end > len(self._vectors):
+            capacity = max(end, 2 * len(self._vectors), 64)
+            grown = np.empty((capacity, self.dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            row_slot = np.full(capacity, -1, dtype=np.int64)
+            row_slot[:self._size] = self._row_slot[:self._size]
+            self._vectors, self._row_slot = grown, row_slot
+        self._vectors[start:end] = vectors
+        self._row_slot[start:end] = slot
+        self._size = end
+        self._rows[doc_id] = np.arange(start, end)
+        self._hashes[doc_id] = doc_hash
+
+    def remove(self, doc_id: str):
+        rows = self._rows.pop(doc_id, None)
+        self._hashes.pop(doc_id, None)
+        if rows is None:
+            return
+        self._row_slot[rows] = -1
+        self._free += len(rows)
+        if self._free * 2 > self._size:
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self._row_slot[:self._size] >= 0)
+        self._vectors = self._vectors[keep].copy()
+        self._row_slot = self._row_slot[keep].copy()
+        self._size = len(keep)
+        self._free = 0
+        self._rows = {}
+        for row, slot in enumerate(self._row_slot):
+            doc_id = self._slot_ids[slot]
+            self._rows.setdefault(doc_id, []).append(row)
+        self._rows = {doc_id: np.asarray(rows) for doc_id, rows in self._rows.items()}
+
+    def document_vectors(self, doc_id: str) -> Optional[np.ndarray]:
+        rows = self._rows.get(doc_id)
+        return None if rows is None else self._vectors[rows].copy()
+
+    def document_vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """Normalized mean of a document's chunk vectors"""
+        rows = self._rows.get(doc_id)
+        if rows is None:
+            return None
+        return _normalize(self._vectors[rows].mean(axis=0))
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        doc_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Best-scoring documents for a query vector, optionally only among doc_ids"""
+        if doc_ids is None:
+            rows = np.flatnonzero(self._row_slot[:self._size] >= 0)
+        else:
+            wanted = [self._rows[d] for d in doc_ids if d in self._rows]
+            rows = np.concatenate(wanted) if wanted else np.empty(0, dtype=np.int64)
+        if not len(rows) or top_k <= 0:
+            return []
+
+        scores = self._vectors[rows] @ _normalize(query)
+        slots = self._row_slot[rows]
+        best = np.full(len(self._slot_ids), -np.inf, dtype=np.float32)
+        np.maximum.at(best, slots, scores)
+
+        found = np.flatnonzero(np.isfinite(best))
+        k = min(top_k, len(found))
+        top = found[np.argpartition(-best[found], k - 1)[:k]]
+        top = top[np.argsort(-best[top], kind="stable")]
+        return [(self._slot_ids[slot], float(best[slot])) for slot in top]
+
+
+# =============================================
+# Store
+# =============================================
+
+class DocsVectorStore:
+    """Per-tenant vector indexes, kept in sync with persisted chunk embeddings"""
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        chunk_chars: int,
+        max_chunks: int,
+        max_tenants: int,
+        session_factory=None
+    ):
+        self.provider = provider
+        self.chunk_chars = chunk_chars
+        self.max_chunks = max_chunks
+        self.max_tenants = max_tenants
+        self._session_factory = session_factory
+        self._indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Lock] = {}
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Vectors of request-supplied content, by content hash (never written to the index)
+        self._transient: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._tasks: set = set()
+        self.stats = {
+            "embed_calls": 0, "embedded_texts": 0, "query_cache_hits": 0,
+            "index_loads": 0, "persist_failures": 0
+        }
+
+    # ---------------------------------------------
+    # Embedding
+    # ---------------------------------------------
+
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.provider.dim), dtype=np.float32)
+        self.stats["embed_calls"] += 1
+        self.stats["embedded_texts"] += len(texts)
+        return _normalize(await self.provider.embed(texts))
+
+    def _cached_query(self, query: str) -> Optional[np.ndarray]:
+        vector = self._query_cache.get(query)
+        if vector is not None:
+            self._query_cache.move_to_end(query)
+            self.stats["query_cache_hits"] += 1
+        return vector
+
+    def _cache_query(self, query: str, vector: np.ndarray):
+        self._query_cache[query] = vector
+        while len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+
+    def _chunks(self, doc: Dict[str, Any]) -> Tuple[str, List[str]]:
+        full_text = f"{doc.get('title') or ''} {doc.get('text') or ''}".strip()
+        return content_hash(full_text), chunk_text(full_text, self.chunk_chars, self.max_chunks)
+
+    # ---------------------------------------------
+    # Indexes
+    # ---------------------------------------------
+
+    async def get_index(self, tenant_key: str) -> VectorIndex:
+        index = self._indexes.get(tenant_key)
+        if index is not None:
+            self._indexes.move_to_end(tenant_key)
+            return index
+
+        lock = self._loading.setdefault(tenant_key, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(tenant_key)
+            if index is None:
+                index = await self._load(tenant_key)
+                self._indexes[tenant_key] = index
+                while len(self._indexes) > self.max_tenants:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    self._loading.pop(evicted, None)
+        return index
+
+    async def _load(self, tenant_key: str) -> VectorIndex:
+        index = VectorIndex(self.provider.dim)
+        if self._session_factory is None:
+            return index
+        self.stats["index_loads"] += 1
+        try:
+            async with self._session_factory() as session:
+                result = await session.execute(text("""
+                    SELECT document_id, content_hash, embedding
+                    FROM workspace.docs_chunk_embeddings
+                    WHERE tenant_key = :tenant_key AND model = :model
+                    ORDER BY document_id, chunk_index
+                """), {"tenant_key": tenant_key, "model": self.provider.model})
+                rows = result.all()
+        except Exception as e:
+            logger.warning(f"Could not load chunk embeddings for {tenant_key}: {e}")
+            return index
+
+        grouped: Dict[str, Tuple[str, List[bytes]]] = {}
+        for document_id, doc_hash, embedding in rows:
+            grouped.setdefault(document_id, (doc_hash, []))[1].append(bytes(embedding))
+        for document_id, (doc_hash, blobs) in grouped.items():
+            vectors = np.frombuffer(b"".join(blobs), dtype="<f4").reshape(-1, self.provider.dim)
+            index.add(document_id, doc_hash, vectors)
+        return index
+
+    async def _embed_with_queries(
+        self,
+        queries: Sequence[str],
+        chunk_groups: Sequence[List[str]]
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Embed uncached queries and groups of chunks in one provider call"""
+        query_vectors: List[Optional[np.ndarray]] = [self._cached_query(q) for q in queries]
+        uncached = [q for q, v in zip(queries, query_vectors) if v is None]
+
+        vectors = await self._embed(uncached + [chunk for chunks in chunk_groups for chunk in chunks])
+
+        for position, query in enumerate(uncached):
+            self._cache_query(query, vectors[position])
+        query_vectors = [v if v is not None else self._query_cache[q] for q, v in zip(queries, query_vectors)]
+
+        groups = []
+        offset = len(uncached)
+        for chunks in chunk_groups:
+            groups.append(vectors[offset:offset + len(chunks)])
+            offset += len(chunks)
+        return query_vectors, groups
+
+    async def index_documents(self, tenant_key: str, documents: Sequence[Dict[str, Any]]) -> VectorIndex:
+        """
+        Embed and persist saved documents ({'id', 'title', 'text'}) whose content changed.
+
+        Only call this with content read from storage or being saved: it
+        replaces the documents' stored vectors.
+        """
+        index = await self.get_index(tenant_key)
+
+        pending: List[Tuple[str, str, List[str]]] = []
+        seen = set()
+        for doc in documents:
+            doc_id = str(doc["id"])
+            doc_hash, chunks = self._chunks(doc)
+            if doc_id not in seen and index.content_hash(doc_id) != doc_hash:
+                pending.append((doc_id, doc_hash, chunks))
+            seen.add(doc_id)
+        if not pending:
+            return index
+
+        _, groups = await self._embed_with_queries((), [chunks for _, _, chunks in pending])
+        for (doc_id, doc_hash, _), vectors in zip(pending, groups):
+            index.add(doc_id, doc_hash, vectors)
+        self._spawn(self._persist(tenant_key, [
+            (doc_id, doc_hash, index.document_vectors(doc_id)) for doc_id, doc_hash, _ in pending
+        ]))
+        return index
+
+    async def _query_documents(
+        self,
+        tenant_key: str,
+        documents: Sequence[Dict[str, Any]],
+        queries: Sequence[str] = ()
+    ) -> Tuple[VectorIndex, Dict[str, np.ndarray], List[np.ndarray]]:
+        """
+        Resolve the documents a query names without writing the index.
+
+        Documents whose content matches what is stored use the stored rows.
+        Other content (unsaved, or differing from storage) is embedded into a
+        per-worker cache keyed by content hash, never by document id.
+        Returns (index, transient vectors by document id, query vectors).
+        """
+        index = await self.get_index(tenant_key)
+
+        transient: Dict[str, np.ndarray] = {}
+        wanted: Dict[str, str] = {}
+        missing: "OrderedDict[str, List[str]]" = OrderedDict()
+        for doc in documents:
+            doc_id = str(doc["id"])
+            if doc_id in transient or doc_id in wanted:
+                continue
+            doc_hash, chunks = self._chunks(doc)
+            if index.content_hash(doc_id) == doc_hash:
+                continue
+            vectors = self._transient.get(doc_hash)
+            if vectors is not None:
+                self._transient.move_to_end(doc_hash)
+                transient[doc_id] = vectors
+            else:
+                wanted[doc_id] = doc_hash
+                missing.setdefault(doc_hash, chunks)
+
+        query_vectors, groups = await self._embed_with_queries(queries, list(missing.values()))
+        embedded = dict(zip(missing, groups))
+        for doc_hash, vectors in embedded.items():
+            self._transient[doc_hash] = vectors
+        while len(self._transient) > TRANSIENT_CACHE_SIZE:
+            self._transient.popitem(last=False)
+        for doc_id, doc_hash in wanted.items():
+            transient[doc_id] = embedded[doc_hash]
+        return index, transient, query_vectors
+
+    @staticmethod
+    def _rank(
+        index: VectorIndex,
+        transient: Dict[str, np.ndarray],
+        query: np.ndarray,
+        top_k: int,
+        doc_ids: Sequence[str]
+    ) -> List[Tuple[str, float]]:
+        """Best documents among doc_ids, scoring stored rows and transient vectors alike"""
+        matches = index.search(query, top_k, [doc_id for doc_id in doc_ids if doc_id not in transient])
+        query = _normalize(query)
+        for doc_id in dict.fromkeys(doc_ids):
+            vectors = transient.get(doc_id)
+            if vectors is not None and len(vectors):
+                matches.append((doc_id, float((vectors @ query).max())))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:top_k]
+
+    # ---------------------------------------------
+    # Document changes
+    # ---------------------------------------------
+
+    async def index_document(self, tenant_key: str, doc_id: str, title: str, body: str):
+        """Embed a saved document's chunks (skipped when its content is unchanged)"""
+        await self.index_documents(tenant_key, [{"id": doc_id, "title": title, "text": body}])
+
+    def schedule_index(self, tenant_key: str, doc_id: str, title: str, body: str):
+        """Index a document in the background, e.g. right after it was saved"""
+        self._spawn(self.index_document(tenant_key, doc_id, title, body))
+
+    async def remove_document(self, doc_id: str):
+        doc_id = str(doc_id)
+        for index in self._indexes.values():
+            index.remove(doc_id)
+        if self._session_factory is None:
+            return
+        try:
+            async with self._session_factory() as session:
+                await session.execute(
+                    text("DELETE FROM workspace.docs_chunk_embeddings WHERE document_id = :document_id"),
+                    {"document_id": doc_id}
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Could not delete chunk embeddings of {doc_id}: {e}")
+
+    async def _persist(self, tenant_key: str, entries: List[Tuple[str, str, np.ndarray]]):
+        if self._session_factory is None:
+            return
+        rows = [
+            {
+                "tenant_key": tenant_key, "document_id": doc_id, "chunk_index": chunk,
+                "model": self.provider.model, "content_hash": doc_hash,
+                "embedding": vector.astype("<f4").tobytes()
+            }
+            for doc_id, doc_hash, vectors in entries
+            for chunk, vector in enumerate(vectors)
+        ]
+        try:
+            async with self._session_factory() as session:
+                await session.execute(text("""
+                    DELETE FROM workspace.docs_chunk_embeddings
+                    WHERE tenant_key = :tenant_key AND model = :model AND document_id = ANY(:document_ids)
+                """), {
+                    "tenant_key": tenant_key,
+                    "model": self.provider.model,
+                    "document_ids": [doc_id for doc_id, _, _ in entries]
+                })
+                await session.execute(text("""
+                    INSERT INTO workspace.docs_chunk_embeddings (
+                        tenant_key, document_id, chunk_index, model, content_hash, embedding
+                    ) VALUES (
+                        :tenant_key, :document_id, :chunk_index, :model, :content_hash, :embedding
+                    )
+                """), rows)
+                await session.commit()
+        except Exception as e:
+            self.stats["persist_failures"] += 1
+            logger.warning(f"Could not persist chunk embeddings for {tenant_key}: {e}")
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Future):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background document indexing failed: {task.exception()}")
+
+    # ---------------------------------------------
+    # Queries
+    # ---------------------------------------------
+
+    async def search(
+        self,
+        tenant_key: str,
+        query: str,
+        documents: Sequence[Dict[str, Any]],
+        top_k: int
+    ) -> List[Tuple[str, float]]:
+        index, transient, (query_vector,) = await self._query_documents(tenant_key, documents, [query])
+        return self._rank(index, transient, query_vector, top_k, [str(doc["id"]) for doc in documents])
+
+    async def similar(
+        self,
+        tenant_key: str,
+        source: Dict[str, Any],
+        candidates: Sequence[Dict[str, Any]],
+        top_k: int
+    ) -> List[Tuple[str, float]]:
+        """
+        Candidates closest to source. An indexed source is compared by its
+        stored vectors; the content sent with it is used only when it is not.
+        """
+        index = await self.get_index(tenant_key)
+        source_id = str(source["id"])
+        source_vector = index.document_vector(source_id)
+        documents = list(candidates) if source_vector is not None else [source, *candidates]
+        index, transient, _ = await self._query_documents(tenant_key, documents)
+        if source_vector is None:
+            source_vector = _normalize(transient[source_id].mean(axis=0))
+        return self._rank(index, transient, source_vector, top_k, [str(doc["id"]) for doc in candidates])
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self.provider.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "model": self.provider.model,
+            "tenants": len(self._indexes),
+            "documents": sum(len(index) for index in self._indexes.values()),
+            "chunks": sum(index.rows for index in self._indexes.values()),
+            "transient_documents": len(self._transient),
+            "pending_tasks": len(self._tasks)
+        }
+
+
+# =============================================
+# Singleton
+# =============================================
+
+_store: Optional[DocsVectorStore] = None
+_store_configured = False
+
+
+def _build_provider() -> Optional[EmbeddingProvider]:
+    choice = settings.DOCS_EMBEDDING_PROVIDER
+    if choice == "auto":
+        choice = "openai" if settings.OPENAI_API_KEY else "none"
+    if choice == "openai" and settings.OPENAI_API_KEY:
+        return OpenAIEmbeddingProvider(
+            settings.OPENAI_API_KEY, settings.DOCS_EMBEDDING_MODEL, settings.DOCS_EMBEDDING_DIMENSIONS
+        )
+    if choice == "hashing":
+        return HashingEmbeddingProvider(settings.DOCS_EMBEDDING_DIMENSIONS)
+    return None
+
+
+def get_docs_vector_store() -> Optional[DocsVectorStore]:
+    """The shared store, or None when no embedding provider is configured"""
+    global _store, _store_configured
+    if not _store_configured:
+        provider = _build_provider()
+        if provider is not None:
+            _store = DocsVectorStore(
+                provider=provider,
+                chunk_chars=settings.DOCS_EMBEDDING_CHUNK_CHARS,
+                max_chunks=settings.DOCS_EMBEDDING_MAX_CHUNKS,
+                max_tenants=settings.DOCS_VECTOR_INDEX_MAX_TENANTS,
+                session_factory=AsyncSessionLocal
+            )
+        _store_configured = True
+    return _store
+
+
+async def close_docs_vector_store():
+    global _store, _store_configured
+    if _store is not None:
+        await _store.close()
+    _store = None
+    _store_configured = False
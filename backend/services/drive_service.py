@@ -13,7 +13,7 @@ import hashlib
 import logging
 
 from models.drive_models import DriveFile, DriveShare, DriveActivity
-from services.nextcloud_service import nextcloud_service
+from services.nextcloud_service import nextcloud_service, upload_size
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -99,12 +99,18 @@ class DriveService:
         tenant_id: UUID,
         owner_id: UUID,
         name: str,
-        content: bytes,
+        content: Any,
         mime_type: Optional[str] = None,
         parent_id: Optional[UUID] = None,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        upload_id: Optional[str] = None
     ) -> DriveFile:
-        """Create/upload a file to both DB and Nextcloud"""
+        """
+        Create/upload a file to both DB and Nextcloud.
+
+        content may be bytes, a file object or an UploadFile; it is streamed
+        to Nextcloud in chunks rather than read into memory.
+        """
         # Build path
         path = f"/{name}"
         if parent_id:
@@ -115,6 +121,7 @@ class DriveService:
         # Upload to Nextcloud
         username, password = self._get_nextcloud_creds()
         nextcloud_path = self._build_nextcloud_path(tenant_id, path)
+        size_bytes = upload_size(content) or 0
 
         try:
             # Ensure parent folders exist
@@ -126,11 +133,12 @@ class DriveService:
                 await nextcloud_service.create_folder(username, password, parent_nextcloud_path)
 
             # Upload file
-            upload_success = await nextcloud_service.upload_file(username, password, nextcloud_path, content)
-            if not upload_success:
-                logger.error(f"Failed to upload file to Nextcloud: {nextcloud_path}")
-            else:
-                logger.info(f"Uploaded file to Nextcloud: {nextcloud_path}")
+            result = await nextcloud_service.upload_stream(
+                username, password, nextcloud_path, content,
+                content_type=mime_type, upload_id=upload_id, owner=f"{tenant_id}:{owner_id}"
+            )
+            size_bytes = result["size"]
+            logger.info(f"Uploaded file to Nextcloud: {nextcloud_path} ({size_bytes} bytes)")
         except Exception as e:
             logger.error(f"Nextcloud upload failed: {e}")
 
@@ -142,7 +150,7 @@ class DriveService:
             name=name,
             file_type='file',
             mime_type=mime_type,
-            size_bytes=len(content),
+            size_bytes=size_bytes,
             path=path,
             storage_path=nextcloud_path,
             description=description
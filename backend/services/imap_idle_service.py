@@ -0,0 +1,452 @@
+"""
+Bheem Workspace - IMAP IDLE Watcher Pool
+Push notifications for mailbox changes using IMAP IDLE (RFC 2177).
+
+Each watched mailbox holds one IMAP connection that sits in IDLE and
+reports new messages, expunges and flag changes as they happen. Watchers
+speak IMAP directly over asyncio streams, so a waiting watcher costs one
+TLS socket and one suspended coroutine (tens of KB) and no thread. A
+single worker can hold thousands of watched mailboxes; the practical
+ceiling is MAIL_IDLE_MAX_WATCHERS, the process file-descriptor limit and
+the IMAP server's per-user connection limit.
+
+Where the server supports them, CONDSTORE adds MODSEQ to flag updates and
+NOTIFY (RFC 5465) delivers new-message headers with the notification
+itself, saving a follow-up FETCH. Servers without IDLE are polled with
+NOOP, which yields the same untagged updates.
+"""
+import asyncio
+import email as email_lib
+import logging
+import random
+import re
+import ssl
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.config import settings
+from services.mail_sync_service import iter_fetch_responses, decode_header_value
+
+logger = logging.getLogger("bheem.mail.idle")
+
+MailEvent = Dict[str, Any]
+EventHandler = Callable[[MailEvent], Awaitable[None]]
+
+# Headers fetched for new-message notifications
+NOTIFY_HEADER_FIELDS = "FROM SUBJECT DATE MESSAGE-ID"
+# After the first update, keep reading briefly so bursts become one batch
+EVENT_DEBOUNCE_SECONDS = 0.25
+CONNECT_TIMEOUT_SECONDS = 30
+COMMAND_TIMEOUT_SECONDS = 60
+MAX_RECONNECT_DELAY_SECONDS = 300
+STREAM_LIMIT_BYTES = 4 * 1024 * 1024
+
+_LITERAL_TAIL_RE = re.compile(rb"\{(\d+)\}\r?\n$")
+_UNTAGGED_RE = re.compile(rb"^\* (\d+) (EXISTS|EXPUNGE|FETCH)\b", re.IGNORECASE)
+_RESP_CODE_RE = re.compile(rb"\[(UIDVALIDITY|UIDNEXT|HIGHESTMODSEQ) (\d+)\]", re.IGNORECASE)
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class IMAPCommandError(Exception):
+    """A command was rejected by the server (NO/BAD)"""
+    pass
+
+
+class IdleWatcher:
+    """Keeps one mailbox folder in IDLE and reports changes"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        email: str,
+        password: str,
+        on_event: EventHandler,
+        connect_slots: asyncio.Semaphore,
+        folder: str = "INBOX",
+        refresh_seconds: int = 1500,
+        poll_seconds: int = 60
+    ):
+        self.host = host
+        self.port = port
+        self.email = email
+        self.password = password
+        self.on_event = on_event
+        self.folder = folder
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        self._connect_slots = connect_slots
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._tag_counter = 0
+        self._task: Optional[asyncio.Task] = None
+
+        # Server features
+        self.capabilities: set = set()
+        self.notify_enabled = False
+
+        # Folder state; uids[n - 1] is the UID of sequence number n
+        self.uids: List[int] = []
+        self.exists = 0
+        self.uidvalidity: Optional[int] = None
+        self.uidnext: Optional[int] = None
+        self.highestmodseq: Optional[int] = None
+        self._events: List[MailEvent] = []
+
+    # =============================================
+    # Lifecycle
+    # =============================================
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._close()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        delay = 1
+        while True:
+            try:
+                async with self._connect_slots:
+                    await self._connect()
+                delay = 1
+                while True:
+                    if "IDLE" in self.capabilities:
+                        await self._idle_once()
+                    else:
+                        await asyncio.sleep(self.poll_seconds)
+                        await self._command("NOOP")
+                    await self._catch_up()
+                    await self._flush_events()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"IMAP IDLE watcher for {self.email} disconnected: {e}")
+                await self._close()
+                if isinstance(e, IMAPCommandError) and "AUTHENTICATIONFAILED" in str(e).upper():
+                    # Bad credentials will not fix themselves; stop watching
+                    return
+                await asyncio.sleep(delay + random.uniform(0, delay))
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    async def _connect(self):
+        context = ssl.create_default_context()
+        self._reader, self._writer = await asyncio.wait_for(
+            # UID SEARCH ALL on a large folder is one long line
+            asyncio.open_connection(self.host, self.port, ssl=context, limit=STREAM_LIMIT_BYTES),
+            timeout=CONNECT_TIMEOUT_SECONDS
+        )
+        greeting = await asyncio.wait_for(self._read_response(), timeout=CONNECT_TIMEOUT_SECONDS)
+        if not self._head(greeting).upper().startswith(b"* OK"):
+            raise ConnectionError(f"Unexpected IMAP greeting: {self._head(greeting)[:100]!r}")
+
+        await self._command(f"LOGIN {_quote(self.email)} {_quote(self.password)}")
+        untagged = await self._command("CAPABILITY")
+        for response in untagged:
+            head = self._head(response)
+            if head.upper().startswith(b"* CAPABILITY"):
+                self.capabilities = set(head.decode(errors="replace").upper().split()[2:])
+
+        if "CONDSTORE" in self.capabilities:
+            await self._command("ENABLE CONDSTORE")
+
+        self.uids = []
+        self.exists = 0
+        untagged = await self._command(f"SELECT {_quote(self.folder)}")
+        for response in untagged:
+            for code, value in _RESP_CODE_RE.findall(self._head(response)):
+                setattr(self, code.decode().lower(), int(value))
+
+        # Sequence-to-UID map, needed to resolve EXPUNGE sequence numbers
+        untagged = await self._command("UID SEARCH ALL")
+        for response in untagged:
+            head = self._head(response)
+            if head.upper().startswith(b"* SEARCH"):
+                self.uids = sorted(int(uid) for uid in head.split()[2:])
+        self.exists = len(self.uids)
+
+        self.notify_enabled = False
+        if "NOTIFY" in self.capabilities:
+            try:
+                await self._command(
+                    "NOTIFY SET (selected (MessageNew (UID FLAGS "
+                    f"BODY.PEEK[HEADER.FIELDS ({NOTIFY_HEADER_FIELDS})]) MessageExpunge FlagChange))"
+                )
+                self.notify_enabled = True
+            except IMAPCommandError:
+                pass
+
+        logger.debug(f"IMAP IDLE watcher started for {self.email} ({len(self.uids)} messages)")
+
+    async def _close(self):
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is None:
+            return
+        try:
+            writer.write(f"{self._next_tag()} LOGOUT\r\n".encode())
+            writer.close()
+            await asyncio.wait_for(writer.wait_closed(), timeout=5)
+        except Exception:
+            pass
+
+    # =============================================
+    # Protocol
+    # =============================================
+
+    def _next_tag(self) -> str:
+        self._tag_counter += 1
+        return f"W{self._tag_counter:05d}"
+
+    @staticmethod
+    def _head(response: List[Any]) -> bytes:
+        first = response[0]
+        return first[0] if isinstance(first, tuple) else first
+
+    async def _read_response(self, first_line: Optional[bytes] = None) -> List[Any]:
+        """
+        Read one complete response, including any literals.
+
+        Returns pieces shaped like imaplib's response data: (prefix, literal)
+        tuples for literal-bearing segments and plain bytes otherwise.
+        """
+        line = first_line if first_line is not None else await self._reader.readline()
+        pieces: List[Any] = []
+        while True:
+            if not line:
+                raise ConnectionError("IMAP connection closed")
+            match = _LITERAL_TAIL_RE.search(line)
+            if not match:
+                pieces.append(line.rstrip(b"\r\n"))
+                return pieces
+            literal = await self._reader.readexactly(int(match.group(1)))
+            pieces.append((line.rstrip(b"\r\n"), literal))
+            line = await self._reader.readline()
+
+    async def _command(self, command: str) -> List[List[Any]]:
+        """Send a command and return its untagged responses"""
+        tag = self._next_tag()
+        self._writer.write(f"{tag} {command}\r\n".encode())
+        await self._writer.drain()
+
+        untagged = []
+        while True:
+            response = await asyncio.wait_for(self._read_response(), timeout=COMMAND_TIMEOUT_SECONDS)
+            head = self._head(response)
+            if head.startswith(tag.encode() + b" "):
+                status = head.split(b" ", 2)[1].upper()
+                if status != b"OK":
+                    raise IMAPCommandError(f"{command.split()[0]} failed: {head.decode(errors='replace')}")
+                return untagged
+            untagged.append(response)
+            self._handle_untagged(response)
+
+    async def _idle_once(self):
+        """Enter IDLE, wait for updates (or the refresh interval), then leave"""
+        tag = self._next_tag()
+        self._writer.write(f"{tag} IDLE\r\n".encode())
+        await self._writer.drain()
+
+        while True:
+            response = await asyncio.wait_for(self._read_response(), timeout=COMMAND_TIMEOUT_SECONDS)
+            head = self._head(response)
+            if head.startswith(b"+"):
+                break
+            if head.startswith(tag.encode() + b" "):
+                # IDLE rejected: fall back to NOOP polling
+                self.capabilities.discard("IDLE")
+                return
+            self._handle_untagged(response)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.refresh_seconds
+        got_update = False
+        while True:
+            timeout = EVENT_DEBOUNCE_SECONDS if got_update else deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                line = await asyncio.wait_for(self._reader.readline(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            response = await self._read_response(line)
+            if self._head(response).upper().startswith(b"* BYE"):
+                raise ConnectionError("IMAP server closed the IDLE session")
+            if self._handle_untagged(response):
+                got_update = True
+
+        self._writer.write(b"DONE\r\n")
+        await self._writer.drain()
+        while True:
+            response = await asyncio.wait_for(self._read_response(), timeout=COMMAND_TIMEOUT_SECONDS)
+            if self._head(response).startswith(tag.encode() + b" "):
+                return
+            self._handle_untagged(response)
+
+    # =============================================
+    # Updates
+    # =============================================
+
+    def _handle_untagged(self, response: List[Any]) -> bool:
+        """Apply an untagged response to folder state; True if it was an update"""
+        head = self._head(response)
+        for code, value in _RESP_CODE_RE.findall(head):
+            setattr(self, code.decode().lower(), int(value))
+
+        match = _UNTAGGED_RE.match(head)
+        if not match:
+            return False
+        number, kind = int(match.group(1)), match.group(2).upper()
+
+        if kind == b"EXISTS":
+            self.exists = number
+            return number > len(self.uids)
+
+        if kind == b"EXPUNGE":
+            self.exists = max(self.exists - 1, 0)
+            if 0 < number <= len(self.uids):
+                uid = self.uids.pop(number - 1)
+                self._events.append({"type": "expunge", "folder": self.folder, "uid": uid})
+            return True
+
+        # FETCH: flag change on a known message, or (with NOTIFY) a new one
+        _, items = next(iter_fetch_responses(response), (None, {}))
+        uid = int(items["UID"]) if items.get("UID") is not None else None
+
+        if number == len(self.uids) + 1 and uid is not None:
+            self.uids.append(uid)
+            self._events.append(self._new_message_event(uid, items))
+            return True
+
+        if 0 < number <= len(self.uids) and "FLAGS" in items:
+            uid = uid or self.uids[number - 1]
+            flags = [str(flag) for flag in items.get("FLAGS") or []]
+            self._events.append({
+                "type": "flags",
+                "folder": self.folder,
+                "uid": uid,
+                "flags": flags,
+                "read": "\\Seen" in flags,
+                "flagged": "\\Flagged" in flags,
+            })
+            if isinstance(items.get("MODSEQ"), list) and items["MODSEQ"]:
+                self._events[-1]["modseq"] = int(items["MODSEQ"][0])
+            return True
+        return False
+
+    def _new_message_event(self, uid: int, items: Dict[str, Any]) -> MailEvent:
+        event: MailEvent = {"type": "new", "folder": self.folder, "uid": uid}
+        headers = next((v for k, v in items.items() if k.startswith("BODY[HEADER")), None)
+        if isinstance(headers, bytes):
+            msg = email_lib.message_from_bytes(headers)
+            event["preview"] = {
+                "id": str(uid),
+                "subject": decode_header_value(msg.get("Subject")),
+                "from": decode_header_value(msg.get("From")),
+                "date": msg.get("Date", ""),
+                "message_id": msg.get("Message-ID", ""),
+            }
+        flags = items.get("FLAGS")
+        if flags is not None:
+            event["read"] = "\\Seen" in [str(flag) for flag in flags]
+        return event
+
+    async def _catch_up(self):
+        """Fetch messages announced by EXISTS that NOTIFY did not deliver"""
+        if self.exists <= len(self.uids):
+            return
+        start = len(self.uids) + 1
+        await self._command(
+            f"FETCH {start}:* (UID FLAGS BODY.PEEK[HEADER.FIELDS ({NOTIFY_HEADER_FIELDS})])"
+        )
+
+    async def _flush_events(self):
+        events, self._events = self._events, []
+        for event in events:
+            try:
+                await self.on_event(event)
+            except Exception as e:
+                logger.warning(f"Mail event handler failed for {self.email}: {e}")
+
+
+class ImapIdleWatcherPool:
+    """Owns the IDLE watchers for all connected users in this worker"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_watchers: int = 5000,
+        connect_concurrency: int = 50,
+        refresh_seconds: int = 1500,
+        poll_seconds: int = 60
+    ):
+        self.host = host
+        self.port = port
+        self.max_watchers = max_watchers
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        # Bounds simultaneous TLS handshakes + logins after a restart
+        self._connect_slots = asyncio.Semaphore(connect_concurrency)
+        self._watchers: Dict[str, IdleWatcher] = {}
+
+    def watch(self, key: str, email: str, password: str, on_event: EventHandler, folder: str = "INBOX") -> bool:
+        """Start watching a mailbox folder under `key`; False if at capacity"""
+        existing = self._watchers.get(key)
+        if existing and existing.running and existing.email == email and existing.password == password:
+            existing.on_event = on_event
+            return True
+        if existing:
+            asyncio.get_running_loop().create_task(existing.stop())
+            del self._watchers[key]
+
+        if len(self._watchers) >= self.max_watchers:
+            logger.warning(f"IMAP IDLE watcher limit reached ({self.max_watchers}); not watching {email}")
+            return False
+
+        watcher = IdleWatcher(
+            self.host, self.port, email, password, on_event, self._connect_slots,
+            folder=folder, refresh_seconds=self.refresh_seconds, poll_seconds=self.poll_seconds
+        )
+        watcher.start()
+        self._watchers[key] = watcher
+        return True
+
+    async def unwatch(self, key: str):
+        watcher = self._watchers.pop(key, None)
+        if watcher:
+            await watcher.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "watchers": len(self._watchers),
+            "running": sum(1 for w in self._watchers.values() if w.running),
+            "max_watchers": self.max_watchers,
+        }
+
+    async def shutdown(self):
+        watchers, self._watchers = list(self._watchers.values()), {}
+        await asyncio.gather(*(w.stop() for w in watchers), return_exceptions=True)
+
+
+# Singleton instance
+imap_idle_pool = ImapIdleWatcherPool(
+    host=settings.MAILCOW_IMAP_HOST,
+    port=settings.MAILCOW_IMAP_PORT,
+    max_watchers=settings.MAIL_IDLE_MAX_WATCHERS,
+    connect_concurrency=settings.MAIL_IDLE_CONNECT_CONCURRENCY,
+    refresh_seconds=settings.MAIL_IDLE_REFRESH_SECONDS,
+    poll_seconds=settings.MAIL_IDLE_POLL_SECONDS
+)
@@ -0,0 +1,257 @@
+"""
+Bheem Workspace - IMAP Connection Pool
+Per-mailbox pool of logged-in IMAP connections.
+
+imaplib is blocking, so every operation runs on a dedicated thread pool and
+the event loop never waits on IMAP I/O. A pooled connection is checked out
+by exactly one operation at a time, which keeps imaplib's per-connection
+state safe, and it stays logged in between requests, so the TLS and LOGIN
+handshake happens once per mailbox rather than once per request.
+"""
+import asyncio
+import hashlib
+import imaplib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from core.config import settings
+
+logger = logging.getLogger("bheem.mail.imap_pool")
+
+T = TypeVar("T")
+
+# Errors that mean the connection itself is unusable (vs. a NO/BAD reply)
+BROKEN_CONNECTION_ERRORS = (imaplib.IMAP4.abort, OSError, EOFError)
+
+# Pooled connections idle longer than this are NOOP-checked before reuse
+HEALTHCHECK_AFTER_SECONDS = 60
+EVICTION_INTERVAL_SECONDS = 30
+CONNECT_TIMEOUT_SECONDS = 30
+
+
+class PooledIMAPConnection:
+    """A logged-in IMAP connection owned by the pool"""
+
+    def __init__(self, imap: imaplib.IMAP4_SSL):
+        self.imap = imap
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class _MailboxPool:
+    """Idle connections and checkout slots for one mailbox login"""
+
+    def __init__(self, email: str, size: int):
+        self.email = email
+        self.slots = asyncio.Semaphore(size)
+        self.idle: List[PooledIMAPConnection] = []
+        # Checkouts holding or waiting for a connection
+        self.in_use = 0
+        self.closed = False
+
+
+class IMAPConnectionPool:
+    """Pool of IMAP connections keyed by mail session credentials"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size_per_user: int = 3,
+        idle_timeout: int = 300,
+        max_workers: int = 32
+    ):
+        self.host = host
+        self.port = port
+        self.size_per_user = size_per_user
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="imap")
+        self._pools: Dict[str, _MailboxPool] = {}
+        self._evictor: Optional[asyncio.Task] = None
+        self._stats = {"connects": 0, "reuses": 0, "reconnects": 0, "evictions": 0}
+
+    # =============================================
+    # Public API
+    # =============================================
+
+    async def run(self, email: str, password: str, operation: Callable[[imaplib.IMAP4_SSL], T]) -> T:
+        """
+        Run a blocking operation against a pooled connection.
+
+        The operation receives a logged-in imaplib connection and runs on the
+        IMAP thread pool. If the connection turns out to be dead, it is
+        discarded and the operation is retried once on a fresh connection.
+        """
+        for attempt in range(2):
+            try:
+                async with self.connection(email, password) as conn:
+                    return await self._call(operation, conn.imap)
+            except BROKEN_CONNECTION_ERRORS as e:
+                if attempt:
+                    raise
+                self._stats["reconnects"] += 1
+                logger.info(f"IMAP connection for {email} dropped ({e}); reconnecting")
+
+    @asynccontextmanager
+    async def connection(self, email: str, password: str):
+        """Check out a logged-in connection for the duration of the block"""
+        self._ensure_evictor()
+        key = self._pool_key(email, password)
+        pool = self._pools.get(key)
+        if pool is None or pool.closed:
+            pool = self._pools[key] = _MailboxPool(email, self.size_per_user)
+
+        # Counted from before the wait for a slot, so the evictor never drops
+        # a pool while a checkout (possibly a slow login) is in progress
+        pool.in_use += 1
+        try:
+            async with pool.slots:
+                conn = await self._checkout(pool, email, password)
+                broken = False
+                try:
+                    yield conn
+                except BROKEN_CONNECTION_ERRORS:
+                    broken = True
+                    raise
+                finally:
+                    if broken or pool.closed or pool is not self._pools.get(key):
+                        self._close(conn)
+                    else:
+                        conn.last_used = time.monotonic()
+                        pool.idle.append(conn)
+        finally:
+            pool.in_use -= 1
+
+    def discard(self, email: str):
+        """Close every pooled connection for a mailbox (logout, password change)"""
+        for key, pool in list(self._pools.items()):
+            if pool.email != email:
+                continue
+            pool.closed = True
+            for conn in pool.idle:
+                self._close(conn)
+            pool.idle.clear()
+            del self._pools[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool counters for monitoring"""
+        return {
+            **self._stats,
+            "mailboxes": len(self._pools),
+            "idle": sum(len(pool.idle) for pool in self._pools.values()),
+            "in_use": sum(pool.in_use for pool in self._pools.values()),
+        }
+
+    async def shutdown(self):
+        """Close all connections and stop the eviction loop"""
+        if self._evictor:
+            self._evictor.cancel()
+            self._evictor = None
+        for email in {pool.email for pool in self._pools.values()}:
+            self.discard(email)
+        self._executor.shutdown(wait=False)
+
+    # =============================================
+    # Internals
+    # =============================================
+
+    @staticmethod
+    def _pool_key(email: str, password: str) -> str:
+        # Hash the password so a changed password gets a fresh login
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return f"{email.lower()}:{digest}"
+
+    async def _call(self, func: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, func, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted; hold on to the connection
+            # until it finishes so no other operation picks it up mid-command
+            await asyncio.wait({future})
+            raise
+
+    async def _checkout(self, pool: _MailboxPool, email: str, password: str) -> PooledIMAPConnection:
+        # Reuse the most recently used connection first; it is the least
+        # likely to have been dropped by the server
+        while pool.idle:
+            conn = pool.idle.pop()
+            if time.monotonic() - conn.last_used > HEALTHCHECK_AFTER_SECONDS:
+                try:
+                    await self._call(conn.imap.noop)
+                except Exception:
+                    self._close(conn)
+                    continue
+            self._stats["reuses"] += 1
+            return conn
+
+        imap = await self._call(self._open, email, password)
+        self._stats["connects"] += 1
+        return PooledIMAPConnection(imap)
+
+    def _open(self, email: str, password: str) -> imaplib.IMAP4_SSL:
+        imap = imaplib.IMAP4_SSL(self.host, self.port, timeout=CONNECT_TIMEOUT_SECONDS)
+        try:
+            imap.login(email, password)
+        except Exception:
+            try:
+                imap.shutdown()
+            except Exception:
+                pass
+            raise
+
+        # CONDSTORE makes SELECT report HIGHESTMODSEQ, which lets folder
+        # sync fetch only flags that changed since the last listing
+        try:
+            _, caps = imap.capability()
+            if caps and b"CONDSTORE" in caps[0].upper().split():
+                imap.enable("CONDSTORE")
+        except imaplib.IMAP4.error:
+            pass
+        return imap
+
+    def _close(self, conn: PooledIMAPConnection):
+        def logout():
+            try:
+                conn.imap.logout()
+            except Exception:
+                pass
+
+        try:
+            self._executor.submit(logout)
+        except RuntimeError:
+            # Executor already shut down
+            pass
+
+    def _ensure_evictor(self):
+        if self._evictor is None or self._evictor.done():
+            self._evictor = asyncio.get_running_loop().create_task(self._evict_idle())
+
+    async def _evict_idle(self):
+        """Periodically close connections idle past the timeout"""
+        while True:
+            await asyncio.sleep(EVICTION_INTERVAL_SECONDS)
+            cutoff = time.monotonic() - self.idle_timeout
+            for key, pool in list(self._pools.items()):
+                stale = [conn for conn in pool.idle if conn.last_used < cutoff]
+                if stale:
+                    pool.idle = [conn for conn in pool.idle if conn.last_used >= cutoff]
+                    for conn in stale:
+                        self._close(conn)
+                    self._stats["evictions"] += len(stale)
+                if not pool.idle and not pool.in_use:
+                    del self._pools[key]
+
+
+# Singleton instance
+imap_pool = IMAPConnectionPool(
+    host=settings.MAILCOW_IMAP_HOST,
+    port=settings.MAILCOW_IMAP_PORT,
+    size_per_user=settings.MAIL_IMAP_POOL_SIZE_PER_USER,
+    idle_timeout=settings.MAIL_IMAP_POOL_IDLE_SECONDS,
+    max_workers=settings.MAIL_IMAP_POOL_WORKERS
+)
@@ -6,8 +6,8 @@ from typing import Dict, Set, Optional, Any
 from datetime import datetime
 import asyncio
 import json
-import imaplib
 from core.logging import get_logger
+from services.imap_idle_service import imap_idle_pool
 
 logger = get_logger("bheem.mail.realtime")
 
@@ -23,10 +23,6 @@ class MailConnectionManager:
     def __init__(self):
         # user_id -> set of WebSocket connections
         self.active_connections: Dict[str, Set[Any]] = {}
-        # user_id -> IMAP monitoring task
-        self.imap_tasks: Dict[str, asyncio.Task] = {}
-        # user_id -> credentials (for IMAP IDLE)
-        self.user_credentials: Dict[str, dict] = {}
 
     async def connect(self, websocket, user_id: str, credentials: Optional[dict] = None):
         """
@@ -54,13 +50,19 @@ class MailConnectionManager:
 
         self.active_connections[user_id].add(websocket)
 
-        # Store credentials for IMAP monitoring
+        # Start IMAP IDLE monitoring (no-op if already watching)
         if credentials:
-            self.user_credentials[user_id] = credentials
-            # Start IMAP monitoring if not already running
-            if user_id not in self.imap_tasks or self.imap_tasks[user_id].done():
-                self.imap_tasks[user_id] = asyncio.create_task(
-                    self._monitor_imap_idle(user_id)
+            watching = imap_idle_pool.watch(
+                user_id,
+                credentials["email"],
+                credentials["password"],
+                lambda event: self._on_mail_event(user_id, event)
+            )
+            if not watching:
+                logger.warning(
+                    f"IMAP watcher capacity reached; no push updates for {user_id}",
+                    action="imap_idle_capacity",
+                    user_id=user_id
                 )
 
         logger.info(
@@ -80,12 +82,7 @@ class MailConnectionManager:
                 del self.active_connections[user_id]
 
                 # Stop IMAP monitoring
-                if user_id in self.imap_tasks:
-                    self.imap_tasks[user_id].cancel()
-                    del self.imap_tasks[user_id]
-
-                if user_id in self.user_credentials:
-                    del self.user_credentials[user_id]
+                asyncio.get_running_loop().create_task(imap_idle_pool.unwatch(user_id))
 
         logger.info(
             f"WebSocket disconnected for user {user_id}",
@@ -195,71 +192,33 @@ class MailConnectionManager:
 
         await self.send_to_user(user_id, message)
 
-    async def _monitor_imap_idle(self, user_id: str):
+    async def _on_mail_event(self, user_id: str, event: dict):
         """
-        Monitor IMAP IDLE for new emails.
+        Forward an IMAP IDLE event to the user's WebSockets.
 
-        Uses IMAP IDLE command to efficiently wait for new emails
-        instead of polling.
+        Message ids are IMAP UIDs, matching the mail API.
         """
-        import os
-
-        imap_host = os.getenv("MAILCOW_IMAP_HOST", "mail.bheem.me")
-        imap_port = int(os.getenv("MAILCOW_IMAP_PORT", "993"))
-
-        while user_id in self.active_connections and self.active_connections[user_id]:
-            try:
-                credentials = self.user_credentials.get(user_id)
-                if not credentials:
-                    await asyncio.sleep(5)
-                    continue
-
-                # Connect to IMAP
-                imap = imaplib.IMAP4_SSL(imap_host, imap_port)
-                imap.login(credentials["email"], credentials["password"])
-                imap.select("INBOX")
-
-                # Get initial message count
-                _, data = imap.search(None, "ALL")
-                initial_count = len(data[0].split()) if data[0] else 0
-
-                logger.debug(
-                    f"Started IMAP IDLE for {user_id}",
-                    action="imap_idle_start",
-                    initial_count=initial_count
-                )
-
-                # Note: Standard imaplib doesn't support IDLE directly
-                # We'll use polling as fallback (check every 30 seconds)
-                while user_id in self.active_connections:
-                    await asyncio.sleep(30)
-
-                    if user_id not in self.active_connections:
-                        break
-
-                    try:
-                        # Check for new messages
-                        imap.noop()  # Keep connection alive
-                        _, data = imap.search(None, "ALL")
-                        current_count = len(data[0].split()) if data[0] else 0
-
-                        if current_count > initial_count:
-                            # New email(s) arrived
-                            await self.broadcast_new_email(user_id, "INBOX")
-                            initial_count = current_count
-
-                    except Exception as e:
-                        logger.warning(f"IMAP check error: {e}")
-                        break
-
-                imap.logout()
-
-            except Exception as e:
-                logger.error(
-                    f"IMAP monitoring error for {user_id}: {e}",
-                    action="imap_error"
-                )
-                await asyncio.sleep(10)  # Wait before retry
+        if event["type"] == "new":
+            await self.broadcast_new_email(user_id, event["folder"], event.get("preview"))
+        elif event["type"] == "expunge":
+            await self.broadcast_email_update(
+                user_id,
+                str(event["uid"]),
+                "deleted",
+                {"folder": event["folder"]}
+            )
+        elif event["type"] == "flags":
+            await self.broadcast_email_update(
+                user_id,
+                str(event["uid"]),
+                "flags",
+                {
+                    "folder": event["folder"],
+                    "flags": event["flags"],
+                    "read": event["read"],
+                    "flagged": event["flagged"]
+                }
+            )
 
     def get_connection_count(self, user_id: str) -> int:
         """Get number of active connections for a user."""
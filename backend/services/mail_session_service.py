@@ -252,12 +252,18 @@ class MailSessionService:
         self._ensure_initialized()
 
         session_key = self._get_session_key(user_id)
+        credentials = self.get_credentials(user_id)
 
         if self._use_redis:
             deleted = self._redis_client.delete(session_key)
         else:
             deleted = 1 if self._memory_store.pop(session_key, None) else 0
 
+        # Drop pooled IMAP logins so they do not outlive the session
+        if credentials:
+            from services.imap_pool_service import imap_pool
+            imap_pool.discard(credentials["email"])
+
         if deleted:
             logger.info(
                 f"Mail session destroyed for user {user_id}",
@@ -0,0 +1,507 @@
+"""
+Bheem Workspace - Mail Store Service
+Persisted message metadata and incrementally maintained conversation threads.
+
+Folder sync writes header metadata for each message into mail_message_meta
+and assigns it to a thread as it arrives, using the same rules as
+MailThreadingService (In-Reply-To, then References, then normalized
+subject). Thread aggregates in mail_threads are recomputed only for the
+threads a sync touched, so conversation listing is an indexed, paginated
+query over the whole folder rather than a regroup of the last N messages.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, update, func, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.logging import get_logger
+from models.mail_models import MailFolderSyncState, MailMessageMeta, MailThread
+from services.imap_pool_service import imap_pool
+from services.mail_sync_service import mail_sync_service, FolderDelta
+from services.mail_threading_service import mail_threading_service
+
+logger = get_logger("bheem.mail.store")
+
+# Keeps IN (...) lists well under driver parameter limits
+IN_CLAUSE_CHUNK = 1000
+MAX_KEY_LENGTH = 500
+
+
+def _chunks(items: List[Any], size: int = IN_CLAUSE_CHUNK) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def message_row(mailbox: str, folder: str, uid: int, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a sync summary into mail_message_meta column values"""
+    threading = mail_threading_service
+    flags = summary.get("flags") or []
+    return {
+        "mailbox": mailbox,
+        "folder": folder,
+        "uid": uid,
+        "message_id": threading._normalize_message_id(summary.get("message_id", ""))[:MAX_KEY_LENGTH] or None,
+        "in_reply_to": threading._normalize_message_id(summary.get("in_reply_to", ""))[:MAX_KEY_LENGTH] or None,
+        "references": threading._parse_references(summary.get("references", "")),
+        "subject_key": threading._get_subject_key(summary.get("subject", ""))[:MAX_KEY_LENGTH] or None,
+        "subject": summary.get("subject", ""),
+        "from_address": summary.get("from", ""),
+        "to_addresses": summary.get("to", ""),
+        "cc_addresses": summary.get("cc", ""),
+        "date_header": (summary.get("date") or "")[:255],
+        "sent_at": _to_utc_naive(threading._parse_date(summary.get("date", ""))),
+        "preview": summary.get("preview", ""),
+        "size": summary.get("size", 0),
+        "flags": flags,
+        "is_read": "\\Seen" in flags,
+        "is_flagged": "\\Flagged" in flags,
+        "has_attachments": bool(summary.get("has_attachments")),
+    }
+
+
+class ThreadResolver:
+    """
+    Assigns incoming messages to threads.
+
+    Seeded with what the store already knows about the folder: which
+    thread each stored Message-ID belongs to, which thread owns each
+    subject key, and which threads hold replies to a given Message-ID
+    (replies can arrive before their parent).
+    """
+
+    def __init__(
+        self,
+        thread_by_message_id: Dict[str, str],
+        thread_by_subject: Dict[str, str],
+        reply_threads: Dict[str, Set[str]]
+    ):
+        self.thread_by_message_id = thread_by_message_id
+        self.thread_by_subject = thread_by_subject
+        self.reply_threads = reply_threads
+
+    def resolve(self, row: Dict[str, Any]) -> Tuple[str, Set[str]]:
+        """Return (thread_id, other thread ids to merge into it) for a message row"""
+        message_id = row.get("message_id")
+        subject_key = row.get("subject_key")
+
+        thread_id = None
+        in_reply_to = row.get("in_reply_to")
+        if in_reply_to:
+            thread_id = self.thread_by_message_id.get(in_reply_to)
+        if not thread_id:
+            for ref in row.get("references") or []:
+                thread_id = self.thread_by_message_id.get(ref)
+                if thread_id:
+                    break
+        if not thread_id and subject_key:
+            thread_id = self.thread_by_subject.get(subject_key)
+
+        # Threads already holding replies to this message belong with it
+        reply_threads = set(self.reply_threads.get(message_id, ())) if message_id else set()
+        if not thread_id and reply_threads:
+            thread_id = sorted(reply_threads)[0]
+        if not thread_id:
+            thread_id = message_id or f"thread_{row['uid']}"
+        merges = reply_threads - {thread_id}
+
+        if merges:
+            for key, value in list(self.thread_by_message_id.items()):
+                if value in merges:
+                    self.thread_by_message_id[key] = thread_id
+            for key, value in list(self.thread_by_subject.items()):
+                if value in merges:
+                    self.thread_by_subject[key] = thread_id
+            for threads in self.reply_threads.values():
+                if threads & merges:
+                    threads.difference_update(merges)
+                    threads.add(thread_id)
+        if message_id:
+            self.thread_by_message_id[message_id] = thread_id
+        if subject_key:
+            self.thread_by_subject.setdefault(subject_key, thread_id)
+        if in_reply_to:
+            self.reply_threads.setdefault(in_reply_to, set()).add(thread_id)
+
+        return thread_id, merges
+
+
+def summarize_thread(thread_id: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute mail_threads aggregate values from a thread's message rows"""
+    ordered = sorted(rows, key=lambda r: (r.get("sent_at") or datetime.min, r.get("uid") or 0))
+    oldest, latest = ordered[0], ordered[-1]
+    listing = [
+        {"subject": r.get("subject", ""), "from": r.get("from_address", ""), "to": r.get("to_addresses", "")}
+        for r in ordered
+    ]
+    return {
+        "thread_id": thread_id,
+        "subject": mail_threading_service._get_conversation_subject(listing),
+        "subject_key": oldest.get("subject_key"),
+        "message_count": len(ordered),
+        "unread_count": sum(1 for r in ordered if not r.get("is_read")),
+        "participants": sorted(mail_threading_service._get_participants(listing)),
+        "preview": latest.get("preview", ""),
+        "latest_date": latest.get("date_header", ""),
+        "oldest_date": oldest.get("date_header", ""),
+        "latest_at": latest.get("sent_at"),
+        "oldest_at": oldest.get("sent_at"),
+    }
+
+
+class MailStoreService:
+    """Keeps mail metadata and threads in sync with IMAP folders"""
+
+    def __init__(self):
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    def _lock_for(self, mailbox: str, folder: str) -> asyncio.Lock:
+        return self._locks.setdefault((mailbox, folder), asyncio.Lock())
+
+    # =============================================
+    # Sync
+    # =============================================
+
+    async def sync_folder(self, db: AsyncSession, email: str, password: str, folder: str = "INBOX") -> Optional[bool]:
+        """
+        Bring the stored metadata for a folder up to date.
+
+        Returns True when the folder is fully synced, False when older
+        messages remain to be backfilled, and None if the sync failed (the
+        previously stored data is still served).
+        """
+        mailbox = email.lower()
+        async with self._lock_for(mailbox, folder):
+            try:
+                state = (await db.execute(
+                    select(MailFolderSyncState).where(
+                        MailFolderSyncState.mailbox == mailbox,
+                        MailFolderSyncState.folder == folder
+                    )
+                )).scalar_one_or_none()
+
+                known_uids: List[int] = []
+                if state:
+                    known_uids = list((await db.execute(
+                        select(MailMessageMeta.uid).where(
+                            MailMessageMeta.mailbox == mailbox,
+                            MailMessageMeta.folder == folder
+                        )
+                    )).scalars().all())
+
+                delta = await imap_pool.run(
+                    email,
+                    password,
+                    lambda mail: mail_sync_service.sync_delta(
+                        mail,
+                        folder,
+                        uidvalidity=state.uidvalidity if state else None,
+                        highestmodseq=state.highestmodseq if state else None,
+                        known_uids=known_uids,
+                        uidnext=state.uidnext if state else None
+                    )
+                )
+
+                await self._apply_delta(db, mailbox, folder, delta)
+
+                if state is None:
+                    state = MailFolderSyncState(mailbox=mailbox, folder=folder)
+                    db.add(state)
+                state.uidvalidity = delta.uidvalidity
+                state.uidnext = delta.uidnext
+                state.highestmodseq = delta.highestmodseq
+                state.last_synced_at = datetime.utcnow()
+                await db.commit()
+                return delta.complete
+            except Exception as e:
+                await db.rollback()
+                logger.warning(
+                    f"Mail folder sync failed for {mailbox}/{folder}: {e}",
+                    action="mail_store_sync_failed"
+                )
+                return None
+
+    async def _apply_delta(self, db: AsyncSession, mailbox: str, folder: str, delta: FolderDelta):
+        scope = (MailMessageMeta.mailbox == mailbox, MailMessageMeta.folder == folder)
+        affected: Set[str] = set()
+
+        if delta.reset:
+            await db.execute(delete(MailMessageMeta).where(*scope))
+            await db.execute(delete(MailThread).where(MailThread.mailbox == mailbox, MailThread.folder == folder))
+
+        # Expunged messages
+        for uids in _chunks(delta.removed):
+            result = await db.execute(
+                delete(MailMessageMeta)
+                .where(*scope, MailMessageMeta.uid.in_(uids))
+                .returning(MailMessageMeta.thread_id)
+            )
+            affected.update(result.scalars().all())
+
+        # Flag changes
+        if delta.flags:
+            table = MailMessageMeta.__table__
+            await db.execute(
+                update(table)
+                .where(table.c.mailbox == mailbox, table.c.folder == folder, table.c.uid == bindparam("b_uid"))
+                .values(
+                    flags=bindparam("b_flags"),
+                    is_read=bindparam("b_read"),
+                    is_flagged=bindparam("b_flagged"),
+                    updated_at=datetime.utcnow()
+                ),
+                [
+                    {"b_uid": uid, "b_flags": flags, "b_read": "\\Seen" in flags, "b_flagged": "\\Flagged" in flags}
+                    for uid, flags in delta.flags.items()
+                ]
+            )
+            for uids in _chunks(list(delta.flags)):
+                result = await db.execute(
+                    select(MailMessageMeta.thread_id).where(*scope, MailMessageMeta.uid.in_(uids))
+                )
+                affected.update(result.scalars().all())
+
+        # New messages, oldest first so parents usually precede replies
+        if delta.added:
+            rows = [message_row(mailbox, folder, uid, summary) for uid, summary in delta.added.items()]
+            rows.sort(key=lambda r: (r["sent_at"] or datetime.min, r["uid"]))
+            resolver = await self._load_resolver(db, mailbox, folder, rows)
+
+            merged: Dict[str, str] = {}
+            for row in rows:
+                thread_id, merges = resolver.resolve(row)
+                row["thread_id"] = thread_id
+                affected.add(thread_id)
+                for old_thread in merges:
+                    merged[old_thread] = thread_id
+
+            # Fold merged threads into their new parent thread
+            for old_thread, new_thread in merged.items():
+                while new_thread in merged and merged[new_thread] != new_thread:
+                    new_thread = merged[new_thread]
+                await db.execute(
+                    update(MailMessageMeta).where(*scope, MailMessageMeta.thread_id == old_thread).values(thread_id=new_thread)
+                )
+                for row in rows:
+                    if row["thread_id"] == old_thread:
+                        row["thread_id"] = new_thread
+                affected.discard(old_thread)
+                affected.add(new_thread)
+                await db.execute(delete(MailThread).where(
+                    MailThread.mailbox == mailbox, MailThread.folder == folder, MailThread.thread_id == old_thread
+                ))
+
+            for batch in _chunks(rows):
+                stmt = insert(MailMessageMeta).values(batch)
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=["mailbox", "folder", "uid"],
+                    set_={
+                        column: getattr(stmt.excluded, column)
+                        for column in batch[0]
+                        if column not in ("mailbox", "folder", "uid")
+                    }
+                ))
+
+        await self._refresh_threads(db, mailbox, folder, affected)
+
+    async def _load_resolver(self, db: AsyncSession, mailbox: str, folder: str, rows: List[Dict[str, Any]]) -> ThreadResolver:
+        scope = (MailMessageMeta.mailbox == mailbox, MailMessageMeta.folder == folder)
+
+        parent_ids = list({
+            ref for row in rows for ref in [row["in_reply_to"], *row["references"]] if ref
+        })
+        thread_by_message_id: Dict[str, str] = {}
+        for ids in _chunks(parent_ids):
+            result = await db.execute(
+                select(MailMessageMeta.message_id, MailMessageMeta.thread_id)
+                .where(*scope, MailMessageMeta.message_id.in_(ids))
+            )
+            thread_by_message_id.update(dict(result.all()))
+
+        subject_keys = list({row["subject_key"] for row in rows if row["subject_key"]})
+        thread_by_subject: Dict[str, str] = {}
+        for keys in _chunks(subject_keys):
+            result = await db.execute(
+                select(MailThread.subject_key, MailThread.thread_id)
+                .where(MailThread.mailbox == mailbox, MailThread.folder == folder, MailThread.subject_key.in_(keys))
+                .order_by(MailThread.latest_at.desc())
+            )
+            for key, thread_id in result.all():
+                thread_by_subject.setdefault(key, thread_id)
+
+        message_ids = list({row["message_id"] for row in rows if row["message_id"]})
+        reply_threads: Dict[str, Set[str]] = {}
+        for ids in _chunks(message_ids):
+            result = await db.execute(
+                select(MailMessageMeta.in_reply_to, MailMessageMeta.thread_id)
+                .where(*scope, MailMessageMeta.in_reply_to.in_(ids))
+            )
+            for parent, thread_id in result.all():
+                reply_threads.setdefault(parent, set()).add(thread_id)
+
+        return ThreadResolver(thread_by_message_id, thread_by_subject, reply_threads)
+
+    async def _refresh_threads(self, db: AsyncSession, mailbox: str, folder: str, thread_ids: Set[str]):
+        """Recompute aggregates for the given threads"""
+        columns = (
+            MailMessageMeta.thread_id, MailMessageMeta.uid, MailMessageMeta.subject,
+            MailMessageMeta.subject_key, MailMessageMeta.from_address, MailMessageMeta.to_addresses,
+            MailMessageMeta.date_header, MailMessageMeta.sent_at, MailMessageMeta.preview,
+            MailMessageMeta.is_read,
+        )
+        for ids in _chunks(sorted(thread_ids)):
+            result = await db.execute(
+                select(*columns).where(
+                    MailMessageMeta.mailbox == mailbox,
+                    MailMessageMeta.folder == folder,
+                    MailMessageMeta.thread_id.in_(ids)
+                )
+            )
+            by_thread: Dict[str, List[Dict[str, Any]]] = {}
+            for row in result.mappings().all():
+                by_thread.setdefault(row["thread_id"], []).append(dict(row))
+
+            empty = [thread_id for thread_id in ids if thread_id not in by_thread]
+            if empty:
+                await db.execute(delete(MailThread).where(
+                    MailThread.mailbox == mailbox, MailThread.folder == folder, MailThread.thread_id.in_(empty)
+                ))
+
+            values = [
+                {"mailbox": mailbox, "folder": folder, "updated_at": datetime.utcnow(), **summarize_thread(thread_id, rows)}
+                for thread_id, rows in by_thread.items()
+            ]
+            if values:
+                stmt = insert(MailThread).values(values)
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=["mailbox", "folder", "thread_id"],
+                    set_={
+                        column: getattr(stmt.excluded, column)
+                        for column in values[0]
+                        if column not in ("mailbox", "folder", "thread_id")
+                    }
+                ))
+
+    # =============================================
+    # Queries
+    # =============================================
+
+    async def list_conversations(
+        self,
+        db: AsyncSession,
+        email: str,
+        folder: str = "INBOX",
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Page through a folder's conversations, newest activity first"""
+        mailbox = email.lower()
+        scope = (MailThread.mailbox == mailbox, MailThread.folder == folder)
+
+        total = (await db.execute(select(func.count()).select_from(MailThread).where(*scope))).scalar() or 0
+        threads = (await db.execute(
+            select(MailThread)
+            .where(*scope)
+            .order_by(MailThread.latest_at.desc().nullslast(), MailThread.thread_id)
+            .offset(offset)
+            .limit(limit)
+        )).scalars().all()
+
+        messages = await self._thread_messages(db, mailbox, folder, [t.thread_id for t in threads])
+        return total, [self._format_thread(t, messages.get(t.thread_id, [])) for t in threads]
+
+    async def get_conversation(self, db: AsyncSession, email: str, folder: str, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Get one conversation with its message summaries (oldest first)"""
+        mailbox = email.lower()
+        thread = (await db.execute(
+            select(MailThread).where(
+                MailThread.mailbox == mailbox,
+                MailThread.folder == folder,
+                MailThread.thread_id == thread_id
+            )
+        )).scalar_one_or_none()
+        if not thread:
+            return None
+        messages = await self._thread_messages(db, mailbox, folder, [thread_id])
+        return self._format_thread(thread, messages.get(thread_id, []))
+
+    async def find_thread_id(self, db: AsyncSession, email: str, folder: str, uid: str) -> Optional[str]:
+        """Look up the thread a message (by UID) belongs to"""
+        try:
+            uid_value = int(uid)
+        except (TypeError, ValueError):
+            return None
+        return (await db.execute(
+            select(MailMessageMeta.thread_id).where(
+                MailMessageMeta.mailbox == email.lower(),
+                MailMessageMeta.folder == folder,
+                MailMessageMeta.uid == uid_value
+            )
+        )).scalar_one_or_none()
+
+    async def _thread_messages(
+        self,
+        db: AsyncSession,
+        mailbox: str,
+        folder: str,
+        thread_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        if not thread_ids:
+            return {}
+        result = await db.execute(
+            select(MailMessageMeta)
+            .where(
+                MailMessageMeta.mailbox == mailbox,
+                MailMessageMeta.folder == folder,
+                MailMessageMeta.thread_id.in_(thread_ids)
+            )
+            .order_by(MailMessageMeta.sent_at.asc().nullsfirst(), MailMessageMeta.uid)
+        )
+        messages: Dict[str, List[Dict[str, Any]]] = {}
+        for meta in result.scalars().all():
+            messages.setdefault(meta.thread_id, []).append(self._format_message(meta))
+        return messages
+
+    def _format_message(self, meta: MailMessageMeta) -> Dict[str, Any]:
+        return {
+            "id": str(meta.uid),
+            "subject": meta.subject or "",
+            "from": meta.from_address or "",
+            "to": meta.to_addresses or "",
+            "cc": meta.cc_addresses or "",
+            "date": meta.date_header or "",
+            "preview": meta.preview or "",
+            "read": bool(meta.is_read),
+            "flagged": bool(meta.is_flagged),
+            "has_attachments": bool(meta.has_attachments),
+            # Threading headers
+            "message_id": f"<{meta.message_id}>" if meta.message_id else "",
+            "in_reply_to": f"<{meta.in_reply_to}>" if meta.in_reply_to else "",
+            "references": " ".join(f"<{ref}>" for ref in (meta.references or []))
+        }
+
+    def _format_thread(self, thread: MailThread, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "thread_id": thread.thread_id,
+            "subject": thread.subject or "",
+            "message_count": thread.message_count or 0,
+            "participants": thread.participants or [],
+            "latest_date": thread.latest_date or "",
+            "oldest_date": thread.oldest_date or "",
+            "preview": thread.preview or "",
+            "has_unread": (thread.unread_count or 0) > 0,
+            "unread_count": thread.unread_count or 0,
+            "messages": messages
+        }
+
+
+# Singleton instance
+mail_store_service = MailStoreService()
@@ -0,0 +1,564 @@
+"""
+Bheem Workspace - Mail Sync Service
+Header-only folder listing with UID-based incremental sync.
+
+A folder listing needs headers, flags and a short preview, not whole
+messages. Listings are built from one batched UID FETCH of the envelope
+headers, FLAGS, RFC822.SIZE and BODYSTRUCTURE, plus a partial peek of the
+first text part for the preview.
+
+Each folder keeps a cursor (UIDVALIDITY, UIDNEXT, HIGHESTMODSEQ) alongside
+the summaries already fetched, so a repeat listing only fetches UIDs it has
+not seen and flag changes since the last HIGHESTMODSEQ.
+"""
+import binascii
+import email as email_lib
+import html
+import imaplib
+import logging
+import quopri
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.header import decode_header, make_header
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("bheem.mail.sync")
+
+# Headers needed to render a listing and to thread conversations
+LIST_HEADER_FIELDS = ("FROM", "TO", "CC", "DATE", "SUBJECT", "MESSAGE-ID", "IN-REPLY-TO", "REFERENCES")
+PREVIEW_PEEK_BYTES = 1024
+PREVIEW_LENGTH = 200
+
+# Bounds on the in-memory sync state
+MAX_TRACKED_FOLDERS = 1000
+MAX_CACHED_PER_FOLDER = 2000
+
+# Full-folder sync: UIDs per FETCH command, and new messages per pass
+# (older messages are backfilled on later passes)
+SYNC_BATCH_SIZE = 500
+SYNC_MAX_NEW = 5000
+
+
+# =============================================
+# IMAP response parsing
+# =============================================
+
+_LITERAL_RE = re.compile(rb"\{(\d+)\}$")
+
+
+def _lex(text: bytes, tokens: List[Any]):
+    """Split a chunk of an IMAP response into tokens"""
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i:i + 1]
+        if c in b" \r\n":
+            i += 1
+        elif c in b"()":
+            tokens.append(c.decode())
+            i += 1
+        elif c == b'"':
+            i += 1
+            buf = bytearray()
+            while i < n and text[i:i + 1] != b'"':
+                if text[i:i + 1] == b"\\":
+                    i += 1
+                buf += text[i:i + 1]
+                i += 1
+            tokens.append(("str", buf.decode("utf-8", errors="replace")))
+            i += 1
+        else:
+            # Atoms may carry a bracketed section, e.g. BODY[HEADER.FIELDS (FROM)]<0>
+            start, depth = i, 0
+            while i < n:
+                c = text[i:i + 1]
+                if c == b"[":
+                    depth += 1
+                elif c == b"]":
+                    depth -= 1
+                elif depth == 0 and c in b" ()\r\n":
+                    break
+                i += 1
+            atom = text[start:i].decode("utf-8", errors="replace")
+            tokens.append(None if atom.upper() == "NIL" else ("atom", atom))
+
+
+def _tokenize_response(data: Iterable[Any]) -> List[Any]:
+    """Tokenize imaplib response data, splicing literals back in"""
+    tokens: List[Any] = []
+    for piece in data:
+        if piece is None:
+            continue
+        if isinstance(piece, tuple):
+            prefix, literal = piece
+            _lex(_LITERAL_RE.sub(b"", prefix.rstrip()), tokens)
+            tokens.append(("lit", literal))
+        else:
+            _lex(piece, tokens)
+    return tokens
+
+
+def _parse_list(tokens: List[Any], pos: int) -> Tuple[List[Any], int]:
+    items = []
+    while pos < len(tokens):
+        token = tokens[pos]
+        if token == "(":
+            nested, pos = _parse_list(tokens, pos + 1)
+            items.append(nested)
+            continue
+        if token == ")":
+            return items, pos + 1
+        items.append(None if token is None else token[1])
+        pos += 1
+    return items, pos
+
+
+def iter_fetch_responses(data: Iterable[Any]) -> Iterator[Tuple[Optional[int], Dict[str, Any]]]:
+    """
+    Yield (sequence number, {ITEM: value}) for each FETCH response.
+
+    Item names are upper-cased; section items keep their section text,
+    e.g. "BODY[1]<0>". Literal values are returned as bytes.
+    """
+    tokens = _tokenize_response(data)
+    pos = 0
+    sequence = None
+    while pos < len(tokens):
+        token = tokens[pos]
+        if token != "(":
+            # Message sequence number (and the FETCH keyword, if present)
+            if isinstance(token, tuple) and token[0] == "atom" and token[1].isdigit():
+                sequence = int(token[1])
+            pos += 1
+            continue
+        values, pos = _parse_list(tokens, pos + 1)
+        items = {}
+        for key, value in zip(values[0::2], values[1::2]):
+            if isinstance(key, str):
+                items[key.upper()] = value
+        yield sequence, items
+        sequence = None
+
+
+def parse_fetch_response(data: Iterable[Any]) -> Dict[int, Dict[str, Any]]:
+    """Parse UID FETCH response data into {uid: {ITEM: value}}"""
+    results: Dict[int, Dict[str, Any]] = {}
+    for _, items in iter_fetch_responses(data):
+        uid = items.get("UID")
+        if uid is not None:
+            results[int(uid)] = items
+    return results
+
+
+def _as_str(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _param_dict(params: Any) -> Dict[str, str]:
+    if not isinstance(params, list):
+        return {}
+    return {_as_str(k).lower(): _as_str(v) for k, v in zip(params[0::2], params[1::2])}
+
+
+@dataclass
+class BodyPart:
+    """A leaf of a BODYSTRUCTURE tree"""
+    section: str
+    mime_type: str
+    encoding: str
+    charset: str
+    is_attachment: bool
+
+
+def parse_bodystructure(structure: Any) -> List[BodyPart]:
+    """Flatten a parsed BODYSTRUCTURE into its leaf parts with section numbers"""
+    parts: List[BodyPart] = []
+
+    def walk(node: Any, path: List[int]):
+        if not isinstance(node, list) or not node:
+            return
+        if isinstance(node[0], list):
+            # Multipart: child parts come first, then the subtype and extensions
+            for index, child in enumerate(node, 1):
+                if not isinstance(child, list):
+                    break
+                walk(child, path + [index])
+            return
+
+        main_type = _as_str(node[0]).lower()
+        sub_type = _as_str(node[1]).lower() if len(node) > 1 else ""
+        params = _param_dict(node[2]) if len(node) > 2 else {}
+        encoding = _as_str(node[5]).lower() if len(node) > 5 else ""
+
+        # Extension data: text/* carries a line count, message/rfc822 an
+        # envelope, body and line count, before MD5 and disposition
+        if main_type == "text":
+            disposition_index = 9
+        elif main_type == "message" and sub_type == "rfc822":
+            disposition_index = 11
+        else:
+            disposition_index = 8
+        disposition = node[disposition_index] if len(node) > disposition_index else None
+        disposition_type = ""
+        disposition_params = {}
+        if isinstance(disposition, list) and disposition:
+            disposition_type = _as_str(disposition[0]).lower()
+            disposition_params = _param_dict(disposition[1]) if len(disposition) > 1 else {}
+
+        is_attachment = (
+            disposition_type == "attachment"
+            or "name" in params
+            or "filename" in disposition_params
+            or main_type not in ("text", "multipart")
+        )
+        parts.append(BodyPart(
+            section=".".join(str(p) for p in path) or "1",
+            mime_type=f"{main_type}/{sub_type}",
+            encoding=encoding,
+            charset=params.get("charset") or "utf-8",
+            is_attachment=is_attachment,
+        ))
+
+    walk(structure, [])
+    return parts
+
+
+def pick_preview_part(parts: List[BodyPart]) -> Optional[BodyPart]:
+    """Prefer the first inline text/plain part, then text/html"""
+    for mime_type in ("text/plain", "text/html"):
+        for part in parts:
+            if part.mime_type == mime_type and not part.is_attachment:
+                return part
+    return None
+
+
+def decode_preview(raw: bytes, part: BodyPart) -> str:
+    """Decode a partial body peek into a short plain-text preview"""
+    if not raw:
+        return ""
+    if part.encoding == "base64":
+        compact = re.sub(rb"\s+", b"", raw)
+        compact = compact[:len(compact) - len(compact) % 4]
+        try:
+            raw = binascii.a2b_base64(compact)
+        except binascii.Error:
+            return ""
+    elif part.encoding == "quoted-printable":
+        # Drop a soft line break or escape cut off by the partial fetch
+        raw = quopri.decodestring(re.sub(rb"=[0-9A-Fa-f]?$", b"", raw))
+
+    try:
+        text = raw.decode(part.charset, errors="ignore")
+    except LookupError:
+        text = raw.decode("utf-8", errors="ignore")
+
+    if part.mime_type == "text/html":
+        text = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", text)
+        text = html.unescape(re.sub(r"<[^>]*>", " ", text))
+
+    return " ".join(text.split())[:PREVIEW_LENGTH]
+
+
+def decode_header_value(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+def uid_set(uids: Iterable[int]) -> str:
+    """Compress UIDs into an IMAP sequence set, e.g. 1:3,7"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(str(a) if a == b else f"{a}:{b}" for a, b in ranges)
+
+
+def _response_value(mail: imaplib.IMAP4, code: str) -> Optional[int]:
+    _, data = mail.response(code)
+    if data and data[-1] is not None:
+        try:
+            return int(_as_str(data[-1]).split()[0])
+        except (ValueError, IndexError):
+            return None
+    return None
+
+
+# =============================================
+# Folder sync state
+# =============================================
+
+@dataclass
+class FolderDelta:
+    """Changes in a folder relative to a caller-supplied cursor"""
+    uidvalidity: Optional[int]
+    uidnext: Optional[int]
+    highestmodseq: Optional[int]
+    reset: bool = False
+    added: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    flags: Dict[int, List[str]] = field(default_factory=dict)
+    removed: List[int] = field(default_factory=list)
+    complete: bool = True
+
+
+@dataclass
+class FolderSyncState:
+    """Sync cursor and cached summaries for one mailbox folder"""
+    uidvalidity: Optional[int] = None
+    uidnext: Optional[int] = None
+    highestmodseq: Optional[int] = None
+    uids: Optional[List[int]] = None
+    messages: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+
+class MailSyncService:
+    """Builds folder listings from header-only fetches and a per-folder cursor"""
+
+    def __init__(self):
+        self._states: "OrderedDict[Tuple[str, str], FolderSyncState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # =============================================
+    # Fetching
+    # =============================================
+
+    def fetch_summaries(self, mail: imaplib.IMAP4, uids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Fetch listing summaries for UIDs in the selected folder.
+
+        One batched UID FETCH for headers, flags, size and structure, then
+        one partial peek per distinct preview section.
+        """
+        if not uids:
+            return {}
+
+        header_item = f"BODY.PEEK[HEADER.FIELDS ({' '.join(LIST_HEADER_FIELDS)})]"
+        _, data = mail.uid("FETCH", uid_set(uids), f"(UID FLAGS RFC822.SIZE BODYSTRUCTURE {header_item})")
+        fetched = parse_fetch_response(data)
+
+        summaries: Dict[int, Dict[str, Any]] = {}
+        preview_parts: Dict[int, BodyPart] = {}
+        for uid, items in fetched.items():
+            headers = b""
+            for key, value in items.items():
+                if key.startswith("BODY[HEADER"):
+                    headers = value if isinstance(value, bytes) else _as_str(value).encode()
+            parts = parse_bodystructure(items.get("BODYSTRUCTURE"))
+            summaries[uid] = self._summarize(uid, items, headers, parts)
+            preview_part = pick_preview_part(parts)
+            if preview_part:
+                preview_parts[uid] = preview_part
+
+        # Group previews by section so common layouts need a single command
+        by_section: Dict[str, List[int]] = {}
+        for uid, part in preview_parts.items():
+            by_section.setdefault(part.section, []).append(uid)
+        for section, section_uids in by_section.items():
+            _, data = mail.uid("FETCH", uid_set(section_uids), f"(UID BODY.PEEK[{section}]<0.{PREVIEW_PEEK_BYTES}>)")
+            for uid, items in parse_fetch_response(data).items():
+                if uid not in summaries:
+                    continue
+                raw = next((v for k, v in items.items() if k.startswith("BODY[")), b"")
+                if not isinstance(raw, bytes):
+                    raw = _as_str(raw).encode()
+                summaries[uid]["preview"] = decode_preview(raw, preview_parts[uid])
+
+        return summaries
+
+    def _summarize(
+        self,
+        uid: int,
+        items: Dict[str, Any],
+        headers: bytes,
+        parts: List[BodyPart]
+    ) -> Dict[str, Any]:
+        msg = email_lib.message_from_bytes(headers)
+        flags = [_as_str(flag) for flag in (items.get("FLAGS") or [])]
+        return {
+            "id": str(uid),
+            "subject": decode_header_value(msg.get("Subject")),
+            "from": decode_header_value(msg.get("From")),
+            "to": decode_header_value(msg.get("To")),
+            "cc": decode_header_value(msg.get("Cc")),
+            "date": msg.get("Date", ""),
+            "preview": "",
+            "read": "\\Seen" in flags,
+            "flagged": "\\Flagged" in flags,
+            "flags": flags,
+            "size": int(items.get("RFC822.SIZE") or 0),
+            "has_attachments": any(part.is_attachment for part in parts),
+            # Threading headers
+            "message_id": msg.get("Message-ID", ""),
+            "in_reply_to": msg.get("In-Reply-To", ""),
+            "references": msg.get("References", "")
+        }
+
+    # =============================================
+    # Incremental listing
+    # =============================================
+
+    def list_folder(
+        self,
+        mail: imaplib.IMAP4,
+        mailbox: str,
+        folder: str,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List the newest messages in a folder, skipping `offset`.
+
+        Runs on a logged-in connection. Returns (summaries, total).
+        """
+        typ, data = mail.select(folder, readonly=True)
+        if typ != "OK":
+            raise imaplib.IMAP4.error(f"Cannot select {folder}: {_as_str(data[0] if data else '')}")
+        exists = int(_as_str(data[0]) or 0)
+        uidvalidity = _response_value(mail, "UIDVALIDITY")
+        uidnext = _response_value(mail, "UIDNEXT")
+        highestmodseq = _response_value(mail, "HIGHESTMODSEQ")
+
+        key = (mailbox.lower(), folder)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.uidvalidity != uidvalidity or uidvalidity is None:
+                # First load, or the server renumbered the folder
+                state = FolderSyncState(uidvalidity=uidvalidity)
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > MAX_TRACKED_FOLDERS:
+                self._states.popitem(last=False)
+            known_uids = state.uids
+            known_uidnext = state.uidnext
+            known_modseq = state.highestmodseq
+
+        # New or expunged messages change UIDNEXT or the message count
+        if known_uids is not None and uidnext is not None and uidnext == known_uidnext and exists == len(known_uids):
+            uids = known_uids
+        else:
+            _, search_data = mail.uid("SEARCH", None, "ALL")
+            uids = sorted(int(uid) for uid in (search_data[0] or b"").split())
+
+        newest_first = uids[::-1]
+        window = newest_first[offset:offset + limit]
+
+        # Flag changes since the last cursor
+        flag_updates: Dict[int, List[str]] = {}
+        cached_in_window = [uid for uid in window if uid in state.messages]
+        if highestmodseq is not None and known_modseq is not None:
+            if highestmodseq != known_modseq and state.messages:
+                _, flag_data = mail.uid("FETCH", "1:*", f"(UID FLAGS) (CHANGEDSINCE {known_modseq})")
+                flag_updates = {uid: items.get("FLAGS") or [] for uid, items in parse_fetch_response(flag_data).items()}
+        elif cached_in_window:
+            # No CONDSTORE: refresh flags for the cached part of the window
+            _, flag_data = mail.uid("FETCH", uid_set(cached_in_window), "(UID FLAGS)")
+            flag_updates = {uid: items.get("FLAGS") or [] for uid, items in parse_fetch_response(flag_data).items()}
+
+        missing = [uid for uid in window if uid not in state.messages]
+        fetched = self.fetch_summaries(mail, missing)
+
+        with self._lock:
+            for uid, flags in flag_updates.items():
+                summary = state.messages.get(uid)
+                if summary:
+                    flags = [_as_str(flag) for flag in flags]
+                    summary.update(flags=flags, read="\\Seen" in flags, flagged="\\Flagged" in flags)
+            state.messages.update(fetched)
+
+            present = set(uids)
+            for uid in [uid for uid in state.messages if uid not in present]:
+                del state.messages[uid]
+            if len(state.messages) > MAX_CACHED_PER_FOLDER:
+                keep = set(window) | set(sorted(state.messages, reverse=True)[:MAX_CACHED_PER_FOLDER])
+                state.messages = {uid: msg for uid, msg in state.messages.items() if uid in keep}
+
+            state.uids = uids
+            state.uidnext = uidnext
+            state.highestmodseq = highestmodseq
+
+            messages = [dict(state.messages[uid]) for uid in window if uid in state.messages]
+
+        return messages, len(uids)
+
+    def sync_delta(
+        self,
+        mail: imaplib.IMAP4,
+        folder: str,
+        uidvalidity: Optional[int] = None,
+        highestmodseq: Optional[int] = None,
+        known_uids: Iterable[int] = (),
+        uidnext: Optional[int] = None,
+        max_new: int = SYNC_MAX_NEW
+    ) -> FolderDelta:
+        """
+        Compute what changed in a folder since a persisted cursor.
+
+        Used by stores that keep their own copy of folder metadata. New
+        messages are fetched newest first, at most `max_new` per call;
+        `complete` is False while older messages remain to be backfilled.
+        """
+        typ, data = mail.select(folder, readonly=True)
+        if typ != "OK":
+            raise imaplib.IMAP4.error(f"Cannot select {folder}: {_as_str(data[0] if data else '')}")
+        exists = int(_as_str(data[0]) or 0)
+        delta = FolderDelta(
+            uidvalidity=_response_value(mail, "UIDVALIDITY"),
+            uidnext=_response_value(mail, "UIDNEXT"),
+            highestmodseq=_response_value(mail, "HIGHESTMODSEQ"),
+        )
+        delta.reset = uidvalidity is None or delta.uidvalidity != uidvalidity
+        known = set() if delta.reset else set(known_uids)
+
+        # New or expunged messages change UIDNEXT or the message count
+        if known and delta.uidnext is not None and delta.uidnext == uidnext and exists == len(known):
+            uids = sorted(known)
+        else:
+            _, search_data = mail.uid("SEARCH", None, "ALL")
+            uids = sorted(int(uid) for uid in (search_data[0] or b"").split())
+        present = set(uids)
+        delta.removed = sorted(known - present)
+        missing = [uid for uid in reversed(uids) if uid not in known]
+
+        # Flag changes on messages the caller already has
+        retained = known & present
+        if retained:
+            if delta.highestmodseq is not None and highestmodseq is not None:
+                flag_data = None
+                if delta.highestmodseq != highestmodseq:
+                    _, flag_data = mail.uid("FETCH", "1:*", f"(UID FLAGS) (CHANGEDSINCE {highestmodseq})")
+            else:
+                _, flag_data = mail.uid("FETCH", "1:*", "(UID FLAGS)")
+            if flag_data:
+                delta.flags = {
+                    uid: [_as_str(flag) for flag in (items.get("FLAGS") or [])]
+                    for uid, items in parse_fetch_response(flag_data).items()
+                    if uid in retained
+                }
+
+        batch = missing[:max_new]
+        for start in range(0, len(batch), SYNC_BATCH_SIZE):
+            delta.added.update(self.fetch_summaries(mail, batch[start:start + SYNC_BATCH_SIZE]))
+        delta.complete = len(batch) == len(missing)
+
+        return delta
+
+    def forget(self, mailbox: str, folder: Optional[str] = None):
+        """Drop sync state for a mailbox (or one folder of it)"""
+        with self._lock:
+            for key in list(self._states):
+                if key[0] == mailbox.lower() and (folder is None or key[1] == folder):
+                    del self._states[key]
+
+
+# Singleton instance
+mail_sync_service = MailSyncService()
@@ -10,10 +10,12 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple
 from datetime import datetime
 import asyncio
 from core.config import settings
+from services.imap_pool_service import imap_pool
+from services.mail_sync_service import mail_sync_service
 
 class MailcowService:
     def __init__(self):
@@ -269,86 +271,40 @@ class MailcowService:
             print(f"[Mailcow] SSH password sync failed: {e}")
             return False
 
-    def get_inbox(self, email: str, password: str, folder: str = "INBOX", limit: int = 50) -> List[Dict[str, Any]]:
-        """Get emails from inbox via IMAP (sync for simplicity)"""
-        messages = []
+    async def get_inbox(
+        self,
+        email: str,
+        password: str,
+        folder: str = "INBOX",
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        List the newest messages in a folder, skipping `offset`.
 
+        Message ids are IMAP UIDs. Only headers, flags, structure and a short
+        preview are fetched, and repeat listings reuse the folder's sync
+        cursor so only new or changed messages go over the wire.
+        """
         try:
-            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-            mail.login(email, password)
-            mail.select(folder)
-            
-            # Search for all emails
-            _, message_numbers = mail.search(None, "ALL")
-            message_list = message_numbers[0].split()
-            
-            # Get latest emails (reversed order)
-            for num in reversed(message_list[-limit:]):
-                _, msg_data = mail.fetch(num, "(RFC822)")
-                
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email_lib.message_from_bytes(response_part[1])
-
-                        # Decode subject
-                        subject = ""
-                        if msg["Subject"]:
-                            decoded = email_lib.header.decode_header(msg["Subject"])[0]
-                            subject = decoded[0] if isinstance(decoded[0], str) else decoded[0].decode(decoded[1] or "utf-8")
-                        
-                        # Decode from
-                        from_addr = msg.get("From", "")
-                        
-                        # Get date
-                        date_str = msg.get("Date", "")
-                        
-                        # Get body preview and check for attachments
-                        body = ""
-                        has_attachments = False
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                if part.get_content_type() == "text/plain" and not body:
-                                    body = part.get_payload(decode=True).decode("utf-8", errors="ignore")[:200]
-                                elif part.get_filename():
-                                    has_attachments = True
-                        else:
-                            body = msg.get_payload(decode=True).decode("utf-8", errors="ignore")[:200]
-
-                        # Extract threading headers
-                        message_id_header = msg.get("Message-ID", "")
-                        in_reply_to = msg.get("In-Reply-To", "")
-                        references = msg.get("References", "")
-
-                        messages.append({
-                            "id": num.decode(),
-                            "subject": subject,
-                            "from": from_addr,
-                            "to": msg.get("To", ""),
-                            "date": date_str,
-                            "preview": body.strip(),
-                            "read": True,  # TODO: Check flags
-                            "has_attachments": has_attachments,
-                            # Threading headers
-                            "message_id": message_id_header,
-                            "in_reply_to": in_reply_to,
-                            "references": references
-                        })
-            
-            mail.logout()
+            messages, _ = await imap_pool.run(
+                email,
+                password,
+                lambda mail: mail_sync_service.list_folder(mail, email, folder, limit, offset)
+            )
+            return messages
         except Exception as e:
             print(f"IMAP Error: {e}")
-        
-        return messages
-    
-    def get_email(self, email_addr: str, password: str, message_id: str, folder: str = "INBOX") -> Optional[Dict[str, Any]]:
+            return []
+
+    async def get_email(self, email_addr: str, password: str, message_id: str, folder: str = "INBOX") -> Optional[Dict[str, Any]]:
         """Get a single email by ID"""
-        try:
-            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-            mail.login(email_addr, password)
+
+        def fetch_email(mail: imaplib.IMAP4_SSL) -> Optional[Dict[str, Any]]:
             mail.select(folder)
-            
-            _, msg_data = mail.fetch(message_id.encode(), "(RFC822)")
-            
+
+            _, msg_data = mail.uid("FETCH", message_id, "(RFC822)")
+
             for response_part in msg_data:
                 if isinstance(response_part, tuple):
                     msg = email_lib.message_from_bytes(response_part[1])
@@ -363,7 +319,7 @@ class MailcowService:
                     body_html = ""
                     body_text = ""
                     attachments = []
-                    
+
                     if msg.is_multipart():
                         for part in msg.walk():
                             content_type = part.get_content_type()
@@ -397,14 +353,6 @@ class MailcowService:
                                 })
                     else:
                         body_text = msg.get_payload(decode=True).decode("utf-8", errors="ignore")
-                    
-                    mail.logout()
-
-                    # Debug: Log attachments found
-                    if attachments:
-                        print(f"DEBUG: Found {len(attachments)} attachments in message {message_id}: {[a['filename'] for a in attachments]}")
-                    else:
-                        print(f"DEBUG: No attachments found in message {message_id}")
 
                     return {
                         "id": message_id,
@@ -421,80 +369,70 @@ class MailcowService:
                         "in_reply_to": msg.get("In-Reply-To", ""),
                         "references": msg.get("References", "")
                     }
-            
-            mail.logout()
+
+            return None
+
+        try:
+            return await imap_pool.run(email_addr, password, fetch_email)
         except Exception as e:
             print(f"IMAP Error: {e}")
-
-        return None
+            return None
 
     async def get_message(self, email_addr: str, password: str, folder: str, message_id: str) -> Optional[Dict[str, Any]]:
         """
-        Async wrapper for get_email. Used by mail_attachments.py.
-        Runs the synchronous IMAP operation in a thread pool.
+        Folder-first alias for get_email. Used by mail_attachments.py.
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None,
-            lambda: self.get_email(email_addr, password, message_id, folder)
-        )
+        return await self.get_email(email_addr, password, message_id, folder)
 
     async def get_attachment(self, email_addr: str, password: str, folder: str, message_id: str, attachment_index: int) -> Optional[bytes]:
         """
         Get a single attachment's content by index.
         Returns the binary content of the attachment.
         """
-        loop = asyncio.get_event_loop()
 
-        def fetch_attachment():
-            try:
-                mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-                mail.login(email_addr, password)
-                mail.select(folder)
-
-                _, msg_data = mail.fetch(message_id.encode(), "(RFC822)")
-
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email_lib.message_from_bytes(response_part[1])
-
-                        attachment_count = 0
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                content_type = part.get_content_type()
-                                content_disposition = str(part.get("Content-Disposition") or "")
-                                filename = part.get_filename()
-
-                                is_attachment = (
-                                    filename or
-                                    "attachment" in content_disposition.lower() or
-                                    (content_type and not content_type.startswith("text/") and
-                                     not content_type.startswith("multipart/"))
-                                )
-
-                                if is_attachment:
-                                    if attachment_count == attachment_index:
-                                        payload = part.get_payload(decode=True)
-                                        mail.logout()
-                                        return payload
-                                    attachment_count += 1
-
-                mail.logout()
-            except Exception as e:
-                print(f"IMAP Error in get_attachment: {e}")
+        def fetch_attachment(mail: imaplib.IMAP4_SSL) -> Optional[bytes]:
+            mail.select(folder)
+
+            _, msg_data = mail.uid("FETCH", message_id, "(RFC822)")
+
+            for response_part in msg_data:
+                if isinstance(response_part, tuple):
+                    msg = email_lib.message_from_bytes(response_part[1])
+
+                    attachment_count = 0
+                    if msg.is_multipart():
+                        for part in msg.walk():
+                            content_type = part.get_content_type()
+                            content_disposition = str(part.get("Content-Disposition") or "")
+                            filename = part.get_filename()
+
+                            is_attachment = (
+                                filename or
+                                "attachment" in content_disposition.lower() or
+                                (content_type and not content_type.startswith("text/") and
+                                 not content_type.startswith("multipart/"))
+                            )
+
+                            if is_attachment:
+                                if attachment_count == attachment_index:
+                                    return part.get_payload(decode=True)
+                                attachment_count += 1
 
             return None
 
-        return await loop.run_in_executor(None, fetch_attachment)
+        try:
+            return await imap_pool.run(email_addr, password, fetch_attachment)
+        except Exception as e:
+            print(f"IMAP Error in get_attachment: {e}")
+            return None
 
-    def get_email_with_attachments(self, email_addr: str, password: str, message_id: str, folder: str = "INBOX") -> Optional[Dict[str, Any]]:
+    async def get_email_with_attachments(self, email_addr: str, password: str, message_id: str, folder: str = "INBOX") -> Optional[Dict[str, Any]]:
         """Get a single email with full attachment content (binary)"""
-        try:
-            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-            mail.login(email_addr, password)
+
+        def fetch_email(mail: imaplib.IMAP4_SSL) -> Optional[Dict[str, Any]]:
             mail.select(folder)
 
-            _, msg_data = mail.fetch(message_id.encode(), "(RFC822)")
+            _, msg_data = mail.uid("FETCH", message_id, "(RFC822)")
 
             for response_part in msg_data:
                 if isinstance(response_part, tuple):
@@ -546,8 +484,6 @@ class MailcowService:
                     else:
                         body_text = msg.get_payload(decode=True).decode("utf-8", errors="ignore")
 
-                    mail.logout()
-
                     return {
                         "id": message_id,
                         "subject": subject,
@@ -563,11 +499,13 @@ class MailcowService:
                         "references": msg.get("References", "")
                     }
 
-            mail.logout()
+            return None
+
+        try:
+            return await imap_pool.run(email_addr, password, fetch_email)
         except Exception as e:
             print(f"IMAP Error in get_email_with_attachments: {e}")
-
-        return None
+            return None
 
     def send_email(
         self,
@@ -707,44 +645,42 @@ class MailcowService:
             print(f"Error saving to Sent folder: {e}")
             return False
     
-    def get_folders(self, email: str, password: str) -> List[str]:
+    async def get_folders(self, email: str, password: str) -> List[str]:
         """Get list of mail folders"""
-        folders = []
-        try:
-            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-            mail.login(email, password)
-            
+
+        def list_folders(mail: imaplib.IMAP4_SSL) -> List[str]:
+            folders = []
             _, folder_list = mail.list()
             for folder in folder_list:
                 # Parse folder name from IMAP response
                 folder_name = folder.decode().split(' "/" ')[-1].strip('"')
                 folders.append(folder_name)
-            
-            mail.logout()
+            return folders
+
+        try:
+            return await imap_pool.run(email, password, list_folders)
         except Exception as e:
             print(f"IMAP Error: {e}")
-            folders = ["INBOX", "Sent", "Drafts", "Trash", "Spam"]
-        
-        return folders
-    
-    def move_email(self, email: str, password: str, message_id: str, from_folder: str, to_folder: str) -> bool:
+            return ["INBOX", "Sent", "Drafts", "Trash", "Spam"]
+
+    async def move_email(self, email: str, password: str, message_id: str, from_folder: str, to_folder: str) -> bool:
         """Move email to another folder"""
-        try:
-            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-            mail.login(email, password)
+
+        def move(mail: imaplib.IMAP4_SSL) -> bool:
             mail.select(from_folder)
 
-            mail.copy(message_id.encode(), to_folder)
-            mail.store(message_id.encode(), "+FLAGS", "\\Deleted")
+            mail.uid("COPY", message_id, to_folder)
+            mail.uid("STORE", message_id, "+FLAGS", "\\Deleted")
             mail.expunge()
-
-            mail.logout()
             return True
+
+        try:
+            return await imap_pool.run(email, password, move)
         except Exception as e:
             print(f"IMAP Error: {e}")
             return False
 
-    def search_emails(
+    async def search_emails(
         self,
         email: str,
         password: str,
@@ -770,73 +706,47 @@ class MailcowService:
         if search_in is None:
             search_in = ['all']
 
-        messages = []
+        # Build IMAP search criteria
+        search_criteria = self._build_search_criteria(query, search_in)
 
-        try:
-            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port, timeout=30)
-            mail.login(email, password)
-            mail.select(folder)
+        search = self._folder_search(folder, search_criteria, lambda: limit)
 
-            # Build IMAP search criteria
-            search_criteria = self._build_search_criteria(query, search_in)
-
-            _, message_numbers = mail.search(None, search_criteria)
-            message_list = message_numbers[0].split()
-
-            # Get latest matching emails (reversed order)
-            for num in reversed(message_list[-limit:]):
-                _, msg_data = mail.fetch(num, "(RFC822)")
-
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email_lib.message_from_bytes(response_part[1])
-
-                        # Decode subject
-                        subject = ""
-                        if msg["Subject"]:
-                            decoded = email_lib.header.decode_header(msg["Subject"])[0]
-                            subject = decoded[0] if isinstance(decoded[0], str) else decoded[0].decode(decoded[1] or "utf-8")
-
-                        # Decode from
-                        from_addr = msg.get("From", "")
-
-                        # Get date
-                        date_str = msg.get("Date", "")
-
-                        # Get body preview
-                        body = ""
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                if part.get_content_type() == "text/plain":
-                                    body = part.get_payload(decode=True).decode("utf-8", errors="ignore")[:200]
-                                    break
-                        else:
-                            body = msg.get_payload(decode=True).decode("utf-8", errors="ignore")[:200]
-
-                        # Extract threading headers
-                        message_id_header = msg.get("Message-ID", "")
-                        in_reply_to = msg.get("In-Reply-To", "")
-                        references = msg.get("References", "")
-
-                        messages.append({
-                            "id": num.decode(),
-                            "subject": subject,
-                            "from": from_addr,
-                            "to": msg.get("To", ""),
-                            "date": date_str,
-                            "preview": body.strip(),
-                            "read": True,
-                            "message_id": message_id_header,
-                            "in_reply_to": in_reply_to,
-                            "references": references,
-                            "folder": folder
-                        })
-
-            mail.logout()
+        try:
+            return await imap_pool.run(email, password, search)
         except Exception as e:
             print(f"IMAP Search Error: {e}")
-
-        return messages
+            return []
+
+    @staticmethod
+    def _folder_search(
+        folder: str,
+        search_criteria: str,
+        limit: Callable[[], int]
+    ) -> Callable[[imaplib.IMAP4_SSL], List[Dict[str, Any]]]:
+        """Build the pooled-connection operation that searches one folder.
+
+        ``limit`` is read after the UID SEARCH, so a multi-folder search can
+        shrink it while this folder waits for a connection.
+        """
+        def search(mail: imaplib.IMAP4_SSL) -> List[Dict[str, Any]]:
+            status, _ = mail.select(folder, readonly=True)
+            if status != "OK":
+                return []
+
+            _, uid_data = mail.uid("SEARCH", None, search_criteria)
+            uids = sorted(int(uid) for uid in (uid_data[0] or b"").split())
+
+            # Get latest matching emails (newest first)
+            latest = uids[::-1][:max(limit(), 0)]
+            if not latest:
+                return []
+            summaries = mail_sync_service.fetch_summaries(mail, latest)
+            return [
+                {**summaries[uid], "folder": folder}
+                for uid in latest if uid in summaries
+            ]
+
+        return search
 
     def _build_search_criteria(self, query: str, search_in: List[str]) -> str:
         """Build IMAP search criteria string."""
@@ -873,7 +783,7 @@ class MailcowService:
         # Default: search subject
         return f'SUBJECT "{safe_query}"'
 
-    def search_all_folders(
+    async def search_all_folders(
         self,
         email: str,
         password: str,
@@ -890,20 +800,70 @@ class MailcowService:
         results = {}
 
         try:
-            folders = self.get_folders(email, password)
-
-            for folder in folders:
-                folder_results = self.search_emails(
-                    email, password, query, folder, search_in, limit
-                )
-                if folder_results:
-                    results[folder] = folder_results
+            async for folder, folder_results in self.iter_search_all_folders(
+                email, password, query, search_in, limit
+            ):
+                results[folder] = folder_results
 
         except Exception as e:
             print(f"IMAP Search All Error: {e}")
 
         return results
 
+    async def iter_search_all_folders(
+        self,
+        email: str,
+        password: str,
+        query: str,
+        search_in: List[str] = None,
+        limit: int = 50
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Search every folder concurrently, yielding each folder's hits as soon
+        as that folder finishes.
+
+        Folder searches share the mailbox's pooled IMAP connections, so at most
+        ``MAIL_IMAP_POOL_SIZE_PER_USER`` run at once. Once ``limit`` hits have
+        been yielded, the searches still queued are cancelled; folders already
+        running fetch only as many summaries as are still needed.
+
+        Yields:
+            (folder, results) for every folder with at least one hit
+        """
+        if search_in is None:
+            search_in = ['all']
+
+        search_criteria = self._build_search_criteria(query, search_in)
+        folders = await self.get_folders(email, password)
+        # INBOX first: it is where most hits are and what users expect to see first
+        folders.sort(key=lambda name: name.upper() != "INBOX")
+
+        remaining = limit
+
+        async def search_folder(folder: str) -> Tuple[str, List[Dict[str, Any]]]:
+            search = self._folder_search(folder, search_criteria, lambda: remaining)
+            try:
+                return folder, await imap_pool.run(email, password, search)
+            except Exception as e:
+                # One unreadable folder should not sink the whole search
+                print(f"IMAP Search Error in {folder}: {e}")
+                return folder, []
+
+        tasks = [asyncio.create_task(search_folder(folder)) for folder in folders]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                folder, folder_results = await next_done
+                if not folder_results:
+                    continue
+                folder_results = folder_results[:remaining]
+                remaining -= len(folder_results)
+                yield folder, folder_results
+                if remaining <= 0:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
 
 # Singleton instance
 mailcow_service = MailcowService()
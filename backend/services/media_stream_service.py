@@ -0,0 +1,180 @@
+"""
+Bheem Workspace - Media Streaming
+Range-aware streaming of videos and recordings without buffering whole files.
+
+Playback requests carry Range (seeking) and conditional headers (ETag /
+If-Range / If-None-Match). For Nextcloud-stored media these are forwarded
+to WebDAV and the upstream body is relayed chunk by chunk as it arrives;
+local files are answered here with the same semantics. Either way at most
+one chunk per stream is held in memory.
+"""
+import logging
+import os
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException
+from starlette.background import BackgroundTask
+from starlette.responses import Response, StreamingResponse
+
+from core.config import settings
+from services.nextcloud_service import nextcloud_service
+
+logger = logging.getLogger(__name__)
+
+# Request headers forwarded to storage so it can answer ranges and revalidation
+FORWARDED_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since", "if-match")
+# Storage response headers relayed to the client
+RELAYED_HEADERS = (
+    "content-length", "content-range", "accept-ranges", "etag",
+    "last-modified", "content-encoding"
+)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def _chunk_size() -> int:
+    return settings.MEDIA_STREAM_CHUNK_KB * 1024
+
+
+def _disposition(filename: Optional[str], disposition: str) -> Dict[str, str]:
+    if not filename:
+        return {}
+    return {"Content-Disposition": f"{disposition}; filename*=UTF-8''{quote(filename)}"}
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range into inclusive (start, end) offsets.
+
+    Returns None to serve the whole file (no header, a malformed one, or
+    several ranges); raises RangeNotSatisfiable if the range lies past the end.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+# =============================================
+# Nextcloud (WebDAV) proxy
+# =============================================
+
+async def stream_from_nextcloud(
+    username: str,
+    password: str,
+    path: str,
+    request_headers: Mapping[str, str],
+    media_type: str,
+    filename: Optional[str] = None,
+    disposition: str = "inline"
+) -> Response:
+    """Relay a WebDAV file with Range/conditional support, one chunk at a time"""
+    forwarded = {name: request_headers[name] for name in FORWARDED_HEADERS if name in request_headers}
+    download = await nextcloud_service.open_download(username, password, path, forwarded)
+    status = download.status_code
+    headers = {name: download.headers[name] for name in RELAYED_HEADERS if name in download.headers}
+
+    if status in (304, 412, 416):
+        await download.aclose()
+        return Response(status_code=status, headers=headers)
+    if status == 404:
+        await download.aclose()
+        raise HTTPException(status_code=404, detail="File not available")
+    if status not in (200, 206):
+        await download.aclose()
+        logger.error(f"Storage returned {status} for {path}")
+        raise HTTPException(status_code=502, detail="Storage unavailable")
+
+    headers.setdefault("accept-ranges", "bytes")
+    headers.update(_disposition(filename, disposition))
+    headers["Cache-Control"] = "private, max-age=3600"
+    return StreamingResponse(
+        download.iter_chunks(_chunk_size()),
+        status_code=status,
+        media_type=media_type,
+        headers=headers,
+        background=BackgroundTask(download.aclose)
+    )
+
+
+# =============================================
+# Local files
+# =============================================
+
+def _local_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+async def _read_file(path: str, start: int, length: int, chunk_size: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def stream_local_file(
+    path: str,
+    request_headers: Mapping[str, str],
+    media_type: str,
+    filename: Optional[str] = None,
+    disposition: str = "inline"
+) -> Response:
+    """Serve a local file with Range, If-Range and If-None-Match support"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not available")
+
+    size = stat.st_size
+    etag = _local_etag(stat)
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=3600"}
+
+    if etag in (request_headers.get("if-none-match") or "").split(", "):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request_headers.get("if-range")
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(request_headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    headers.update(_disposition(filename, disposition))
+    if byte_range is None:
+        start, length, status = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+
+    return StreamingResponse(
+        _read_file(path, start, length, _chunk_size()),
+        status_code=status,
+        media_type=media_type,
+        headers=headers
+    )
@@ -0,0 +1,302 @@
+"""
+Bheem Workspace - Pooled Nextcloud HTTP Client
+Shared keep-alive connections for every WebDAV and OCS call to Nextcloud.
+
+Each Nextcloud origin gets one process-wide httpx client with bounded
+connections, so repeated calls (listing, trash loops, imports) reuse warm
+TCP/TLS connections instead of handshaking per operation. Streaming
+downloads, which hold a connection for a whole playback, get a separate
+pool per origin so they cannot starve short calls. Idempotent
+requests are retried on transport errors and 502/503/504 with jittered
+exponential backoff, and every request is timed into a per-operation
+latency histogram.
+"""
+import asyncio
+import bisect
+import logging
+import random
+import time
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency buckets; one more bucket catches the rest
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Methods that are safe to send again (MKCOL/DELETE report 405/404 on replay)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PROPFIND", "PUT", "DELETE", "MKCOL"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class LatencyHistogram:
+    """Bucketed request latencies for one operation"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool = False):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of requests"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                break
+        if index < len(LATENCY_BUCKETS_MS):
+            return float(min(LATENCY_BUCKETS_MS[index], self.max_ms))
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}" for bound in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.buckets))
+        }
+
+
+def retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number attempt (0-based)"""
+    cap = min(settings.NEXTCLOUD_HTTP_RETRY_MAX_SECONDS, settings.NEXTCLOUD_HTTP_RETRY_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def _replayable(kwargs: Dict[str, Any]) -> bool:
+    content = kwargs.get("content")
+    return content is None or isinstance(content, (bytes, str))
+
+
+class NextcloudHTTPClient:
+    """Connection pool, retry policy and latency stats for one Nextcloud origin"""
+
+    def __init__(
+        self,
+        origin: str,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        retries: Optional[int] = None,
+        http2: Optional[bool] = None
+    ):
+        self.origin = origin
+        self.max_connections = max_connections or settings.NEXTCLOUD_HTTP_MAX_CONNECTIONS
+        self.max_keepalive = max_keepalive or settings.NEXTCLOUD_HTTP_MAX_KEEPALIVE
+        self.retries = settings.NEXTCLOUD_HTTP_RETRIES if retries is None else retries
+        self.http2 = settings.NEXTCLOUD_HTTP2 if http2 is None else http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.stats = {"requests": 0, "retries": 0, "transport_errors": 0, "clients_created": 0}
+
+    def _new_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("NEXTCLOUD_HTTP2 is set but the h2 package is missing; using HTTP/1.1 keep-alive")
+                http2 = False
+        return httpx.AsyncClient(
+            verify=False,
+            http2=http2,
+            timeout=httpx.Timeout(
+                settings.NEXTCLOUD_HTTP_TIMEOUT_SECONDS,
+                connect=settings.NEXTCLOUD_HTTP_CONNECT_TIMEOUT_SECONDS
+            ),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=settings.NEXTCLOUD_HTTP_KEEPALIVE_SECONDS
+            )
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = self._new_client()
+            self._loop = loop
+            self.stats["clients_created"] += 1
+        return self._client
+
+    def _observe(self, operation: str, started: float, error: bool):
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = self.histograms[operation] = LatencyHistogram()
+        histogram.observe((time.monotonic() - started) * 1000, error)
+
+    async def request(self, operation: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared pool, retrying idempotent ones on transient failures"""
+        method = method.upper()
+        attempts = 1
+        if method in IDEMPOTENT_METHODS and _replayable(kwargs):
+            attempts += self.retries
+
+        for attempt in range(attempts):
+            self.stats["requests"] += 1
+            started = time.monotonic()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self.stats["transport_errors"] += 1
+                self._observe(operation, started, error=True)
+                if attempt + 1 >= attempts:
+                    raise
+                logger.info(f"Nextcloud {operation} failed ({e!r}), retrying")
+            else:
+                self._observe(operation, started, error=response.status_code >= 500)
+                if response.status_code not in RETRY_STATUSES or attempt + 1 >= attempts:
+                    return response
+                logger.info(f"Nextcloud {operation} returned {response.status_code}, retrying")
+            self.stats["retries"] += 1
+            await asyncio.sleep(retry_delay(attempt))
+
+    def build_request(self, method: str, url: str, **kwargs) -> httpx.Request:
+        return self.client.build_request(method, url, **kwargs)
+
+    async def send(self, operation: str, request: httpx.Request, **kwargs) -> httpx.Response:
+        """Send a prebuilt request (e.g. stream=True downloads); timed to headers, never retried"""
+        self.stats["requests"] += 1
+        started = time.monotonic()
+        try:
+            response = await self.client.send(request, **kwargs)
+        except httpx.TransportError:
+            self.stats["transport_errors"] += 1
+            self._observe(operation, started, error=True)
+            raise
+        self._observe(operation, started, error=response.status_code >= 500)
+        return response
+
+    def operation(self, name: str, timeout: Optional[Union[httpx.Timeout, float]] = None) -> "NextcloudOperation":
+        return NextcloudOperation(self, name, timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "origin": self.origin,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            **self.stats,
+            "operations": {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class NextcloudOperation:
+    """
+    httpx-style view of the shared pool that labels requests with an
+    operation name. Usable as `async with` so call sites read like a
+    per-call client, but leaving the block does not close the pool.
+    """
+
+    def __init__(self, pool: NextcloudHTTPClient, name: str, timeout: Optional[Union[httpx.Timeout, float]] = None):
+        self.pool = pool
+        self.name = name
+        self.timeout = timeout
+
+    async def __aenter__(self) -> "NextcloudOperation":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return await self.pool.request(self.name, method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def build_request(self, method: str, url: str, **kwargs) -> httpx.Request:
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return self.pool.build_request(method, url, **kwargs)
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        return await self.pool.send(self.name, request, **kwargs)
+
+
+# =============================================
+# Process-wide pools
+# =============================================
+
+_pools: Dict[str, NextcloudHTTPClient] = {}
+_stream_pools: Dict[str, NextcloudHTTPClient] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_nextcloud_client(base_url: Optional[str] = None) -> NextcloudHTTPClient:
+    """Shared pool for the Nextcloud origin of base_url (defaults to NEXTCLOUD_URL)"""
+    origin = _origin(base_url or settings.NEXTCLOUD_URL)
+    pool = _pools.get(origin)
+    if pool is None:
+        pool = _pools[origin] = NextcloudHTTPClient(origin)
+    return pool
+
+
+def get_nextcloud_stream_client(base_url: Optional[str] = None) -> NextcloudHTTPClient:
+    """Pool for long-lived streaming downloads from the Nextcloud origin of base_url"""
+    origin = _origin(base_url or settings.NEXTCLOUD_URL)
+    pool = _stream_pools.get(origin)
+    if pool is None:
+        pool = _stream_pools[origin] = NextcloudHTTPClient(
+            origin,
+            max_connections=settings.NEXTCLOUD_HTTP_STREAM_MAX_CONNECTIONS,
+            max_keepalive=settings.NEXTCLOUD_HTTP_MAX_KEEPALIVE
+        )
+    return pool
+
+
+def get_nextcloud_client_stats() -> Dict[str, Any]:
+    stats = {origin: pool.get_stats() for origin, pool in _pools.items()}
+    stats.update({f"stream:{origin}": pool.get_stats() for origin, pool in _stream_pools.items()})
+    return stats
+
+
+async def close_nextcloud_clients():
+    """Close every pooled connection (app shutdown)"""
+    pools = list(_pools.values()) + list(_stream_pools.values())
+    _pools.clear()
+    _stream_pools.clear()
+    for pool in pools:
+        await pool.aclose()
@@ -2,11 +2,123 @@
 Bheem Workspace - Nextcloud Service
 Document storage and file management via WebDAV
 """
+import asyncio
+import hashlib
+import inspect
+import logging
+import uuid
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Set, Union
+from urllib.parse import quote, unquote
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from core.config import settings
+from services.nextcloud_client import get_nextcloud_client, get_nextcloud_stream_client, NextcloudOperation
+
+logger = logging.getLogger(__name__)
+
+DAV_NS = {"d": "DAV:"}
+OC_NS = {"oc": "http://owncloud.org/ns"}
+# Piece size for single-request streaming PUTs
+UPLOAD_PIECE_BYTES = 256 * 1024
+
+
+class WebDAVUploadError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def upload_size(source) -> Optional[int]:
+    """Best-effort size of an upload source without reading it (None if unknown)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    size = getattr(source, "size", None)
+    if isinstance(size, int):
+        return size
+    fileobj = getattr(source, "file", source)
+    try:
+        position = fileobj.tell()
+        end = fileobj.seek(0, 2)
+        fileobj.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+async def iter_upload_chunks(source, chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Yield an upload source in chunks of at most chunk_size bytes.
+
+    Accepts bytes, Starlette UploadFiles (async read), plain file objects
+    and async iterables of bytes, so callers never have to read a whole
+    upload into memory.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield bytes(view[offset:offset + chunk_size])
+        return
+    if hasattr(source, "__aiter__"):
+        buffer = bytearray()
+        async for piece in source:
+            buffer += piece
+            while len(buffer) >= chunk_size:
+                yield bytes(buffer[:chunk_size])
+                del buffer[:chunk_size]
+        if buffer:
+            yield bytes(buffer)
+        return
+    read = source.read
+    is_async = inspect.iscoroutinefunction(read)
+    while True:
+        chunk = await read(chunk_size) if is_async else read(chunk_size)
+        if not chunk:
+            break
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+class _UploadDigest:
+    """Running size and SHA-256 of the bytes that passed through an upload"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.max_size = max_size
+
+    def update(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            max_mb = self.max_size / (1024 * 1024)
+            raise ValueError(f"File size exceeds maximum allowed ({max_mb}MB)")
+        self.sha256.update(chunk)
+
+    def result(self) -> Dict[str, Any]:
+        return {"size": self.size, "checksum": self.sha256.hexdigest()}
+
+
+class WebDAVDownload:
+    """An open streaming WebDAV GET; the body is read chunk by chunk and must be closed"""
+
+    def __init__(self, response: httpx.Response):
+        self.response = response
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.response.headers
+
+    def iter_chunks(self, chunk_size: int):
+        # Raw bytes: Content-Length and Content-Range refer to the encoded body
+        return self.response.aiter_raw(chunk_size)
+
+    async def aclose(self):
+        # Returns the connection to the download pool
+        await self.response.aclose()
+
 
 class NextcloudService:
     def __init__(self):
@@ -14,6 +126,10 @@ class NextcloudService:
         self.admin_user = settings.NEXTCLOUD_ADMIN_USER
         self.admin_pass = settings.NEXTCLOUD_ADMIN_PASSWORD
     
+    def _client(self, operation: str, timeout: Optional[Union[httpx.Timeout, float]] = None) -> NextcloudOperation:
+        """Shared keep-alive connection pool, labelled for per-operation latency stats"""
+        return get_nextcloud_client(self.base_url).operation(operation, timeout)
+
     def _get_webdav_url(self, username: str) -> str:
         return f"{self.base_url}/remote.php/dav/files/{username}"
     
@@ -37,7 +153,7 @@ class NextcloudService:
             </d:prop>
         </d:propfind>'''
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("list_files") as client:
             response = await client.request(
                 method="PROPFIND",
                 url=webdav_url,
@@ -96,7 +212,7 @@ class NextcloudService:
         """Create a folder via WebDAV MKCOL"""
         webdav_url = f"{self._get_webdav_url(username)}{path}"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("create_folder") as client:
             response = await client.request(
                 method="MKCOL",
                 url=webdav_url,
@@ -108,7 +224,7 @@ class NextcloudService:
         """Upload a file via WebDAV PUT"""
         webdav_url = f"{self._get_webdav_url(username)}{path}"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("upload_file") as client:
             response = await client.put(
                 url=webdav_url,
                 content=content,
@@ -116,11 +232,241 @@ class NextcloudService:
             )
             return response.status_code in [201, 204]
     
+    # =============================================
+    # Streaming uploads
+    # =============================================
+
+    def _upload_client(self) -> NextcloudOperation:
+        return self._client("upload_stream", timeout=httpx.Timeout(30.0, read=300.0, write=300.0))
+
+    def _upload_session_url(
+        self,
+        username: str,
+        upload_id: Optional[str],
+        target_user: str = "",
+        path: str = "",
+        owner: Optional[str] = None
+    ) -> str:
+        """
+        Chunk session of a resumable upload.
+
+        The client-chosen upload_id is only meaningful together with who is
+        uploading (owner, e.g. "tenant:user") and where to, so one user can
+        never resume into, or assemble, another user's stored chunks.
+        """
+        if upload_id:
+            scope = "\0".join((owner or "", target_user, path, upload_id))
+            session_id = hashlib.sha256(scope.encode()).hexdigest()[:48]
+        else:
+            session_id = uuid.uuid4().hex
+        return f"{self.base_url}/remote.php/dav/uploads/{username}/bheem-{session_id}"
+
+    def _upload_chunk_size(self, size: Optional[int]) -> int:
+        # Chunked v2 wants chunks of at least 5 MB and at most 10000 of them
+        chunk_size = max(settings.NEXTCLOUD_UPLOAD_CHUNK_MB, 5) * 1024 * 1024
+        if size:
+            chunk_size = max(chunk_size, -(-size // 10000))
+        return chunk_size
+
+    async def upload_stream(
+        self,
+        username: str,
+        password: str,
+        path: str,
+        source,
+        size: Optional[int] = None,
+        content_type: Optional[str] = None,
+        target_user: Optional[str] = None,
+        upload_id: Optional[str] = None,
+        max_size: Optional[int] = None,
+        owner: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload a file without holding it in memory, hashing it on the way out.
+
+        source is anything iter_upload_chunks accepts. Files smaller than
+        NEXTCLOUD_CHUNKED_UPLOAD_THRESHOLD_MB go up in one streaming PUT;
+        larger ones (or ones of unknown size) use Nextcloud's chunked upload v2
+        with up to NEXTCLOUD_UPLOAD_PARALLELISM chunk PUTs in flight. Passing
+        the same upload_id (and owner) again resumes a failed chunked upload,
+        skipping the chunks the server already holds with identical content.
+
+        Returns {"size", "checksum"} (SHA-256). Raises ValueError if the file is
+        larger than max_size and WebDAVUploadError if storage rejects it.
+        """
+        target_user = target_user or username
+        if size is None:
+            size = upload_size(source)
+        if max_size is not None and size is not None and size > max_size:
+            max_mb = max_size / (1024 * 1024)
+            raise ValueError(f"File size exceeds maximum allowed ({max_mb}MB)")
+
+        digest = _UploadDigest(max_size)
+        auth = (username, password)
+        async with self._upload_client() as client:
+            threshold = settings.NEXTCLOUD_CHUNKED_UPLOAD_THRESHOLD_MB * 1024 * 1024
+            if size is not None and size < threshold:
+                await self._put_stream(client, auth, target_user, path, source, size, content_type, digest)
+            else:
+                await self._chunked_upload(
+                    client, auth, target_user, path, source, size, content_type, upload_id, digest, owner
+                )
+        return digest.result()
+
+    async def _put_stream(
+        self,
+        client: NextcloudOperation,
+        auth,
+        target_user: str,
+        path: str,
+        source,
+        size: Optional[int],
+        content_type: Optional[str],
+        digest: "_UploadDigest"
+    ):
+        async def body():
+            async for chunk in iter_upload_chunks(source, UPLOAD_PIECE_BYTES):
+                digest.update(chunk)
+                yield chunk
+
+        headers = {"Content-Type": content_type} if content_type else {}
+        if size is not None:
+            headers["Content-Length"] = str(size)
+        response = await client.put(
+            url=f"{self._get_webdav_url(target_user)}{path}",
+            content=body(),
+            auth=auth,
+            headers=headers
+        )
+        if response.status_code not in (201, 204):
+            raise WebDAVUploadError(f"Upload failed with status {response.status_code}", response.status_code)
+
+    async def _existing_chunks(
+        self,
+        client: NextcloudOperation,
+        auth,
+        session_url: str
+    ) -> Optional[Dict[int, Set[str]]]:
+        """Chunk number -> checksums stored with it in an upload session, or None if there is no session"""
+        response = await client.request(
+            method="PROPFIND",
+            url=session_url,
+            content=(
+                '<?xml version="1.0"?><d:propfind xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns">'
+                '<d:prop><oc:checksums/></d:prop></d:propfind>'
+            ),
+            auth=auth,
+            headers={"Depth": "1", "Content-Type": "application/xml"}
+        )
+        if response.status_code != 207:
+            return None
+        chunks = {}
+        for element in ET.fromstring(response.content).findall("d:response", DAV_NS):
+            name = unquote(element.findtext("d:href", "", DAV_NS).rstrip("/").rsplit("/", 1)[-1])
+            if name.isdigit():
+                checksums = set()
+                for checksum in element.iterfind(".//oc:checksum", OC_NS):
+                    checksums.update(value.upper() for value in (checksum.text or "").split())
+                chunks[int(name)] = checksums
+        return chunks
+
+    async def _put_chunk(self, client: NextcloudOperation, auth, url: str, chunk: bytes, headers: Dict[str, str]):
+        response = await client.put(url=url, content=chunk, auth=auth, headers=headers)
+        if response.status_code not in (201, 204):
+            raise WebDAVUploadError(f"Chunk upload failed with status {response.status_code}", response.status_code)
+
+    async def _chunked_upload(
+        self,
+        client: NextcloudOperation,
+        auth,
+        target_user: str,
+        path: str,
+        source,
+        size: Optional[int],
+        content_type: Optional[str],
+        upload_id: Optional[str],
+        digest: "_UploadDigest",
+        owner: Optional[str] = None
+    ):
+        """Nextcloud chunked upload v2: MKCOL a session, PUT numbered chunks, MOVE .file into place"""
+        session_url = self._upload_session_url(auth[0], upload_id, target_user, path, owner)
+        destination = {"Destination": f"{self._get_webdav_url(target_user)}{quote(path)}"}
+
+        existing = await self._existing_chunks(client, auth, session_url) if upload_id else None
+        if existing is None:
+            existing = {}
+            response = await client.request("MKCOL", session_url, auth=auth, headers=destination)
+            if response.status_code not in (201, 405):
+                raise WebDAVUploadError(
+                    f"Could not start chunked upload: status {response.status_code}", response.status_code
+                )
+        elif existing:
+            logger.info(f"Resuming chunked upload {session_url} with {len(existing)} chunks stored")
+
+        # Chunks are read and hashed in order; at most `parallelism` of them
+        # are held in memory while their PUTs are in flight.
+        semaphore = asyncio.Semaphore(settings.NEXTCLOUD_UPLOAD_PARALLELISM)
+        pending = set()
+        failures = []
+
+        def finished(task: asyncio.Task):
+            semaphore.release()
+            pending.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+
+        count = 0
+        try:
+            async for chunk in iter_upload_chunks(source, self._upload_chunk_size(size)):
+                digest.update(chunk)
+                count += 1
+                # Stored chunks are reused only if their content matches; Nextcloud keeps the
+                # OC-Checksum sent with each chunk, so a changed stream re-sends what differs
+                checksum = f"SHA1:{hashlib.sha1(chunk).hexdigest()}".upper()
+                if checksum in existing.get(count, ()):
+                    continue
+                await semaphore.acquire()
+                if failures:
+                    semaphore.release()
+                    break
+                task = asyncio.ensure_future(self._put_chunk(
+                    client, auth, f"{session_url}/{count:05d}", chunk, {**destination, "OC-Checksum": checksum}
+                ))
+                pending.add(task)
+                task.add_done_callback(finished)
+            if pending:
+                await asyncio.gather(*list(pending), return_exceptions=True)
+            if failures:
+                raise failures[0]
+
+            if count == 0:
+                await client.request("DELETE", session_url, auth=auth)
+                await self._put_stream(client, auth, target_user, path, b"", 0, content_type, digest)
+                return
+
+            headers = {**destination, "OC-Total-Length": str(digest.size)}
+            response = await client.request("MOVE", f"{session_url}/.file", auth=auth, headers=headers)
+            if response.status_code not in (201, 204):
+                raise WebDAVUploadError(
+                    f"Assembling chunked upload failed with status {response.status_code}", response.status_code
+                )
+        except BaseException:
+            for task in list(pending):
+                task.cancel()
+            if upload_id:
+                logger.warning(f"Chunked upload {session_url} interrupted after {count} chunks; it can be resumed")
+            else:
+                try:
+                    await client.request("DELETE", session_url, auth=auth)
+                except Exception as e:
+                    logger.warning(f"Could not clean up upload session {session_url}: {e}")
+            raise
+
     async def download_file(self, username: str, password: str, path: str) -> Optional[bytes]:
         """Download a file via WebDAV GET"""
         webdav_url = f"{self._get_webdav_url(username)}{path}"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("download_file") as client:
             response = await client.get(
                 url=webdav_url,
                 auth=(username, password)
@@ -129,11 +475,33 @@ class NextcloudService:
                 return response.content
             return None
     
+    async def open_download(
+        self,
+        username: str,
+        password: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> WebDAVDownload:
+        """
+        Start a streaming WebDAV GET without reading the body.
+
+        headers may carry Range / If-Range / If-None-Match, which Nextcloud
+        answers with 206, 304 or 416 as usual.
+        """
+        webdav_url = f"{self._get_webdav_url(username)}{path}"
+        # Playbacks hold their connection for minutes, so they use their own pool
+        client = get_nextcloud_stream_client(self.base_url).operation(
+            "open_download", timeout=httpx.Timeout(30.0, read=300.0)
+        )
+        request = client.build_request("GET", webdav_url, headers=headers)
+        response = await client.send(request, auth=(username, password), stream=True)
+        return WebDAVDownload(response)
+
     async def delete_file(self, username: str, password: str, path: str) -> bool:
         """Delete a file or folder via WebDAV DELETE"""
         webdav_url = f"{self._get_webdav_url(username)}{path}"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("delete_file") as client:
             response = await client.delete(
                 url=webdav_url,
                 auth=(username, password)
@@ -145,7 +513,7 @@ class NextcloudService:
         source_url = f"{self._get_webdav_url(username)}{source}"
         dest_url = f"{self._get_webdav_url(username)}{destination}"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("move_file") as client:
             response = await client.request(
                 method="MOVE",
                 url=source_url,
@@ -159,7 +527,7 @@ class NextcloudService:
         source_url = f"{self._get_webdav_url(username)}{source}"
         dest_url = f"{self._get_webdav_url(username)}{destination}"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("copy_file") as client:
             response = await client.request(
                 method="COPY",
                 url=source_url,
@@ -172,7 +540,7 @@ class NextcloudService:
         """Create a public share link via OCS API"""
         ocs_url = f"{self._get_ocs_url()}/apps/files_sharing/api/v1/shares"
         
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("create_share_link") as client:
             response = await client.post(
                 url=ocs_url,
                 auth=(username, password),
@@ -206,7 +574,7 @@ class NextcloudService:
         if email:
             data["email"] = email
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("create_user") as client:
             response = await client.post(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -222,7 +590,7 @@ class NextcloudService:
         """
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("sync_password") as client:
             response = await client.put(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -241,7 +609,7 @@ class NextcloudService:
         """Check if a user exists"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("user_exists") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -255,7 +623,7 @@ class NextcloudService:
         """Get user storage quota and usage via OCS API"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("get_user_quota") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -287,7 +655,7 @@ class NextcloudService:
         # Quota value: number of bytes, or 'none' for unlimited
         quota_value = str(quota_bytes) if quota_bytes > 0 else "none"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("set_user_quota") as client:
             response = await client.put(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -303,7 +671,7 @@ class NextcloudService:
         if search:
             params["search"] = search
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("list_users") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -324,7 +692,7 @@ class NextcloudService:
         """Get detailed user information"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("get_user_details") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -353,7 +721,7 @@ class NextcloudService:
         """Disable a Nextcloud user"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}/disable"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("disable_user") as client:
             response = await client.put(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -365,7 +733,7 @@ class NextcloudService:
         """Enable a Nextcloud user"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}/enable"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("enable_user") as client:
             response = await client.put(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -377,7 +745,7 @@ class NextcloudService:
         """Delete a Nextcloud user"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("delete_user") as client:
             response = await client.delete(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -396,7 +764,7 @@ class NextcloudService:
         if shared_with_me:
             params["shared_with_me"] = "true"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("list_shares") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -445,7 +813,7 @@ class NextcloudService:
         """Get details of a specific share"""
         ocs_url = f"{self._get_ocs_url()}/apps/files_sharing/api/v1/shares/{share_id}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("get_share") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -475,7 +843,7 @@ class NextcloudService:
         """Delete a share"""
         ocs_url = f"{self._get_ocs_url()}/apps/files_sharing/api/v1/shares/{share_id}"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("delete_share") as client:
             response = await client.delete(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -495,7 +863,7 @@ class NextcloudService:
         if password:
             data["password"] = password
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("update_share") as client:
             response = await client.put(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -510,7 +878,7 @@ class NextcloudService:
         """List all groups"""
         ocs_url = f"{self._get_ocs_url()}/cloud/groups"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("list_groups") as client:
             response = await client.get(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -529,7 +897,7 @@ class NextcloudService:
         """Create a new group"""
         ocs_url = f"{self._get_ocs_url()}/cloud/groups"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("create_group") as client:
             response = await client.post(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -542,7 +910,7 @@ class NextcloudService:
         """Add user to a group"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}/groups"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("add_user_to_group") as client:
             response = await client.post(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
@@ -555,7 +923,7 @@ class NextcloudService:
         """Remove user from a group"""
         ocs_url = f"{self._get_ocs_url()}/cloud/users/{username}/groups"
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client("remove_user_from_group") as client:
             response = await client.delete(
                 url=ocs_url,
                 auth=(self.admin_user, self.admin_pass),
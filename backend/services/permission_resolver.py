@@ -0,0 +1,318 @@
+"""
+Bheem Workspace - Admin Permission Resolver
+Compiled, cached effective admin grants per user
+
+A user's role assignments are loaded once per (tenant, user) and compiled
+into segment tries, so a check walks "users.read" -> users -> read instead
+of joining roles and splitting wildcard strings every time. check_many()
+answers a whole list page from one compiled set, and resolve_many() loads
+the grants of many users in a single query.
+
+Any write to admin_roles or user_admin_roles through this worker's engine
+drops the cache; other workers catch up within PERMISSION_CACHE_TTL_SECONDS.
+"""
+import re
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import and_, event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import engine
+from models.org_models import AdminRole, UserAdminRole
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+# Admin roles use "users.read", core RBAC constants use "user:read"
+_SEGMENT_SEPARATOR = re.compile(r"[.:]")
+# Marks a node that is granted exactly (as opposed to a mere prefix)
+_GRANTED = ""
+
+_ROLE_WRITE = re.compile(
+    r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(?:\"?workspace\"?\.)?\"?(?:admin_roles|user_admin_roles)\"?\b",
+    re.IGNORECASE
+)
+
+# (scope_type, scope_id) of an org unit or group assignment
+Scope = Tuple[str, str]
+PermissionCheck = Union[str, Tuple[str, Optional[Scope]]]
+
+
+class PermissionTrie:
+    """Granted permissions by segment; a '*' segment grants its node and everything below it"""
+
+    __slots__ = ("root",)
+
+    def __init__(self, permissions: Iterable[str] = ()):
+        self.root: Dict[str, Any] = {}
+        for permission in permissions:
+            self.add(permission)
+
+    def add(self, permission: str):
+        node = self.root
+        for segment in _SEGMENT_SEPARATOR.split(permission):
+            if WILDCARD in node:
+                return
+            if segment == WILDCARD:
+                node.clear()
+                node[WILDCARD] = True
+                return
+            node = node.setdefault(segment, {})
+        node[_GRANTED] = True
+
+    def allows(self, permission: str) -> bool:
+        node = self.root
+        for segment in _SEGMENT_SEPARATOR.split(permission):
+            if WILDCARD in node:
+                return True
+            node = node.get(segment)
+            if node is None:
+                return False
+        return WILDCARD in node or _GRANTED in node
+
+
+class CompiledPermissions:
+    """
+    Effective admin grants of one user in one tenant.
+
+    Checks without a scope see every grant the user holds, matching the
+    previous union-of-roles behaviour; checks with a scope see global
+    grants plus grants assigned for that org unit or group.
+    """
+
+    def __init__(self, grants: Iterable[Tuple[str, Optional[Scope]]] = (), expires_at: Optional[datetime] = None):
+        self.expires_at = expires_at
+        self.permissions: List[str] = []
+        self._any = PermissionTrie()
+        self._global = PermissionTrie()
+        self._scoped: Dict[Scope, PermissionTrie] = {}
+        self._memo: Dict[Tuple[str, Optional[Scope]], bool] = {}
+        seen = set()
+        for permission, scope in grants:
+            if permission not in seen:
+                seen.add(permission)
+                self.permissions.append(permission)
+                self._any.add(permission)
+            if scope is None:
+                self._global.add(permission)
+            else:
+                self._scoped.setdefault(scope, PermissionTrie()).add(permission)
+        self.permissions.sort()
+
+    def allows(self, permission: str, scope: Optional[Scope] = None) -> bool:
+        key = (permission, scope)
+        allowed = self._memo.get(key)
+        if allowed is None:
+            if scope is None:
+                allowed = self._any.allows(permission)
+            else:
+                scoped = self._scoped.get(scope)
+                allowed = self._global.allows(permission) or (scoped is not None and scoped.allows(permission))
+            self._memo[key] = allowed
+        return allowed
+
+    def allows_many(self, checks: Iterable[PermissionCheck]) -> List[bool]:
+        """One answer per check; a check is a permission or a (permission, scope) pair"""
+        return [
+            self.allows(check) if isinstance(check, str) else self.allows(check[0], check[1])
+            for check in checks
+        ]
+
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _uuid(value) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+async def _load_grants(
+    db: AsyncSession,
+    tenant_id: str,
+    user_ids: Sequence[str]
+) -> Dict[str, CompiledPermissions]:
+    """Compile the unexpired role assignments of user_ids with one query"""
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(
+            UserAdminRole.user_id,
+            UserAdminRole.scope_type,
+            UserAdminRole.scope_id,
+            UserAdminRole.expires_at,
+            AdminRole.permissions
+        ).join(AdminRole, AdminRole.id == UserAdminRole.role_id).where(
+            and_(
+                UserAdminRole.user_id.in_([_uuid(user_id) for user_id in user_ids]),
+                AdminRole.tenant_id == _uuid(tenant_id),
+                or_(
+                    UserAdminRole.expires_at.is_(None),
+                    UserAdminRole.expires_at > now
+                )
+            )
+        )
+    )
+
+    grants: Dict[str, List[Tuple[str, Optional[Scope]]]] = {str(user_id): [] for user_id in user_ids}
+    expiry: Dict[str, datetime] = {}
+    for row in result.all():
+        user_id = str(row.user_id)
+        if row.scope_id is None or (row.scope_type or "global") == "global":
+            scope = None
+        else:
+            scope = (row.scope_type, str(row.scope_id))
+        grants.setdefault(user_id, []).extend((permission, scope) for permission in row.permissions or [])
+        if row.expires_at is not None:
+            expires_at = _utc_naive(row.expires_at)
+            expiry[user_id] = min(expiry.get(user_id, expires_at), expires_at)
+
+    return {
+        user_id: CompiledPermissions(user_grants, expires_at=expiry.get(user_id))
+        for user_id, user_grants in grants.items()
+    }
+
+
+class PermissionResolver:
+    """
+    Bounded LRU of compiled grants, keyed by (tenant_id, user_id).
+
+    - Entries live for ttl_seconds, or until the earliest assignment expiry
+    - invalidate() bumps a generation so loads already in flight when a
+      role or assignment write lands are not stored
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[CompiledPermissions, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "checks": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(tenant_id, user_id) -> Tuple[str, str]:
+        return str(tenant_id), str(user_id)
+
+    def get(self, key: Tuple[str, str]) -> Optional[CompiledPermissions]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            compiled, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return compiled
+            del self._entries[key]
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, key: Tuple[str, str], compiled: CompiledPermissions, generation: int):
+        if generation != self.generation:
+            return
+        ttl = self.ttl_seconds
+        if compiled.expires_at is not None:
+            ttl = min(ttl, (compiled.expires_at - datetime.utcnow()).total_seconds())
+        if ttl <= 0:
+            return
+        self._entries[key] = (compiled, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def resolve_many(
+        self,
+        db: AsyncSession,
+        tenant_id: str,
+        user_ids: Iterable[str]
+    ) -> Dict[str, CompiledPermissions]:
+        """Compiled grants for several users; cache misses are loaded together"""
+        resolved: Dict[str, CompiledPermissions] = {}
+        missing = []
+        for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+            compiled = self.get(self.key(tenant_id, user_id))
+            if compiled is None:
+                missing.append(user_id)
+            else:
+                resolved[user_id] = compiled
+
+        if missing:
+            generation = self.generation
+            loaded = await _load_grants(db, tenant_id, missing)
+            self.stats["loads"] += 1
+            for user_id, compiled in loaded.items():
+                self.store(self.key(tenant_id, user_id), compiled, generation)
+            resolved.update(loaded)
+        return resolved
+
+    async def resolve(self, db: AsyncSession, user_id: str, tenant_id: str) -> CompiledPermissions:
+        return (await self.resolve_many(db, tenant_id, [user_id]))[str(user_id)]
+
+    async def check(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        tenant_id: str,
+        permission: str,
+        scope: Optional[Scope] = None
+    ) -> bool:
+        compiled = await self.resolve(db, user_id, tenant_id)
+        self.stats["checks"] += 1
+        return compiled.allows(permission, scope)
+
+    async def check_many(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        tenant_id: str,
+        checks: Iterable[PermissionCheck]
+    ) -> List[bool]:
+        """Answer many checks (e.g. one per row of a list page) from one resolution"""
+        compiled = await self.resolve(db, user_id, tenant_id)
+        results = compiled.allows_many(checks)
+        self.stats["checks"] += len(results)
+        return results
+
+    def invalidate(self, user_id: Optional[str] = None, tenant_id: Optional[str] = None):
+        """Drop entries for a user or tenant, or everything if neither is given"""
+        self.generation += 1
+        self.stats["invalidations"] += 1
+        if user_id is None and tenant_id is None:
+            self._entries.clear()
+            return
+        for key in [
+            k for k in self._entries
+            if (tenant_id is None or k[0] == str(tenant_id)) and (user_id is None or k[1] == str(user_id))
+        ]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        return {**self.stats, "entries": len(self._entries), "hit_rate": round(hit_rate, 4)}
+
+
+permission_resolver = PermissionResolver(
+    max_entries=settings.PERMISSION_CACHE_SIZE,
+    ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _watch_admin_role_writes(conn, cursor, statement, parameters, context, executemany):
+    if _ROLE_WRITE.match(statement):
+        conn.info["admin_roles_written"] = True
+        permission_resolver.invalidate()
+
+
+@event.listens_for(engine.sync_engine, "commit")
+@event.listens_for(engine.sync_engine, "rollback")
+def _invalidate_after_admin_role_write(conn):
+    if conn.info.pop("admin_roles_written", False):
+        # Again at transaction end: grants loaded mid-transaction may hold uncommitted state
+        permission_resolver.invalidate()
@@ -0,0 +1,727 @@
+"""
+Bheem Workspace - Search Index Service
+Persistent inverted index backing unified search.
+
+Entities are tokenized into field-boosted postings stored in
+workspace.search_postings, partitioned by tenant (or by owning user for
+entities that carry no tenant_id). Postings are kept current incrementally:
+ORM changes to indexed models are captured on flush (and bulk UPDATE/DELETE
+statements on them as they execute) and written to the index once the
+originating transaction commits.
+"""
+import asyncio
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, and_, case, delete, event, func, insert, or_, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from models.admin_models import TenantUser
+from models.calendar_models import SearchDocument, SearchIndexLog, SearchPosting
+from models.drive_models import DriveFile
+from models.mail_models import MailContact, MailDraft
+from models.meet_models import MeetingRoom
+from models.notes_models import Note
+from models.productivity_models import Form, Presentation, Spreadsheet
+from models.sites_models import Site, SitePage
+
+logger = logging.getLogger("bheem.search.index")
+
+# Tokenizer limits
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+MAX_TERMS_PER_DOCUMENT = 2000
+SNIPPET_LENGTH = 200
+
+# Per-field boosts applied to log-scaled term frequency
+FIELD_BOOSTS = {
+    'title': 4.0,
+    'meta': 2.0,
+    'body': 1.0,
+}
+
+WRITE_BATCH_SIZE = 1000
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_PENDING_KEY = "search_index_pending"
+_STALE_KEY = "search_index_stale"
+
+# Columns no extractor reads; bulk updates that only set these skip reindexing
+UNINDEXED_COLUMNS = frozenset({'view_count'})
+
+
+# =============================================
+# Tokenizer
+# =============================================
+
+def strip_html(text: Optional[str]) -> str:
+    """Remove HTML tags, keeping word boundaries between elements"""
+    if not text:
+        return ''
+    return _HTML_TAG_RE.sub(' ', text)
+
+
+def tokenize(text: Optional[str], min_length: int = MIN_TERM_LENGTH) -> List[str]:
+    """Split text into lowercase word terms"""
+    if not text:
+        return []
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if min_length <= len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def build_postings(fields: Dict[str, Optional[str]]) -> Dict[str, float]:
+    """
+    Build term weights for a document.
+
+    Each field contributes boost * (1 + ln(tf)) for every term it contains,
+    so repeated terms saturate instead of dominating the score.
+    """
+    weights: Dict[str, float] = defaultdict(float)
+    for field, text in fields.items():
+        boost = FIELD_BOOSTS.get(field, 1.0)
+        for term, tf in Counter(tokenize(text)).items():
+            weights[term] += boost * (1 + math.log(tf))
+
+    if len(weights) > MAX_TERMS_PER_DOCUMENT:
+        top = sorted(weights.items(), key=lambda item: -item[1])[:MAX_TERMS_PER_DOCUMENT]
+        return dict(top)
+    return dict(weights)
+
+
+# =============================================
+# Entity Extractors
+# =============================================
+
+def _attr(obj: Any, name: str) -> Any:
+    """Read a loaded attribute without triggering a lazy load"""
+    return sa_inspect(obj).dict.get(name)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _snippet(text: Optional[str]) -> str:
+    return ' '.join(strip_html(text).split())[:SNIPPET_LENGTH]
+
+
+def _document(
+    obj: Any,
+    partition_id: Optional[UUID],
+    entity_type: str,
+    owner_id: Optional[UUID],
+    title: Optional[str],
+    body: Optional[str] = None,
+    meta: Optional[str] = None,
+    snippet: Optional[str] = None,
+    mime_type: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    if partition_id is None:
+        return None
+    return {
+        'partition_id': partition_id,
+        'entity_type': entity_type,
+        'entity_id': _attr(obj, 'id'),
+        'owner_id': owner_id,
+        'title': title,
+        'snippet': snippet if snippet is not None else _snippet(body),
+        'mime_type': mime_type,
+        'extra': extra or {},
+        'created_at': _attr(obj, 'created_at'),
+        'updated_at': _attr(obj, 'updated_at'),
+        'postings': build_postings({
+            'title': title,
+            'meta': meta,
+            'body': strip_html(body),
+        }),
+    }
+
+
+def _extract_mail_draft(draft: MailDraft) -> Optional[Dict[str, Any]]:
+    recipients = ' '.join(
+        f"{r.get('name') or ''} {r.get('email') or ''}"
+        for r in (_attr(draft, 'to_addresses') or [])
+        if isinstance(r, dict)
+    )
+    return _document(
+        draft, _attr(draft, 'user_id'), 'mail', _attr(draft, 'user_id'),
+        title=_attr(draft, 'subject') or '(No Subject)',
+        body=_attr(draft, 'body'),
+        meta=recipients,
+    )
+
+
+def _extract_mail_contact(contact: MailContact) -> Optional[Dict[str, Any]]:
+    email = _attr(contact, 'email')
+    return _document(
+        contact, _attr(contact, 'user_id'), 'contacts', _attr(contact, 'user_id'),
+        title=_attr(contact, 'name') or email,
+        meta=email,
+        snippet=email or '',
+        extra={'email': email},
+    )
+
+
+def _extract_drive_file(file: DriveFile) -> Optional[Dict[str, Any]]:
+    if _attr(file, 'is_trashed'):
+        return None
+    return _document(
+        file, _attr(file, 'tenant_id'), 'drive', _attr(file, 'created_by'),
+        title=_attr(file, 'name'),
+        body=_attr(file, 'description'),
+        meta=' '.join(_attr(file, 'tags') or []),
+        mime_type=_attr(file, 'mime_type'),
+        extra={'size': _attr(file, 'size_bytes')},
+    )
+
+
+def _extract_spreadsheet(sheet: Spreadsheet) -> Optional[Dict[str, Any]]:
+    if _attr(sheet, 'is_deleted'):
+        return None
+    return _document(
+        sheet, _attr(sheet, 'tenant_id'), 'sheets', _attr(sheet, 'created_by'),
+        title=_attr(sheet, 'title'),
+        body=_attr(sheet, 'description'),
+    )
+
+
+def _extract_presentation(pres: Presentation) -> Optional[Dict[str, Any]]:
+    if _attr(pres, 'is_deleted'):
+        return None
+    return _document(
+        pres, _attr(pres, 'tenant_id'), 'slides', _attr(pres, 'created_by'),
+        title=_attr(pres, 'title'),
+        body=_attr(pres, 'description'),
+    )
+
+
+def _extract_form(form: Form) -> Optional[Dict[str, Any]]:
+    if _attr(form, 'is_deleted'):
+        return None
+    return _document(
+        form, _attr(form, 'tenant_id'), 'forms', _attr(form, 'created_by'),
+        title=_attr(form, 'title'),
+        body=_attr(form, 'description'),
+        extra={'response_count': _attr(form, 'response_count')},
+    )
+
+
+def _extract_meeting(meeting: MeetingRoom) -> Optional[Dict[str, Any]]:
+    return _document(
+        meeting, _attr(meeting, 'host_id'), 'meet', _attr(meeting, 'host_id'),
+        title=_attr(meeting, 'room_name') or 'Untitled Meeting',
+        body=_attr(meeting, 'description'),
+        meta=_attr(meeting, 'room_code'),
+        extra={
+            'meeting_code': _attr(meeting, 'room_code'),
+            'scheduled_start': _iso(_attr(meeting, 'scheduled_start')),
+        },
+    )
+
+
+def _extract_note(note: Note) -> Optional[Dict[str, Any]]:
+    if _attr(note, 'is_trashed'):
+        return None
+    return _document(
+        note, _attr(note, 'tenant_id'), 'notes', _attr(note, 'owner_id'),
+        title=_attr(note, 'title') or 'Untitled Note',
+        body=_attr(note, 'content'),
+        extra={'color': _attr(note, 'color'), 'is_pinned': _attr(note, 'is_pinned')},
+    )
+
+
+def _extract_site(site: Site) -> Optional[Dict[str, Any]]:
+    if _attr(site, 'is_archived'):
+        return None
+    return _document(
+        site, _attr(site, 'tenant_id'), 'site', _attr(site, 'owner_id'),
+        title=_attr(site, 'name'),
+        body=_attr(site, 'description'),
+        meta=_attr(site, 'slug'),
+        extra={
+            'subtype': 'site',
+            'slug': _attr(site, 'slug'),
+            'visibility': _attr(site, 'visibility') or 'private',
+        },
+    )
+
+
+def _extract_site_page(page: SitePage) -> Optional[Dict[str, Any]]:
+    site_id = _attr(page, 'site_id')
+    return _document(
+        page, _attr(page, 'tenant_id'), 'site_page', _attr(page, 'author_id'),
+        title=_attr(page, 'title'),
+        body=_attr(page, 'content'),
+        meta=' '.join(_attr(page, 'meta_keywords') or []),
+        extra={
+            'subtype': 'page',
+            'site_id': str(site_id) if site_id else None,
+            'path': _attr(page, 'path'),
+            'is_draft': _attr(page, 'is_draft'),
+        },
+    )
+
+
+# Indexed model -> (entity_type, extractor). An extractor returning None
+# removes the entity from the index (e.g. trashed files).
+INDEXED_MODELS: Dict[type, Tuple[str, Callable[[Any], Optional[Dict[str, Any]]]]] = {
+    MailDraft: ('mail', _extract_mail_draft),
+    MailContact: ('contacts', _extract_mail_contact),
+    DriveFile: ('drive', _extract_drive_file),
+    Spreadsheet: ('sheets', _extract_spreadsheet),
+    Presentation: ('slides', _extract_presentation),
+    Form: ('forms', _extract_form),
+    MeetingRoom: ('meet', _extract_meeting),
+    Note: ('notes', _extract_note),
+    Site: ('site', _extract_site),
+    SitePage: ('site_page', _extract_site_page),
+}
+
+# Models partitioned by tenant_id (the rest are partitioned by owning user)
+TENANT_SCOPED_MODELS = [DriveFile, Spreadsheet, Presentation, Form, Note, Site, SitePage]
+USER_SCOPED_MODELS = [
+    (MailDraft, MailDraft.user_id),
+    (MailContact, MailContact.user_id),
+    # Rooms carry no tenant, so a meeting is searchable by its host only
+    (MeetingRoom, MeetingRoom.host_id),
+]
+
+
+class SearchIndexService:
+    """Maintains and queries the unified search inverted index"""
+
+    def __init__(self):
+        self._initialized = False
+        self._write_lock = asyncio.Lock()
+        self._tasks: set = set()
+
+    # =============================================
+    # Incremental Maintenance
+    # =============================================
+
+    def initialize(self):
+        """Register session hooks that keep the index in sync with ORM writes"""
+        if self._initialized:
+            return
+
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "do_orm_execute", self._do_orm_execute)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+        self._initialized = True
+        logger.info("Search index hooks registered")
+
+    def shutdown(self):
+        """Remove session hooks"""
+        if not self._initialized:
+            return
+
+        event.remove(Session, "after_flush", self._after_flush)
+        event.remove(Session, "do_orm_execute", self._do_orm_execute)
+        event.remove(Session, "after_commit", self._after_commit)
+        event.remove(Session, "after_rollback", self._after_rollback)
+        self._initialized = False
+
+    def _after_flush(self, session: Session, flush_context):
+        """Capture indexed entities touched by this flush"""
+        changes = None
+
+        for obj in list(session.new) + list(session.dirty):
+            spec = INDEXED_MODELS.get(type(obj))
+            if not spec or (obj not in session.new and not session.is_modified(obj)):
+                continue
+            entity_type, extractor = spec
+            entity_id = _attr(obj, 'id')
+            if entity_id is None:
+                continue
+            try:
+                doc = extractor(obj)
+            except Exception as e:
+                logger.warning(f"Could not extract {entity_type} {entity_id} for indexing: {e}")
+                continue
+            if changes is None:
+                changes = session.info.setdefault(_PENDING_KEY, {})
+            changes[(entity_type, entity_id)] = doc
+
+        for obj in session.deleted:
+            spec = INDEXED_MODELS.get(type(obj))
+            entity_id = _attr(obj, 'id') if spec else None
+            if entity_id is None:
+                continue
+            if changes is None:
+                changes = session.info.setdefault(_PENDING_KEY, {})
+            changes[(spec[0], entity_id)] = None
+
+    def _do_orm_execute(self, orm_execute_state: ORMExecuteState):
+        """
+        Capture indexed entities hit by bulk UPDATE/DELETE statements, which
+        bypass the flush. Deleted ids are removed from the index; updated ids
+        are reloaded and re-extracted after commit.
+        """
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        model = mapper.class_ if mapper is not None else None
+        spec = INDEXED_MODELS.get(model)
+        if not spec:
+            return
+
+        statement = orm_execute_state.statement
+        if orm_execute_state.is_update:
+            # Values given to .values(); empty for bulk updates by primary key
+            columns = {getattr(key, 'key', key) for key in (getattr(statement, '_values', None) or {})}
+            if columns and columns <= UNINDEXED_COLUMNS:
+                return
+
+        parameters = orm_execute_state.parameters
+        if isinstance(parameters, list):
+            # Bulk UPDATE by primary key: the ids are in the parameter sets
+            entity_ids = [params['id'] for params in parameters if params.get('id') is not None]
+        else:
+            # Resolve the affected ids before the statement runs
+            query = select(model.id)
+            if statement.whereclause is not None:
+                query = query.where(statement.whereclause)
+            entity_ids = orm_execute_state.session.execute(query).scalars().all()
+        if not entity_ids:
+            return
+
+        session = orm_execute_state.session
+        if orm_execute_state.is_delete:
+            changes = session.info.setdefault(_PENDING_KEY, {})
+            for entity_id in entity_ids:
+                changes[(spec[0], entity_id)] = None
+        else:
+            session.info.setdefault(_STALE_KEY, defaultdict(set))[model].update(entity_ids)
+
+    def _after_commit(self, session: Session):
+        """Hand captured changes to the index writer once they are durable"""
+        changes = session.info.pop(_PENDING_KEY, None)
+        stale = session.info.pop(_STALE_KEY, None)
+        if not changes and not stale:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("No running event loop; skipping incremental index update")
+            return
+
+        task = loop.create_task(self.apply_changes(changes or {}, stale))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _after_rollback(self, session: Session):
+        session.info.pop(_PENDING_KEY, None)
+        session.info.pop(_STALE_KEY, None)
+
+    async def apply_changes(
+        self,
+        changes: Dict[Tuple[str, UUID], Optional[Dict[str, Any]]],
+        stale: Optional[Dict[type, Set[UUID]]] = None
+    ):
+        """
+        Write a batch of index changes using a dedicated session.
+
+        Entities in stale (model -> ids changed by bulk UPDATE) are reloaded
+        and re-extracted first; ids that no longer exist are removed.
+        """
+        from core.database import AsyncSessionLocal
+
+        # Serialize writers so two commits touching the same entity
+        # cannot interleave their delete/insert pairs
+        async with self._write_lock:
+            try:
+                async with AsyncSessionLocal() as db:
+                    if stale:
+                        changes = {**changes, **await self._reload(db, stale)}
+                    await self._remove(db, list(changes.keys()))
+                    await self._insert(db, [doc for doc in changes.values() if doc])
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Search index update failed for {len(changes)} entities: {e}")
+
+    async def _reload(
+        self, db: AsyncSession, stale: Dict[type, Set[UUID]]
+    ) -> Dict[Tuple[str, UUID], Optional[Dict[str, Any]]]:
+        changes = {}
+        for model, ids in stale.items():
+            entity_type, extractor = INDEXED_MODELS[model]
+            changes.update({(entity_type, entity_id): None for entity_id in ids})
+            result = await db.execute(select(model).where(model.id.in_(list(ids))))
+            for obj in result.scalars().all():
+                try:
+                    changes[(entity_type, obj.id)] = extractor(obj)
+                except Exception as e:
+                    # Leave the indexed document as it was, like a failed flush-time extraction
+                    changes.pop((entity_type, obj.id))
+                    logger.warning(f"Could not extract {entity_type} {obj.id} for indexing: {e}")
+        return changes
+
+    async def _remove(self, db: AsyncSession, keys: List[Tuple[str, UUID]]):
+        by_type: Dict[str, List[UUID]] = defaultdict(list)
+        for entity_type, entity_id in keys:
+            by_type[entity_type].append(entity_id)
+
+        for entity_type, ids in by_type.items():
+            await db.execute(
+                delete(SearchPosting).where(
+                    SearchPosting.entity_type == entity_type,
+                    SearchPosting.entity_id.in_(ids)
+                )
+            )
+            await db.execute(
+                delete(SearchDocument).where(
+                    SearchDocument.entity_type == entity_type,
+                    SearchDocument.entity_id.in_(ids)
+                )
+            )
+
+    async def _insert(self, db: AsyncSession, docs: List[Dict[str, Any]]):
+        if not docs:
+            return
+
+        now = datetime.utcnow()
+        doc_rows = []
+        posting_rows = []
+        for doc in docs:
+            doc_rows.append({
+                'partition_id': doc['partition_id'],
+                'entity_type': doc['entity_type'],
+                'entity_id': doc['entity_id'],
+                'owner_id': doc['owner_id'],
+                'title': doc['title'],
+                'snippet': doc['snippet'],
+                'mime_type': doc['mime_type'],
+                'extra': doc['extra'],
+                'created_at': doc['created_at'],
+                'updated_at': doc['updated_at'] or doc['created_at'],
+                'indexed_at': now,
+            })
+            for term, weight in doc['postings'].items():
+                posting_rows.append({
+                    'partition_id': doc['partition_id'],
+                    'term': term,
+                    'entity_type': doc['entity_type'],
+                    'entity_id': doc['entity_id'],
+                    'weight': weight,
+                })
+
+        for start in range(0, len(doc_rows), WRITE_BATCH_SIZE):
+            await db.execute(insert(SearchDocument), doc_rows[start:start + WRITE_BATCH_SIZE])
+        for start in range(0, len(posting_rows), WRITE_BATCH_SIZE):
+            await db.execute(insert(SearchPosting), posting_rows[start:start + WRITE_BATCH_SIZE])
+
+    # =============================================
+    # Full Rebuild
+    # =============================================
+
+    async def rebuild_tenant(self, db: AsyncSession, tenant_id: UUID) -> int:
+        """
+        Rebuild the index for a tenant and its users' private partitions.
+
+        The run is recorded in SearchIndexLog.
+
+        Returns:
+            Number of entities indexed
+        """
+        log = SearchIndexLog(
+            tenant_id=tenant_id,
+            entity_type='tenant',
+            entity_id=tenant_id,
+            action='rebuild',
+            status='processing'
+        )
+        db.add(log)
+        await db.commit()
+
+        indexed = 0
+        try:
+            user_result = await db.execute(
+                select(TenantUser.user_id).where(TenantUser.tenant_id == tenant_id)
+            )
+            user_ids = [row[0] for row in user_result.all()]
+            partitions = [tenant_id] + user_ids
+
+            async with self._write_lock:
+                await db.execute(delete(SearchPosting).where(SearchPosting.partition_id.in_(partitions)))
+                await db.execute(delete(SearchDocument).where(SearchDocument.partition_id.in_(partitions)))
+
+                sources = [(model, model.tenant_id == tenant_id) for model in TENANT_SCOPED_MODELS]
+                if user_ids:
+                    sources += [(model, column.in_(user_ids)) for model, column in USER_SCOPED_MODELS]
+
+                for model, condition in sources:
+                    _, extractor = INDEXED_MODELS[model]
+                    batch = []
+                    rows = await db.stream_scalars(
+                        select(model).where(condition).execution_options(yield_per=WRITE_BATCH_SIZE)
+                    )
+                    async for obj in rows:
+                        doc = extractor(obj)
+                        if doc:
+                            batch.append(doc)
+                        if len(batch) >= WRITE_BATCH_SIZE:
+                            await self._insert(db, batch)
+                            indexed += len(batch)
+                            batch = []
+                    await self._insert(db, batch)
+                    indexed += len(batch)
+
+                log.status = 'completed'
+                log.processed_at = datetime.utcnow()
+                await db.commit()
+
+            logger.info(f"Rebuilt search index for tenant {tenant_id}: {indexed} entities")
+            return indexed
+
+        except Exception as e:
+            await db.rollback()
+            log.status = 'failed'
+            log.error_message = str(e)
+            log.processed_at = datetime.utcnow()
+            db.add(log)
+            await db.commit()
+            logger.error(f"Search index rebuild failed for tenant {tenant_id}: {e}")
+            raise
+
+    # =============================================
+    # Query
+    # =============================================
+
+    async def query(
+        self,
+        db: AsyncSession,
+        partitions: List[UUID],
+        query: str,
+        entity_types: List[str],
+        owner_ids: Optional[List[UUID]] = None,
+        shared_ids: Optional[Select] = None,
+        mime_types: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        after_score: Optional[float] = None,
+        after_id: Optional[UUID] = None,
+        include_ties: bool = False,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Tuple[int, List[Tuple[SearchDocument, float]]]:
+        """
+        Find documents matching every query term.
+
+        The last term is matched as a prefix unless the query ends in
+        whitespace, so results update while the user is still typing.
+        Results are ordered by (score desc, entity_id asc). Passing
+        after_score resumes strictly after a previous page: documents with
+        a lower score, plus equal-score documents when include_ties is set
+        or their entity_id sorts after after_id. The total ignores the
+        resume position.
+
+        shared_ids is a query for entity ids shared with the searcher. With
+        owner_ids, documents owned by those users or shared match; without,
+        only shared documents do.
+
+        Returns:
+            Tuple of (total matches, [(document, score), ...])
+        """
+        # Whole words are filtered exactly as at index time (shorter terms are
+        # never indexed); only the word being typed may be a single character
+        words = tokenize(query, min_length=1)
+        prefix = words.pop() if words and not query[-1:].isspace() else None
+        exact = [word for word in words if len(word) >= MIN_TERM_LENGTH]
+        terms = list(dict.fromkeys(exact + ([prefix] if prefix else [])))[:MAX_QUERY_TERMS]
+        if not terms or not partitions or not entity_types:
+            return 0, []
+
+        term_conditions = []
+        for index, term in enumerate(terms):
+            if prefix and index == len(terms) - 1 and term == prefix:
+                term_conditions.append(SearchPosting.term.like(f'{term}%'))
+            else:
+                term_conditions.append(SearchPosting.term == term)
+
+        # Count how many distinct query terms each entity matched
+        matched_terms = None
+        for condition in term_conditions:
+            term_matched = func.max(case((condition, 1), else_=0))
+            matched_terms = term_matched if matched_terms is None else matched_terms + term_matched
+
+        scored = (
+            select(
+                SearchPosting.entity_type,
+                SearchPosting.entity_id,
+                func.sum(SearchPosting.weight).label('score')
+            )
+            .where(
+                SearchPosting.partition_id.in_(partitions),
+                SearchPosting.entity_type.in_(entity_types),
+                or_(*term_conditions)
+            )
+            .group_by(SearchPosting.entity_type, SearchPosting.entity_id)
+            .having(matched_terms == len(term_conditions))
+            .subquery()
+        )
+
+        conditions = [
+            SearchDocument.entity_type == scored.c.entity_type,
+            SearchDocument.entity_id == scored.c.entity_id,
+        ]
+        if owner_ids and shared_ids is not None:
+            conditions.append(or_(
+                SearchDocument.owner_id.in_(owner_ids),
+                SearchDocument.entity_id.in_(shared_ids)
+            ))
+        elif owner_ids:
+            conditions.append(SearchDocument.owner_id.in_(owner_ids))
+        elif shared_ids is not None:
+            conditions.append(SearchDocument.entity_id.in_(shared_ids))
+        if mime_types:
+            conditions.append(SearchDocument.mime_type.in_(mime_types))
+        if date_from:
+            conditions.append(SearchDocument.created_at >= date_from)
+        if date_to:
+            conditions.append(SearchDocument.created_at <= date_to)
+
+        matches = select(SearchDocument, scored.c.score).join(scored, and_(*conditions))
+
+        count_result = await db.execute(
+            select(func.count()).select_from(matches.subquery())
+        )
+        total = count_result.scalar() or 0
+        if total == 0:
+            return 0, []
+
+        if after_score is not None:
+            if include_ties:
+                matches = matches.where(scored.c.score <= after_score)
+            elif after_id is not None:
+                matches = matches.where(or_(
+                    scored.c.score < after_score,
+                    and_(scored.c.score == after_score, SearchDocument.entity_id > after_id)
+                ))
+            else:
+                matches = matches.where(scored.c.score < after_score)
+
+        result = await db.execute(
+            matches
+            .order_by(scored.c.score.desc(), SearchDocument.entity_id.asc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return total, [(row[0], float(row[1] or 0)) for row in result.all()]
+
+
+# Singleton instance
+search_index_service = SearchIndexService()
@@ -2,20 +2,53 @@
 Bheem Workspace - Enterprise Search Service
 Business logic for unified search across all workspace apps
 """
-from typing import Optional, List, Dict, Any
+import asyncio
+import base64
+import heapq
+import json
+import logging
+from itertools import islice
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, and_, func, text
 from sqlalchemy.orm import selectinload
 
-from models.mail_models import MailDraft, MailContact
-from models.drive_models import DriveFile
-from models.productivity_models import Spreadsheet, Presentation, Form
-from models.meet_models import MeetingRoom
-from models.calendar_models import SearchIndexLog
-from models.notes_models import Note
-from models.sites_models import Site, SitePage
+from models.drive_models import DriveFile, DriveShare
+from models.productivity_models import Spreadsheet, SpreadsheetShare, Presentation, PresentationShare, Form
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.calendar_models import SearchIndexLog, SearchDocument
+from services.search_index_service import search_index_service
+
+logger = logging.getLogger("bheem.search")
+
+
+# App -> indexed entity types searched for it
+APP_ENTITY_TYPES = {
+    'mail': ['mail'],
+    'drive': ['drive'],
+    'docs': ['drive'],
+    'sheets': ['sheets'],
+    'slides': ['slides'],
+    'forms': ['forms'],
+    'meet': ['meet'],
+    'contacts': ['contacts'],
+    'notes': ['notes'],
+    'sites': ['site', 'site_page'],
+}
+
+# Apps whose results are limited to the searching user's own items
+OWNER_SCOPED_APPS = {'drive', 'docs', 'sheets', 'slides', 'forms', 'notes'}
+SHAREABLE_APPS = {'drive', 'docs', 'sheets', 'slides'}
+
+DOC_MIME_TYPES = [
+    'application/vnd.bheem.document',
+    'application/vnd.google-apps.document',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+]
 
 
 class SearchService:
@@ -40,11 +73,16 @@ class SearchService:
         owner_id: Optional[UUID] = None,
         shared_with_me: bool = False,
         skip: int = 0,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Perform unified search across workspace apps
 
+        Apps are searched concurrently, each in its own session and within
+        SEARCH_APP_TIMEOUT_SECONDS. Apps that fail or run out of time are
+        left out and the response is flagged as partial.
+
         Args:
             tenant_id: Tenant UUID
             user_id: User performing the search
@@ -55,153 +93,68 @@ class SearchService:
             date_to: Filter by date range end
             owner_id: Filter by owner
             shared_with_me: Only show shared items
-            skip: Pagination offset
+            skip: Pagination offset (ignored when a cursor is given)
             limit: Pagination limit
+            cursor: next_cursor from a previous page
 
         Returns:
-            Dict with results grouped by app
+            Dict with merged results, total, next_cursor and partial flag
+
+        Raises:
+            ValueError: If the cursor is malformed
         """
         # Default to all apps if none specified
         if not apps:
             apps = ['mail', 'drive', 'docs', 'sheets', 'slides', 'forms', 'meet', 'contacts', 'notes', 'sites']
+        apps = [app for app in dict.fromkeys(apps) if app in APP_ENTITY_TYPES]
 
-        results = {
-            'query': query,
-            'total': 0,
-            'results': []
-        }
-
-        search_tasks = []
-
-        # Search each requested app
-        if 'mail' in apps:
-            mail_results = await self._search_mail(
-                tenant_id, user_id, query, date_from, date_to, skip, limit
-            )
-            results['results'].extend(mail_results)
-
-        if 'drive' in apps:
-            drive_results = await self._search_drive(
-                tenant_id, user_id, query, file_types, date_from, date_to,
-                owner_id, shared_with_me, skip, limit
-            )
-            results['results'].extend(drive_results)
-
-        if 'docs' in apps:
-            docs_results = await self._search_docs(
-                tenant_id, user_id, query, date_from, date_to,
-                owner_id, shared_with_me, skip, limit
-            )
-            results['results'].extend(docs_results)
-
-        if 'sheets' in apps:
-            sheets_results = await self._search_sheets(
-                tenant_id, user_id, query, date_from, date_to,
-                owner_id, shared_with_me, skip, limit
-            )
-            results['results'].extend(sheets_results)
-
-        if 'slides' in apps:
-            slides_results = await self._search_slides(
-                tenant_id, user_id, query, date_from, date_to,
-                owner_id, shared_with_me, skip, limit
-            )
-            results['results'].extend(slides_results)
-
-        if 'forms' in apps:
-            forms_results = await self._search_forms(
-                tenant_id, user_id, query, date_from, date_to,
-                owner_id, skip, limit
-            )
-            results['results'].extend(forms_results)
-
-        if 'meet' in apps:
-            meet_results = await self._search_meetings(
-                tenant_id, user_id, query, date_from, date_to, skip, limit
-            )
-            results['results'].extend(meet_results)
-
-        if 'contacts' in apps:
-            contact_results = await self._search_contacts(
-                tenant_id, user_id, query, skip, limit
-            )
-            results['results'].extend(contact_results)
-
-        if 'notes' in apps:
-            notes_results = await self._search_notes(
-                tenant_id, user_id, query, date_from, date_to, skip, limit
-            )
-            results['results'].extend(notes_results)
+        after = self._decode_cursor(cursor) if cursor else None
+        offset = 0 if after else skip
 
-        if 'sites' in apps:
-            sites_results = await self._search_sites(
-                tenant_id, user_id, query, date_from, date_to, skip, limit
+        # Each app returns its own top offset+limit (+1 to detect a next page)
+        outcomes = await asyncio.gather(*[
+            self._search_app_with_budget(
+                app, tenant_id, user_id, query, file_types, date_from, date_to,
+                owner_id, shared_with_me, offset + limit + 1, after
             )
-            results['results'].extend(sites_results)
-
-        # Sort by relevance score (descending) and then by date
-        results['results'].sort(key=lambda x: (-x.get('score', 0), x.get('updated_at', '')), reverse=False)
+            for app in apps
+        ])
+
+        total = 0
+        ranked_lists = []
+        failed_apps = []
+        for app, outcome in zip(apps, outcomes):
+            if outcome is None:
+                failed_apps.append(app)
+                continue
+            total += outcome[0]
+            ranked_lists.append(outcome[1])
+
+        # k-way heap merge of the per-app ranked lists
+        merged = list(islice(
+            heapq.merge(*ranked_lists, key=self._rank_key),
+            offset + limit + 1
+        ))
+        page = merged[offset:offset + limit]
+        has_more = len(merged) > offset + limit
 
-        # Apply pagination to combined results
-        results['total'] = len(results['results'])
-        results['results'] = results['results'][skip:skip + limit]
+        results = {
+            'query': query,
+            'total': total,
+            'results': page,
+            'next_cursor': self._encode_cursor(page[-1]) if has_more and page else None,
+            'partial': bool(failed_apps),
+            'failed_apps': failed_apps
+        }
 
         # Log search
-        await self._log_search(tenant_id, user_id, query, apps, results['total'])
+        await self._log_search(tenant_id, user_id, query, apps, total)
 
         return results
 
-    async def _search_mail(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search mail drafts"""
-        conditions = [
-            MailDraft.tenant_id == tenant_id,
-            MailDraft.user_id == user_id,
-            or_(
-                MailDraft.subject.ilike(f'%{query}%'),
-                MailDraft.body.ilike(f'%{query}%'),
-                MailDraft.to_addresses.cast(text('text')).ilike(f'%{query}%')
-            )
-        ]
-
-        if date_from:
-            conditions.append(MailDraft.created_at >= date_from)
-        if date_to:
-            conditions.append(MailDraft.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(MailDraft)
-            .where(and_(*conditions))
-            .order_by(MailDraft.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        drafts = result.scalars().all()
-
-        return [
-            {
-                'id': str(draft.id),
-                'type': 'mail',
-                'title': draft.subject or '(No Subject)',
-                'snippet': (draft.body or '')[:200],
-                'score': self._calculate_score(query, draft.subject, draft.body),
-                'created_at': draft.created_at.isoformat() if draft.created_at else None,
-                'updated_at': draft.updated_at.isoformat() if draft.updated_at else None
-            }
-            for draft in drafts
-        ]
-
-    async def _search_drive(
+    async def _search_app_with_budget(
         self,
+        app: str,
         tenant_id: UUID,
         user_id: UUID,
         query: str,
@@ -210,564 +163,131 @@ class SearchService:
         date_to: Optional[datetime],
         owner_id: Optional[UUID],
         shared_with_me: bool,
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search Drive files"""
-        conditions = [
-            DriveFile.tenant_id == tenant_id,
-            DriveFile.is_deleted == False,
-            or_(
-                DriveFile.name.ilike(f'%{query}%'),
-                DriveFile.description.ilike(f'%{query}%')
-            )
-        ]
-
-        if shared_with_me:
-            # TODO: Join with DriveShare to check shared files
-            pass
-        else:
-            conditions.append(DriveFile.owner_id == user_id)
-
-        if owner_id:
-            conditions.append(DriveFile.owner_id == owner_id)
-
-        if file_types:
-            conditions.append(DriveFile.mime_type.in_(file_types))
-
-        if date_from:
-            conditions.append(DriveFile.created_at >= date_from)
-        if date_to:
-            conditions.append(DriveFile.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(DriveFile)
-            .where(and_(*conditions))
-            .order_by(DriveFile.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        files = result.scalars().all()
-
-        return [
-            {
-                'id': str(file.id),
-                'type': 'drive',
-                'title': file.name,
-                'snippet': file.description or '',
-                'mime_type': file.mime_type,
-                'size': file.size,
-                'score': self._calculate_score(query, file.name, file.description),
-                'created_at': file.created_at.isoformat() if file.created_at else None,
-                'updated_at': file.updated_at.isoformat() if file.updated_at else None
-            }
-            for file in files
-        ]
-
-    async def _search_docs(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        owner_id: Optional[UUID],
-        shared_with_me: bool,
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search documents (Drive files with document type)"""
-        doc_types = [
-            'application/vnd.bheem.document',
-            'application/vnd.google-apps.document',
-            'application/msword',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        ]
-
-        conditions = [
-            DriveFile.tenant_id == tenant_id,
-            DriveFile.is_deleted == False,
-            DriveFile.mime_type.in_(doc_types),
-            or_(
-                DriveFile.name.ilike(f'%{query}%'),
-                DriveFile.description.ilike(f'%{query}%')
-            )
-        ]
-
-        if not shared_with_me:
-            conditions.append(DriveFile.owner_id == user_id)
-
-        if owner_id:
-            conditions.append(DriveFile.owner_id == owner_id)
-
-        if date_from:
-            conditions.append(DriveFile.created_at >= date_from)
-        if date_to:
-            conditions.append(DriveFile.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(DriveFile)
-            .where(and_(*conditions))
-            .order_by(DriveFile.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        files = result.scalars().all()
-
-        return [
-            {
-                'id': str(file.id),
-                'type': 'docs',
-                'title': file.name,
-                'snippet': file.description or '',
-                'score': self._calculate_score(query, file.name, file.description),
-                'created_at': file.created_at.isoformat() if file.created_at else None,
-                'updated_at': file.updated_at.isoformat() if file.updated_at else None
-            }
-            for file in files
-        ]
-
-    async def _search_sheets(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        owner_id: Optional[UUID],
-        shared_with_me: bool,
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search spreadsheets"""
-        conditions = [
-            Spreadsheet.tenant_id == tenant_id,
-            Spreadsheet.is_deleted == False,
-            or_(
-                Spreadsheet.name.ilike(f'%{query}%'),
-                Spreadsheet.description.ilike(f'%{query}%')
-            )
-        ]
-
-        if not shared_with_me:
-            conditions.append(Spreadsheet.owner_id == user_id)
-
-        if owner_id:
-            conditions.append(Spreadsheet.owner_id == owner_id)
-
-        if date_from:
-            conditions.append(Spreadsheet.created_at >= date_from)
-        if date_to:
-            conditions.append(Spreadsheet.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(Spreadsheet)
-            .where(and_(*conditions))
-            .order_by(Spreadsheet.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
+        limit: int,
+        after: Optional[Tuple[float, str, UUID]]
+    ) -> Optional[Tuple[int, List[Dict]]]:
+        """Run one app search in its own session; None if it failed or timed out"""
+        async def run():
+            async with AsyncSessionLocal() as db:
+                return await self._search_app(
+                    db, app, tenant_id, user_id, query, file_types, date_from, date_to,
+                    owner_id, shared_with_me, limit, after
+                )
 
-        sheets = result.scalars().all()
-
-        return [
-            {
-                'id': str(sheet.id),
-                'type': 'sheets',
-                'title': sheet.name,
-                'snippet': sheet.description or '',
-                'score': self._calculate_score(query, sheet.name, sheet.description),
-                'created_at': sheet.created_at.isoformat() if sheet.created_at else None,
-                'updated_at': sheet.updated_at.isoformat() if sheet.updated_at else None
-            }
-            for sheet in sheets
-        ]
+        try:
+            return await asyncio.wait_for(run(), timeout=settings.SEARCH_APP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Search in '{app}' exceeded {settings.SEARCH_APP_TIMEOUT_SECONDS}s budget")
+        except Exception as e:
+            logger.error(f"Search in '{app}' failed: {e}")
+        return None
 
-    async def _search_slides(
+    async def _search_app(
         self,
+        db: AsyncSession,
+        app: str,
         tenant_id: UUID,
         user_id: UUID,
         query: str,
+        file_types: Optional[List[str]],
         date_from: Optional[datetime],
         date_to: Optional[datetime],
         owner_id: Optional[UUID],
         shared_with_me: bool,
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search presentations"""
-        conditions = [
-            Presentation.tenant_id == tenant_id,
-            Presentation.is_deleted == False,
-            or_(
-                Presentation.name.ilike(f'%{query}%'),
-                Presentation.description.ilike(f'%{query}%')
-            )
-        ]
-
-        if not shared_with_me:
-            conditions.append(Presentation.owner_id == user_id)
-
-        if owner_id:
-            conditions.append(Presentation.owner_id == owner_id)
-
-        if date_from:
-            conditions.append(Presentation.created_at >= date_from)
-        if date_to:
-            conditions.append(Presentation.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(Presentation)
-            .where(and_(*conditions))
-            .order_by(Presentation.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        presentations = result.scalars().all()
-
-        return [
-            {
-                'id': str(pres.id),
-                'type': 'slides',
-                'title': pres.name,
-                'snippet': pres.description or '',
-                'slide_count': pres.slide_count,
-                'score': self._calculate_score(query, pres.name, pres.description),
-                'created_at': pres.created_at.isoformat() if pres.created_at else None,
-                'updated_at': pres.updated_at.isoformat() if pres.updated_at else None
-            }
-            for pres in presentations
-        ]
-
-    async def _search_forms(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        owner_id: Optional[UUID],
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search forms"""
-        conditions = [
-            Form.tenant_id == tenant_id,
-            Form.is_deleted == False,
-            or_(
-                Form.title.ilike(f'%{query}%'),
-                Form.description.ilike(f'%{query}%')
-            )
-        ]
-
+        limit: int,
+        after: Optional[Tuple[float, str, UUID]] = None
+    ) -> Tuple[int, List[Dict]]:
+        """Search a single app through the inverted index, in rank order"""
+        owner_ids = shared_ids = None
         if owner_id:
-            conditions.append(Form.owner_id == owner_id)
-        else:
-            conditions.append(Form.owner_id == user_id)
-
-        if date_from:
-            conditions.append(Form.created_at >= date_from)
-        if date_to:
-            conditions.append(Form.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(Form)
-            .where(and_(*conditions))
-            .order_by(Form.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
+            owner_ids = [owner_id]
+        elif app in OWNER_SCOPED_APPS:
+            # Own items plus items shared with the user; only the latter for shared_with_me
+            if app in SHAREABLE_APPS:
+                shared_ids = self._shared_ids(app, user_id)
+            if not (shared_with_me and shared_ids is not None):
+                owner_ids = [user_id]
+
+        mime_types = None
+        if app == 'docs':
+            mime_types = DOC_MIME_TYPES
+        elif app == 'drive' and file_types:
+            mime_types = file_types
+
+        # Translate the merged-order cursor into this app's resume position
+        after_score = after_id = None
+        include_ties = False
+        if after:
+            after_score, after_app, after_entity_id = after
+            if app == after_app:
+                after_id = after_entity_id
+            elif app > after_app:
+                include_ties = True
+
+        total, matches = await search_index_service.query(
+            db,
+            partitions=[p for p in (tenant_id, user_id) if p],
+            query=query,
+            entity_types=APP_ENTITY_TYPES[app],
+            owner_ids=owner_ids,
+            shared_ids=shared_ids,
+            mime_types=mime_types,
+            date_from=date_from,
+            date_to=date_to,
+            after_score=after_score,
+            after_id=after_id,
+            include_ties=include_ties,
+            limit=limit
         )
 
-        forms = result.scalars().all()
-
-        return [
-            {
-                'id': str(form.id),
-                'type': 'forms',
-                'title': form.title,
-                'snippet': form.description or '',
-                'response_count': form.response_count,
-                'score': self._calculate_score(query, form.title, form.description),
-                'created_at': form.created_at.isoformat() if form.created_at else None,
-                'updated_at': form.updated_at.isoformat() if form.updated_at else None
-            }
-            for form in forms
-        ]
-
-    async def _search_meetings(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search meetings"""
-        conditions = [
-            MeetingRoom.tenant_id == tenant_id,
-            or_(
-                MeetingRoom.title.ilike(f'%{query}%'),
-                MeetingRoom.description.ilike(f'%{query}%')
-            )
-        ]
-
-        if date_from:
-            conditions.append(MeetingRoom.scheduled_start >= date_from)
-        if date_to:
-            conditions.append(MeetingRoom.scheduled_start <= date_to)
-
-        result = await self.db.execute(
-            select(MeetingRoom)
-            .where(and_(*conditions))
-            .order_by(MeetingRoom.scheduled_start.desc())
-            .offset(skip)
-            .limit(limit)
+        return total, [self._format_result(app, doc, score) for doc, score in matches]
+
+    @staticmethod
+    def _shared_ids(app: str, user_id: UUID):
+        """Query for the ids of the app's items shared with the user"""
+        if app == 'sheets':
+            return select(SpreadsheetShare.spreadsheet_id).where(SpreadsheetShare.user_id == user_id)
+        if app == 'slides':
+            return select(PresentationShare.presentation_id).where(PresentationShare.user_id == user_id)
+        return select(DriveShare.file_id).where(
+            DriveShare.user_id == user_id,
+            or_(DriveShare.expires_at.is_(None), DriveShare.expires_at > datetime.utcnow())
         )
 
-        meetings = result.scalars().all()
-
-        return [
-            {
-                'id': str(meeting.id),
-                'type': 'meet',
-                'title': meeting.title or 'Untitled Meeting',
-                'snippet': meeting.description or '',
-                'meeting_code': meeting.meeting_code,
-                'scheduled_start': meeting.scheduled_start.isoformat() if meeting.scheduled_start else None,
-                'score': self._calculate_score(query, meeting.title, meeting.description),
-                'created_at': meeting.created_at.isoformat() if meeting.created_at else None,
-                'updated_at': None
-            }
-            for meeting in meetings
-        ]
-
-    async def _search_contacts(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search contacts"""
-        result = await self.db.execute(
-            select(MailContact)
-            .where(
-                MailContact.tenant_id == tenant_id,
-                MailContact.user_id == user_id,
-                or_(
-                    MailContact.name.ilike(f'%{query}%'),
-                    MailContact.email.ilike(f'%{query}%'),
-                    MailContact.company.ilike(f'%{query}%'),
-                    MailContact.notes.ilike(f'%{query}%')
-                )
-            )
-            .order_by(MailContact.name.asc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        contacts = result.scalars().all()
-
-        return [
-            {
-                'id': str(contact.id),
-                'type': 'contacts',
-                'title': contact.name or contact.email,
-                'snippet': f"{contact.email} - {contact.company or ''}"[:200],
-                'email': contact.email,
-                'score': self._calculate_score(query, contact.name, contact.email),
-                'created_at': contact.created_at.isoformat() if contact.created_at else None,
-                'updated_at': contact.updated_at.isoformat() if contact.updated_at else None
-            }
-            for contact in contacts
-        ]
-
-    async def _search_notes(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search notes"""
-        conditions = [
-            Note.tenant_id == tenant_id,
-            Note.owner_id == user_id,
-            Note.is_trashed == False,
-            or_(
-                Note.title.ilike(f'%{query}%'),
-                Note.content.ilike(f'%{query}%')
-            )
-        ]
-
-        if date_from:
-            conditions.append(Note.created_at >= date_from)
-        if date_to:
-            conditions.append(Note.created_at <= date_to)
-
-        result = await self.db.execute(
-            select(Note)
-            .where(and_(*conditions))
-            .order_by(Note.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        notes = result.scalars().all()
-
-        return [
-            {
-                'id': str(note.id),
-                'type': 'notes',
-                'title': note.title or 'Untitled Note',
-                'snippet': (note.content or '')[:200],
-                'color': note.color,
-                'is_pinned': note.is_pinned,
-                'score': self._calculate_score(query, note.title, note.content),
-                'created_at': note.created_at.isoformat() if note.created_at else None,
-                'updated_at': note.updated_at.isoformat() if note.updated_at else None
-            }
-            for note in notes
-        ]
-
-    async def _search_sites(
-        self,
-        tenant_id: UUID,
-        user_id: UUID,
-        query: str,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        skip: int,
-        limit: int
-    ) -> List[Dict]:
-        """Search sites and pages"""
-        results = []
-
-        # Search sites
-        site_conditions = [
-            Site.tenant_id == tenant_id,
-            Site.is_archived == False,
-            or_(
-                Site.name.ilike(f'%{query}%'),
-                Site.description.ilike(f'%{query}%')
-            )
-        ]
-
-        if date_from:
-            site_conditions.append(Site.created_at >= date_from)
-        if date_to:
-            site_conditions.append(Site.created_at <= date_to)
-
-        site_result = await self.db.execute(
-            select(Site)
-            .where(and_(*site_conditions))
-            .order_by(Site.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        sites = site_result.scalars().all()
-
-        for site in sites:
-            results.append({
-                'id': str(site.id),
-                'type': 'sites',
-                'subtype': 'site',
-                'title': site.name,
-                'snippet': site.description or '',
-                'slug': site.slug,
-                'visibility': site.visibility.value if site.visibility else 'private',
-                'score': self._calculate_score(query, site.name, site.description),
-                'created_at': site.created_at.isoformat() if site.created_at else None,
-                'updated_at': site.updated_at.isoformat() if site.updated_at else None
-            })
-
-        # Search pages
-        page_conditions = [
-            SitePage.tenant_id == tenant_id,
-            or_(
-                SitePage.title.ilike(f'%{query}%'),
-                SitePage.content.ilike(f'%{query}%')
-            )
-        ]
-
-        if date_from:
-            page_conditions.append(SitePage.created_at >= date_from)
-        if date_to:
-            page_conditions.append(SitePage.created_at <= date_to)
-
-        page_result = await self.db.execute(
-            select(SitePage)
-            .where(and_(*page_conditions))
-            .order_by(SitePage.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-
-        pages = page_result.scalars().all()
-
-        for page in pages:
-            # Strip HTML from content for snippet
-            content_text = (page.content or '').replace('<', ' <')
-            import re
-            content_text = re.sub(r'<[^>]+>', '', content_text)[:200]
-
-            results.append({
-                'id': str(page.id),
-                'type': 'sites',
-                'subtype': 'page',
-                'title': page.title,
-                'snippet': content_text,
-                'site_id': str(page.site_id),
-                'path': page.path,
-                'is_draft': page.is_draft,
-                'score': self._calculate_score(query, page.title, page.content),
-                'created_at': page.created_at.isoformat() if page.created_at else None,
-                'updated_at': page.updated_at.isoformat() if page.updated_at else None
-            })
-
-        return results
-
-    def _calculate_score(
-        self,
-        query: str,
-        title: Optional[str],
-        content: Optional[str]
-    ) -> float:
-        """Calculate relevance score for search result"""
-        score = 0.0
-        query_lower = query.lower()
-
-        # Title match (higher weight)
-        if title:
-            title_lower = title.lower()
-            if query_lower == title_lower:
-                score += 100
-            elif query_lower in title_lower:
-                score += 50
-                # Boost for match at beginning
-                if title_lower.startswith(query_lower):
-                    score += 20
-
-        # Content match
-        if content:
-            content_lower = content.lower()
-            if query_lower in content_lower:
-                score += 25
-                # Count occurrences
-                count = content_lower.count(query_lower)
-                score += min(count * 2, 20)  # Cap at 20
-
-        return score
+    @staticmethod
+    def _rank_key(result: Dict) -> Tuple[float, str, str]:
+        """Merge order: score desc, then app, then id (matches index order)"""
+        return (-result['score'], result['type'], result['id'])
+
+    @staticmethod
+    def _encode_cursor(result: Dict) -> str:
+        payload = json.dumps([result['score'], result['type'], result['id']])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[float, str, UUID]:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            score, app, entity_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return float(score), str(app), UUID(entity_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid search cursor") from e
+
+    def _format_result(self, app: str, doc: SearchDocument, score: float) -> Dict:
+        """Build a search result from an indexed document"""
+        result = {
+            'id': str(doc.entity_id),
+            'type': app,
+            'title': doc.title,
+            'snippet': doc.snippet or '',
+            'score': score,
+            'created_at': doc.created_at.isoformat() if doc.created_at else None,
+            'updated_at': doc.updated_at.isoformat() if doc.updated_at else None
+        }
+        if doc.mime_type:
+            result['mime_type'] = doc.mime_type
+        result.update(doc.extra or {})
+        return result
 
     async def _log_search(
         self,
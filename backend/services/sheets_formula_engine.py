@@ -0,0 +1,934 @@
+"""
+Bheem Sheets - Formula Engine
+=============================
+Parses cell formulas once, tracks which cells every formula reads, and
+recalculates only the cells downstream of an edit, in dependency order.
+
+- Formulas are tokenized and parsed into small tuple ASTs (cached by text)
+- Each worksheet engine keeps precedents/dependents for single-cell refs
+  and a per-column index for range refs
+- An edit marks the changed cells dirty, collects their transitive
+  dependents and evaluates that subgraph topologically; cells caught in
+  a cycle (or fed by one) become #CYCLE!
+- Values are held column by column: numbers in float64 arrays, text and
+  other non-numeric values in a sparse per-row overflow, so range
+  functions (SUM, AVERAGE, MIN, ...) are NumPy reductions over slices
+- Engines are cached per worksheet and revalidated against updated_at, so
+  an edit does not rebuild the graph for the whole sheet
+
+Formulas the engine cannot parse (unknown functions, unsupported syntax)
+keep the value the client computed and are not recalculated here.
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int]  # (row, column), both 1-based
+Span = Tuple[int, int, int, int]  # (row1, col1, row2, col2), inclusive
+
+
+# =============================================
+# References and error values
+# =============================================
+
+CELL_REF_RE = re.compile(r"^\$?([A-Z]{1,3})\$?([1-9][0-9]*)$")
+
+
+def col_to_num(col: str) -> int:
+    num = 0
+    for char in col:
+        num = num * 26 + (ord(char) - ord('A') + 1)
+    return num
+
+
+def num_to_col(num: int) -> str:
+    result = ''
+    while num > 0:
+        num -= 1
+        result = chr(num % 26 + ord('A')) + result
+        num //= 26
+    return result
+
+
+def parse_cell_ref(ref: str) -> Optional[Cell]:
+    """'B12' / '$B$12' -> (12, 2); None if ref is not a single cell"""
+    match = CELL_REF_RE.match(ref.upper())
+    if not match:
+        return None
+    return int(match.group(2)), col_to_num(match.group(1))
+
+
+def cell_name(cell: Cell) -> str:
+    return f"{num_to_col(cell[1])}{cell[0]}"
+
+
+class CellError(str):
+    """Spreadsheet error value (#DIV/0! etc.); a str so it serializes as-is"""
+
+
+DIV0 = CellError("#DIV/0!")
+VALUE = CellError("#VALUE!")
+NUM = CellError("#NUM!")
+NA = CellError("#N/A")
+CYCLE = CellError("#CYCLE!")
+
+
+class UnsupportedFormula(Exception):
+    pass
+
+
+class _ErrorResult(Exception):
+    """Short-circuits evaluation with an error value"""
+
+    def __init__(self, error: CellError):
+        self.error = error
+
+
+# =============================================
+# Tokenizer and parser
+# =============================================
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"]|"")*")
+      | (?P<range>\$?[A-Za-z]{1,3}\$?[0-9]+:\$?[A-Za-z]{1,3}\$?[0-9]+)
+      | (?P<number>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)
+      | (?P<func>[A-Za-z][A-Za-z0-9_.]*(?=\s*\())
+      | (?P<bool>(?i:TRUE|FALSE)(?![A-Za-z0-9_]))
+      | (?P<ref>\$?[A-Za-z]{1,3}\$?[0-9]+(?![A-Za-z0-9_]))
+      | (?P<op><>|<=|>=|[-+*/^&=<>%(),])
+    )""", re.VERBOSE)
+
+BINARY_PRECEDENCE = {
+    "=": 1, "<>": 1, "<": 1, ">": 1, "<=": 1, ">=": 1,
+    "&": 2,
+    "+": 3, "-": 3,
+    "*": 4, "/": 4,
+    "^": 5,
+}
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise UnsupportedFormula(f"Unexpected input at {position}: {text[position:position + 10]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token[0] is None:
+            raise UnsupportedFormula("Unexpected end of formula")
+        self.position += 1
+        return token
+
+    def expect(self, text: str):
+        kind, value = self.take()
+        if kind != "op" or value != text:
+            raise UnsupportedFormula(f"Expected {text!r}, found {value!r}")
+
+    def expression(self, min_precedence: int = 1):
+        node = self.unary()
+        while True:
+            kind, value = self.peek()
+            precedence = BINARY_PRECEDENCE.get(value) if kind == "op" else None
+            if precedence is None or precedence < min_precedence:
+                return node
+            self.take()
+            node = ("bin", value, node, self.expression(precedence + 1))
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == "op" and value in ("-", "+"):
+            self.take()
+            operand = self.unary()
+            return ("neg", operand) if value == "-" else operand
+        node = self.primary()
+        while self.peek() == ("op", "%"):
+            self.take()
+            node = ("pct", node)
+        return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "number":
+            return ("lit", _parse_number(value))
+        if kind == "string":
+            return ("lit", value[1:-1].replace('""', '"'))
+        if kind == "bool":
+            return ("lit", value.upper() == "TRUE")
+        if kind == "ref":
+            cell = parse_cell_ref(value)
+            if cell is None:
+                raise UnsupportedFormula(f"Invalid reference {value!r}")
+            return ("ref",) + cell
+        if kind == "range":
+            first, second = (parse_cell_ref(part) for part in value.split(":"))
+            if first is None or second is None:
+                raise UnsupportedFormula(f"Invalid range {value!r}")
+            return ("range", min(first[0], second[0]), min(first[1], second[1]),
+                    max(first[0], second[0]), max(first[1], second[1]))
+        if kind == "func":
+            name = value.upper()
+            if name not in FUNCTIONS and name not in LAZY_FUNCTIONS:
+                raise UnsupportedFormula(f"Unknown function {name}")
+            self.expect("(")
+            args = []
+            if self.peek() != ("op", ")"):
+                args.append(self.expression())
+                while self.peek() == ("op", ","):
+                    self.take()
+                    args.append(self.expression())
+            self.expect(")")
+            return ("call", name, tuple(args))
+        if kind == "op" and value == "(":
+            node = self.expression()
+            self.expect(")")
+            return node
+        raise UnsupportedFormula(f"Unexpected {value!r}")
+
+
+@lru_cache(maxsize=4096)
+def parse_formula(formula: str):
+    """Parse '=...' into an AST; raises UnsupportedFormula"""
+    if not formula or not formula.startswith("="):
+        raise UnsupportedFormula("Not a formula")
+    parser = _Parser(tokenize(formula[1:]))
+    node = parser.expression()
+    if parser.peek()[0] is not None:
+        raise UnsupportedFormula(f"Unexpected {parser.peek()[1]!r}")
+    return node
+
+
+def references(node) -> Tuple[Set[Cell], List[Span]]:
+    """Single cells and ranges an AST reads"""
+    cells: Set[Cell] = set()
+    spans: List[Span] = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        tag = current[0]
+        if tag == "ref":
+            cells.add((current[1], current[2]))
+        elif tag == "range":
+            spans.append(current[1:])
+        elif tag == "call":
+            stack.extend(current[2])
+        elif tag == "bin":
+            stack.extend(current[2:])
+        elif tag in ("neg", "pct"):
+            stack.append(current[1])
+    return cells, spans
+
+
+# =============================================
+# Columnar cell storage
+# =============================================
+
+def _parse_number(text: str):
+    number = float(text.strip())
+    if not math.isfinite(number):
+        raise ValueError(text)
+    return int(number) if number.is_integer() and "." not in text and "e" not in text.lower() else number
+
+
+def _as_number(value) -> Optional[float]:
+    """Numeric reading of a stored value for range maths; None for text, blanks and booleans"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str) and not isinstance(value, CellError):
+            # Cells saved by clients often hold numbers as strings
+            return float(_parse_number(value))
+    except (ValueError, OverflowError):
+        # Unparseable text, or an integer too large for a float
+        return None
+    return None
+
+
+class _Column:
+    """
+    One worksheet column. Numeric readings live in a float64 array (NaN =
+    none) so range functions reduce with NumPy; anything that is not a plain
+    number (text, booleans, numeric strings, errors) is kept sparse by row.
+    Numbers past SHEETS_DENSE_ROW_LIMIT are kept sparse too, so a single
+    far-away cell cannot grow the array for the whole column.
+    """
+
+    __slots__ = ("numbers", "far", "other", "errors")
+
+    dense_rows = settings.SHEETS_DENSE_ROW_LIMIT
+
+    def __init__(self):
+        self.numbers = np.full(min(64, self.dense_rows), np.nan)
+        self.far: Dict[int, float] = {}
+        self.other: Dict[int, Any] = {}
+        self.errors: Dict[int, CellError] = {}
+
+    def _reserve(self, size: int):
+        if size > len(self.numbers):
+            grown = np.full(min(max(size, len(self.numbers) * 2), self.dense_rows), np.nan)
+            grown[:len(self.numbers)] = self.numbers
+            self.numbers = grown
+
+    def _has_number(self, row: int) -> bool:
+        if row in self.far:
+            return True
+        return row <= len(self.numbers) and not np.isnan(self.numbers[row - 1])
+
+    def set(self, row: int, value):
+        index = row - 1
+        self.other.pop(row, None)
+        self.errors.pop(row, None)
+        self.far.pop(row, None)
+        if index < len(self.numbers):
+            self.numbers[index] = np.nan
+        if value is None or value == "":
+            return
+        number = _as_number(value)
+        if number is not None:
+            if row <= self.dense_rows:
+                self._reserve(row)
+                self.numbers[index] = number
+            else:
+                self.far[row] = number
+        if number is None or not isinstance(value, (int, float)):
+            self.other[row] = value
+        if isinstance(value, CellError):
+            self.errors[row] = value
+
+    def get(self, row: int):
+        if row in self.other:
+            return self.other[row]
+        number = self.far.get(row)
+        if number is None and row - 1 < len(self.numbers):
+            number = self.numbers[row - 1]
+        if number is not None and not np.isnan(number):
+            return int(number) if number.is_integer() else float(number)
+        return None
+
+    def _far_rows(self, row1: int, row2: int) -> List[int]:
+        return [row for row in self.far if row1 <= row <= row2]
+
+    def span_numbers(self, row1: int, row2: int, strict: bool = True) -> np.ndarray:
+        if strict:
+            for row, error in self.errors.items():
+                if row1 <= row <= row2:
+                    raise _ErrorResult(error)
+        values = self.numbers[row1 - 1:row2]
+        values = values[~np.isnan(values)]
+        if self.far:
+            far = [self.far[row] for row in self._far_rows(row1, row2)]
+            if far:
+                values = np.concatenate([values, np.array(far)])
+        return values
+
+    def span_items(self, row1: int, row2: int) -> List[Tuple[int, Any]]:
+        rows = set(np.flatnonzero(~np.isnan(self.numbers[row1 - 1:row2])) + row1)
+        rows.update(self._far_rows(row1, row2))
+        rows.update(row for row in self.other if row1 <= row <= row2)
+        return [(int(row), self.get(int(row))) for row in sorted(rows)]
+
+    def span_count(self, row1: int, row2: int) -> int:
+        """Non-empty cells in the span"""
+        numeric = self.numbers[row1 - 1:row2]
+        count = int(np.count_nonzero(~np.isnan(numeric))) + len(self._far_rows(row1, row2))
+        for row in self.other:
+            if row1 <= row <= row2 and not self._has_number(row):
+                count += 1
+        return count
+
+
+class _Range:
+    """A range argument, read lazily from the worksheet columns"""
+
+    def __init__(self, engine: "SheetEngine", span: Span):
+        self.engine = engine
+        self.span = span
+
+    def _columns(self):
+        row1, col1, row2, col2 = self.span
+        for col in range(col1, col2 + 1):
+            column = self.engine.columns.get(col)
+            if column is not None:
+                yield column
+
+    def numbers(self, strict: bool = True) -> np.ndarray:
+        row1, _, row2, _ = self.span
+        parts = [column.span_numbers(row1, row2, strict) for column in self._columns()]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def count(self) -> int:
+        row1, _, row2, _ = self.span
+        return sum(column.span_count(row1, row2) for column in self._columns())
+
+    def __iter__(self):
+        """Values in row-major order"""
+        row1, col1, row2, col2 = self.span
+        entries = []
+        for col in range(col1, col2 + 1):
+            column = self.engine.columns.get(col)
+            if column is not None:
+                entries.extend((row, col, value) for row, value in column.span_items(row1, row2))
+        entries.sort()
+        return iter([value for _, _, value in entries])
+
+
+# =============================================
+# Value coercion
+# =============================================
+
+def _number(value):
+    """Scalar operand as a number (empty = 0); #VALUE! for text"""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, CellError):
+        raise _ErrorResult(value)
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return _parse_number(value)
+        except ValueError:
+            raise _ErrorResult(VALUE)
+    raise _ErrorResult(VALUE)
+
+
+def _number_array(args) -> np.ndarray:
+    """All numeric arguments as one array: ranges contribute their numbers, scalars are coerced"""
+    parts = [
+        arg.numbers() if isinstance(arg, _Range) else np.array([_number(arg)], dtype=float)
+        for arg in args
+    ]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def _text(value) -> str:
+    if isinstance(value, CellError):
+        raise _ErrorResult(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _bool(value) -> bool:
+    if isinstance(value, CellError):
+        raise _ErrorResult(value)
+    if isinstance(value, bool):
+        return value
+    if value is None or value == "":
+        return False
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str) and value.upper() in ("TRUE", "FALSE"):
+        return value.upper() == "TRUE"
+    raise _ErrorResult(VALUE)
+
+
+def _scalar(value):
+    if isinstance(value, _Range):
+        raise _ErrorResult(VALUE)
+    return value
+
+
+def normalize(value):
+    """Final cell value: integral floats as ints, non-finite numbers as #NUM!"""
+    if isinstance(value, _Range):
+        return VALUE
+    if isinstance(value, float):
+        value = float(value)
+        if not math.isfinite(value):
+            return NUM
+        if value.is_integer() and abs(value) < 1e15:
+            return int(value)
+    if value is None:
+        return 0
+    return value
+
+
+# =============================================
+# Functions
+# =============================================
+
+def _round(number, digits=0):
+    number, digits = _number(number), int(_number(digits))
+    # Beyond these a float has no digits left to round; a float factor also
+    # keeps a huge digit count from computing an arbitrarily large 10 ** digits
+    if digits >= 15:
+        return number
+    if digits < -308:
+        return 0
+    factor = 10.0 ** digits
+    return math.copysign(math.floor(abs(number) * factor + 0.5) / factor, number)
+
+
+def _average(*args):
+    numbers = _number_array(args)
+    if not numbers.size:
+        raise _ErrorResult(DIV0)
+    return float(numbers.mean())
+
+
+def _mod(number, divisor):
+    number, divisor = _number(number), _number(divisor)
+    if divisor == 0:
+        raise _ErrorResult(DIV0)
+    return number % divisor
+
+
+def _sqrt(number):
+    number = _number(number)
+    if number < 0:
+        raise _ErrorResult(NUM)
+    return math.sqrt(number)
+
+
+def _reduce(reducer: Callable, empty=0):
+    def function(*args):
+        numbers = _number_array(args)
+        return float(reducer(numbers)) if numbers.size else empty
+    return function
+
+
+def _count(*args):
+    count = 0
+    for arg in args:
+        if isinstance(arg, _Range):
+            # Errors are skipped, not propagated
+            count += arg.numbers(strict=False).size
+        else:
+            count += isinstance(arg, (int, float)) and not isinstance(arg, bool)
+    return count
+
+
+def _counta(*args):
+    count = 0
+    for arg in args:
+        if isinstance(arg, _Range):
+            count += arg.count()
+        else:
+            count += arg is not None and arg != ""
+    return count
+
+
+def _logical(args) -> List[bool]:
+    flags = []
+    for arg in args:
+        if isinstance(arg, _Range):
+            flags.extend(value for value in arg if isinstance(value, bool))
+        else:
+            flags.append(_bool(arg))
+    if not flags:
+        raise _ErrorResult(VALUE)
+    return flags
+
+
+def _concat(*args):
+    return "".join(_text(value) for arg in args for value in (arg if isinstance(arg, _Range) else [arg]))
+
+
+FUNCTIONS: Dict[str, Callable] = {
+    "SUM": _reduce(np.sum),
+    "AVERAGE": _average,
+    "COUNT": _count,
+    "COUNTA": _counta,
+    "MIN": _reduce(np.min),
+    "MAX": _reduce(np.max),
+    "PRODUCT": _reduce(np.prod),
+    "ABS": lambda number: abs(_number(_scalar(number))),
+    "ROUND": lambda number, digits=0: _round(_scalar(number), _scalar(digits)),
+    "INT": lambda number: math.floor(_number(_scalar(number))),
+    "MOD": lambda number, divisor: _mod(_scalar(number), _scalar(divisor)),
+    "POWER": lambda base, exponent: _power(_number(_scalar(base)), _number(_scalar(exponent))),
+    "SQRT": lambda number: _sqrt(_scalar(number)),
+    "AND": lambda *args: all(_logical(args)),
+    "OR": lambda *args: any(_logical(args)),
+    "NOT": lambda value: not _bool(_scalar(value)),
+    "CONCAT": _concat,
+    "CONCATENATE": _concat,
+    "LEN": lambda value: len(_text(_scalar(value))),
+    "UPPER": lambda value: _text(_scalar(value)).upper(),
+    "LOWER": lambda value: _text(_scalar(value)).lower(),
+    "TRIM": lambda value: " ".join(_text(_scalar(value)).split()),
+}
+
+# Functions that decide which arguments to evaluate
+LAZY_FUNCTIONS = ("IF", "IFERROR")
+
+
+def _power(base, exponent):
+    if base == 0 and exponent < 0:
+        raise _ErrorResult(DIV0)
+    try:
+        # Float maths bounds the work: int ** int would compute arbitrarily large integers
+        result = float(base) ** exponent
+    except (OverflowError, ZeroDivisionError):
+        raise _ErrorResult(NUM)
+    if isinstance(result, complex) or not math.isfinite(result):
+        raise _ErrorResult(NUM)
+    return result
+
+
+def _compare(op: str, left, right) -> bool:
+    left, right = _scalar(left), _scalar(right)
+    for value in (left, right):
+        if isinstance(value, CellError):
+            raise _ErrorResult(value)
+
+    def rank(value):
+        if isinstance(value, bool):
+            return 2, value
+        if isinstance(value, (int, float)):
+            return 0, value
+        return 1, (value or "").lower()
+
+    if left is None:
+        left = 0 if isinstance(right, (int, float)) else ""
+    if right is None:
+        right = 0 if isinstance(left, (int, float)) else ""
+    left_key, right_key = rank(left), rank(right)
+    if op == "=":
+        return left_key == right_key
+    if op == "<>":
+        return left_key != right_key
+    if op == "<":
+        return left_key < right_key
+    if op == ">":
+        return left_key > right_key
+    if op == "<=":
+        return left_key <= right_key
+    return left_key >= right_key
+
+
+def _binary(op: str, left, right):
+    if op in ("=", "<>", "<", ">", "<=", ">="):
+        return _compare(op, left, right)
+    if op == "&":
+        return _text(_scalar(left)) + _text(_scalar(right))
+    left, right = _number(_scalar(left)), _number(_scalar(right))
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if op == "/":
+        if right == 0:
+            raise _ErrorResult(DIV0)
+        return left / right
+    return _power(left, right)
+
+
+# =============================================
+# Worksheet engine
+# =============================================
+
+class SheetEngine:
+    """Values, parsed formulas and the dependency graph of one worksheet"""
+
+    def __init__(self, cells: Optional[Dict[str, Any]] = None):
+        self.columns: Dict[int, _Column] = {}
+        self.formulas: Dict[Cell, Any] = {}
+        self.precedents: Dict[Cell, Tuple[Set[Cell], List[Span]]] = {}
+        self.cell_dependents: Dict[Cell, Set[Cell]] = defaultdict(set)
+        # column -> formula cell -> row spans of its ranges in that column
+        self.range_dependents: Dict[int, Dict[Cell, List[Tuple[int, int]]]] = defaultdict(dict)
+        for ref, data in (cells or {}).items():
+            cell = parse_cell_ref(ref)
+            if cell is None:
+                continue
+            if isinstance(data, dict):
+                value, formula = data.get("value"), data.get("formula")
+            else:
+                value, formula = data, None
+            self._store(cell, value)
+            ast = self._parse(formula)
+            if ast is not None:
+                self._register(cell, ast)
+
+    # -- values ---------------------------------------------------------
+
+    def _store(self, cell: Cell, value):
+        row, col = cell
+        column = self.columns.get(col)
+        if column is None:
+            if value is None or value == "":
+                return
+            column = self.columns[col] = _Column()
+        column.set(row, value)
+
+    def value(self, cell: Cell):
+        column = self.columns.get(cell[1])
+        return column.get(cell[0]) if column is not None else None
+
+    # -- graph ----------------------------------------------------------
+
+    @staticmethod
+    def _parse(formula):
+        if not formula or not isinstance(formula, str) or not formula.startswith("="):
+            return None
+        try:
+            return parse_formula(formula)
+        except UnsupportedFormula:
+            return None
+
+    def _register(self, cell: Cell, ast):
+        cells, spans = references(ast)
+        self.formulas[cell] = ast
+        self.precedents[cell] = (cells, spans)
+        for precedent in cells:
+            self.cell_dependents[precedent].add(cell)
+        for row1, col1, row2, col2 in spans:
+            for col in range(col1, col2 + 1):
+                self.range_dependents[col].setdefault(cell, []).append((row1, row2))
+
+    def _unregister(self, cell: Cell):
+        if self.formulas.pop(cell, None) is None:
+            return
+        cells, spans = self.precedents.pop(cell)
+        for precedent in cells:
+            dependents = self.cell_dependents.get(precedent)
+            if dependents is not None:
+                dependents.discard(cell)
+                if not dependents:
+                    del self.cell_dependents[precedent]
+        for _, col1, _, col2 in spans:
+            for col in range(col1, col2 + 1):
+                column = self.range_dependents.get(col)
+                if column is not None:
+                    column.pop(cell, None)
+                    if not column:
+                        del self.range_dependents[col]
+
+    def dependents(self, cell: Cell) -> Set[Cell]:
+        """Formula cells that read cell directly"""
+        row, col = cell
+        found = set(self.cell_dependents.get(cell, ()))
+        for dependent, spans in self.range_dependents.get(col, {}).items():
+            if any(row1 <= row <= row2 for row1, row2 in spans):
+                found.add(dependent)
+        return found
+
+    def _recalc_order(self, dirty: Iterable[Cell]) -> Tuple[List[Cell], List[Cell]]:
+        """Topological order of dirty cells and their dependents, plus cells left in or behind a cycle"""
+        edges: Dict[Cell, Set[Cell]] = {}
+        queue = deque(dirty)
+        while queue:
+            cell = queue.popleft()
+            if cell in edges:
+                continue
+            edges[cell] = self.dependents(cell)
+            queue.extend(dependent for dependent in edges[cell] if dependent not in edges)
+
+        indegree = dict.fromkeys(edges, 0)
+        for targets in edges.values():
+            for target in targets:
+                indegree[target] += 1
+        ready = deque(cell for cell, degree in indegree.items() if degree == 0)
+        order = []
+        while ready:
+            cell = ready.popleft()
+            order.append(cell)
+            for target in edges[cell]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+        cyclic = [cell for cell, degree in indegree.items() if degree > 0]
+        return order, cyclic
+
+    # -- evaluation -----------------------------------------------------
+
+    def _eval(self, node):
+        tag = node[0]
+        if tag == "lit":
+            return node[1]
+        if tag == "ref":
+            return self.value((node[1], node[2]))
+        if tag == "range":
+            return _Range(self, node[1:])
+        if tag == "bin":
+            return _binary(node[1], self._eval(node[2]), self._eval(node[3]))
+        if tag == "neg":
+            return -_number(_scalar(self._eval(node[1])))
+        if tag == "pct":
+            return _number(_scalar(self._eval(node[1]))) / 100
+        name, args = node[1], node[2]
+        if name == "IF":
+            if not 2 <= len(args) <= 3:
+                raise _ErrorResult(NA)
+            if _bool(_scalar(self._eval(args[0]))):
+                return self._eval(args[1])
+            return self._eval(args[2]) if len(args) == 3 else False
+        if name == "IFERROR":
+            if len(args) != 2:
+                raise _ErrorResult(NA)
+            try:
+                value = self._eval(args[0])
+            except _ErrorResult:
+                return self._eval(args[1])
+            return self._eval(args[1]) if isinstance(value, CellError) else value
+        try:
+            return FUNCTIONS[name](*[self._eval(arg) for arg in args])
+        except TypeError:
+            # Wrong number of arguments
+            raise _ErrorResult(NA)
+
+    def evaluate(self, cell: Cell):
+        try:
+            return normalize(self._eval(self.formulas[cell]))
+        except _ErrorResult as e:
+            return e.error
+        except (OverflowError, ValueError):
+            return NUM
+        except RecursionError:
+            return VALUE
+
+    def apply(self, updates: Iterable[Tuple[str, Any, Optional[str]]]) -> Dict[str, Any]:
+        """
+        Set cells from (ref, value, formula) tuples and recalculate what
+        depends on them. Returns {ref: value} for every edited or
+        recalculated cell.
+        """
+        dirty = []
+        for ref, value, formula in updates:
+            cell = parse_cell_ref(ref)
+            if cell is None:
+                continue
+            self._unregister(cell)
+            ast = self._parse(formula)
+            if ast is not None:
+                self._register(cell, ast)
+            else:
+                if formula and value is None:
+                    value = formula
+                self._store(cell, value)
+            dirty.append(cell)
+
+        order, cyclic = self._recalc_order(dirty)
+        for cell in order:
+            if cell in self.formulas:
+                self._store(cell, self.evaluate(cell))
+        for cell in cyclic:
+            self._store(cell, CYCLE)
+        return {cell_name(cell): self.value(cell) for cell in order + cyclic}
+
+
+# =============================================
+# Per-worksheet engine cache
+# =============================================
+
+class SheetEngineCache:
+    """
+    LRU of worksheet engines, valid while the worksheet version is unchanged.
+
+    Engines are mutated in place by apply(), so edits of one worksheet must
+    hold locked(worksheet_id) from lookup until the write commits (or the
+    entry is invalidated); otherwise a concurrent edit would compute with
+    values that may yet be rolled back.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, SheetEngine]]" = OrderedDict()
+        # Worksheet id -> [lock, holders and waiters]
+        self._locks: Dict[str, list] = {}
+        self.stats = {"hits": 0, "misses": 0, "build_ms": 0.0}
+
+    @asynccontextmanager
+    async def locked(self, key: str):
+        """Serialize edits of one worksheet on this worker"""
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+    def lookup(self, key: str, version: Any) -> Optional[SheetEngine]:
+        """Cached engine for key if it is still at version (callers can then skip loading the cells)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def build(self, key: str, version: Any, cells: Dict[str, Any]) -> SheetEngine:
+        self.stats["misses"] += 1
+        started = time.monotonic()
+        engine = SheetEngine(cells)
+        self.stats["build_ms"] += (time.monotonic() - started) * 1000
+        self.put(key, version, engine)
+        return engine
+
+    def get(self, key: str, version: Any, cells: Callable[[], Dict[str, Any]]) -> SheetEngine:
+        """Engine for key at version; cells() supplies the data when it has to be (re)built"""
+        engine = self.lookup(key, version)
+        if engine is None:
+            engine = self.build(key, version, cells())
+        return engine
+
+    def put(self, key: str, version: Any, engine: SheetEngine):
+        self._entries[key] = (version, engine)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "build_ms": round(self.stats["build_ms"], 1), "entries": len(self._entries)}
+
+
+# Singleton instance
+_engine_cache: Optional[SheetEngineCache] = None
+
+
+def get_sheet_engine_cache() -> SheetEngineCache:
+    global _engine_cache
+    if _engine_cache is None:
+        _engine_cache = SheetEngineCache(settings.SHEETS_ENGINE_CACHE_SIZE)
+    return _engine_cache
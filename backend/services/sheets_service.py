@@ -4,7 +4,7 @@ Bheem Sheets Service
 Business logic for spreadsheet operations.
 Handles CRUD, worksheets, cell updates, sharing, and formula evaluation.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Tuple
 from uuid import UUID
 from datetime import datetime
 import logging
@@ -12,7 +12,7 @@ import re
 import json
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, or_, func
+from sqlalchemy import select, update, delete, and_, or_, func, text
 from sqlalchemy.orm import selectinload
 
 from models.productivity_models import (
@@ -21,9 +21,122 @@ from models.productivity_models import (
     SpreadsheetShare,
     ProductivityTemplate
 )
+from core.config import settings
+from services.sheets_formula_engine import get_sheet_engine_cache
 
 logger = logging.getLogger(__name__)
 
+# Merges a {cell_ref: partial cell} patch into worksheets.data key by key, so
+# an edit writes only the cells it touched instead of re-serializing the sheet.
+# Recalculated cells send just their value and keep their stored formula/format.
+_CELL_MERGE = """
+    SELECT COALESCE(jsonb_object_agg(p.key, COALESCE({cells} -> p.key, CAST('{{}}' AS jsonb)) || p.value),
+                    CAST('{{}}' AS jsonb))
+    FROM jsonb_each(CAST(:patch AS jsonb)) p
+"""
+
+
+def build_cell_patch(edits: Dict[str, Dict[str, Any]], recalculated: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Changed cells only: full cell data for edits (formulas with their computed value), the new value for dependents"""
+    patch = {ref: {'value': value} for ref, value in recalculated.items()}
+    for ref, cell_data in edits.items():
+        value = recalculated.get(ref) if cell_data.get('formula') else cell_data.get('value')
+        patch[ref] = {**cell_data, 'value': value}
+    return patch
+
+
+async def patch_worksheet_cells(
+    db: AsyncSession,
+    worksheet_id: Any,
+    patch: Dict[str, Dict[str, Any]],
+    cells_key: Optional[str] = None
+) -> datetime:
+    """
+    Apply a cell patch to worksheets.data in the database and bump updated_at
+    (naive UTC, as the ORM writes it).
+
+    cells_key names the object holding the cells when they are nested
+    (e.g. {"cells": {...}, "row_heights": ...}); by default cells sit at the
+    top level of data. Returns the new updated_at. Does not commit.
+    """
+    if cells_key is None:
+        current = "w.data"
+    else:
+        current = f"(w.data -> '{cells_key}')"
+    merged = f"COALESCE({current}, CAST('{{}}' AS jsonb)) || ({_CELL_MERGE.format(cells=current)})"
+    if cells_key is not None:
+        merged = f"jsonb_set(COALESCE(w.data, CAST('{{}}' AS jsonb)), '{{{cells_key}}}', {merged})"
+
+    result = await db.execute(text(f"""
+        UPDATE workspace.worksheets w
+        SET data = {merged}, updated_at = :updated_at
+        WHERE w.id = CAST(:worksheet_id AS uuid)
+        RETURNING w.updated_at
+    """), {"worksheet_id": str(worksheet_id), "patch": json.dumps(patch), "updated_at": datetime.utcnow()})
+    return result.scalar()
+
+
+async def apply_cell_edits(
+    db: AsyncSession,
+    spreadsheet_id: Any,
+    worksheet_id: Any,
+    edits: Dict[str, Dict[str, Any]],
+    cells_key: Optional[str] = None,
+    before_commit: Optional[Callable[[], Awaitable[None]]] = None
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+    """
+    Recalculate and persist cell edits through the cached worksheet engine,
+    then commit.
+
+    The worksheet row is locked (FOR UPDATE) before its version is compared
+    with the cached engine, so edits from other workers are serialized and
+    an engine is never reused over a version it has not seen. before_commit
+    runs in the same transaction after the cells are written. Returns
+    (recalculated, patch), or None if the worksheet does not exist.
+    """
+    engine_cache = get_sheet_engine_cache()
+    engine_key = str(worksheet_id) if cells_key is None else f"{worksheet_id}:{cells_key}"
+    params = {"worksheet_id": str(worksheet_id), "spreadsheet_id": str(spreadsheet_id)}
+
+    # One edit of a worksheet at a time on this worker: the cached engine is updated in place
+    async with engine_cache.locked(engine_key):
+        try:
+            result = await db.execute(text("""
+                SELECT updated_at FROM workspace.worksheets
+                WHERE id = CAST(:worksheet_id AS uuid)
+                AND spreadsheet_id = CAST(:spreadsheet_id AS uuid)
+                FOR UPDATE
+            """), params)
+            version = result.scalar_one_or_none()
+            if version is None:
+                return None
+
+            # Cell data is only loaded when the cached engine is stale
+            engine = engine_cache.lookup(engine_key, version)
+            if engine is None:
+                cells = "data" if cells_key is None else f"data -> '{cells_key}'"
+                data = await db.execute(text(f"""
+                    SELECT {cells} FROM workspace.worksheets WHERE id = CAST(:worksheet_id AS uuid)
+                """), params)
+                engine = engine_cache.build(engine_key, version, data.scalar() or {})
+
+            # Recalculate the edited cells and everything that depends on them, then persist
+            # only the changed cells; a failure must not leave the cached engine ahead of the database
+            recalculated = engine.apply(
+                [(cell_ref, cell_data.get('value'), cell_data.get('formula')) for cell_ref, cell_data in edits.items()]
+            )
+            patch = build_cell_patch(edits, recalculated)
+            version = await patch_worksheet_cells(db, worksheet_id, patch, cells_key=cells_key)
+            if before_commit is not None:
+                await before_commit()
+            await db.commit()
+        except Exception:
+            engine_cache.invalidate(engine_key)
+            raise
+        engine_cache.put(engine_key, version, engine)
+
+    return recalculated, patch
+
 
 class SheetsService:
     """Service class for Bheem Sheets operations"""
@@ -476,165 +589,56 @@ class SheetsService:
         Update multiple cells in a worksheet.
 
         updates format: [{"cell": "A1", "value": "Hello", "formula": "=SUM(B1:B10)"}, ...]
+
+        Formulas are evaluated server-side and every cell that depends on an
+        edited cell is recalculated; their new values come back under
+        'recalculated' so clients can patch them in place.
         """
 
         spreadsheet = await self.get_spreadsheet(db, spreadsheet_id, user_id, include_worksheets=False)
         if not spreadsheet:
             return None
 
-        query = select(Worksheet).where(
-            and_(
-                Worksheet.id == worksheet_id,
-                Worksheet.spreadsheet_id == spreadsheet_id
-            )
-        )
-        result = await db.execute(query)
-        worksheet = result.scalar_one_or_none()
-
-        if not worksheet:
-            return None
-
-        # Get current data
-        data = dict(worksheet.data) if worksheet.data else {}
-
         # Process updates
-        results = {}
+        edits = {}
         for update in updates:
             cell_ref = update.get('cell', '').upper()
             if not self._is_valid_cell_ref(cell_ref):
                 continue
 
-            value = update.get('value')
-            formula = update.get('formula')
-            cell_format = update.get('format', {})
-
-            # Calculate formula if provided
-            calculated_value = value
-            if formula and formula.startswith('='):
-                calculated_value = self._evaluate_formula(formula, data)
-
-            # Store cell data
-            data[cell_ref] = {
-                'value': calculated_value,
-                'formula': formula,
-                'format': cell_format
+            # Formula values are filled in by the engine
+            edits[cell_ref] = {
+                'value': update.get('value'),
+                'formula': update.get('formula'),
+                'format': update.get('format', {})
             }
 
-            results[cell_ref] = {
-                'value': calculated_value,
-                'formula': formula
-            }
+        async def touch_spreadsheet():
+            spreadsheet.updated_at = datetime.utcnow()
 
-        # Update worksheet
-        worksheet.data = data
-        worksheet.updated_at = datetime.utcnow()
-        spreadsheet.updated_at = datetime.utcnow()
+        applied = await apply_cell_edits(
+            db, spreadsheet_id, worksheet_id, edits, before_commit=touch_spreadsheet
+        )
+        if applied is None:
+            return None
+        recalculated, patch = applied
 
-        await db.commit()
+        results = {
+            cell_ref: {'value': patch[cell_ref]['value'], 'formula': cell_data['formula']}
+            for cell_ref, cell_data in edits.items()
+        }
 
         return {
             'updated_cells': len(results),
-            'cells': results
+            'cells': results,
+            'recalculated': {ref: value for ref, value in recalculated.items() if ref not in results}
         }
 
     def _is_valid_cell_ref(self, cell_ref: str) -> bool:
         """Validate cell reference format (e.g., A1, BC123)"""
-        pattern = r'^[A-Z]{1,3}[1-9][0-9]*$'
-        return bool(re.match(pattern, cell_ref))
-
-    def _evaluate_formula(self, formula: str, data: Dict[str, Any]) -> Any:
-        """
-        Basic formula evaluation.
-        Supports: SUM, AVERAGE, COUNT, MIN, MAX, basic arithmetic
-        """
-        if not formula or not formula.startswith('='):
-            return formula
-
-        formula_body = formula[1:].strip().upper()
-
-        try:
-            # Handle SUM function
-            sum_match = re.match(r'SUM\(([A-Z]+\d+):([A-Z]+\d+)\)', formula_body)
-            if sum_match:
-                values = self._get_range_values(sum_match.group(1), sum_match.group(2), data)
-                return sum(v for v in values if isinstance(v, (int, float)))
-
-            # Handle AVERAGE function
-            avg_match = re.match(r'AVERAGE\(([A-Z]+\d+):([A-Z]+\d+)\)', formula_body)
-            if avg_match:
-                values = self._get_range_values(avg_match.group(1), avg_match.group(2), data)
-                numeric = [v for v in values if isinstance(v, (int, float))]
-                return sum(numeric) / len(numeric) if numeric else 0
-
-            # Handle COUNT function
-            count_match = re.match(r'COUNT\(([A-Z]+\d+):([A-Z]+\d+)\)', formula_body)
-            if count_match:
-                values = self._get_range_values(count_match.group(1), count_match.group(2), data)
-                return len([v for v in values if v is not None and v != ''])
-
-            # Handle MIN function
-            min_match = re.match(r'MIN\(([A-Z]+\d+):([A-Z]+\d+)\)', formula_body)
-            if min_match:
-                values = self._get_range_values(min_match.group(1), min_match.group(2), data)
-                numeric = [v for v in values if isinstance(v, (int, float))]
-                return min(numeric) if numeric else 0
-
-            # Handle MAX function
-            max_match = re.match(r'MAX\(([A-Z]+\d+):([A-Z]+\d+)\)', formula_body)
-            if max_match:
-                values = self._get_range_values(max_match.group(1), max_match.group(2), data)
-                numeric = [v for v in values if isinstance(v, (int, float))]
-                return max(numeric) if numeric else 0
-
-            # For simple cell references or arithmetic, return the formula as-is for now
-            return formula
-
-        except Exception as e:
-            logger.warning(f"Formula evaluation error: {e}")
-            return f"#ERROR: {str(e)}"
-
-    def _get_range_values(self, start_ref: str, end_ref: str, data: Dict[str, Any]) -> List[Any]:
-        """Get all values in a cell range"""
-        values = []
-
-        start_col = re.match(r'([A-Z]+)', start_ref).group(1)
-        start_row = int(re.match(r'[A-Z]+(\d+)', start_ref).group(1))
-        end_col = re.match(r'([A-Z]+)', end_ref).group(1)
-        end_row = int(re.match(r'[A-Z]+(\d+)', end_ref).group(1))
-
-        # Convert column letters to numbers
-        def col_to_num(col: str) -> int:
-            num = 0
-            for c in col:
-                num = num * 26 + (ord(c) - ord('A') + 1)
-            return num
-
-        def num_to_col(num: int) -> str:
-            result = ''
-            while num > 0:
-                num -= 1
-                result = chr(num % 26 + ord('A')) + result
-                num //= 26
-            return result
-
-        start_col_num = col_to_num(start_col)
-        end_col_num = col_to_num(end_col)
-
-        for row in range(start_row, end_row + 1):
-            for col_num in range(start_col_num, end_col_num + 1):
-                col = num_to_col(col_num)
-                cell_ref = f"{col}{row}"
-                cell_data = data.get(cell_ref, {})
-                value = cell_data.get('value') if isinstance(cell_data, dict) else cell_data
-                if value is not None:
-                    # Try to convert to number
-                    try:
-                        value = float(value) if '.' in str(value) else int(value)
-                    except (ValueError, TypeError):
-                        pass
-                    values.append(value)
-
-        return values
+        pattern = r'^[A-Z]{1,3}([1-9][0-9]*)$'
+        match = re.match(pattern, cell_ref)
+        return bool(match) and int(match.group(1)) <= settings.SHEETS_MAX_ROWS
 
     # =============================================
     # Sharing
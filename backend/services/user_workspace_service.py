@@ -182,7 +182,7 @@ class UserWorkspaceService:
         limit: int = 50
     ) -> List[Dict]:
         """Get user's email inbox"""
-        return mailcow_service.get_inbox(email, password, folder, limit)
+        return await mailcow_service.get_inbox(email, password, folder, limit)
 
     async def get_user_email(
         self,
@@ -192,7 +192,7 @@ class UserWorkspaceService:
         folder: str = "INBOX"
     ) -> Optional[Dict]:
         """Get a specific email"""
-        return mailcow_service.get_email(email, password, message_id, folder)
+        return await mailcow_service.get_email(email, password, message_id, folder)
 
     async def send_user_email(
         self,
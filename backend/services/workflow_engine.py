@@ -0,0 +1,313 @@
+"""
+Bheem Workspace - Workflow Engine
+=================================
+Background execution of workflow runs.
+
+Triggers only insert a 'queued' WorkflowRun and return. Every process runs
+a dispatcher that claims due runs from the workflow_runs table and
+executes them on a bounded pool of worker tasks:
+
+- claiming is serialized with a transaction-scoped advisory lock, so the
+  per-tenant and per-workflow concurrency limits hold across processes;
+  claimed runs get a lease that is extended on every step, and runs whose
+  lease expired (their worker died) are claimed again
+- failed steps are retried with exponential backoff (WorkflowService.
+  handle_run_failure); completed steps are not repeated
+- delay actions park the run as 'waiting' with next_run_at set, so a long
+  delay holds neither a worker nor a connection
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, text, update
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.workflow_models import Workflow, WorkflowRun
+from services.workflow_service import WorkflowService
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key of the advisory lock taken while claiming runs
+CLAIM_LOCK_KEY = 0x5746_4C57
+# Due runs read per free worker, so runs of tenants at their limit can be skipped
+CANDIDATES_PER_SLOT = 4
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+def pick_runs(
+    candidates: Sequence[Any],
+    running: Iterable[Any],
+    limit: int,
+    tenant_limit: int,
+    workflow_limit: int
+) -> List[Any]:
+    """
+    Choose up to `limit` due runs (oldest first) without exceeding the
+    concurrency limits, given the (tenant_id, workflow_id, count) rows of
+    runs already executing.
+    """
+    per_tenant: Counter = Counter()
+    per_workflow: Counter = Counter()
+    for tenant_id, workflow_id, count in running:
+        per_tenant[tenant_id] += count
+        per_workflow[workflow_id] += count
+
+    picked = []
+    for run in candidates:
+        if len(picked) >= limit:
+            break
+        if per_tenant[run.tenant_id] >= tenant_limit or per_workflow[run.workflow_id] >= workflow_limit:
+            continue
+        per_tenant[run.tenant_id] += 1
+        per_workflow[run.workflow_id] += 1
+        picked.append(run)
+    return picked
+
+
+class WorkflowEngine:
+    """Dispatcher plus worker pool executing queued workflow runs"""
+
+    def __init__(
+        self,
+        workers: int,
+        tenant_limit: int,
+        workflow_limit: int,
+        poll_interval: float,
+        lease_seconds: int,
+        session_factory=None
+    ):
+        self.workers = workers
+        self.tenant_limit = tenant_limit
+        self.workflow_limit = workflow_limit
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._active: Dict[UUID, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._finished: Deque[float] = deque()
+        self._started_at = time.monotonic()
+        self.stats = {
+            "claimed": 0, "completed": 0, "failed": 0, "retries": 0, "waiting": 0,
+            "claim_errors": 0, "worker_errors": 0, "last_claim_lag_ms": 0.0, "max_claim_lag_ms": 0.0
+        }
+
+    # =============================================
+    # Lifecycle
+    # =============================================
+
+    def start(self):
+        """Start the dispatcher on the running event loop"""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._started_at = time.monotonic()
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch_loop())
+
+    def notify(self):
+        """New runs were queued; look for work now instead of at the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self, grace_seconds: float = 10.0):
+        """Stop claiming, let running steps finish briefly, then hand the rest back to the queue"""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._dispatcher = None
+
+        tasks = list(self._active.values())
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=grace_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    # =============================================
+    # Dispatching
+    # =============================================
+
+    async def _dispatch_loop(self):
+        error_backoff = self.poll_interval
+        while True:
+            self._wakeup.clear()
+            free = self.workers - len(self._active)
+            claimed: List[UUID] = []
+            if free > 0:
+                try:
+                    claimed = await self._claim(free)
+                    error_backoff = self.poll_interval
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats["claim_errors"] += 1
+                    logger.warning(f"Workflow engine could not claim runs, retrying in {error_backoff:.0f}s: {e}")
+                    await asyncio.sleep(error_backoff)
+                    error_backoff = min(error_backoff * 2, 60)
+                    continue
+
+            for run_id in claimed:
+                task = asyncio.get_running_loop().create_task(self._process(run_id))
+                self._active[run_id] = task
+                task.add_done_callback(lambda _, run_id=run_id: self._done(run_id))
+
+            if claimed and len(claimed) == free:
+                continue  # Every slot filled; more runs may be due
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _done(self, run_id: UUID):
+        self._active.pop(run_id, None)
+        self.notify()
+
+    async def _claim(self, limit: int) -> List[UUID]:
+        """Lock due runs, pick those within the concurrency limits and lease them to this worker"""
+        now = datetime.utcnow()
+        async with self._session_factory() as db:
+            await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY})
+
+            running = await db.execute(
+                select(WorkflowRun.tenant_id, WorkflowRun.workflow_id, func.count())
+                .where(WorkflowRun.status == 'running', WorkflowRun.locked_until > now)
+                .group_by(WorkflowRun.tenant_id, WorkflowRun.workflow_id)
+            )
+            candidates = await db.execute(
+                select(WorkflowRun.id, WorkflowRun.tenant_id, WorkflowRun.workflow_id, WorkflowRun.next_run_at)
+                .where(or_(
+                    and_(WorkflowRun.status.in_(('queued', 'waiting')), WorkflowRun.next_run_at <= now),
+                    and_(WorkflowRun.status == 'running', WorkflowRun.locked_until <= now)
+                ))
+                .order_by(WorkflowRun.next_run_at)
+                .limit(limit * CANDIDATES_PER_SLOT)
+                .with_for_update(skip_locked=True)
+            )
+            picked = pick_runs(candidates.all(), running.all(), limit, self.tenant_limit, self.workflow_limit)
+
+            if picked:
+                await db.execute(
+                    update(WorkflowRun)
+                    .where(WorkflowRun.id.in_([run.id for run in picked]))
+                    .values(
+                        status='running',
+                        locked_by=self.node_id,
+                        locked_until=now + timedelta(seconds=self.lease_seconds)
+                    )
+                )
+            await db.commit()
+
+        if picked:
+            self.stats["claimed"] += len(picked)
+            lag_ms = max((now - (run.next_run_at or now)).total_seconds() * 1000 for run in picked)
+            self.stats["last_claim_lag_ms"] = round(lag_ms, 2)
+            self.stats["max_claim_lag_ms"] = round(max(self.stats["max_claim_lag_ms"], lag_ms), 2)
+        return [run.id for run in picked]
+
+    # =============================================
+    # Execution
+    # =============================================
+
+    async def _process(self, run_id: UUID):
+        try:
+            status = await self._execute(run_id)
+        except asyncio.CancelledError:
+            await asyncio.shield(self._release(run_id))
+            raise
+        except Exception as e:
+            # The run keeps its lease and is claimed again once it expires
+            self.stats["worker_errors"] += 1
+            logger.error(f"Workflow run {run_id} could not be processed: {e}")
+            return
+
+        if status == 'completed':
+            self.stats["completed"] += 1
+        elif status == 'failed':
+            self.stats["failed"] += 1
+        elif status == 'queued':
+            self.stats["retries"] += 1
+        elif status == 'waiting':
+            self.stats["waiting"] += 1
+        if status in ('completed', 'failed'):
+            self._finished.append(time.monotonic())
+
+    async def _execute(self, run_id: UUID) -> Optional[str]:
+        async with self._session_factory() as db:
+            run = await db.get(WorkflowRun, run_id)
+            if run is None or run.locked_by != self.node_id or run.status != 'running':
+                return None  # Deleted with its workflow, or the lease went to another worker
+            workflow = await db.get(Workflow, run.workflow_id)
+            if workflow is None:
+                return None
+
+            service = WorkflowService(db)
+            try:
+                return await service.execute_run(workflow, run)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return await service.handle_run_failure(run, str(e) or type(e).__name__)
+
+    async def _release(self, run_id: UUID):
+        """Put an interrupted run back in the queue; its current step runs again"""
+        try:
+            async with self._session_factory() as db:
+                await db.execute(
+                    update(WorkflowRun)
+                    .where(
+                        WorkflowRun.id == run_id,
+                        WorkflowRun.locked_by == self.node_id,
+                        WorkflowRun.status == 'running'
+                    )
+                    .values(status='queued', next_run_at=datetime.utcnow(), locked_by=None, locked_until=None)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Could not release workflow run {run_id}; it resumes when its lease expires: {e}")
+
+    # =============================================
+    # Stats
+    # =============================================
+
+    def runs_per_second(self) -> float:
+        """Finished runs per second over the last minute"""
+        now = time.monotonic()
+        while self._finished and self._finished[0] < now - THROUGHPUT_WINDOW_SECONDS:
+            self._finished.popleft()
+        window = min(THROUGHPUT_WINDOW_SECONDS, max(now - self._started_at, 1.0))
+        return round(len(self._finished) / window, 3)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "node": self.node_id,
+            "running": self._dispatcher is not None and not self._dispatcher.done(),
+            "active": len(self._active),
+            "workers": self.workers,
+            "tenant_limit": self.tenant_limit,
+            "workflow_limit": self.workflow_limit,
+            "runs_per_sec": self.runs_per_second()
+        }
+
+
+# Singleton instance
+workflow_engine = WorkflowEngine(
+    workers=settings.WORKFLOW_WORKERS,
+    tenant_limit=settings.WORKFLOW_TENANT_CONCURRENCY,
+    workflow_limit=settings.WORKFLOW_CONCURRENCY_PER_WORKFLOW,
+    poll_interval=settings.WORKFLOW_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.WORKFLOW_LEASE_SECONDS
+)
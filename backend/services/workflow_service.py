@@ -2,19 +2,34 @@
 Bheem Workspace - Workflow Automation Service
 Business logic for Bheem Flows - workflow automation engine
 """
+import asyncio
+import random
 from typing import Optional, List, Dict, Any
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, and_, or_, func
 from sqlalchemy.orm import selectinload
 
+from core.config import settings
 from models.workflow_models import (
     Workflow, WorkflowRun, WorkflowTemplate,
     WORKFLOW_TRIGGERS, WORKFLOW_ACTIONS
 )
 
 
+def retry_delay(attempt: int) -> float:
+    """Seconds before retry number `attempt` (exponential backoff with jitter)"""
+    delay = settings.WORKFLOW_RETRY_BASE_SECONDS * (2 ** (attempt - 1))
+    return min(delay, settings.WORKFLOW_RETRY_MAX_SECONDS) * random.uniform(0.8, 1.2)
+
+
+def _notify_engine():
+    """Wake this process's workers so a new run starts without waiting for the next poll"""
+    from services.workflow_engine import workflow_engine
+    workflow_engine.notify()
+
+
 class WorkflowService:
     """Service for managing automated workflows"""
 
@@ -173,98 +188,173 @@ class WorkflowService:
         tenant_id: UUID,
         trigger_data: Dict[str, Any]
     ) -> Optional[WorkflowRun]:
-        """Trigger a workflow execution"""
-        workflow = await self.get_workflow(workflow_id, tenant_id)
+        """Queue a workflow run; the workflow engine executes it in the background"""
+        result = await self.db.execute(
+            select(Workflow).where(
+                Workflow.id == workflow_id,
+                Workflow.tenant_id == tenant_id
+            )
+        )
+        workflow = result.scalar_one_or_none()
         if not workflow or not workflow.is_enabled:
             return None
 
-        # Create workflow run
-        run = WorkflowRun(
-            workflow_id=workflow_id,
-            status='running',
-            trigger_data=trigger_data,
-            execution_log=[]
-        )
-
+        run = self._new_run(workflow, trigger_data)
         self.db.add(run)
         await self.db.commit()
-        await self.db.refresh(run)
-
-        # Execute workflow asynchronously
-        # In production, this would be queued for background execution
-        await self._execute_workflow(workflow, run, trigger_data)
-
+        _notify_engine()
         return run
 
-    async def _execute_workflow(
+    def _new_run(self, workflow: Workflow, trigger_data: Dict[str, Any]) -> WorkflowRun:
+        now = datetime.utcnow()
+        return WorkflowRun(
+            workflow_id=workflow.id,
+            tenant_id=workflow.tenant_id,
+            status='queued',
+            trigger_data=trigger_data,
+            execution_log=[],
+            context={'trigger': trigger_data},
+            current_step=0,
+            attempts=0,
+            max_attempts=settings.WORKFLOW_MAX_ATTEMPTS,
+            started_at=now,
+            next_run_at=now
+        )
+
+    async def execute_run(
         self,
         workflow: Workflow,
-        run: WorkflowRun,
-        trigger_data: Dict[str, Any]
-    ):
-        """Execute workflow actions"""
-        execution_log = []
-        context = {'trigger': trigger_data}
-
-        try:
-            # Check conditions
-            if workflow.conditions:
-                if not self._evaluate_conditions(workflow.conditions, context):
-                    execution_log.append({
-                        'step': 'conditions',
-                        'status': 'skipped',
-                        'message': 'Conditions not met'
-                    })
-                    run.status = 'completed'
-                    run.execution_log = execution_log
-                    run.completed_at = datetime.utcnow()
-                    await self.db.commit()
-                    return
-
-            # Execute each action
-            for i, action in enumerate(workflow.actions):
-                action_type = action.get('type')
-                action_config = action.get('config', {})
-
+        run: WorkflowRun
+    ) -> str:
+        """
+        Execute a claimed run from its current step and return its new status.
+
+        Progress is committed after every action, so a retry (or a run picked
+        up after a worker died) continues at the step that did not finish.
+        A delay action parks the run as 'waiting' until it is due instead of
+        sleeping. Action errors are recorded on the run and re-raised for
+        handle_run_failure.
+        """
+        execution_log = list(run.execution_log or [])
+        context = dict(run.context or {'trigger': run.trigger_data or {}})
+        if not execution_log:
+            run.started_at = datetime.utcnow()
+
+        # Check conditions
+        if not run.current_step and workflow.conditions:
+            if not self._evaluate_conditions(workflow.conditions, context):
                 execution_log.append({
-                    'step': i + 1,
-                    'action': action_type,
-                    'status': 'started',
-                    'started_at': datetime.utcnow().isoformat()
+                    'step': 'conditions',
+                    'status': 'skipped',
+                    'message': 'Conditions not met'
                 })
+                run.execution_log = execution_log
+                return await self._finish_run(run, 'completed')
+
+        # Execute each remaining action
+        actions = workflow.actions or []
+        for i in range(run.current_step or 0, len(actions)):
+            action_type = actions[i].get('type')
+            action_config = actions[i].get('config', {})
+
+            entry = {
+                'step': i + 1,
+                'action': action_type,
+                'status': 'started',
+                'started_at': datetime.utcnow().isoformat()
+            }
+            execution_log.append(entry)
+
+            if action_type == 'delay':
+                result = await self._action_delay(self._resolve_variables(action_config, context))
+                entry['result'] = result
+                context[f'action_{i}'] = result
+                if result['delayed_seconds'] > 0:
+                    resume_at = datetime.utcnow() + timedelta(seconds=result['delayed_seconds'])
+                    entry['status'] = 'scheduled'
+                    entry['resume_at'] = resume_at.isoformat()
+                    self._checkpoint(run, i + 1, context, execution_log)
+                    run.status = 'waiting'
+                    run.next_run_at = resume_at
+                    run.locked_by = None
+                    run.locked_until = None
+                    await self.db.commit()
+                    return run.status
+                entry['status'] = 'completed'
+                continue
 
-                try:
-                    result = await self._execute_action(
-                        action_type, action_config, context
-                    )
-                    execution_log[-1]['status'] = 'completed'
-                    execution_log[-1]['result'] = result
-                    context[f'action_{i}'] = result
-                except Exception as e:
-                    execution_log[-1]['status'] = 'failed'
-                    execution_log[-1]['error'] = str(e)
-                    raise
-
-            # Update run status
-            run.status = 'completed'
-            run.execution_log = execution_log
-            run.completed_at = datetime.utcnow()
-            run.duration_ms = int(
-                (run.completed_at - run.started_at).total_seconds() * 1000
-            )
-
-            # Update workflow stats
-            workflow.run_count += 1
-            workflow.last_run_at = datetime.utcnow()
-
-        except Exception as e:
-            run.status = 'failed'
-            run.error = str(e)
-            run.execution_log = execution_log
-            run.completed_at = datetime.utcnow()
-            workflow.last_error = str(e)
+            try:
+                result = await asyncio.wait_for(
+                    self._execute_action(action_type, action_config, context),
+                    settings.WORKFLOW_STEP_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                entry['status'] = 'failed'
+                entry['error'] = str(e) or type(e).__name__
+                run.execution_log = execution_log
+                raise
+
+            entry['status'] = 'completed'
+            entry['result'] = result
+            context[f'action_{i}'] = result
+            self._checkpoint(run, i + 1, context, execution_log)
+            await self.db.commit()
+
+        run.execution_log = execution_log
+        await self.db.execute(
+            update(Workflow)
+            .where(Workflow.id == workflow.id)
+            .values(run_count=func.coalesce(Workflow.run_count, 0) + 1, last_run_at=datetime.utcnow())
+        )
+        return await self._finish_run(run, 'completed')
 
+    def _checkpoint(
+        self,
+        run: WorkflowRun,
+        next_step: int,
+        context: Dict[str, Any],
+        execution_log: List[Dict]
+    ):
+        """Record progress on the run and extend the worker's lease"""
+        run.current_step = next_step
+        run.context = dict(context)
+        run.execution_log = list(execution_log)
+        if run.locked_by:
+            run.locked_until = datetime.utcnow() + timedelta(seconds=settings.WORKFLOW_LEASE_SECONDS)
+
+    async def handle_run_failure(
+        self,
+        run: WorkflowRun,
+        error: str
+    ) -> str:
+        """Retry the failed step after a backoff, or fail the run once its attempts are used up"""
+        run.attempts = (run.attempts or 0) + 1
+        run.error = error
+        if run.attempts < (run.max_attempts or 1):
+            run.status = 'queued'
+            run.next_run_at = datetime.utcnow() + timedelta(seconds=retry_delay(run.attempts))
+            run.locked_by = None
+            run.locked_until = None
+            await self.db.commit()
+            return run.status
+
+        await self.db.execute(
+            update(Workflow)
+            .where(Workflow.id == run.workflow_id)
+            .values(last_error=error)
+        )
+        return await self._finish_run(run, 'failed')
+
+    async def _finish_run(self, run: WorkflowRun, status: str) -> str:
+        run.status = status
+        run.completed_at = datetime.utcnow()
+        if run.started_at:
+            run.duration_ms = int((run.completed_at - run.started_at).total_seconds() * 1000)
+        run.next_run_at = None
+        run.locked_by = None
+        run.locked_until = None
         await self.db.commit()
+        return status
 
     def _evaluate_conditions(
         self,
@@ -370,7 +460,8 @@ class WorkflowService:
         headers = config.get('headers', {})
         body = config.get('body')
 
-        async with aiohttp.ClientSession() as session:
+        timeout = aiohttp.ClientTimeout(total=settings.WORKFLOW_STEP_TIMEOUT_SECONDS)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
             async with session.request(
                 method, url, headers=headers, data=body
             ) as response:
@@ -380,11 +471,9 @@ class WorkflowService:
                 }
 
     async def _action_delay(self, config: Dict) -> Dict:
-        """Execute delay action"""
-        import asyncio
-        duration = config.get('duration_seconds', 0)
-        await asyncio.sleep(duration)
-        return {'delayed_seconds': duration}
+        """Execute delay action (execute_run schedules the wait rather than sleeping)"""
+        duration = float(config.get('duration_seconds') or 0)
+        return {'delayed_seconds': max(duration, 0)}
 
     # =============================================
     # Workflow Runs
@@ -560,21 +649,19 @@ class WorkflowService:
         trigger_type: str,
         trigger_data: Dict[str, Any]
     ) -> List[WorkflowRun]:
-        """Process a trigger event and execute matching workflows"""
+        """Process a trigger event and queue runs of matching workflows"""
         workflows = await self.find_workflows_for_trigger(tenant_id, trigger_type)
-        runs = []
-
-        for workflow in workflows:
+        runs = [
+            self._new_run(workflow, trigger_data)
+            for workflow in workflows
             # Check if trigger config matches
-            if self._matches_trigger_config(
-                workflow.trigger_config, trigger_data
-            ):
-                run = await self.trigger_workflow(
-                    workflow.id, tenant_id, trigger_data
-                )
-                if run:
-                    runs.append(run)
+            if self._matches_trigger_config(workflow.trigger_config, trigger_data)
+        ]
 
+        if runs:
+            self.db.add_all(runs)
+            await self.db.commit()
+            _notify_engine()
         return runs
 
     def _matches_trigger_config(
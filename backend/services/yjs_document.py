@@ -0,0 +1,632 @@
+"""
+Bheem Docs - Server-side Yjs Document
+=====================================
+Pure-Python engine for the Yjs v1 update format, used by collaboration rooms.
+
+The server never renders the document, so it does not integrate updates into
+a full Y.Doc. It works on the encoded structs instead, like Yjs' own
+``mergeUpdates`` / ``diffUpdate`` helpers:
+
+- merge: union of all structs per client, deduplicated by clock range, with
+  consecutive insertions coalesced into a single item
+- state vector: how far each client's structs are known without gaps
+- diff: only the structs a peer's state vector does not cover
+- gc: content of fully deleted items is replaced by a deleted-length marker,
+  as Yjs does with garbage collection enabled
+
+Binary layout reference: yjs/src/utils/UpdateEncoder.js (v1) and lib0 encoding.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Struct / content type refs (low 5 bits of the info byte)
+REF_GC = 0
+REF_DELETED = 1
+REF_JSON = 2
+REF_BINARY = 3
+REF_STRING = 4
+REF_EMBED = 5
+REF_FORMAT = 6
+REF_TYPE = 7
+REF_ANY = 8
+REF_DOC = 9
+REF_SKIP = 10
+
+# Info byte flags
+HAS_ORIGIN = 0x80
+HAS_RIGHT_ORIGIN = 0x40
+HAS_PARENT_SUB = 0x20
+
+# Contents whose adjacent items can be concatenated
+MERGEABLE_REFS = {REF_DELETED, REF_JSON, REF_STRING, REF_ANY}
+# Contents dropped once their item is deleted (types keep their children addressable)
+COLLECTABLE_REFS = {REF_JSON, REF_BINARY, REF_STRING, REF_EMBED, REF_FORMAT, REF_ANY}
+
+# YXmlElement and YXmlHook carry a node name after the type ref
+NAMED_TYPE_REFS = {3, 5}
+
+EMPTY_UPDATE = b"\x00\x00"
+
+ID = Tuple[int, int]
+DeleteSet = Dict[int, List[Tuple[int, int]]]
+
+
+class YjsDecodeError(ValueError):
+    """Raised when bytes are not a valid Yjs v1 update or state vector"""
+
+
+# =============================================
+# lib0 encoding
+# =============================================
+
+class _Decoder:
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf: bytes):
+        self.buf = buf
+        self.pos = 0
+
+    def read_uint8(self) -> int:
+        if self.pos >= len(self.buf):
+            raise YjsDecodeError("Unexpected end of data")
+        value = self.buf[self.pos]
+        self.pos += 1
+        return value
+
+    def read_var_uint(self) -> int:
+        num = 0
+        shift = 0
+        while True:
+            byte = self.read_uint8()
+            num |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return num
+            shift += 7
+            if shift > 63:
+                raise YjsDecodeError("Integer out of range")
+
+    def read_bytes(self, length: int) -> bytes:
+        end = self.pos + length
+        if end > len(self.buf):
+            raise YjsDecodeError("Unexpected end of data")
+        data = self.buf[self.pos:end]
+        self.pos = end
+        return data
+
+    def read_var_bytes(self) -> bytes:
+        return self.read_bytes(self.read_var_uint())
+
+    def read_var_string(self) -> str:
+        try:
+            return self.read_var_bytes().decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise YjsDecodeError(f"Invalid string: {e}") from e
+
+    def read_id(self) -> ID:
+        return self.read_var_uint(), self.read_var_uint()
+
+    def skip_var_int(self):
+        while self.read_uint8() & 0x80:
+            pass
+
+    def skip_any(self):
+        tag = self.read_uint8()
+        if tag in (127, 126, 121, 120):  # undefined, null, false, true
+            return
+        if tag == 125:  # integer
+            self.skip_var_int()
+        elif tag == 124:  # float32
+            self.read_bytes(4)
+        elif tag in (123, 122):  # float64, bigint64
+            self.read_bytes(8)
+        elif tag in (119, 116):  # string, Uint8Array
+            self.read_var_bytes()
+        elif tag == 118:  # object
+            for _ in range(self.read_var_uint()):
+                self.read_var_bytes()
+                self.skip_any()
+        elif tag == 117:  # array
+            for _ in range(self.read_var_uint()):
+                self.skip_any()
+        else:
+            raise YjsDecodeError(f"Unknown value type {tag}")
+
+    def read_raw(self, skip) -> bytes:
+        """Bytes consumed by ``skip``, kept verbatim for re-encoding"""
+        start = self.pos
+        skip()
+        return self.buf[start:self.pos]
+
+
+def _write_var_uint(out: bytearray, num: int):
+    while num > 0x7F:
+        out.append(0x80 | (num & 0x7F))
+        num >>= 7
+    out.append(num)
+
+
+def _write_var_bytes(out: bytearray, data: bytes):
+    _write_var_uint(out, len(data))
+    out += data
+
+
+# =============================================
+# Structs
+# =============================================
+
+def _utf16_length(text: str) -> int:
+    return len(text) + sum(1 for ch in text if ord(ch) > 0xFFFF)
+
+
+def _split_utf16(text: str, offset: int) -> Tuple[str, str]:
+    """Split at a UTF-16 offset; a split surrogate pair becomes U+FFFD on both sides, as in Yjs"""
+    units = 0
+    for index, ch in enumerate(text):
+        if units == offset:
+            return text[:index], text[index:]
+        units += 2 if ord(ch) > 0xFFFF else 1
+        if units > offset:
+            return text[:index] + "�", "�" + text[index + 1:]
+    return text, ""
+
+
+@dataclass
+class _Content:
+    """Item content; ``data`` is str (string), list of raw elements (JSON/any), raw bytes or None"""
+    ref: int
+    length: int
+    data: Any = None
+
+    def split(self, offset: int) -> Tuple["_Content", "_Content"]:
+        if self.ref == REF_DELETED:
+            return _Content(REF_DELETED, offset), _Content(REF_DELETED, self.length - offset)
+        if self.ref == REF_STRING:
+            left, right = _split_utf16(self.data, offset)
+            return _Content(REF_STRING, offset, left), _Content(REF_STRING, self.length - offset, right)
+        if self.ref in (REF_JSON, REF_ANY):
+            return (
+                _Content(self.ref, offset, self.data[:offset]),
+                _Content(self.ref, self.length - offset, self.data[offset:])
+            )
+        raise YjsDecodeError(f"Content type {self.ref} cannot be split")
+
+    def write(self, out: bytearray):
+        if self.ref == REF_DELETED:
+            _write_var_uint(out, self.length)
+        elif self.ref == REF_STRING:
+            _write_var_bytes(out, self.data.encode("utf-8"))
+        elif self.ref in (REF_JSON, REF_ANY):
+            _write_var_uint(out, len(self.data))
+            for element in self.data:
+                out += element
+        else:
+            out += self.data
+
+
+def _read_content(decoder: _Decoder, ref: int) -> _Content:
+    if ref == REF_DELETED:
+        return _Content(REF_DELETED, decoder.read_var_uint())
+    if ref == REF_STRING:
+        text = decoder.read_var_string()
+        return _Content(REF_STRING, _utf16_length(text), text)
+    if ref == REF_JSON:
+        elements = [decoder.read_raw(decoder.read_var_bytes) for _ in range(decoder.read_var_uint())]
+        return _Content(REF_JSON, len(elements), elements)
+    if ref == REF_ANY:
+        elements = [decoder.read_raw(decoder.skip_any) for _ in range(decoder.read_var_uint())]
+        return _Content(REF_ANY, len(elements), elements)
+    if ref in (REF_BINARY, REF_EMBED):
+        return _Content(ref, 1, decoder.read_raw(decoder.read_var_bytes))
+    if ref == REF_FORMAT:
+        def skip_format():
+            decoder.read_var_bytes()
+            decoder.read_var_bytes()
+        return _Content(ref, 1, decoder.read_raw(skip_format))
+    if ref == REF_TYPE:
+        def skip_type():
+            if decoder.read_var_uint() in NAMED_TYPE_REFS:
+                decoder.read_var_bytes()
+        return _Content(ref, 1, decoder.read_raw(skip_type))
+    if ref == REF_DOC:
+        def skip_doc():
+            decoder.read_var_bytes()
+            decoder.skip_any()
+        return _Content(ref, 1, decoder.read_raw(skip_doc))
+    raise YjsDecodeError(f"Unknown content type {ref}")
+
+
+@dataclass
+class _Struct:
+    """GC range, Skip (gap) or Item as found in an update"""
+    ref: int
+    client: int
+    clock: int
+    length: int
+    info: int = 0
+    origin: Optional[ID] = None
+    right_origin: Optional[ID] = None
+    parent: Optional[bytes] = None  # Raw parent info, present only when there are no origins
+    content: Optional[_Content] = None
+
+    @property
+    def end(self) -> int:
+        return self.clock + self.length
+
+    @property
+    def is_item(self) -> bool:
+        return self.ref not in (REF_GC, REF_SKIP)
+
+    def slice_from(self, offset: int) -> "_Struct":
+        """The part of this struct starting ``offset`` clocks in"""
+        if offset <= 0:
+            return self
+        if not self.is_item:
+            return replace(self, clock=self.clock + offset, length=self.length - offset)
+        # Like Item.write(encoder, offset): the slice's origin is the clock
+        # just before it, which makes the parent info redundant
+        return replace(
+            self,
+            clock=self.clock + offset,
+            length=self.length - offset,
+            info=self.info | HAS_ORIGIN,
+            origin=(self.client, self.clock + offset - 1),
+            parent=None,
+            content=self.content.split(offset)[1]
+        )
+
+    def slice_to(self, offset: int) -> "_Struct":
+        """The first ``offset`` clocks of this struct"""
+        if not self.is_item:
+            return replace(self, length=offset)
+        return replace(self, length=offset, content=self.content.split(offset)[0])
+
+    def write(self, out: bytearray):
+        if not self.is_item:
+            out.append(self.ref)
+            _write_var_uint(out, self.length)
+            return
+        out.append(self.info)
+        if self.origin is not None:
+            _write_var_uint(out, self.origin[0])
+            _write_var_uint(out, self.origin[1])
+        if self.right_origin is not None:
+            _write_var_uint(out, self.right_origin[0])
+            _write_var_uint(out, self.right_origin[1])
+        if self.origin is None and self.right_origin is None:
+            out += self.parent
+        self.content.write(out)
+
+
+def _continues(left: _Struct, right: _Struct) -> bool:
+    """Whether ``right`` can be folded into ``left`` without changing the document"""
+    if left.ref == REF_GC and right.ref == REF_GC:
+        return True
+    return (
+        left.is_item and right.is_item
+        and right.origin == (left.client, left.end - 1)
+        and right.right_origin == left.right_origin
+        and not (left.info | right.info) & HAS_PARENT_SUB
+        and left.content.ref == right.content.ref
+        and left.content.ref in MERGEABLE_REFS
+    )
+
+
+def _coalesce(run: List[_Struct]) -> _Struct:
+    first = run[0]
+    if len(run) == 1:
+        return first
+    length = sum(struct.length for struct in run)
+    if first.ref == REF_GC:
+        return replace(first, length=length)
+    ref = first.content.ref
+    if ref == REF_STRING:
+        data = "".join(struct.content.data for struct in run)
+    elif ref in (REF_JSON, REF_ANY):
+        data = [element for struct in run for element in struct.content.data]
+    else:
+        data = None
+    return replace(first, length=length, content=_Content(ref, length, data))
+
+
+# =============================================
+# Update decoding / encoding
+# =============================================
+
+def _read_delete_set(decoder: _Decoder) -> DeleteSet:
+    delete_set: DeleteSet = {}
+    for _ in range(decoder.read_var_uint()):
+        client = decoder.read_var_uint()
+        ranges = delete_set.setdefault(client, [])
+        for _ in range(decoder.read_var_uint()):
+            clock = decoder.read_var_uint()
+            ranges.append((clock, decoder.read_var_uint()))
+    return delete_set
+
+
+def _read_update(update: bytes) -> Tuple[Dict[int, List[_Struct]], DeleteSet]:
+    decoder = _Decoder(update)
+    structs: Dict[int, List[_Struct]] = {}
+    for _ in range(decoder.read_var_uint()):
+        count = decoder.read_var_uint()
+        client = decoder.read_var_uint()
+        clock = decoder.read_var_uint()
+        client_structs = structs.setdefault(client, [])
+        for _ in range(count):
+            info = decoder.read_uint8()
+            ref = info & 0x1F
+            if ref in (REF_GC, REF_SKIP):
+                struct = _Struct(ref, client, clock, decoder.read_var_uint())
+            else:
+                origin = decoder.read_id() if info & HAS_ORIGIN else None
+                right_origin = decoder.read_id() if info & HAS_RIGHT_ORIGIN else None
+                parent = None
+                if origin is None and right_origin is None:
+                    def skip_parent():
+                        if decoder.read_var_uint() == 1:
+                            decoder.read_var_bytes()  # root type name
+                        else:
+                            decoder.read_id()  # parent item
+                        if info & HAS_PARENT_SUB:
+                            decoder.read_var_bytes()
+                    parent = decoder.read_raw(skip_parent)
+                content = _read_content(decoder, ref)
+                struct = _Struct(ref, client, clock, content.length, info, origin, right_origin, parent, content)
+            client_structs.append(struct)
+            clock += struct.length
+    return structs, _read_delete_set(decoder)
+
+
+def _merge_delete_sets(delete_sets: Iterable[DeleteSet]) -> DeleteSet:
+    merged: DeleteSet = {}
+    for delete_set in delete_sets:
+        for client, ranges in delete_set.items():
+            merged.setdefault(client, []).extend(ranges)
+    for client, ranges in merged.items():
+        ranges.sort()
+        compact: List[Tuple[int, int]] = []
+        for clock, length in ranges:
+            if compact and clock <= compact[-1][0] + compact[-1][1]:
+                last_clock, last_length = compact[-1]
+                compact[-1] = (last_clock, max(last_length, clock + length - last_clock))
+            elif length > 0:
+                compact.append((clock, length))
+        merged[client] = compact
+    return {client: ranges for client, ranges in merged.items() if ranges}
+
+
+def _write_update(structs: Dict[int, List[_Struct]], delete_set: DeleteSet) -> bytes:
+    out = bytearray()
+    clients = sorted((client for client, items in structs.items() if items), reverse=True)
+    _write_var_uint(out, len(clients))
+    for client in clients:
+        client_structs = structs[client]
+        _write_var_uint(out, len(client_structs))
+        _write_var_uint(out, client)
+        _write_var_uint(out, client_structs[0].clock)
+        for struct in client_structs:
+            struct.write(out)
+
+    _write_var_uint(out, len(delete_set))
+    for client in sorted(delete_set, reverse=True):
+        _write_var_uint(out, client)
+        _write_var_uint(out, len(delete_set[client]))
+        for clock, length in delete_set[client]:
+            _write_var_uint(out, clock)
+            _write_var_uint(out, length)
+    return bytes(out)
+
+
+def _merge_client_structs(structs: List[_Struct]) -> List[_Struct]:
+    """Order one client's structs by clock, drop overlaps, mark gaps and coalesce runs"""
+    ordered = sorted((s for s in structs if s.ref != REF_SKIP), key=lambda s: s.clock)
+    merged: List[_Struct] = []
+    run: List[_Struct] = []
+    end = None
+    for struct in ordered:
+        if end is not None:
+            if struct.end <= end:
+                continue
+            if struct.clock < end:
+                struct = struct.slice_from(end - struct.clock)
+            elif struct.clock > end:
+                merged.append(_coalesce(run))
+                merged.append(_Struct(REF_SKIP, struct.client, end, struct.clock - end))
+                run = []
+        if run and not _continues(run[-1], struct):
+            merged.append(_coalesce(run))
+            run = []
+        run.append(struct)
+        end = struct.end
+    if run:
+        merged.append(_coalesce(run))
+    return merged
+
+
+def _collect_deleted(structs: List[_Struct], ranges: List[Tuple[int, int]]) -> List[_Struct]:
+    """Replace the content of deleted item ranges with deleted-length markers"""
+    collected: List[_Struct] = []
+    index = 0
+    for struct in structs:
+        if not struct.is_item or struct.content.ref not in COLLECTABLE_REFS:
+            collected.append(struct)
+            continue
+        while index < len(ranges) and sum(ranges[index]) <= struct.clock:
+            index += 1
+        rest = struct
+        cursor = index
+        while cursor < len(ranges) and ranges[cursor][0] < rest.end:
+            start = max(ranges[cursor][0], rest.clock)
+            stop = min(sum(ranges[cursor]), rest.end)
+            if start > rest.clock:
+                collected.append(rest.slice_to(start - rest.clock))
+                rest = rest.slice_from(start - rest.clock)
+            deleted_length = stop - rest.clock
+            collected.append(replace(
+                rest,
+                info=(rest.info & ~0x1F) | REF_DELETED,
+                ref=REF_DELETED,
+                length=deleted_length,
+                content=_Content(REF_DELETED, deleted_length)
+            ))
+            if stop >= rest.end:
+                rest = None
+                break
+            rest = rest.slice_from(deleted_length)
+            cursor += 1
+        if rest is not None:
+            collected.append(rest)
+    # Re-run the merge pass so adjacent deleted markers fold together
+    return _merge_client_structs(collected)
+
+
+# =============================================
+# Public API
+# =============================================
+
+def merge_updates(updates: Sequence[bytes], gc: bool = False) -> bytes:
+    """
+    Merge Yjs v1 updates into a single update.
+
+    With ``gc`` the content of items covered by the delete set is dropped,
+    which is what a Y.Doc with garbage collection enabled would store.
+    """
+    per_client: Dict[int, List[_Struct]] = {}
+    delete_sets = []
+    for update in updates:
+        structs, delete_set = _read_update(update)
+        for client, client_structs in structs.items():
+            per_client.setdefault(client, []).extend(client_structs)
+        delete_sets.append(delete_set)
+
+    delete_set = _merge_delete_sets(delete_sets)
+    merged = {client: _merge_client_structs(structs) for client, structs in per_client.items()}
+    if gc:
+        for client, ranges in delete_set.items():
+            if client in merged:
+                merged[client] = _collect_deleted(merged[client], ranges)
+    return _write_update(merged, delete_set)
+
+
+def decode_state_vector(state_vector: bytes) -> Dict[int, int]:
+    """Decode an encoded state vector into {client: clock}"""
+    if not state_vector:
+        return {}
+    decoder = _Decoder(state_vector)
+    return {decoder.read_var_uint(): decoder.read_var_uint() for _ in range(decoder.read_var_uint())}
+
+
+def encode_state_vector(clocks: Dict[int, int]) -> bytes:
+    """Encode {client: clock} as a Yjs state vector"""
+    out = bytearray()
+    _write_var_uint(out, len(clocks))
+    for client in sorted(clocks, reverse=True):
+        _write_var_uint(out, client)
+        _write_var_uint(out, clocks[client])
+    return bytes(out)
+
+
+def state_vector_from_update(update: bytes) -> Dict[int, int]:
+    """Clock up to which each client's structs are present without gaps"""
+    structs, _ = _read_update(update)
+    clocks = {}
+    for client, client_structs in structs.items():
+        clock = 0
+        for struct in sorted(client_structs, key=lambda s: s.clock):
+            if struct.ref == REF_SKIP or struct.clock > clock:
+                break
+            clock = max(clock, struct.end)
+        if clock:
+            clocks[client] = clock
+    return clocks
+
+
+def diff_update(update: bytes, state_vector: bytes) -> bytes:
+    """
+    The part of ``update`` a peer with ``state_vector`` is missing.
+
+    The delete set is always sent in full, as Yjs does.
+    """
+    known = decode_state_vector(state_vector)
+    structs, delete_set = _read_update(update)
+    missing: Dict[int, List[_Struct]] = {}
+    for client, client_structs in structs.items():
+        known_clock = known.get(client, 0)
+        needed: List[_Struct] = []
+        for struct in client_structs:
+            if struct.end <= known_clock:
+                continue
+            if not needed:
+                # A diff never starts with a gap
+                if struct.ref == REF_SKIP:
+                    continue
+                struct = struct.slice_from(known_clock - struct.clock)
+            needed.append(struct)
+        if needed:
+            missing[client] = needed
+    return _write_update(missing, delete_set)
+
+
+class YDocument:
+    """
+    A collaboration room's document, held as an append-only log of Yjs
+    updates that is periodically compacted into a single merged update.
+    """
+
+    def __init__(
+        self,
+        state: Optional[bytes] = None,
+        compact_after_updates: int = 200,
+        compact_after_bytes: int = 512 * 1024,
+        gc: bool = True
+    ):
+        self.compact_after_updates = compact_after_updates
+        self.compact_after_bytes = compact_after_bytes
+        self.gc = gc
+        self._state = EMPTY_UPDATE
+        self._log: List[bytes] = []
+        self._log_bytes = 0
+        self.compactions = 0
+        if state:
+            self.apply_update(state)
+            self.compact()
+
+    def apply_update(self, update: bytes) -> None:
+        """Validate and record an update; raises YjsDecodeError for malformed input"""
+        _read_update(update)
+        self._log.append(update)
+        self._log_bytes += len(update)
+        if len(self._log) >= self.compact_after_updates or self._log_bytes >= self.compact_after_bytes:
+            self.compact()
+
+    def compact(self) -> bytes:
+        """Fold the update log into the merged state"""
+        if self._log:
+            self._state = merge_updates([self._state, *self._log], gc=self.gc)
+            self._log.clear()
+            self._log_bytes = 0
+            self.compactions += 1
+        return self._state
+
+    def encode_state(self) -> bytes:
+        """The whole document as one update"""
+        return self.compact()
+
+    def encode_state_vector(self) -> bytes:
+        return encode_state_vector(state_vector_from_update(self.compact()))
+
+    def diff(self, state_vector: bytes) -> bytes:
+        """Updates the holder of ``state_vector`` has not seen yet"""
+        return diff_update(self.compact(), state_vector)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._log and self._state == EMPTY_UPDATE
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "state_bytes": len(self._state),
+            "pending_updates": len(self._log),
+            "pending_bytes": self._log_bytes,
+            "compactions": self.compactions,
+        }
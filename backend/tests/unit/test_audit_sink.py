@@ -0,0 +1,113 @@
+"""
+Audit Log Sink Unit Tests
+"""
+
+import json
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+class Writer:
+    """Records written batches; can be told to fail."""
+
+    def __init__(self, fail=False, reject=None):
+        self.batches = []
+        self.fail = fail
+        self.reject = reject
+
+    async def __call__(self, events):
+        if self.fail or (self.reject and any(e["n"] == self.reject for e in events)):
+            raise RuntimeError("database unavailable")
+        self.batches.append([e["n"] for e in events])
+
+
+def _sink(tmp_path, writer, **overrides):
+    from services.audit_sink import AuditSink
+
+    options = {"max_queue": 100, "batch_size": 10, "flush_interval": 60, "spill_dir": str(tmp_path)}
+    options.update(overrides)
+    return AuditSink(name="test", writer=writer, **options)
+
+
+class TestAuditSink:
+    """Test batching, spilling and replay of audit events."""
+
+    @pytest.mark.asyncio
+    async def test_events_are_written_in_bulk(self, tmp_path):
+        """Test that queued events go out as full batches."""
+        writer = Writer()
+        sink = _sink(tmp_path, writer)
+
+        for n in range(25):
+            await sink.submit({"n": n})
+        await sink.close()
+
+        assert [len(batch) for batch in writer.batches] == [10, 10, 5]
+        assert sink.get_stats()["written"] == 25
+
+    @pytest.mark.asyncio
+    async def test_full_queue_spills_to_disk(self, tmp_path):
+        """Test that overflow beyond the queue bound is written to the spill file."""
+        writer = Writer(fail=True)
+        sink = _sink(tmp_path, writer, max_queue=5, batch_size=100, backpressure_timeout=0.01)
+
+        for n in range(8):
+            await sink.submit({"n": n})
+
+        spilled = [json.loads(line)["n"] for f in tmp_path.glob("test-*.jsonl") for line in f.read_text().splitlines()]
+        assert spilled == [5, 6, 7]
+        assert sink.get_stats()["queue_depth"] == 5
+        await sink.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_replayed_later(self, tmp_path):
+        """Test that events survive an outage and are written once the database recovers."""
+        writer = Writer(fail=True)
+        sink = _sink(tmp_path, writer, max_queue=3)
+        for n in range(3):
+            await sink.submit({"n": n})
+        await sink.close()
+        assert sink.get_stats()["queue_depth"] == 0
+
+        writer.fail = False
+        restarted = _sink(tmp_path, writer)
+        await restarted.submit({"n": 3})
+        await restarted.close()
+
+        assert sorted(n for batch in writer.batches for n in batch) == [0, 1, 2, 3]
+        assert list(tmp_path.glob("test-*.jsonl")) == []
+
+    @pytest.mark.asyncio
+    async def test_bad_row_does_not_block_queue(self, tmp_path):
+        """Test that a row the database keeps refusing is dead-lettered."""
+        from services.audit_sink import ISOLATE_AFTER_FAILED_BATCHES
+
+        writer = Writer(reject=2)
+        sink = _sink(tmp_path, writer)
+        for n in range(5):
+            await sink.submit({"n": n})
+
+        for _ in range(ISOLATE_AFTER_FAILED_BATCHES):
+            sink._retry_at = 0
+            await sink.flush()
+
+        assert sorted(n for batch in writer.batches for n in batch) == [0, 1, 3, 4]
+        assert sink.get_stats()["rejected"] == 1
+        assert len(list(tmp_path.glob("*.dead"))) == 1
+        await sink.close()
+
+    @pytest.mark.asyncio
+    async def test_discard_drops_queued_events(self, tmp_path):
+        """Test that discarded events never reach the writer while the rest still do."""
+        writer = Writer()
+        sink = _sink(tmp_path, writer)
+        for n in range(6):
+            await sink.submit({"n": n})
+
+        dropped = await sink.discard(lambda event: event["n"] % 2)
+        await sink.close()
+
+        assert dropped == 3
+        assert writer.batches == [[0, 2, 4]]
+        assert sink.get_stats()["discarded"] == 3
@@ -0,0 +1,150 @@
+"""
+Availability Engine Unit Tests
+"""
+
+import uuid
+import pytest
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+pytestmark = pytest.mark.unit
+
+DAY = date(2030, 3, 4)  # Monday
+
+
+def at(hour, minute=0, day=DAY):
+    return datetime.combine(day, time(hour, minute))
+
+
+def _session(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    from services import availability_engine
+
+    cache = availability_engine.AvailabilityCache(max_entries=1000, ttl_seconds=60)
+    monkeypatch.setattr(availability_engine, "availability_cache", cache)
+    return cache
+
+
+class TestIntervalSet:
+    """Test interval arithmetic."""
+
+    def test_merge_subtract_intersect(self):
+        """Test merging of overlapping/touching intervals and sweep-based set operations."""
+        from services.availability_engine import IntervalSet, intersect_all
+
+        busy = IntervalSet([(at(11), at(12)), (at(9), at(10)), (at(9, 30), at(10, 30)), (at(12), at(13))])
+        hours = IntervalSet([(at(9), at(17))])
+
+        assert list(busy) == [(at(9), at(10, 30)), (at(11), at(13))]
+        assert list(hours.subtract(busy)) == [(at(10, 30), at(11)), (at(13), at(17))]
+        assert busy.overlaps(at(10), at(11)) and not busy.overlaps(at(10, 30), at(11))
+        assert list(intersect_all([hours, IntervalSet([(at(8), at(10))]), IntervalSet([(at(9, 30), at(12))])])) == [
+            (at(9, 30), at(10))
+        ]
+
+    def test_aligned_slots_keep_grid_and_notice(self):
+        """Test that free slots stay on the window's grid and respect the notice cutoff."""
+        from services.availability_engine import IntervalSet, aligned_slots
+
+        windows = IntervalSet([(at(9), at(12))])
+        busy = IntervalSet([(at(9, 40), at(10, 10))])
+        slots = list(aligned_slots(windows, busy, timedelta(minutes=30), not_before=at(9, 5)))
+
+        assert [start.strftime("%H:%M") for start, _ in slots] == ["10:30", "11:00", "11:30"]
+
+    def test_slot_grid_marks_busy_slots(self):
+        """Test the resource grid: every slot listed, booked ones flagged."""
+        from services.availability_engine import IntervalSet, slot_grid
+
+        grid = slot_grid(at(9), at(11), timedelta(minutes=30), IntervalSet([(at(9, 45), at(10, 15))]))
+
+        assert [free for _, _, free in grid] == [True, False, False, True]
+
+
+class TestAvailabilityCache:
+    """Test per-day caching of busy time."""
+
+    @pytest.mark.asyncio
+    async def test_days_cached_until_owner_invalidated(self, fresh_cache):
+        """Test one load for many owners/days, multi-day bookings split per day, and invalidation."""
+        from services.availability_engine import HOST, host_busy, invalidate_host
+
+        alice, bob = str(uuid.uuid4()), str(uuid.uuid4())
+        overnight = (uuid.UUID(alice), at(22), at(2, day=DAY + timedelta(days=1)))
+        db = _session([overnight])
+
+        busy = await host_busy(db, [alice, bob], DAY, DAY + timedelta(days=1))
+        again = await host_busy(db, [alice], DAY + timedelta(days=1), DAY + timedelta(days=1))
+
+        assert list(busy[alice]) == [(at(22), at(2, day=DAY + timedelta(days=1)))]
+        assert not busy[bob]
+        assert list(again[alice]) == [(at(0, day=DAY + timedelta(days=1)), at(2, day=DAY + timedelta(days=1)))]
+        assert db.execute.await_count == 1
+
+        invalidate_host(alice)
+        await host_busy(db, [alice, bob], DAY, DAY)
+        assert db.execute.await_count == 2
+        assert fresh_cache.get((HOST, bob, DAY)) == []
+
+
+class TestCommonSlot:
+    """Test multi-host / multi-resource intersection."""
+
+    @pytest.mark.asyncio
+    async def test_first_slot_all_free(self):
+        """Test that the first common slot honours host bookings and room hours and bookings."""
+        from services.availability_engine import find_common_slot
+
+        hosts = [str(uuid.uuid4()) for _ in range(5)]
+        room = SimpleNamespace(id=uuid.uuid4(), available_days=[1, 2, 3, 4, 5], available_from="10:00", available_until="18:00")
+        host_rows = [(uuid.UUID(hosts[n]), at(10 + n), at(11 + n)) for n in range(5)]
+        room_rows = [(room.id, at(15), at(16))]
+        result = MagicMock()
+        result.all.side_effect = [host_rows, room_rows]
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+
+        slot = await find_common_slot(
+            db, at(8), at(20), timedelta(minutes=45), host_ids=hosts, resources=[room]
+        )
+
+        assert slot == (at(16), at(16, 45))
+        assert db.execute.await_count == 2
+
+
+class TestAppointmentSlots:
+    """Test AppointmentService on top of the engine."""
+
+    @pytest.mark.asyncio
+    async def test_slots_skip_buffered_bookings(self):
+        """Test that working hours minus buffered bookings yield the expected slots."""
+        from services.appointment_service import AppointmentService
+
+        host_id = uuid.uuid4()
+        appointment_type = SimpleNamespace(
+            user_id=host_id, is_active=True, duration_minutes=60, min_notice_hours=0,
+            buffer_before_minutes=0, buffer_after_minutes=30,
+            availability={"monday": {"enabled": True, "start": "09:00", "end": "13:00"}}
+        )
+        type_result = MagicMock()
+        type_result.scalar_one_or_none.return_value = appointment_type
+        busy_result = MagicMock()
+        busy_result.all.return_value = [(host_id, at(10), at(11))]
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[type_result, busy_result])
+
+        slots = await AppointmentService(db).get_available_slots(uuid.uuid4(), DAY, DAY + timedelta(days=1))
+
+        assert slots == {DAY.isoformat(): [
+            {"start": at(9).isoformat(), "end": at(10).isoformat()},
+            {"start": at(12).isoformat(), "end": at(13).isoformat()},
+        ]}
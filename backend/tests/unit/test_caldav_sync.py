@@ -0,0 +1,205 @@
+"""
+CalDAV Event Cache Unit Tests
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import httpx
+
+pytestmark = pytest.mark.unit
+
+USER = "alice"
+PASSWORD = "secret"
+BASE = "/remote.php/dav/calendars/alice/personal"
+START = datetime(2030, 3, 1)
+END = datetime(2030, 4, 1)
+
+
+def _ical(uid, title, start, end, rrule=None):
+    lines = [
+        "BEGIN:VCALENDAR", "BEGIN:VEVENT", f"UID:{uid}", f"SUMMARY:{title}",
+        f"DTSTART:{start}", f"DTEND:{end}"
+    ]
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    return "\r\n".join(lines + ["END:VEVENT", "END:VCALENDAR"])
+
+
+def _delta(token, changed=None, removed=()):
+    return {"sync_token": token, "changed": changed or {}, "removed": list(removed)}
+
+
+def _fetched(events):
+    return {href: {"etag": etag, "calendar_data": data} for href, (etag, data) in events.items()}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    from services import caldav_sync
+
+    cache = caldav_sync.CalendarEventCache(max_entries=100, fresh_seconds=60, multiget_batch=2)
+    monkeypatch.setattr(caldav_sync, "calendar_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def server(monkeypatch):
+    from services.caldav_service import caldav_service
+
+    sync = AsyncMock()
+    multiget = AsyncMock()
+    monkeypatch.setattr(caldav_service, "sync_collection", sync)
+    monkeypatch.setattr(caldav_service, "multiget", multiget)
+    return sync, multiget
+
+
+class TestCalendarEventCache:
+    """Test incremental sync of the local mirror."""
+
+    @pytest.mark.asyncio
+    async def test_incremental_sync_fetches_only_changes(self, fresh_cache, server):
+        """Test a full first sync in batches, then a delta that fetches one event and drops one."""
+        from services.caldav_sync import get_cached_events
+
+        sync, multiget = server
+        hrefs = [f"{BASE}/{n}.ics" for n in range(3)]
+        sync.side_effect = [
+            _delta("t1", {href: f'"e{n}"' for n, href in enumerate(hrefs)}),
+            _delta("t2", {hrefs[0]: '"e0"', hrefs[1]: '"e1b"'}, removed=[hrefs[2]]),
+        ]
+        standup = _ical("standup", "Standup", "20300304T090000Z", "20300304T093000Z")
+        moved = _ical("moved", "Moved", "20300305T090000Z", "20300305T093000Z")
+        multiget.side_effect = [
+            _fetched({hrefs[0]: ('"e0"', standup), hrefs[1]: ('"e1"', standup)}),
+            _fetched({hrefs[2]: ('"e2"', standup)}),
+            _fetched({hrefs[1]: ('"e1b"', moved)}),
+        ]
+
+        first = await get_cached_events(USER, PASSWORD, "personal", START, END)
+        fresh_cache.mark_stale(USER, "personal")
+        second = await get_cached_events(USER, PASSWORD, "personal", START, END)
+
+        assert len(first) == 3
+        assert sync.await_args_list[1].args[3] == "t1"
+        assert multiget.await_args_list[2].args[3] == [hrefs[1]]
+        assert sorted(event["title"] for event in second) == ["Moved", "Standup"]
+        assert fresh_cache.get_stats()["events_fetched"] == 4
+
+    @pytest.mark.asyncio
+    async def test_fresh_reads_and_credentials(self, fresh_cache, server):
+        """Test that fresh reads skip the server and other credentials never see the mirror."""
+        from services.caldav_sync import get_cached_events
+
+        sync, multiget = server
+        sync.return_value = _delta("t1")
+
+        await get_cached_events(USER, PASSWORD, "personal", START, END)
+        await get_cached_events(USER, PASSWORD, "personal", START, END)
+        await get_cached_events(USER, "guess", "personal", START, END)
+
+        assert sync.await_count == 2
+        assert fresh_cache.get_stats()["hits"] == 1
+        multiget.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_expired_token_resyncs(self, fresh_cache, server):
+        """Test that a rejected sync token triggers a full listing that prunes vanished events."""
+        from services.caldav_service import CalDAVSyncTokenError
+        from services.caldav_sync import get_cached_events
+
+        sync, multiget = server
+        gone, kept = f"{BASE}/gone.ics", f"{BASE}/kept.ics"
+        sync.side_effect = [
+            _delta("t1", {gone: '"a"', kept: '"b"'}),
+            CalDAVSyncTokenError("expired"),
+            _delta("t9", {kept: '"b"'}),
+        ]
+        multiget.return_value = _fetched({
+            gone: ('"a"', _ical("gone", "Old", "20300305T100000Z", "20300305T110000Z")),
+            kept: ('"b"', _ical("kept", "Review", "20300306T100000Z", "20300306T110000Z")),
+        })
+
+        await get_cached_events(USER, PASSWORD, "personal", START, END)
+        fresh_cache.mark_stale(USER)
+        events = await get_cached_events(USER, PASSWORD, "personal", START, END)
+
+        assert [event["title"] for event in events] == ["Review"]
+        assert multiget.await_count == 1
+        assert fresh_cache.get_stats()["token_resets"] == 1
+
+
+class TestCachedQueries:
+    """Test range filtering and search over the mirror."""
+
+    @pytest.mark.asyncio
+    async def test_search_expands_matches_across_calendars(self, server):
+        """Test search over several calendars, with recurring matches expanded and a failing calendar skipped."""
+        from services.caldav_service import CalDAVNotFoundError
+        from services.caldav_sync import search_cached_events
+
+        sync, multiget = server
+
+        async def sync_calendar(user, password, calendar_id, token):
+            if calendar_id == "missing":
+                raise CalDAVNotFoundError("missing")
+            return _delta("t1", {f"{calendar_id}/1.ics": '"x"', f"{calendar_id}/2.ics": '"y"'})
+
+        sync.side_effect = sync_calendar
+        multiget.side_effect = lambda user, password, calendar_id, batch: _fetched({
+            f"{calendar_id}/1.ics": ('"x"', _ical("1", f"Sprint planning {calendar_id}", "20300304T090000Z",
+                                                   "20300304T100000Z", rrule="FREQ=WEEKLY;COUNT=3")),
+            f"{calendar_id}/2.ics": ('"y"', _ical("2", "Lunch", "20300201T120000Z", "20300201T130000Z")),
+        })
+
+        found = await search_cached_events(USER, PASSWORD, ["personal", "work", "missing"], "PLANNING", START, END)
+
+        assert len(found) == 6
+        assert {event["calendar_id"] for event in found} == {"personal", "work"}
+        assert found[0]["start"] == "2030-03-04T09:00:00"
+
+    def test_in_range(self):
+        """Test overlap rules for timed, zero-length and recurring events."""
+        from services.caldav_sync import in_range
+
+        assert in_range({"start": "2030-02-28T23:00:00", "end": "2030-03-01T01:00:00"}, START, END)
+        assert not in_range({"start": "2030-02-28T10:00:00", "end": "2030-03-01T00:00:00"}, START, END)
+        assert in_range({"start": "2030-03-01T00:00:00"}, START, END)
+        assert in_range({"start": "2029-01-01T09:00:00", "recurrence": "FREQ=DAILY"}, START, END)
+        assert not in_range({"start": "2030-04-01T09:00:00", "recurrence": "FREQ=DAILY"}, START, END)
+
+
+class TestSyncCollection:
+    """Test the sync-collection REPORT client."""
+
+    @pytest.mark.asyncio
+    async def test_parses_changes_and_token_errors(self, monkeypatch):
+        """Test changed/removed hrefs and the new token, and that a rejected token raises."""
+        from services import caldav_service as module
+        from services.caldav_service import CalDAVSyncTokenError, caldav_service
+
+        body = f"""<?xml version="1.0"?>
+        <d:multistatus xmlns:d="DAV:">
+            <d:response><d:href>{BASE}/</d:href><d:propstat><d:prop/></d:propstat></d:response>
+            <d:response><d:href>{BASE}/a.ics</d:href>
+                <d:propstat><d:prop><d:getetag>"1"</d:getetag></d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>
+            </d:response>
+            <d:response><d:href>{BASE}/b.ics</d:href><d:status>HTTP/1.1 404 Not Found</d:status></d:response>
+            <d:sync-token>http://sabre.io/ns/sync/7</d:sync-token>
+        </d:multistatus>"""
+        pool = AsyncMock()
+        pool.request.side_effect = [httpx.Response(207, content=body), httpx.Response(403)]
+        operation = AsyncMock()
+        operation.__aenter__.return_value = pool
+        monkeypatch.setattr(module.CalDAVService, "_client", lambda self, name: operation)
+
+        delta = await caldav_service.sync_collection(USER, PASSWORD, "personal")
+
+        assert delta == {
+            "sync_token": "http://sabre.io/ns/sync/7",
+            "changed": {f"{BASE}/a.ics": '"1"'},
+            "removed": [f"{BASE}/b.ics"],
+        }
+        with pytest.raises(CalDAVSyncTokenError):
+            await caldav_service.sync_collection(USER, PASSWORD, "personal", "http://sabre.io/ns/sync/7")
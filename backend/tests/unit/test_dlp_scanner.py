@@ -0,0 +1,132 @@
+"""
+DLP Scanner Unit Tests
+"""
+
+import re
+import random
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+pytestmark = pytest.mark.unit
+
+SSN = r"\b\d{3}-\d{2}-\d{4}\b"
+AADHAAR = r"\b\d{4}\s?\d{4}\s?\d{4}\b"
+BANK = r"\b\d{9,18}\b"
+KEYWORD = r"confidential"
+
+
+def _rule(pattern, name="rule", action="warn", severity="medium", apps=None, rule_id=None):
+    return SimpleNamespace(
+        id=rule_id or name,
+        name=name,
+        pattern=pattern,
+        action=action,
+        severity=severity,
+        custom_message=None,
+        scope={"apps": apps} if apps else {}
+    )
+
+
+def _rule_set(*rules):
+    from services.dlp_scanner import DLPRuleCache
+
+    return DLPRuleCache(ttl_seconds=60).put("tenant", rules)
+
+
+class TestDLPScan:
+    """Test the compiled chunked scanner."""
+
+    def test_counts_match_findall_across_chunk_boundaries(self, monkeypatch):
+        """Test that chunked scanning finds the same matches as re.findall."""
+        from services import dlp_scanner
+
+        monkeypatch.setattr(dlp_scanner, "MAX_MATCH_CHARS", 32)
+        random.seed(7)
+        pieces = ["123-45-6789", "1234 5678 9012", "123456789012", "Confidential", "x", " ", "\n", "9"]
+        content = "".join(random.choice(pieces) for _ in range(3000))
+        rule_set = _rule_set(*(_rule(p, name=p) for p in (SSN, AADHAAR, BANK, KEYWORD)))
+
+        scan = rule_set.start_scan("email")
+        for start in range(0, len(content), 100):
+            scan.feed(content[start:start + 100])
+        hits = {hit.rule.pattern: hit.match_count for hit in scan.finish()}
+
+        for pattern in (SSN, AADHAAR, BANK, KEYWORD):
+            assert hits[pattern] == len(re.findall(pattern, content, re.IGNORECASE))
+
+    def test_overlapping_rules_are_all_reported(self):
+        """Test that one number matching two rules counts for both."""
+        hits = _rule_set(_rule(AADHAAR, "aadhaar"), _rule(BANK, "bank")).scan("email", "id 123456789012 end")
+
+        assert sorted(hit.rule.name for hit in hits) == ["aadhaar", "bank"]
+
+    def test_clean_content_has_no_hits(self):
+        """Test that content without sensitive data yields nothing."""
+        assert _rule_set(_rule(SSN)).scan("email", "nothing to see here " * 1000) == []
+
+    def test_scope_and_invalid_patterns(self):
+        """Test that out-of-scope rules and broken regexes are skipped."""
+        rule_set = _rule_set(_rule(KEYWORD, "docs only", apps=["document"]), _rule("([unclosed"))
+
+        assert rule_set.scan("email", "Confidential") == []
+        assert len(rule_set.scan("document", "Confidential")) == 1
+
+    def test_samples_are_bounded_and_redacted(self):
+        """Test that only a few redacted samples are kept."""
+        hit = _rule_set(_rule(SSN)).scan("email", "123-45-6789 " * 50)[0]
+
+        assert hit.match_count == 50
+        assert hit.redacted_samples == ["12*******89"] * 5
+
+
+class TestDLPService:
+    """Test rule caching and batched incident writes."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        from services import dlp_service
+        from services.dlp_scanner import DLPRuleCache
+
+        cache = DLPRuleCache(ttl_seconds=60)
+        monkeypatch.setattr(dlp_service, "dlp_rule_cache", cache)
+        return cache
+
+    def _db(self, rules):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = rules
+        result.rowcount = 1
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+        db.commit = AsyncMock()
+        return db
+
+    @pytest.mark.asyncio
+    async def test_rules_loaded_once_and_incidents_batched(self):
+        """Test that repeated scans reuse the compiled rules and write incidents in one commit."""
+        from services.dlp_service import DLPService
+
+        db = self._db([_rule(SSN, "ssn", action="block", severity="high"), _rule(KEYWORD, "kw")])
+        service = DLPService(db)
+
+        clean = await service.scan_content("t1", "u1", "hello", "email")
+        result = await service.scan_content("t1", "u1", "Confidential 123-45-6789", "email")
+
+        assert clean["has_violations"] is False
+        assert result["should_block"] is True
+        assert result["max_severity"] == "high"
+        # One rule load, then one stats UPDATE for the second scan
+        assert db.execute.await_count == 2
+        assert db.commit.await_count == 1
+        assert len(db.add_all.call_args[0][0]) == 2
+
+    @pytest.mark.asyncio
+    async def test_rule_changes_invalidate_cache(self, fresh_cache):
+        """Test that deleting a rule drops the tenant's compiled rule set."""
+        from services.dlp_service import DLPService
+
+        service = DLPService(self._db([_rule(SSN)]))
+        await service.scan_content("t1", "u1", "hello", "email")
+        await service.delete_rule("r1", "t1")
+
+        assert fresh_cache.get("t1") is None
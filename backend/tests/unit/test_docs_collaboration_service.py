@@ -0,0 +1,199 @@
+"""
+Docs Collaboration Service Unit Tests
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+pytestmark = pytest.mark.unit
+
+# Yjs updates for a Y.Text "text": insert "abc", then append "d"
+INSERT_ABC = bytes([1, 1, 1, 0, 4, 1, 4, 116, 101, 120, 116, 3, 97, 98, 99, 0])
+INSERT_D = bytes([1, 1, 1, 3, 132, 1, 2, 1, 100, 0])
+
+
+def _make_service(monkeypatch, hub=None):
+    from services.docs_collab_backplane import InProcessBackplane, _InProcessHub
+    from services.docs_collaboration_service import DocsCollaborationService
+
+    service = DocsCollaborationService(InProcessBackplane(hub=hub or _InProcessHub()))
+    monkeypatch.setattr(service, "_load_session_state", AsyncMock(return_value=None))
+    monkeypatch.setattr(service, "_ensure_flusher", lambda: None)
+    service.saved = []
+
+    async def save_documents(states):
+        service.saved.append(dict(states))
+        return True
+
+    monkeypatch.setattr(service, "_save_documents", save_documents)
+    return service
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data):
+        import json
+        self.sent.append(json.loads(data))
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Collaboration service with database access stubbed out."""
+    return _make_service(monkeypatch)
+
+
+class TestDocumentSync:
+    """Test merging and diffing of room documents."""
+
+    @pytest.mark.asyncio
+    async def test_sync_step1_returns_only_missing_updates(self, service):
+        """Test that a client at clock 3 only receives the appended character."""
+        from services.yjs_document import encode_state_vector
+
+        await service.get_or_create_room("doc-1")
+        await service.handle_sync_update("doc-1", "u1", INSERT_ABC)
+        await service.handle_sync_update("doc-1", "u1", INSERT_D)
+
+        response = await service.handle_sync_step1("doc-1", "u2", encode_state_vector({1: 3}))
+
+        assert bytes.fromhex(response["update"]) == INSERT_D
+
+    @pytest.mark.asyncio
+    async def test_malformed_update_returns_error(self, service):
+        """Test that garbage updates are rejected and not stored."""
+        await service.get_or_create_room("doc-1")
+
+        response = await service.handle_message("doc-1", "u1", {"type": "sync_update", "update": "0102"})
+
+        assert response["type"] == "error"
+        assert service.rooms["doc-1"].document_state is None
+
+
+class TestWriteBehind:
+    """Test batching of presence and autosave writes."""
+
+    @pytest.mark.asyncio
+    async def test_autosave_writes_all_dirty_rooms_at_once(self, service):
+        """Test that edits in several rooms produce one bulk save."""
+        for doc_id in ("doc-1", "doc-2"):
+            await service.get_or_create_room(doc_id)
+            await service.handle_sync_update(doc_id, "u1", INSERT_ABC)
+
+        await service._flush_autosaves()
+        await service._flush_autosaves()
+
+        assert len(service.saved) == 1
+        assert set(service.saved[0]) == {"doc-1", "doc-2"}
+
+    @pytest.mark.asyncio
+    async def test_failed_autosave_is_retried(self, service, monkeypatch):
+        """Test that rooms stay dirty when the bulk write fails."""
+        monkeypatch.setattr(service, "_save_documents", AsyncMock(return_value=False))
+        await service.get_or_create_room("doc-1")
+        await service.handle_sync_update("doc-1", "u1", INSERT_ABC)
+
+        await service._flush_autosaves()
+
+        assert service._dirty_rooms == {"doc-1"}
+
+    @pytest.mark.asyncio
+    async def test_save_merges_state_saved_by_another_worker(self, monkeypatch):
+        """Test that a save keeps edits only another worker had stored."""
+        from types import SimpleNamespace
+        from services import docs_collaboration_service
+        from services.docs_collaboration_service import DocsCollaborationService
+        from services.yjs_document import merge_updates
+
+        converged = merge_updates([INSERT_ABC, INSERT_D])
+        writes = []
+
+        class FakeSession:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement, params=None):
+                sql = str(statement)
+                if "FOR UPDATE" in sql:
+                    return [SimpleNamespace(document_id="doc-1", yjs_state=converged)]
+                if "docs_sessions" in sql:
+                    writes.extend(params)
+
+            async def commit(self):
+                pass
+
+        monkeypatch.setattr(docs_collaboration_service, "ERPSessionLocal", FakeSession)
+        service = DocsCollaborationService()
+
+        assert await service._save_documents({"doc-1": INSERT_ABC})
+        assert writes == [{"document_id": "doc-1", "yjs_state": converged}]
+
+    @pytest.mark.asyncio
+    async def test_presence_changes_are_coalesced(self, service):
+        """Test that a join followed by a leave only queues the removal."""
+        from services.docs_collaboration_service import ConnectedUser
+
+        user = ConnectedUser(user_id="u1", user_name="Asha", user_email="a@x.com")
+        await service._update_db_presence("doc-1", user)
+        await service._update_db_presence("doc-1", user)
+        await service._remove_db_presence("doc-1", "u1")
+
+        assert service._presence_upserts == {}
+        assert service._presence_deletes == {("doc-1", "u1")}
+
+
+class TestBackplane:
+    """Test rooms shared between workers."""
+
+    @pytest.fixture
+    def nodes(self, monkeypatch):
+        from services.docs_collab_backplane import _InProcessHub
+
+        hub = _InProcessHub()
+        return _make_service(monkeypatch, hub), _make_service(monkeypatch, hub)
+
+    @pytest.mark.asyncio
+    async def test_new_worker_pulls_unsaved_edits(self, nodes):
+        """Test that a worker opening a room receives edits made on another worker."""
+        first, second = nodes
+        await first.user_join("doc-1", "u1", "Asha", "a@x.com", FakeWebSocket())
+        await first.handle_sync_update("doc-1", "u1", INSERT_ABC)
+
+        join = await second.user_join("doc-1", "u2", "Ravi", "r@x.com", FakeWebSocket())
+
+        assert second.rooms["doc-1"].document_state == INSERT_ABC
+        assert {user["id"] for user in join["users"]} == {"u1", "u2"}
+
+    @pytest.mark.asyncio
+    async def test_updates_reach_clients_on_other_workers(self, nodes):
+        """Test that an edit on one worker is broadcast and merged on the other."""
+        first, second = nodes
+        socket = FakeWebSocket()
+        await first.user_join("doc-1", "u1", "Asha", "a@x.com", socket)
+        await second.user_join("doc-1", "u2", "Ravi", "r@x.com", FakeWebSocket())
+
+        await second.handle_sync_update("doc-1", "u2", INSERT_ABC)
+
+        updates = [m for m in socket.sent if m["type"] == "sync_update"]
+        assert bytes.fromhex(updates[-1]["update"]) == INSERT_ABC
+        assert first.rooms["doc-1"].document_state == INSERT_ABC
+        assert any(m["type"] == "user_joined" and m["user"]["id"] == "u2" for m in socket.sent)
+        assert "doc-1" in first._dirty_rooms
+
+    @pytest.mark.asyncio
+    async def test_room_stats_aggregate_across_workers(self, nodes):
+        """Test that stats count a shared room once with users from every worker."""
+        first, second = nodes
+        await first.user_join("doc-1", "u1", "Asha", "a@x.com", FakeWebSocket())
+        await second.user_join("doc-1", "u2", "Ravi", "r@x.com", FakeWebSocket())
+        await second.user_join("doc-2", "u3", "Mei", "m@x.com", FakeWebSocket())
+
+        stats = await first.get_room_stats()
+
+        assert stats["total_rooms"] == 2
+        assert stats["total_users"] == 3
+        assert len(stats["nodes"]) == 2
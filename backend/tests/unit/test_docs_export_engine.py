@@ -0,0 +1,108 @@
+"""
+Docs Export Engine Unit Tests
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+pytestmark = pytest.mark.unit
+
+
+def _engine(**overrides):
+    from services.docs_export_engine import ExportEngine
+
+    options = {"max_workers": 2, "max_queue": 2, "per_tenant_limit": 1, "cache_max_bytes": 1024}
+    options.update(overrides)
+    return ExportEngine(executor_factory=lambda workers: ThreadPoolExecutor(workers), **options)
+
+
+class Render:
+    """Render job that records how many renders overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return text.encode()
+
+
+class TestExportEngine:
+    """Test pooled export rendering."""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_document_served_from_cache(self):
+        """Test that a repeat export with the same content key skips rendering."""
+        engine = _engine()
+        render = Render(delay=0)
+        key = engine.content_key("pdf", {"content": []}, "Title")
+
+        first = await engine.run(render, "doc", cache_key=key)
+        second = await engine.run(render, "doc", cache_key=key)
+
+        assert first == second == b"doc"
+        assert render.calls == 1
+        assert engine.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_exports_render_once(self):
+        """Test that simultaneous exports of one document share a render."""
+        engine = _engine()
+        render = Render()
+        key = engine.content_key("docx", "same")
+
+        results = await asyncio.gather(*(engine.run(render, "doc", cache_key=key) for _ in range(5)))
+
+        assert results == [b"doc"] * 5
+        assert render.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_tenant_concurrency_is_capped(self):
+        """Test that one tenant's exports run one at a time."""
+        engine = _engine(max_workers=3, max_queue=3)
+        render = Render()
+
+        await asyncio.gather(*(engine.run(render, str(i), tenant_id="t1") for i in range(3)))
+
+        assert render.peak == 1
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self):
+        """Test that exports beyond workers plus queue depth are refused."""
+        from services.docs_export_engine import ExportQueueFull
+
+        engine = _engine(max_workers=1, max_queue=1)
+        render = Render()
+        running = [asyncio.ensure_future(engine.run(render, str(i), tenant_id=str(i))) for i in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExportQueueFull):
+            await engine.run(render, "overflow")
+        await asyncio.gather(*running)
+        assert engine.get_stats()["active_jobs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded_by_size(self):
+        """Test that old artifacts are evicted once the byte budget is exceeded."""
+        engine = _engine(cache_max_bytes=10)
+        render = Render(delay=0)
+
+        for text in ("aaaaaa", "bbbbbb"):
+            await engine.run(render, text, cache_key=text)
+
+        stats = engine.get_stats()
+        assert stats["cache_entries"] == 1
+        assert stats["cache_bytes"] == 6
@@ -0,0 +1,159 @@
+"""
+Docs Vector Index Unit Tests
+"""
+
+import asyncio
+import pytest
+
+np = pytest.importorskip("numpy")
+
+pytestmark = pytest.mark.unit
+
+
+class CountingProvider:
+    """Hashing provider that records every embed call."""
+
+    def __init__(self):
+        from services.docs_vector_index import HashingEmbeddingProvider
+
+        self.inner = HashingEmbeddingProvider(dim=64)
+        self.model = self.inner.model
+        self.dim = self.inner.dim
+        self.calls = []
+
+    async def embed(self, texts):
+        self.calls.append(list(texts))
+        return await self.inner.embed(texts)
+
+    async def close(self):
+        pass
+
+
+def _store(provider=None):
+    from services.docs_vector_index import DocsVectorStore
+
+    return DocsVectorStore(provider=provider or CountingProvider(), chunk_chars=200, max_chunks=8, max_tenants=4)
+
+
+def _docs():
+    return [
+        {"id": "1", "title": "Quarterly budget", "text": "revenue forecast and budget for the finance team"},
+        {"id": "2", "title": "Holiday plans", "text": "beach trip itinerary and hotel booking"},
+        {"id": "3", "title": "Hiring", "text": "interview schedule for backend engineers"},
+    ]
+
+
+class TestVectorIndex:
+    """Test the in-memory matrix index."""
+
+    def test_search_matches_brute_force(self):
+        """Test that ranking equals a per-document max of cosine similarities."""
+        from services.docs_vector_index import VectorIndex
+
+        rng = np.random.default_rng(3)
+        index = VectorIndex(dim=16)
+        docs = {f"d{n}": rng.normal(size=(rng.integers(1, 4), 16)) for n in range(40)}
+        for doc_id, vectors in docs.items():
+            index.add(doc_id, "h", vectors)
+        query = rng.normal(size=16)
+
+        def cosine(vectors):
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            return float((vectors @ (query / np.linalg.norm(query))).max())
+
+        expected = sorted(docs, key=lambda d: -cosine(docs[d]))[:5]
+        assert [doc_id for doc_id, _ in index.search(query, 5)] == expected
+
+    def test_remove_and_replace_with_compaction(self):
+        """Test that removed documents disappear and replaced ones use their new vectors."""
+        from services.docs_vector_index import VectorIndex
+
+        index = VectorIndex(dim=2)
+        index.add("a", "1", np.array([[1.0, 0.0]]))
+        index.add("b", "1", np.array([[0.0, 1.0]]))
+        for _ in range(5):
+            index.add("b", "2", np.array([[0.0, 1.0], [0.7, 0.7]]))
+        index.remove("a")
+
+        assert index.search(np.array([1.0, 0.0]), 5)[0][0] == "b"
+        assert len(index) == 1 and index.rows == 2
+        assert index.search(np.array([1.0, 0.0]), 5, doc_ids=["a"]) == []
+
+
+class TestDocsVectorStore:
+    """Test embedding reuse across queries."""
+
+    @pytest.mark.asyncio
+    async def test_one_embedding_call_per_query(self):
+        """Test that documents are embedded once and later queries only embed the query."""
+        provider = CountingProvider()
+        store = _store(provider)
+
+        first = await store.search("t1", "finance budget", _docs(), top_k=2)
+        second = await store.search("t1", "hotel booking", _docs(), top_k=2)
+
+        assert first[0][0] == "1"
+        assert second[0][0] == "2"
+        assert [len(call) for call in provider.calls] == [4, 1]
+
+    @pytest.mark.asyncio
+    async def test_changed_document_is_reembedded(self):
+        """Test that only a document whose content changed is embedded again."""
+        provider = CountingProvider()
+        store = _store(provider)
+        await store.index_document("t1", "1", "Notes", "old text")
+        await store.index_document("t1", "1", "Notes", "old text")
+        await store.index_document("t1", "1", "Notes", "new text")
+
+        assert len(provider.calls) == 2
+
+        await store.remove_document("1")
+        assert store.get_stats()["documents"] == 0
+
+    @pytest.mark.asyncio
+    async def test_request_content_never_replaces_stored_vectors(self, monkeypatch):
+        """Test that searches with altered content neither overwrite nor persist a saved document's vectors."""
+        provider = CountingProvider()
+        store = _store(provider)
+        persisted = []
+
+        async def persist(tenant_key, entries):
+            persisted.extend(doc_id for doc_id, _, _ in entries)
+
+        monkeypatch.setattr(store, "_persist", persist)
+        await store.index_document("t1", "1", "Quarterly budget", "revenue forecast and budget for the finance team")
+        index = await store.get_index("t1")
+        stored_hash = index.content_hash("1")
+
+        forged = [{"id": "1", "title": "Quarterly budget", "text": "hotel booking"}, *_docs()[1:]]
+        matches = await store.search("t1", "hotel booking", forged, top_k=3)
+        similar = await store.similar("t1", {"id": "1", "text": "anything"}, _docs()[1:], top_k=1)
+        await asyncio.sleep(0)
+
+        assert index.content_hash("1") == stored_hash
+        assert persisted == ["1"]
+        assert matches[0][0] in {"1", "2"}
+        assert similar[0][0] in {"2", "3"}
+        assert all("anything" not in call for call in provider.calls)
+
+
+class TestDocsAIServiceSearch:
+    """Test that the AI service ranks through the vector index."""
+
+    @pytest.mark.asyncio
+    async def test_semantic_and_similar_search(self):
+        """Test semantic_search and find_similar_documents with the local provider."""
+        from services.docs_ai_service import DocsAIService
+
+        service = DocsAIService()
+        service.vector_store = _store()
+        documents = [{"id": d["id"], "title": d["title"], "content": f"<p>{d['text']}</p>"} for d in _docs()]
+
+        results = await service.semantic_search("interview engineers", documents, top_k=2, tenant_id="t1")
+        similar = await service.find_similar_documents(
+            "9", "<p>budget forecast for the finance team</p>", documents, top_k=1, tenant_id="t1"
+        )
+
+        assert results[0]["id"] == "3"
+        assert results[0]["snippet"].startswith("Hiring")
+        assert similar[0]["id"] == "1"
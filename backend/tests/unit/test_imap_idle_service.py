@@ -0,0 +1,84 @@
+"""
+IMAP IDLE Watcher Unit Tests
+"""
+
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def _watcher(uids=(10, 11, 12)):
+    from services.imap_idle_service import IdleWatcher
+
+    async def on_event(event):
+        pass
+
+    watcher = IdleWatcher("imap.test", 993, "a@example.com", "pw", on_event, asyncio.Semaphore(1))
+    watcher.uids = list(uids)
+    watcher.exists = len(uids)
+    return watcher
+
+
+class TestUntaggedUpdates:
+    """Test translation of untagged IDLE responses into events."""
+
+    def test_expunge_resolves_sequence_to_uid(self):
+        """Test that EXPUNGE sequence numbers map to the right UID."""
+        watcher = _watcher()
+
+        assert watcher._handle_untagged([b"* 2 EXPUNGE"]) is True
+
+        assert watcher.uids == [10, 12]
+        assert watcher._events == [{"type": "expunge", "folder": "INBOX", "uid": 11}]
+
+    def test_exists_flags_pending_new_messages(self):
+        """Test that a higher EXISTS count marks messages to fetch."""
+        watcher = _watcher()
+
+        assert watcher._handle_untagged([b"* 4 EXISTS"]) is True
+        assert watcher.exists == 4
+        assert watcher._handle_untagged([b"* 4 EXISTS"]) is True
+        assert watcher._handle_untagged([b"* 3 EXISTS"]) is False
+
+    def test_flag_fetch_without_uid_uses_sequence_map(self):
+        """Test that unsolicited FLAGS updates carry the message UID."""
+        watcher = _watcher()
+
+        watcher._handle_untagged([b"* 3 FETCH (FLAGS (\\Seen) MODSEQ (77))"])
+
+        event = watcher._events[0]
+        assert (event["type"], event["uid"], event["read"], event["modseq"]) == ("flags", 12, True, 77)
+
+    def test_new_message_fetch_builds_preview(self):
+        """Test that a NOTIFY/catch-up FETCH for the next sequence is a new message."""
+        watcher = _watcher()
+        header = b"From: Asha <asha@example.com>\r\nSubject: Lunch?\r\n\r\n"
+
+        watcher._handle_untagged([
+            (b"* 4 FETCH (UID 20 FLAGS () BODY[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)] {%d}" % len(header), header),
+            b")",
+        ])
+
+        assert watcher.uids == [10, 11, 12, 20]
+        event = watcher._events[0]
+        assert event["type"] == "new"
+        assert event["preview"]["subject"] == "Lunch?"
+        assert event["read"] is False
+
+
+class TestResponseReader:
+    """Test reading responses that contain literals."""
+
+    @pytest.mark.asyncio
+    async def test_read_response_splices_literal(self):
+        """Test that a literal and the rest of its line form one response."""
+        watcher = _watcher()
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"* 1 FETCH (UID 5 BODY[HEADER] {5}\r\nabcde FLAGS ())\r\n* OK next\r\n")
+        watcher._reader = reader
+
+        response = await watcher._read_response()
+
+        assert response == [(b"* 1 FETCH (UID 5 BODY[HEADER] {5}", b"abcde"), b" FLAGS ())"]
+        assert await watcher._read_response() == [b"* OK next"]
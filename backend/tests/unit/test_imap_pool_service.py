@@ -0,0 +1,129 @@
+"""
+IMAP Connection Pool Unit Tests
+"""
+
+import imaplib
+import pytest
+from unittest.mock import MagicMock
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Pool whose logins return mock connections instead of dialing IMAP."""
+    from services.imap_pool_service import IMAPConnectionPool
+
+    pool = IMAPConnectionPool(host="imap.test", port=993, size_per_user=2)
+    pool.opened = []
+
+    def fake_open(email, password):
+        conn = MagicMock(name=f"imap-{len(pool.opened)}")
+        pool.opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(pool, "_open", fake_open)
+    return pool
+
+
+class TestIMAPConnectionPool:
+    """Test connection reuse and recovery."""
+
+    @pytest.mark.asyncio
+    async def test_connection_is_reused_across_operations(self, pool):
+        """Test that sequential operations share one login."""
+        first = await pool.run("a@example.com", "pw", lambda imap: imap)
+        second = await pool.run("a@example.com", "pw", lambda imap: imap)
+
+        assert first is second
+        assert len(pool.opened) == 1
+        assert pool.get_stats()["reuses"] == 1
+        await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_password_change_gets_fresh_login(self, pool):
+        """Test that pools are keyed by credentials, not just address."""
+        await pool.run("a@example.com", "old", lambda imap: imap)
+        await pool.run("a@example.com", "new", lambda imap: imap)
+
+        assert len(pool.opened) == 2
+        await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_dropped_connection_is_retried_once(self, pool):
+        """Test that an aborted connection is discarded and the call retried."""
+        calls = []
+
+        def operation(imap):
+            calls.append(imap)
+            if len(calls) == 1:
+                raise imaplib.IMAP4.abort("socket closed")
+            return "ok"
+
+        assert await pool.run("a@example.com", "pw", operation) == "ok"
+        assert calls[0] is not calls[1]
+        assert pool.get_stats()["reconnects"] == 1
+        await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_discard_closes_idle_connections(self, pool):
+        """Test that discarding a mailbox drops its pooled logins."""
+        await pool.run("a@example.com", "pw", lambda imap: imap)
+
+        pool.discard("a@example.com")
+
+        assert pool.get_stats()["idle"] == 0
+        await pool.run("a@example.com", "pw", lambda imap: imap)
+        assert len(pool.opened) == 2
+        await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_operation_holds_connection_until_done(self, pool):
+        """Test that a cancelled caller does not return a busy connection to the pool."""
+        import asyncio
+        import threading
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow(imap):
+            started.set()
+            release.wait(5)
+
+        task = asyncio.create_task(pool.run("a@example.com", "pw", slow))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        await asyncio.sleep(0.05)
+
+        assert pool.get_stats()["in_use"] == 1
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        stats = pool.get_stats()
+        assert (stats["in_use"], stats["idle"]) == (0, 1)
+        await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_evictor_keeps_pool_during_login(self, pool, monkeypatch):
+        """Test that a pool with a login in progress survives eviction and keeps the new connection."""
+        import asyncio
+        import threading
+        from services import imap_pool_service
+
+        monkeypatch.setattr(imap_pool_service, "EVICTION_INTERVAL_SECONDS", 0.01)
+        fake_open, logging_in, release = pool._open, threading.Event(), threading.Event()
+
+        def slow_open(email, password):
+            logging_in.set()
+            release.wait(5)
+            return fake_open(email, password)
+
+        monkeypatch.setattr(pool, "_open", slow_open)
+        task = asyncio.create_task(pool.run("a@example.com", "pw", lambda imap: imap))
+        await asyncio.get_running_loop().run_in_executor(None, logging_in.wait, 5)
+        await asyncio.sleep(0.05)
+
+        assert pool.get_stats()["mailboxes"] == 1
+        release.set()
+        await task
+        assert pool.get_stats()["idle"] == 1
+        await pool.shutdown()
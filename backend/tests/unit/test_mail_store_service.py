@@ -0,0 +1,121 @@
+"""
+Mail Store Service Unit Tests
+"""
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def _row(uid, message_id=None, in_reply_to=None, references=(), subject="Hello"):
+    from services.mail_store_service import message_row
+
+    return message_row("a@example.com", "INBOX", uid, {
+        "subject": subject,
+        "message_id": f"<{message_id}>" if message_id else "",
+        "in_reply_to": f"<{in_reply_to}>" if in_reply_to else "",
+        "references": " ".join(f"<{ref}>" for ref in references),
+        "date": "Mon, 02 Feb 2026 10:00:00 +0530",
+        "flags": ["\\Seen"],
+    })
+
+
+class TestMessageRow:
+    """Test conversion of sync summaries into metadata rows."""
+
+    def test_headers_are_normalized(self):
+        """Test that ids lose angle brackets and dates become naive UTC."""
+        row = _row(7, message_id="m1@x", references=("r1@x", "r2@x"), subject="Re: Fwd: Budget")
+
+        assert row["message_id"] == "m1@x"
+        assert row["references"] == ["r1@x", "r2@x"]
+        assert row["subject_key"] == "budget"
+        assert row["sent_at"].tzinfo is None
+        assert row["sent_at"].hour == 4
+        assert row["is_read"] is True
+
+
+class TestThreadResolver:
+    """Test incremental thread assignment."""
+
+    def _resolver(self, by_message_id=None, by_subject=None, replies=None):
+        from services.mail_store_service import ThreadResolver
+
+        return ThreadResolver(by_message_id or {}, by_subject or {}, replies or {})
+
+    def test_reply_joins_stored_parent_thread(self):
+        """Test that In-Reply-To finds the parent's thread in the store."""
+        resolver = self._resolver(by_message_id={"root@x": "root@x"})
+
+        thread_id, merges = resolver.resolve(_row(2, "reply@x", in_reply_to="root@x", subject="Other"))
+
+        assert thread_id == "root@x"
+        assert merges == set()
+
+    def test_references_used_when_parent_missing(self):
+        """Test that an older reference links the thread when In-Reply-To is unknown."""
+        resolver = self._resolver(by_message_id={"root@x": "root@x"})
+
+        thread_id, _ = resolver.resolve(_row(3, "c@x", in_reply_to="gone@x", references=("root@x", "gone@x"), subject="Other"))
+
+        assert thread_id == "root@x"
+
+    def test_subject_fallback(self):
+        """Test that unlinked messages group by normalized subject."""
+        resolver = self._resolver(by_subject={"quarterly plan": "t1"})
+
+        thread_id, _ = resolver.resolve(_row(4, "new@x", subject="RE: Quarterly plan"))
+
+        assert thread_id == "t1"
+
+    def test_new_thread_uses_message_id(self):
+        """Test that an unrelated message starts its own thread."""
+        resolver = self._resolver()
+
+        assert resolver.resolve(_row(5, "solo@x", subject="Solo"))[0] == "solo@x"
+        assert resolver.resolve(_row(6, subject=""))[0] == "thread_6"
+
+    def test_parent_arriving_after_replies_merges_their_threads(self):
+        """Test that a late parent pulls separate reply threads together."""
+        resolver = self._resolver(replies={"root@x": {"a@x", "b@x"}})
+
+        thread_id, merges = resolver.resolve(_row(1, "root@x", subject="Unique"))
+
+        assert thread_id == "a@x"
+        assert merges == {"b@x"}
+
+    def test_batch_messages_see_each_other(self):
+        """Test that a reply later in the same batch joins its parent."""
+        resolver = self._resolver()
+
+        root_thread, _ = resolver.resolve(_row(1, "root@x", subject="Launch"))
+        reply_thread, _ = resolver.resolve(_row(2, "r@x", in_reply_to="root@x", subject="Different"))
+
+        assert reply_thread == root_thread
+
+
+class TestSummarizeThread:
+    """Test thread aggregate computation."""
+
+    def test_aggregates_use_oldest_and_latest(self):
+        """Test counts, dates and preview come from the right messages."""
+        from datetime import datetime
+        from services.mail_store_service import summarize_thread
+
+        rows = [
+            {"uid": 2, "subject": "Re: Plan", "from_address": "B <b@x.com>", "to_addresses": "a@x.com",
+             "date_header": "late", "sent_at": datetime(2026, 2, 2), "preview": "latest", "is_read": False,
+             "subject_key": "plan"},
+            {"uid": 1, "subject": "Plan", "from_address": "A <a@x.com>", "to_addresses": "b@x.com",
+             "date_header": "early", "sent_at": datetime(2026, 2, 1), "preview": "first", "is_read": True,
+             "subject_key": "plan"},
+        ]
+
+        summary = summarize_thread("t", rows)
+
+        assert summary["subject"] == "Plan"
+        assert summary["message_count"] == 2
+        assert summary["unread_count"] == 1
+        assert summary["preview"] == "latest"
+        assert (summary["oldest_date"], summary["latest_date"]) == ("early", "late")
+        assert summary["participants"] == ["a@x.com", "b@x.com"]
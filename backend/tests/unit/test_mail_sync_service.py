@@ -0,0 +1,206 @@
+"""
+Mail Sync Service Unit Tests
+"""
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+ALTERNATIVE_WITH_PDF = (
+    b'((("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 10 1 NIL NIL NIL NIL)'
+    b'("text" "html" ("charset" "utf-8") NIL NIL "7bit" 10 1 NIL NIL NIL NIL) "alternative" NIL NIL NIL NIL)'
+    b'("application" "pdf" ("name" "q3.pdf") NIL NIL "base64" 100 NIL ("attachment" ("filename" "q3.pdf")) NIL NIL)'
+    b' "mixed" ("boundary" "b1") NIL NIL NIL)'
+)
+
+
+class FakeIMAP:
+    """Minimal stand-in for a selected imaplib connection."""
+
+    def __init__(self):
+        self.uidvalidity = 1
+        self.modseq = 10
+        self.messages = {}  # uid -> (flags, subject)
+        self.commands = []
+
+    def add(self, uid, subject, flags=""):
+        self.messages[uid] = (flags, subject)
+
+    def select(self, folder, readonly=False):
+        self._responses = {
+            "UIDVALIDITY": [str(self.uidvalidity).encode()],
+            "UIDNEXT": [str(max(self.messages, default=0) + 1).encode()],
+            "HIGHESTMODSEQ": [str(self.modseq).encode()],
+        }
+        return "OK", [str(len(self.messages)).encode()]
+
+    def response(self, code):
+        return code, self._responses.get(code, [None])
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        if command == "SEARCH":
+            return "OK", [" ".join(str(uid) for uid in sorted(self.messages)).encode()]
+
+        uids = self._expand(args[0])
+        items = args[1]
+        data = []
+        for uid in uids:
+            flags, subject = self.messages[uid]
+            if "CHANGEDSINCE" in items:
+                data.append(f"{uid} (UID {uid} FLAGS ({flags}) MODSEQ ({self.modseq}))".encode())
+            elif "BODYSTRUCTURE" in items:
+                header = f"Subject: {subject}\r\n\r\n".encode()
+                prefix = (
+                    f"{uid} (UID {uid} FLAGS ({flags}) RFC822.SIZE 512 BODYSTRUCTURE ".encode()
+                    + ALTERNATIVE_WITH_PDF
+                    + f" BODY[HEADER.FIELDS (SUBJECT)] {{{len(header)}}}".encode()
+                )
+                data.extend([(prefix, header), b")"])
+            elif "BODY.PEEK[" in items:
+                body = f"Preview of {subject}".encode()
+                data.extend([(f"{uid} (UID {uid} BODY[1.1]<0> {{{len(body)}}}".encode(), body), b")"])
+            else:
+                data.append(f"{uid} (UID {uid} FLAGS ({flags}))".encode())
+        return "OK", data
+
+    def _expand(self, uid_set):
+        uids = []
+        for chunk in uid_set.split(","):
+            start, _, end = chunk.partition(":")
+            last = max(self.messages) if end == "*" else int(end or start)
+            uids.extend(uid for uid in range(int(start), last + 1) if uid in self.messages)
+        return uids
+
+    def fetch_commands(self):
+        return [c for c in self.commands if c[0] == "FETCH"]
+
+
+class TestFetchParsing:
+    """Test IMAP FETCH response and BODYSTRUCTURE parsing."""
+
+    def test_parse_fetch_response_splices_literals(self):
+        """Test that literal values land under their item names."""
+        from services.mail_sync_service import parse_fetch_response
+
+        data = [
+            (b'1 (UID 42 FLAGS (\\Seen \\Flagged) BODY[HEADER.FIELDS (SUBJECT)] {14}', b"Subject: Hi\r\n\r\n"),
+            b")",
+        ]
+
+        items = parse_fetch_response(data)[42]
+
+        assert items["FLAGS"] == ["\\Seen", "\\Flagged"]
+        assert items["BODY[HEADER.FIELDS (SUBJECT)]"] == b"Subject: Hi\r\n\r\n"
+
+    def test_bodystructure_numbers_nested_parts(self):
+        """Test that nested multiparts get dotted section numbers."""
+        from services.mail_sync_service import parse_bodystructure, parse_fetch_response, pick_preview_part
+
+        structure = parse_fetch_response([b"1 (UID 1 BODYSTRUCTURE " + ALTERNATIVE_WITH_PDF + b")"])[1]["BODYSTRUCTURE"]
+        parts = parse_bodystructure(structure)
+
+        assert [p.section for p in parts] == ["1.1", "1.2", "2"]
+        assert [p.is_attachment for p in parts] == [False, False, True]
+        assert pick_preview_part(parts).section == "1.1"
+
+    def test_decode_preview_handles_truncated_base64(self):
+        """Test that a partial base64 peek decodes cleanly."""
+        from services.mail_sync_service import BodyPart, decode_preview
+
+        part = BodyPart(section="1", mime_type="text/plain", encoding="base64", charset="utf-8", is_attachment=False)
+
+        assert decode_preview(b"SGVsbG8gd29ybGQh\r\nSGVs", part) == "Hello world!Hel"
+
+    def test_uid_set_compresses_ranges(self):
+        """Test that consecutive UIDs collapse into ranges."""
+        from services.mail_sync_service import uid_set
+
+        assert uid_set([7, 1, 2, 3, 9, 10]) == "1:3,7,9:10"
+
+
+class TestIncrementalSync:
+    """Test cursor-based folder listing."""
+
+    def test_first_listing_batches_headers_and_previews(self):
+        """Test that a cold listing uses one header fetch and one preview fetch."""
+        from services.mail_sync_service import MailSyncService
+
+        imap = FakeIMAP()
+        for uid in range(1, 6):
+            imap.add(uid, f"Message {uid}", flags="\\Seen" if uid % 2 else "")
+
+        messages, total = MailSyncService().list_folder(imap, "a@example.com", "INBOX", limit=3)
+
+        assert total == 5
+        assert [m["id"] for m in messages] == ["5", "4", "3"]
+        assert [m["read"] for m in messages] == [True, False, True]
+        assert messages[0]["has_attachments"] is True
+        assert messages[0]["preview"] == "Preview of Message 5"
+        assert len(imap.fetch_commands()) == 2
+
+    def test_repeat_listing_fetches_only_new_messages(self):
+        """Test that a warm listing only fetches UIDs it has not seen."""
+        from services.mail_sync_service import MailSyncService
+
+        service = MailSyncService()
+        imap = FakeIMAP()
+        for uid in range(1, 4):
+            imap.add(uid, f"Message {uid}")
+        service.list_folder(imap, "a@example.com", "INBOX")
+
+        imap.add(4, "Message 4")
+        imap.modseq += 1
+        imap.commands.clear()
+        messages, _ = service.list_folder(imap, "a@example.com", "INBOX")
+
+        header_fetches = [c for c in imap.fetch_commands() if "BODYSTRUCTURE" in c[2]]
+        assert [c[1] for c in header_fetches] == ["4"]
+        assert [m["id"] for m in messages] == ["4", "3", "2", "1"]
+
+    def test_unchanged_folder_is_served_from_cursor(self):
+        """Test that an unchanged folder needs no SEARCH or FETCH."""
+        from services.mail_sync_service import MailSyncService
+
+        service = MailSyncService()
+        imap = FakeIMAP()
+        imap.add(1, "Only")
+        service.list_folder(imap, "a@example.com", "INBOX")
+
+        imap.commands.clear()
+        messages, _ = service.list_folder(imap, "a@example.com", "INBOX")
+
+        assert imap.commands == []
+        assert messages[0]["subject"] == "Only"
+
+    def test_flag_changes_use_changedsince(self):
+        """Test that flag changes are picked up via the stored modseq."""
+        from services.mail_sync_service import MailSyncService
+
+        service = MailSyncService()
+        imap = FakeIMAP()
+        imap.add(1, "Unread")
+        service.list_folder(imap, "a@example.com", "INBOX")
+
+        imap.add(1, "Unread", flags="\\Seen")
+        imap.modseq += 1
+        messages, _ = service.list_folder(imap, "a@example.com", "INBOX")
+
+        assert any("CHANGEDSINCE 10" in c[2] for c in imap.fetch_commands())
+        assert messages[0]["read"] is True
+
+    def test_uidvalidity_change_resets_cache(self):
+        """Test that a renumbered folder is fully refetched."""
+        from services.mail_sync_service import MailSyncService
+
+        service = MailSyncService()
+        imap = FakeIMAP()
+        imap.add(1, "Old")
+        service.list_folder(imap, "a@example.com", "INBOX")
+
+        imap.uidvalidity = 2
+        imap.add(1, "Renumbered")
+        messages, _ = service.list_folder(imap, "a@example.com", "INBOX")
+
+        assert messages[0]["subject"] == "Renumbered"
@@ -0,0 +1,66 @@
+"""
+Mailcow Service Unit Tests
+"""
+
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def folder_search(monkeypatch):
+    """Fake folder searches with per-folder latency and hit counts."""
+    from services import mailcow_service as module
+
+    folders = {"Archive": (0.05, 3), "INBOX": (0.01, 2), "Sent": (0.02, 0), "Spam": (0.5, 9)}
+    started = []
+
+    async def get_folders(email, password):
+        return list(folders)
+
+    def fake_folder_search(folder, criteria, limit):
+        def search(mail):
+            return folder, limit
+
+        return search
+
+    async def fake_run(email, password, search):
+        folder, limit = search(None)
+        started.append(folder)
+        delay, hits = folders[folder]
+        await asyncio.sleep(delay)
+        return [{"id": str(i), "folder": folder} for i in range(min(hits, limit()))]
+
+    service = module.MailcowService()
+    monkeypatch.setattr(service, "get_folders", get_folders)
+    monkeypatch.setattr(service, "_folder_search", fake_folder_search)
+    monkeypatch.setattr(module.imap_pool, "run", fake_run)
+    service.started = started
+    return service
+
+
+class TestSearchAllFolders:
+    """Test concurrent all-folder search."""
+
+    @pytest.mark.asyncio
+    async def test_folders_stream_in_completion_order(self, folder_search):
+        """Test that hits arrive per folder as each search finishes, INBOX first."""
+        seen = [
+            (folder, len(results))
+            async for folder, results in folder_search.iter_search_all_folders("a@x", "pw", "q", limit=10)
+        ]
+
+        assert folder_search.started[0] == "INBOX"
+        assert seen == [("INBOX", 2), ("Archive", 3), ("Spam", 5)]
+
+    @pytest.mark.asyncio
+    async def test_limit_stops_slow_folders(self, folder_search):
+        """Test that reaching the hit limit cancels searches still running."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        results = await folder_search.search_all_folders("a@x", "pw", "q", limit=4)
+
+        assert {folder: len(hits) for folder, hits in results.items()} == {"INBOX": 2, "Archive": 2}
+        assert loop.time() - start < 0.4
@@ -0,0 +1,126 @@
+"""
+Media Streaming Unit Tests
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+pytestmark = pytest.mark.unit
+
+
+async def _body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+class FakeDownload:
+    """Streaming WebDAV response stand-in."""
+
+    def __init__(self, status_code, headers, chunks=()):
+        self.status_code = status_code
+        self.headers = headers
+        self.chunks = list(chunks)
+        self.chunk_sizes = []
+        self.aclose = AsyncMock()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    def iter_chunks(self, chunk_size):
+        self.chunk_sizes.append(chunk_size)
+        return self._iterate()
+
+
+class TestParseRange:
+    """Test Range header parsing."""
+
+    def test_ranges(self):
+        """Test explicit, open-ended, suffix and ignored ranges."""
+        from services.media_stream_service import parse_range
+
+        assert parse_range("bytes=0-99", 1000) == (0, 99)
+        assert parse_range("bytes=900-", 1000) == (900, 999)
+        assert parse_range("bytes=-100", 1000) == (900, 999)
+        assert parse_range("bytes=500-5000", 1000) == (500, 999)
+        assert parse_range("bytes=0-1,5-6", 1000) is None
+        assert parse_range("items=0-1", 1000) is None
+        assert parse_range(None, 1000) is None
+
+    def test_unsatisfiable(self):
+        """Test that a range starting past the end is rejected."""
+        from services.media_stream_service import parse_range, RangeNotSatisfiable
+
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=1000-", 1000)
+
+
+class TestLocalFile:
+    """Test ranged serving of local recordings."""
+
+    @pytest.mark.asyncio
+    async def test_partial_and_conditional_responses(self, tmp_path):
+        """Test 206, If-Range fallback to 200, 304 and 416."""
+        from services.media_stream_service import stream_local_file
+
+        path = tmp_path / "rec.mp4"
+        path.write_bytes(bytes(range(256)) * 4)
+
+        partial = stream_local_file(str(path), {"range": "bytes=10-19"}, "video/mp4")
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == "bytes 10-19/1024"
+        assert await _body(partial) == bytes(range(10, 20))
+
+        etag = partial.headers["etag"]
+        stale = stream_local_file(str(path), {"range": "bytes=10-19", "if-range": '"old"'}, "video/mp4")
+        assert stale.status_code == 200
+        assert len(await _body(stale)) == 1024
+
+        assert stream_local_file(str(path), {"if-none-match": etag}, "video/mp4").status_code == 304
+        assert stream_local_file(str(path), {"range": "bytes=2000-"}, "video/mp4").status_code == 416
+
+
+class TestNextcloudProxy:
+    """Test relaying WebDAV downloads."""
+
+    @pytest.mark.asyncio
+    async def test_range_is_forwarded_and_body_relayed(self, monkeypatch):
+        """Test that Range goes upstream and the 206 body streams through in chunks."""
+        from services import media_stream_service
+
+        download = FakeDownload(
+            206,
+            {"content-range": "bytes 0-5/100", "content-length": "6", "etag": '"abc"', "x-other": "1"},
+            [b"abc", b"def"]
+        )
+        open_download = AsyncMock(return_value=download)
+        monkeypatch.setattr(media_stream_service.nextcloud_service, "open_download", open_download)
+
+        response = await media_stream_service.stream_from_nextcloud(
+            "admin", "secret", "/Videos/a.mp4",
+            {"range": "bytes=0-5", "cookie": "session"}, "video/mp4", filename="a.mp4"
+        )
+
+        assert open_download.await_args[0][3] == {"range": "bytes=0-5"}
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 0-5/100"
+        assert "x-other" not in response.headers
+        assert await _body(response) == b"abcdef"
+        assert download.chunk_sizes == [media_stream_service._chunk_size()]
+
+        await response.background()
+        download.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_not_modified_closes_upstream(self, monkeypatch):
+        """Test that a 304 from storage is passed on without a body."""
+        from services import media_stream_service
+
+        download = FakeDownload(304, {"etag": '"abc"'})
+        monkeypatch.setattr(media_stream_service.nextcloud_service, "open_download", AsyncMock(return_value=download))
+
+        response = await media_stream_service.stream_from_nextcloud(
+            "admin", "secret", "/Videos/a.mp4", {"if-none-match": '"abc"'}, "video/mp4"
+        )
+
+        assert response.status_code == 304
+        download.aclose.assert_awaited_once()
@@ -0,0 +1,143 @@
+"""
+Pooled Nextcloud Client Unit Tests
+"""
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def _pool(monkeypatch, handler, retries=2):
+    import httpx
+    from services import nextcloud_client
+
+    monkeypatch.setattr(nextcloud_client, "retry_delay", lambda attempt: 0)
+    pool = nextcloud_client.NextcloudHTTPClient("https://cloud.test", retries=retries)
+    monkeypatch.setattr(pool, "_new_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return pool
+
+
+class TestRetries:
+    """Test the retry policy."""
+
+    @pytest.mark.asyncio
+    async def test_idempotent_request_retried_on_503(self, monkeypatch):
+        """Test that a GET is retried until it succeeds, and the attempts are recorded."""
+        import httpx
+
+        statuses = [503, 502, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0))
+
+        pool = _pool(monkeypatch, handler)
+        response = await pool.request("download_file", "GET", "https://cloud.test/remote.php/dav/files/a/x")
+
+        assert response.status_code == 200
+        assert pool.stats["retries"] == 2
+        assert pool.histograms["download_file"].count == 3
+        assert pool.histograms["download_file"].errors == 2
+
+    @pytest.mark.asyncio
+    async def test_non_idempotent_and_streamed_bodies_not_retried(self, monkeypatch):
+        """Test that POST/MOVE and generator bodies are sent only once."""
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            return httpx.Response(503)
+
+        pool = _pool(monkeypatch, handler)
+
+        async def body():
+            yield b"data"
+
+        await pool.request("create_share_link", "POST", "https://cloud.test/ocs", data={"path": "/a"})
+        await pool.request("move_file", "MOVE", "https://cloud.test/dav/a")
+        await pool.request("upload_stream", "PUT", "https://cloud.test/dav/a", content=body())
+
+        assert calls == ["POST", "MOVE", "PUT"]
+
+    @pytest.mark.asyncio
+    async def test_transport_error_retried_then_raised(self, monkeypatch):
+        """Test that connection failures are retried and the last one propagates."""
+        import httpx
+
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        pool = _pool(monkeypatch, handler, retries=1)
+
+        with pytest.raises(httpx.ConnectError):
+            await pool.request("list_files", "PROPFIND", "https://cloud.test/dav/")
+        assert pool.stats["transport_errors"] == 2
+
+
+class TestPooling:
+    """Test connection reuse across service calls."""
+
+    @pytest.mark.asyncio
+    async def test_service_calls_share_one_client(self, monkeypatch):
+        """Test that NextcloudService operations go through a single pooled client."""
+        import httpx
+        from services import nextcloud_client
+        from services.nextcloud_service import NextcloudService
+
+        def handler(request):
+            return httpx.Response(201 if request.method in ("MKCOL", "PUT") else 204)
+
+        pool = _pool(monkeypatch, handler)
+        monkeypatch.setattr(nextcloud_client, "_pools", {"https://cloud.test": pool})
+        service = NextcloudService()
+        service.base_url = "https://cloud.test/nextcloud"
+
+        assert await service.create_folder("alice", "pw", "/Drive")
+        assert await service.upload_file("alice", "pw", "/Drive/a.txt", b"hi")
+        for name in ("a", "b", "c"):
+            assert await service.delete_file("alice", "pw", f"/Drive/{name}")
+
+        stats = nextcloud_client.get_nextcloud_client_stats()["https://cloud.test"]
+        assert stats["clients_created"] == 1
+        assert stats["operations"]["delete_file"]["count"] == 3
+        assert set(stats["operations"]) == {"create_folder", "upload_file", "delete_file"}
+
+    @pytest.mark.asyncio
+    async def test_streaming_downloads_use_their_own_pool(self, monkeypatch):
+        """Test that open_download holds a connection from the stream pool, not the shared one."""
+        import httpx
+        from services import nextcloud_client
+        from services.nextcloud_service import NextcloudService
+
+        shared = _pool(monkeypatch, lambda request: httpx.Response(204))
+        streams = _pool(monkeypatch, lambda request: httpx.Response(200, content=b"video"))
+        monkeypatch.setattr(nextcloud_client, "_pools", {"https://cloud.test": shared})
+        monkeypatch.setattr(nextcloud_client, "_stream_pools", {"https://cloud.test": streams})
+        service = NextcloudService()
+        service.base_url = "https://cloud.test/nextcloud"
+
+        download = await service.open_download("alice", "pw", "/Videos/a.mp4")
+        await download.aclose()
+
+        stats = nextcloud_client.get_nextcloud_client_stats()
+        assert stats["stream:https://cloud.test"]["operations"]["open_download"]["count"] == 1
+        assert stats["https://cloud.test"]["requests"] == 0
+
+
+class TestLatencyHistogram:
+    """Test histogram bookkeeping."""
+
+    def test_percentiles_use_bucket_bounds(self):
+        """Test that percentiles report bucket upper bounds, capped at the observed max."""
+        from services.nextcloud_client import LatencyHistogram
+
+        histogram = LatencyHistogram()
+        for elapsed in [3] * 90 + [40] * 9 + [20000]:
+            histogram.observe(elapsed)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["p50_ms"] == 5.0
+        assert snapshot["p95_ms"] == 50.0
+        assert snapshot["max_ms"] == 20000
+        assert snapshot["buckets"]["inf"] == 1
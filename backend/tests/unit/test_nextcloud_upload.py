@@ -0,0 +1,165 @@
+"""
+Nextcloud Streaming Upload Unit Tests
+"""
+
+import asyncio
+import hashlib
+import io
+import pytest
+
+pytestmark = pytest.mark.unit
+
+MB = 1024 * 1024
+
+
+class FakeNextcloud:
+    """WebDAV server stand-in recording every request."""
+
+    def __init__(self, existing=None, fail_chunk=None):
+        self.requests = []
+        self.chunks = {}
+        self.existing = existing
+        self.fail_chunk = fail_chunk
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handler(self, request):
+        import httpx
+
+        self.requests.append((request.method, request.url.path, request.headers))
+        if request.method == "PROPFIND":
+            if self.existing is None:
+                return httpx.Response(404)
+            responses = "".join(
+                f"<d:response><d:href>{request.url.path}/{number:05d}</d:href>"
+                f"<d:propstat><d:prop><oc:checksums><oc:checksum>SHA1:{hashlib.sha1(chunk).hexdigest()}"
+                f"</oc:checksum></oc:checksums></d:prop></d:propstat></d:response>"
+                for number, chunk in self.existing.items()
+            )
+            return httpx.Response(
+                207,
+                content=f'<d:multistatus xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns">{responses}</d:multistatus>'
+            )
+        if request.method == "PUT":
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            name = request.url.path.rsplit("/", 1)[-1]
+            if name == self.fail_chunk:
+                return httpx.Response(507)
+            self.chunks[name] = request.content
+            return httpx.Response(201)
+        return httpx.Response(201)
+
+    def methods(self):
+        return [method for method, _, _ in self.requests]
+
+
+def _service(monkeypatch, server, threshold_mb=32, parallelism=2):
+    import httpx
+    from core.config import settings
+    from services.nextcloud_service import NextcloudService
+
+    monkeypatch.setattr(settings, "NEXTCLOUD_CHUNKED_UPLOAD_THRESHOLD_MB", threshold_mb)
+    monkeypatch.setattr(settings, "NEXTCLOUD_UPLOAD_CHUNK_MB", 5)
+    monkeypatch.setattr(settings, "NEXTCLOUD_UPLOAD_PARALLELISM", parallelism)
+    service = NextcloudService()
+    service.base_url = "https://cloud.test"
+    monkeypatch.setattr(
+        service, "_upload_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(server.handler))
+    )
+    return service
+
+
+class TestSingleUpload:
+    """Test uploads below the chunking threshold."""
+
+    @pytest.mark.asyncio
+    async def test_streams_one_put_with_checksum(self, monkeypatch):
+        """Test that a small file goes up in one PUT with its length and SHA-256."""
+        server = FakeNextcloud()
+        service = _service(monkeypatch, server)
+        data = b"hello world" * 1000
+
+        result = await service.upload_stream("alice", "pw", "/Drive/a.txt", io.BytesIO(data), content_type="text/plain")
+
+        assert server.methods() == ["PUT"]
+        assert server.requests[0][2]["content-length"] == str(len(data))
+        assert server.chunks["a.txt"] == data
+        assert result == {"size": len(data), "checksum": hashlib.sha256(data).hexdigest()}
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_file(self, monkeypatch):
+        """Test that max_size is enforced before anything is sent."""
+        server = FakeNextcloud()
+        service = _service(monkeypatch, server)
+
+        with pytest.raises(ValueError):
+            await service.upload_stream("alice", "pw", "/a.bin", b"x" * 100, max_size=10)
+        assert server.requests == []
+
+
+class TestChunkedUpload:
+    """Test Nextcloud chunked upload v2."""
+
+    @pytest.mark.asyncio
+    async def test_parallel_chunks_are_assembled(self, monkeypatch):
+        """Test MKCOL, bounded parallel chunk PUTs and the final MOVE."""
+        server = FakeNextcloud()
+        service = _service(monkeypatch, server, threshold_mb=1, parallelism=2)
+        data = bytes(range(256)) * (12 * MB // 256 + 1)
+
+        result = await service.upload_stream("alice", "pw", "/Videos/big file.mp4", data)
+
+        assert server.methods() == ["MKCOL", "PUT", "PUT", "PUT", "MOVE"]
+        assert b"".join(server.chunks[name] for name in sorted(server.chunks)) == data
+        assert server.peak == 2
+        move = server.requests[-1]
+        assert move[1].endswith("/.file")
+        assert move[2]["oc-total-length"] == str(len(data))
+        assert move[2]["destination"] == "https://cloud.test/remote.php/dav/files/alice/Videos/big%20file.mp4"
+        assert result["checksum"] == hashlib.sha256(data).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_stored_chunks(self, monkeypatch):
+        """Test that retrying with the same upload_id only sends missing chunks or ones whose content changed."""
+        data = b"a" * (12 * MB)
+        server = FakeNextcloud(existing={1: data[:5 * MB], 2: b"b" * (5 * MB)})
+        service = _service(monkeypatch, server, threshold_mb=1, parallelism=1)
+
+        result = await service.upload_stream("alice", "pw", "/big.bin", data, upload_id="abc-123", owner="t1:u1")
+
+        session = service._upload_session_url("alice", "abc-123", "alice", "/big.bin", "t1:u1")
+        assert server.methods() == ["PROPFIND", "PUT", "PUT", "MOVE"]
+        assert server.requests[0][1] == session.split("cloud.test", 1)[1]
+        assert [path.rsplit("/", 1)[-1] for _, path, _ in server.requests[1:3]] == ["00002", "00003"]
+        assert server.requests[1][2]["oc-checksum"] == f"SHA1:{hashlib.sha1(data[5 * MB:10 * MB]).hexdigest()}".upper()
+        assert result["checksum"] == hashlib.sha256(data).hexdigest()
+
+    def test_sessions_are_scoped_to_owner_and_target(self):
+        """Test that the same upload_id maps to different sessions for other users or paths."""
+        from services.nextcloud_service import NextcloudService
+
+        service = NextcloudService()
+        session = service._upload_session_url("admin", "resume-me", "admin", "/Drive/t1/a.bin", "t1:u1")
+
+        assert session == service._upload_session_url("admin", "resume-me", "admin", "/Drive/t1/a.bin", "t1:u1")
+        assert session != service._upload_session_url("admin", "resume-me", "admin", "/Drive/t1/a.bin", "t1:u2")
+        assert session != service._upload_session_url("admin", "resume-me", "admin", "/Drive/t1/b.bin", "t1:u1")
+        assert "resume-me" not in session.rsplit("/", 1)[-1]
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_cleans_up_session(self, monkeypatch):
+        """Test that a rejected chunk aborts the upload and deletes the session."""
+        from services.nextcloud_service import WebDAVUploadError
+
+        server = FakeNextcloud(fail_chunk="00002")
+        service = _service(monkeypatch, server, threshold_mb=1, parallelism=1)
+
+        with pytest.raises(WebDAVUploadError) as error:
+            await service.upload_stream("alice", "pw", "/big.bin", b"a" * (16 * MB))
+
+        assert error.value.status_code == 507
+        assert "MOVE" not in server.methods()
+        assert server.methods()[-1] == "DELETE"
@@ -0,0 +1,150 @@
+"""
+Admin Permission Resolver Unit Tests
+"""
+
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+pytestmark = pytest.mark.unit
+
+TENANT = str(uuid.uuid4())
+ALICE = str(uuid.uuid4())
+BOB = str(uuid.uuid4())
+GROUP = str(uuid.uuid4())
+
+
+def _grant(user_id, permissions, scope_type="global", scope_id=None, expires_at=None):
+    return SimpleNamespace(
+        user_id=uuid.UUID(user_id), scope_type=scope_type, scope_id=scope_id,
+        expires_at=expires_at, permissions=permissions
+    )
+
+
+def _session(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+@pytest.fixture(autouse=True)
+def fresh_resolver(monkeypatch):
+    from services import admin_service, permission_resolver
+
+    resolver = permission_resolver.PermissionResolver(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(permission_resolver, "permission_resolver", resolver)
+    monkeypatch.setattr(admin_service, "permission_resolver", resolver)
+    return resolver
+
+
+class TestCompiledPermissions:
+    """Test wildcard and scope matching."""
+
+    def test_wildcards(self):
+        """Test exact grants, category wildcards and the global wildcard."""
+        from services.permission_resolver import CompiledPermissions
+
+        compiled = CompiledPermissions([("users.*", None), ("billing.read", None)])
+
+        assert compiled.allows("users.read")
+        assert compiled.allows("users.reset_password")
+        assert compiled.allows("billing.read")
+        assert not compiled.allows("billing.write")
+        assert not compiled.allows("billing")
+        assert CompiledPermissions([("*", None)]).allows("docs.manage_templates")
+        assert CompiledPermissions([("user:*", None)]).allows("user:manage")
+
+    def test_scoped_grants(self):
+        """Test that scoped grants only apply to their scope, or to unscoped checks."""
+        from services.permission_resolver import CompiledPermissions
+
+        compiled = CompiledPermissions([("groups.read", None), ("groups.write", ("group", GROUP))])
+
+        assert compiled.allows_many([
+            ("groups.write", ("group", GROUP)),
+            ("groups.write", ("group", "other")),
+            ("groups.read", ("group", "other")),
+            "groups.write",
+        ]) == [True, False, True, True]
+
+
+class TestPermissionResolver:
+    """Test loading, caching and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_check_many_uses_one_query(self, fresh_resolver):
+        """Test that hundreds of row checks and later requests share one load."""
+        db = _session([_grant(ALICE, ["users.read"]), _grant(ALICE, ["groups.*"])])
+        checks = [("groups.write" if n % 2 else "users.delete", None) for n in range(500)]
+
+        results = await fresh_resolver.check_many(db, ALICE, TENANT, checks)
+        assert await fresh_resolver.check(db, ALICE, TENANT, "users.read")
+
+        assert results == [bool(n % 2) for n in range(500)]
+        assert db.execute.await_count == 1
+        assert fresh_resolver.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_resolve_many_loads_missing_users_together(self, fresh_resolver):
+        """Test that users without assignments compile to an empty grant set."""
+        db = _session([_grant(ALICE, ["*"])])
+
+        resolved = await fresh_resolver.resolve_many(db, TENANT, [ALICE, BOB])
+
+        assert resolved[ALICE].allows("billing.write")
+        assert resolved[BOB].permissions == []
+        assert db.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_entry_expires_with_assignment(self, fresh_resolver):
+        """Test that an expiring assignment bounds how long grants are cached."""
+        db = _session([_grant(ALICE, ["users.read"], expires_at=datetime.utcnow() + timedelta(seconds=5))])
+
+        await fresh_resolver.resolve(db, ALICE, TENANT)
+        expires_at = fresh_resolver._entries[fresh_resolver.key(TENANT, ALICE)][1]
+
+        import time
+        assert expires_at - time.monotonic() <= 5
+
+    @pytest.mark.asyncio
+    async def test_role_writes_invalidate(self, fresh_resolver):
+        """Test that admin role and assignment writes drop compiled grants; other writes do not."""
+        from services.permission_resolver import _invalidate_after_admin_role_write, _watch_admin_role_writes
+
+        db = _session([_grant(ALICE, ["users.read"])])
+        await fresh_resolver.resolve(db, ALICE, TENANT)
+
+        conn = SimpleNamespace(info={})
+        _watch_admin_role_writes(conn, None, "UPDATE workspace.admin_roles_audit SET x = 1", {}, None, False)
+        assert conn.info == {} and fresh_resolver.generation == 0
+
+        _watch_admin_role_writes(
+            conn, None, "DELETE FROM workspace.user_admin_roles WHERE id = CAST($1 AS uuid)", {}, None, False
+        )
+        _invalidate_after_admin_role_write(conn)
+        await fresh_resolver.resolve(db, ALICE, TENANT)
+
+        assert db.execute.await_count == 2
+        assert fresh_resolver.get_stats()["invalidations"] == 2
+
+
+class TestAdminRoleService:
+    """Test AdminRoleService on top of the resolver."""
+
+    @pytest.mark.asyncio
+    async def test_permissions_and_checks(self, fresh_resolver):
+        """Test effective permissions and single and batch checks."""
+        from services.admin_service import AdminRoleService
+
+        db = _session([_grant(ALICE, ["users.read", "users.write"]), _grant(ALICE, ["users.read"])])
+        service = AdminRoleService(db)
+
+        assert await service.get_user_permissions(ALICE, TENANT) == ["users.read", "users.write"]
+        assert await service.check_permission(ALICE, TENANT, "users.write")
+        assert await service.check_many(ALICE, TENANT, ["users.read", "users.delete"]) == [True, False]
+        assert db.execute.await_count == 1
+        assert fresh_resolver.get_stats()["checks"] == 3
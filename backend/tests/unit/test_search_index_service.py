@@ -0,0 +1,198 @@
+"""
+Search Index Service Unit Tests
+"""
+
+import pytest
+from uuid import uuid4
+
+pytestmark = pytest.mark.unit
+
+
+class TestTokenizer:
+    """Test tokenizer and posting construction."""
+
+    def test_tokenize_lowercases_and_splits_on_punctuation(self):
+        """Test that terms are lowercased and split on non-word characters."""
+        from services.search_index_service import tokenize
+
+        assert tokenize("Quarterly-Report_v2, FINAL!") == ["quarterly", "report", "v2", "final"]
+
+    def test_tokenize_drops_short_terms(self):
+        """Test that single-character terms are not indexed."""
+        from services.search_index_service import tokenize
+
+        assert tokenize("a b cd") == ["cd"]
+        assert tokenize("a b cd", min_length=1) == ["a", "b", "cd"]
+
+    def test_build_postings_applies_field_boosts(self):
+        """Test that title terms outweigh body terms."""
+        from services.search_index_service import build_postings, FIELD_BOOSTS
+
+        postings = build_postings({"title": "budget", "body": "forecast"})
+
+        assert postings["budget"] == FIELD_BOOSTS["title"]
+        assert postings["forecast"] == FIELD_BOOSTS["body"]
+
+    def test_build_postings_saturates_term_frequency(self):
+        """Test that repeated terms grow logarithmically."""
+        from services.search_index_service import build_postings
+
+        once = build_postings({"body": "invoice"})["invoice"]
+        many = build_postings({"body": "invoice " * 50})["invoice"]
+
+        assert once < many < once * 10
+
+    def test_strip_html_keeps_word_boundaries(self):
+        """Test that adjacent elements do not merge into one term."""
+        from services.search_index_service import strip_html, tokenize
+
+        assert tokenize(strip_html("<p>alpha</p><p>beta</p>")) == ["alpha", "beta"]
+
+
+class TestExtractors:
+    """Test entity extraction for indexing."""
+
+    def test_drive_file_is_partitioned_by_tenant(self):
+        """Test that drive files index under their tenant and owner."""
+        from models.drive_models import DriveFile
+        from services.search_index_service import INDEXED_MODELS
+
+        tenant_id, owner_id = uuid4(), uuid4()
+        file = DriveFile(
+            id=uuid4(), tenant_id=tenant_id, created_by=owner_id,
+            name="Roadmap 2026.pdf", file_type="file", mime_type="application/pdf",
+            description="Product roadmap", is_trashed=False,
+        )
+
+        entity_type, extractor = INDEXED_MODELS[DriveFile]
+        doc = extractor(file)
+
+        assert entity_type == "drive"
+        assert doc["partition_id"] == tenant_id
+        assert doc["owner_id"] == owner_id
+        assert doc["mime_type"] == "application/pdf"
+        assert "roadmap" in doc["postings"]
+
+    def test_trashed_drive_file_is_removed(self):
+        """Test that trashed files produce no index document."""
+        from models.drive_models import DriveFile
+        from services.search_index_service import INDEXED_MODELS
+
+        file = DriveFile(id=uuid4(), tenant_id=uuid4(), created_by=uuid4(), name="old.txt", is_trashed=True)
+
+        assert INDEXED_MODELS[DriveFile][1](file) is None
+
+    def test_mail_draft_is_partitioned_by_user(self):
+        """Test that drafts, which have no tenant, index under their user."""
+        from models.mail_models import MailDraft
+        from services.search_index_service import INDEXED_MODELS
+
+        user_id = uuid4()
+        draft = MailDraft(
+            id=uuid4(), user_id=user_id, subject="Lunch",
+            body="<b>Friday</b> works", to_addresses=[{"name": "Asha", "email": "asha@example.com"}],
+        )
+
+        doc = INDEXED_MODELS[MailDraft][1](draft)
+
+        assert doc["partition_id"] == user_id
+        assert doc["snippet"] == "Friday works"
+        assert {"lunch", "friday", "asha"} <= set(doc["postings"])
+
+
+class TestQuery:
+    """Test how query text becomes term filters."""
+
+    @pytest.mark.asyncio
+    async def test_whole_words_filtered_like_index_terms(self):
+        """Test that short whole words are dropped while the word being typed may be one character."""
+        from unittest.mock import AsyncMock, MagicMock
+        from services.search_index_service import SearchIndexService
+
+        async def terms_for(query):
+            db = MagicMock()
+            db.execute = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=0)))
+            await SearchIndexService().query(db, [uuid4()], query, ['drive'])
+            if not db.execute.await_count:
+                return None
+            params = db.execute.await_args.args[0].compile().params
+            return [value for key, value in params.items() if key.startswith('term_')]
+
+        assert await terms_for("a budget r") == ["budget", "r%"]
+        assert await terms_for("Q3 budget ") == ["q3", "budget"]
+        assert await terms_for("a ") is None
+
+
+class TestBulkStatements:
+    """Test that bulk UPDATE/DELETE statements on indexed models reach the index."""
+
+    @staticmethod
+    def _execute_state(statement, session, ids, is_delete):
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+        from sqlalchemy import inspect
+
+        session.execute = MagicMock(return_value=MagicMock(scalars=MagicMock(
+            return_value=MagicMock(all=MagicMock(return_value=ids))
+        )))
+        return SimpleNamespace(
+            is_update=not is_delete, is_delete=is_delete, statement=statement, parameters={},
+            bind_mapper=inspect(statement.entity_description['entity']), session=session,
+        )
+
+    @pytest.mark.asyncio
+    async def test_deleted_draft_is_removed_from_index(self, monkeypatch):
+        """Test that a draft deleted with delete(MailDraft) is dropped from search on commit."""
+        import asyncio
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock
+        from sqlalchemy import delete
+        from models.mail_models import MailDraft
+        from services.search_index_service import SearchIndexService
+
+        service = SearchIndexService()
+        apply_changes = AsyncMock()
+        monkeypatch.setattr(service, "apply_changes", apply_changes)
+        draft_id, user_id = uuid4(), uuid4()
+        session = SimpleNamespace(info={})
+        statement = delete(MailDraft).where(MailDraft.id == draft_id, MailDraft.user_id == user_id)
+
+        service._do_orm_execute(self._execute_state(statement, session, [draft_id], is_delete=True))
+        service._after_commit(session)
+        await asyncio.gather(*service._tasks)
+
+        apply_changes.assert_awaited_once_with({("mail", draft_id): None}, None)
+        assert session.info == {}
+
+    @pytest.mark.asyncio
+    async def test_updated_pages_are_reindexed(self, monkeypatch):
+        """Test that bulk-updated rows are reloaded after commit, and counter-only updates are ignored."""
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock
+        from sqlalchemy import update
+        from models.sites_models import SitePage
+        from models.mail_models import MailDraft
+        from services.search_index_service import SearchIndexService
+
+        service = SearchIndexService()
+        session = SimpleNamespace(info={})
+        page_id = uuid4()
+        counter = update(SitePage).where(SitePage.id == page_id).values(view_count=SitePage.view_count + 1)
+        service._do_orm_execute(self._execute_state(counter, session, [page_id], is_delete=False))
+        assert session.info == {}
+
+        kept, gone = uuid4(), uuid4()
+        edit = update(MailDraft).where(MailDraft.user_id == uuid4()).values(subject="Quarterly plan")
+        service._do_orm_execute(self._execute_state(edit, session, [kept, gone], is_delete=False))
+        stale = session.info["search_index_stale"]
+        assert stale == {MailDraft: {kept, gone}}
+
+        draft = MailDraft(id=kept, user_id=uuid4(), subject="Quarterly plan", body="", to_addresses=[])
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(scalars=MagicMock(
+            return_value=MagicMock(all=MagicMock(return_value=[draft]))
+        )))
+        changes = await service._reload(db, stale)
+
+        assert changes[("mail", gone)] is None
+        assert "quarterly" in changes[("mail", kept)]["postings"]
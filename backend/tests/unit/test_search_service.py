@@ -0,0 +1,93 @@
+"""
+Search Service Unit Tests
+"""
+
+import pytest
+from uuid import uuid4
+from unittest.mock import AsyncMock, patch
+
+pytestmark = pytest.mark.unit
+
+
+def _result(app: str, score: float) -> dict:
+    return {"id": str(uuid4()), "type": app, "title": app, "score": score}
+
+
+class TestUnifiedSearchMerge:
+    """Test concurrent fan-out merging and cursor pagination."""
+
+    @pytest.fixture
+    def search_service(self):
+        """Create a search service with a mocked session."""
+        from services.search_service import SearchService
+        service = SearchService(AsyncMock())
+        service._log_search = AsyncMock()
+        return service
+
+    def test_cursor_round_trip(self, search_service):
+        """Test that a cursor decodes to the result it was built from."""
+        result = _result("drive", 7.25)
+
+        score, app, entity_id = search_service._decode_cursor(search_service._encode_cursor(result))
+
+        assert (score, app, str(entity_id)) == (7.25, "drive", result["id"])
+
+    def test_invalid_cursor_raises_value_error(self, search_service):
+        """Test that malformed cursors are rejected."""
+        with pytest.raises(ValueError):
+            search_service._decode_cursor("not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_results_are_merged_by_score(self, search_service):
+        """Test that per-app lists are merged into one ranked page."""
+        per_app = {
+            "drive": [_result("drive", 9.0), _result("drive", 3.0)],
+            "notes": [_result("notes", 5.0), _result("notes", 1.0)],
+        }
+
+        async def fake_search(app, *args):
+            return len(per_app[app]), per_app[app]
+
+        with patch.object(search_service, "_search_app_with_budget", side_effect=fake_search):
+            page = await search_service.search(uuid4(), uuid4(), "q", apps=["drive", "notes"], limit=3)
+
+        assert [r["score"] for r in page["results"]] == [9.0, 5.0, 3.0]
+        assert page["total"] == 4
+        assert page["next_cursor"] is not None
+        assert page["partial"] is False
+
+    @pytest.mark.asyncio
+    async def test_failed_app_marks_response_partial(self, search_service):
+        """Test that an app that times out is reported instead of failing the search."""
+        drive_results = [_result("drive", 2.0)]
+
+        async def fake_search(app, *args):
+            return None if app == "mail" else (1, drive_results)
+
+        with patch.object(search_service, "_search_app_with_budget", side_effect=fake_search):
+            page = await search_service.search(uuid4(), uuid4(), "q", apps=["drive", "mail"])
+
+        assert page["partial"] is True
+        assert page["failed_apps"] == ["mail"]
+        assert page["results"] == drive_results
+        assert page["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_shared_items_are_visible(self, search_service, monkeypatch):
+        """Test that shareable apps match own or shared items, and only shared ones for shared_with_me."""
+        from services import search_service as module
+
+        query = AsyncMock(return_value=(0, []))
+        monkeypatch.setattr(module.search_index_service, "query", query)
+        tenant_id, user_id = uuid4(), uuid4()
+
+        for app, shared_with_me in (("sheets", False), ("sheets", True), ("notes", True)):
+            await search_service._search_app(
+                AsyncMock(), app, tenant_id, user_id, "q", None, None, None, None, shared_with_me, 10
+            )
+
+        own, shared_only, notes = [call.kwargs for call in query.await_args_list]
+        assert own["owner_ids"] == [user_id]
+        assert "spreadsheet_shares" in str(own["shared_ids"])
+        assert shared_only["owner_ids"] is None and shared_only["shared_ids"] is not None
+        assert notes["owner_ids"] == [user_id] and notes["shared_ids"] is None
@@ -0,0 +1,219 @@
+"""
+Passport Verified-Token Cache Unit Tests
+"""
+
+import asyncio
+import time
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def _cache(**overrides):
+    from core.security import VerifiedTokenCache
+
+    options = {"max_entries": 100, "ttl_seconds": 300, "negative_ttl_seconds": 30}
+    options.update(overrides)
+    return VerifiedTokenCache(**options)
+
+
+def _verifier(result=None, delay=0.0):
+    calls = []
+
+    async def verify(token):
+        calls.append(token)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return verify, calls
+
+
+USER = {"id": "u1", "email": "a@example.com"}
+
+
+class TestVerifiedTokenCache:
+    """Test caching of Passport verification results."""
+
+    @pytest.mark.asyncio
+    async def test_valid_token_verified_once(self):
+        """Test that repeat requests with the same token are served from cache."""
+        cache = _cache()
+        verify, calls = _verifier((USER, time.time() + 3600))
+
+        assert await cache.resolve("tok", verify) == USER
+        assert await cache.resolve("tok", verify) == USER
+        assert len(calls) == 1
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_verification(self):
+        """Test single-flight coalescing of a burst of identical tokens."""
+        cache = _cache()
+        verify, calls = _verifier((USER, None), delay=0.05)
+
+        results = await asyncio.gather(*(cache.resolve("tok", verify) for _ in range(20)))
+
+        assert all(result == USER for result in results)
+        assert len(calls) == 1
+        assert cache.get_stats()["coalesced"] == 19
+
+    @pytest.mark.asyncio
+    async def test_invalid_token_is_negatively_cached(self):
+        """Test that rejected tokens are not re-sent to Passport."""
+        cache = _cache()
+        verify, calls = _verifier(None)
+
+        assert await cache.resolve("bad", verify) is None
+        assert await cache.resolve("bad", verify) is None
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_passport_outage_is_not_cached(self):
+        """Test that an unavailable Passport is retried on the next request."""
+        from core.security import PassportUnavailable
+
+        cache = _cache()
+        verify, calls = _verifier(PassportUnavailable("timeout"))
+
+        assert await cache.resolve("tok", verify) is None
+        assert await cache.resolve("tok", verify) is None
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_entry_does_not_outlive_token_exp(self):
+        """Test that an already expired token is not cached."""
+        cache = _cache()
+        verify, calls = _verifier((USER, time.time() - 1))
+
+        await cache.resolve("tok", verify)
+        await cache.resolve("tok", verify)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_is_refused(self):
+        """Test that the revocation hook drops the entry and flags the token."""
+        cache = _cache()
+        verify, _ = _verifier((USER, None))
+        await cache.resolve("tok", verify)
+
+        cache.revoke("tok")
+
+        assert cache.is_revoked("tok")
+        assert cache.get_stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self):
+        """Test that the least recently used entries are evicted."""
+        cache = _cache(max_entries=2)
+        verify, _ = _verifier((USER, None))
+
+        for token in ("a", "b", "c"):
+            await cache.resolve(token, verify)
+
+        assert cache.get_stats()["entries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_revocation_is_shared_across_workers(self):
+        """Test that a token revoked by one worker is pushed to another without a Redis lookup per check."""
+        from core.security import SharedRevocations
+
+        class FakePubSub:
+            def __init__(self, redis):
+                self.redis = redis
+                self.queue = asyncio.Queue()
+
+            async def subscribe(self, channel):
+                self.redis.subscribers.append(self.queue)
+
+            async def listen(self):
+                while True:
+                    yield await self.queue.get()
+
+            async def close(self):
+                self.redis.subscribers.remove(self.queue)
+
+        class FakeRedis:
+            def __init__(self):
+                self.keys = {}
+                self.subscribers = []
+                self.lookups = 0
+
+            async def set(self, key, value, ex=None):
+                self.keys[key] = ex
+
+            async def publish(self, channel, message):
+                for queue in self.subscribers:
+                    queue.put_nowait({"type": "message", "data": message})
+
+            def pubsub(self):
+                return FakePubSub(self)
+
+            async def scan_iter(self, match, count=None):
+                for key in list(self.keys):
+                    yield key
+
+            async def ttl(self, key):
+                self.lookups += 1
+                return self.keys.get(key, -2)
+
+            async def close(self):
+                pass
+
+        redis = FakeRedis()
+        redis.keys[SharedRevocations.PREFIX + _cache()._key("old")] = 60
+
+        def worker():
+            revocations = SharedRevocations("redis://test")
+            revocations._redis = revocations._subscriber = redis
+            return _cache(revocations=revocations), revocations
+
+        (worker_a, shared_a), (worker_b, shared_b) = worker(), worker()
+        assert not await worker_b.is_revoked_anywhere("tok")
+        await asyncio.sleep(0.01)
+
+        await worker_a.revoke_everywhere("tok")
+        await asyncio.sleep(0.01)
+        lookups = redis.lookups
+
+        assert await worker_b.is_revoked_anywhere("tok")
+        assert await worker_b.is_revoked_anywhere("old")
+        assert not await worker_b.is_revoked_anywhere("other")
+        assert redis.lookups == lookups
+        assert 290 < redis.keys[SharedRevocations.PREFIX + worker_a._key("tok")] <= 301
+
+        await shared_a.close()
+        await shared_b.close()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_store_falls_back_to_local(self):
+        """Test that a Redis outage neither delays checks nor is retried on every lookup."""
+        from core.security import SharedRevocations
+
+        calls = []
+
+        class DownRedis:
+            def pubsub(self):
+                calls.append("pubsub")
+                raise ConnectionError("refused")
+
+            async def set(self, key, value, ex=None):
+                raise ConnectionError("refused")
+
+            async def close(self):
+                pass
+
+        revocations = SharedRevocations("redis://test")
+        revocations._redis = revocations._subscriber = DownRedis()
+        cache = _cache(revocations=revocations)
+
+        assert not await cache.is_revoked_anywhere("tok")
+        await asyncio.sleep(0.01)
+        assert not await cache.is_revoked_anywhere("tok")
+        await cache.revoke_everywhere("tok")
+
+        assert await cache.is_revoked_anywhere("tok")
+        assert len(calls) == 1
+        await revocations.close()
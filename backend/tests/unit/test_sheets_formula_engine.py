@@ -0,0 +1,361 @@
+"""
+Sheets Formula Engine Unit Tests
+"""
+
+import time
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+pytestmark = pytest.mark.unit
+
+
+def _evaluate(formula, cells=None):
+    from services.sheets_formula_engine import SheetEngine
+
+    return SheetEngine(cells or {}).apply([("Z99", None, formula)])["Z99"]
+
+
+class TestEvaluation:
+    """Test parsing and evaluation of single formulas."""
+
+    def test_operators_and_functions(self):
+        """Test precedence, text, logic and aggregate functions."""
+        cells = {"A1": {"value": 2}, "A2": {"value": "3"}, "A3": {"value": "text"}, "B1": {"value": 4}}
+
+        assert _evaluate("=1+2*3^2", cells) == 19
+        assert _evaluate("=-2^2") == 4
+        assert _evaluate("=(A1+B1)/4", cells) == 1.5
+        assert _evaluate("=SUM(A1:B3)", cells) == 9
+        assert _evaluate("=AVERAGE(A1:A3)", cells) == 2.5
+        assert _evaluate("=COUNT(A1:A3)+COUNTA(A1:A3)", cells) == 5
+        assert _evaluate('=IF(A1>1,"big","small")&"!"', cells) == "big!"
+        assert _evaluate("=ROUND(2.345, 2)") == 2.35
+        assert _evaluate("=50%*B1", cells) == 2
+        assert _evaluate("=AND(TRUE, A1=2, NOT(FALSE))", cells) is True
+
+    def test_errors(self):
+        """Test error values and their propagation."""
+        cells = {"A1": {"value": "text"}}
+
+        assert _evaluate("=1/0") == "#DIV/0!"
+        assert _evaluate("=A1*2", cells) == "#VALUE!"
+        assert _evaluate("=SUM(1/0, 2)") == "#DIV/0!"
+        assert _evaluate("=IFERROR(1/0, 7)") == 7
+        assert _evaluate("=IF(TRUE, 1, 1/0)") == 1
+        assert _evaluate("=SQRT(-1)") == "#NUM!"
+
+    def test_power_overflow_is_num_error(self):
+        """Test that huge powers and huge stored integers neither crash nor spin on bignum maths."""
+        from services.sheets_formula_engine import SheetEngine
+
+        started = time.monotonic()
+        assert _evaluate("=2^1000000") == "#NUM!"
+        assert _evaluate("=9^99999999") == "#NUM!"
+        assert _evaluate("=POWER(10, 400)") == "#NUM!"
+        assert _evaluate("=0.5^1000000") == 0
+        assert time.monotonic() - started < 1
+
+        engine = SheetEngine({"A1": {"value": 10 ** 400}})
+        assert engine.apply([("B1", None, "=COUNT(A1)")])["B1"] == 1
+
+    def test_round_digits_are_bounded(self):
+        """Test that huge digit counts neither crash nor spin on bignum maths."""
+        started = time.monotonic()
+        assert _evaluate("=ROUND(1.5, 10000000)") == 1.5
+        assert _evaluate("=ROUND(123.456, -10000000)") == 0
+        assert _evaluate("=ROUND(-2.5, 0)") == -3
+        assert _evaluate("=ROUND(1234.5, -2)") == 1200
+        assert time.monotonic() - started < 1
+
+    def test_unsupported_formula_keeps_client_value(self):
+        """Test that formulas the engine cannot evaluate are stored, not recalculated."""
+        from services.sheets_formula_engine import SheetEngine
+
+        engine = SheetEngine({})
+        changed = engine.apply([("A1", 42, "=VLOOKUP(B1,C1:D9,2)"), ("A2", None, "=SUM(")])
+
+        assert changed == {"A1": 42, "A2": "=SUM("}
+
+    def test_row_zero_refs_are_unsupported(self):
+        """Test that refs to row 0 are rejected as unsupported rather than crashing the engine."""
+        from services.sheets_formula_engine import SheetEngine, UnsupportedFormula, parse_formula
+
+        for formula in ("=A0", "=SUM(A0:B2)", "=SUM(A1:B0)"):
+            with pytest.raises(UnsupportedFormula):
+                parse_formula(formula)
+
+        engine = SheetEngine({"A1": {"value": 5, "formula": "=A0"}, "A2": {"value": 3, "formula": "=SUM(A0:B2)"}})
+        assert engine.apply([("B1", 1, None)]) == {"B1": 1}
+        assert engine.value((1, 1)) == 5
+
+
+class TestRecalculation:
+    """Test dependency tracking and incremental recalculation."""
+
+    def test_only_dependents_recalculate(self):
+        """Test that an edit recomputes its downstream chain and nothing else."""
+        from services.sheets_formula_engine import SheetEngine
+
+        engine = SheetEngine({
+            "A1": {"value": 1},
+            "B1": {"value": 2, "formula": "=A1*2"},
+            "C1": {"value": 3, "formula": "=B1+1"},
+            "D1": {"value": 10, "formula": "=A2+10"},
+        })
+
+        assert engine.apply([("A1", 5, None)]) == {"A1": 5, "B1": 10, "C1": 11}
+
+    def test_range_dependents(self):
+        """Test that edits inside a referenced range recalculate it and edits outside do not."""
+        from services.sheets_formula_engine import SheetEngine
+
+        cells = {f"A{row}": {"value": 1} for row in range(1, 101)}
+        cells["B1"] = {"value": 100, "formula": "=SUM(A1:A100)"}
+        engine = SheetEngine(cells)
+
+        assert engine.apply([("A50", 11, None)]) == {"A50": 11, "B1": 110}
+        assert engine.apply([("A101", 5, None)]) == {"A101": 5}
+
+    def test_formula_replacement_updates_graph(self):
+        """Test that rewriting a formula drops its old precedents."""
+        from services.sheets_formula_engine import SheetEngine
+
+        engine = SheetEngine({"A1": {"value": 1}, "A2": {"value": 2}, "B1": {"value": 1, "formula": "=A1"}})
+        engine.apply([("B1", None, "=A2")])
+
+        assert engine.apply([("A1", 9, None)]) == {"A1": 9}
+        assert engine.apply([("A2", 7, None)]) == {"A2": 7, "B1": 7}
+
+    def test_cycles_detected_and_recovered(self):
+        """Test that cycles and cells fed by them report #CYCLE! until broken."""
+        from services.sheets_formula_engine import SheetEngine
+
+        engine = SheetEngine({"C1": {"value": 0, "formula": "=B1+1"}})
+        changed = engine.apply([("A1", None, "=B1"), ("B1", None, "=A1")])
+
+        assert changed == {"A1": "#CYCLE!", "B1": "#CYCLE!", "C1": "#CYCLE!"}
+        assert engine.apply([("A1", 3, None)]) == {"A1": 3, "B1": 3, "C1": 4}
+
+    def test_large_sheet_edit_touches_only_its_row(self):
+        """Test that an edit in a 100k-cell sheet recalculates just its dependent cell."""
+        from services.sheets_formula_engine import SheetEngine
+
+        cells = {}
+        for row in range(1, 50001):
+            cells[f"A{row}"] = {"value": row}
+            cells[f"B{row}"] = {"value": row * 2, "formula": f"=A{row}*2"}
+        engine = SheetEngine(cells)
+
+        started = time.monotonic()
+        changed = engine.apply([("A25000", 1, None)])
+        elapsed = time.monotonic() - started
+
+        assert changed == {"A25000": 1, "B25000": 2}
+        assert elapsed < 0.05
+
+
+class TestColumnarStorage:
+    """Test the per-column value store behind range functions."""
+
+    def test_range_reductions_match_cell_values(self):
+        """Test vectorized aggregates over mixed columns, gaps and numeric strings."""
+        cells = {
+            "A1": {"value": 1.5}, "A2": {"value": "2"}, "A3": {"value": "x"}, "A5": {"value": True},
+            "B1": {"value": -4}, "B300": {"value": 10},
+        }
+
+        assert _evaluate("=SUM(A1:B300)", cells) == 9.5
+        assert _evaluate("=MIN(A1:B300)", cells) == -4
+        assert _evaluate("=MAX(A1:A9)", cells) == 2
+        assert _evaluate("=PRODUCT(A1:A3, 2)", cells) == 6
+        assert _evaluate("=COUNTA(A1:B300)", cells) == 6
+        assert _evaluate('=CONCAT(A1:A3)', cells) == "1.52x"
+
+    def test_errors_in_ranges(self):
+        """Test that an error inside a range propagates to SUM but is skipped by COUNT."""
+        from services.sheets_formula_engine import SheetEngine
+
+        engine = SheetEngine({"A1": {"value": 1}, "A2": {"value": 0}})
+        changed = engine.apply([("A3", None, "=A1/A2"), ("B1", None, "=SUM(A1:A3)"), ("B2", None, "=COUNT(A1:A3)")])
+
+        assert changed == {"A3": "#DIV/0!", "B1": "#DIV/0!", "B2": 2}
+
+    def test_cleared_cells_leave_ranges(self):
+        """Test that overwriting text with a number and clearing cells updates the columns."""
+        from services.sheets_formula_engine import SheetEngine
+
+        engine = SheetEngine({"A1": {"value": "x"}, "A2": {"value": 4}, "B1": {"value": 0, "formula": "=SUM(A1:A2)"}})
+
+        assert engine.apply([("A1", 3, None)]) == {"A1": 3, "B1": 7}
+        assert engine.apply([("A2", "", None)]) == {"A2": None, "B1": 3}
+        assert engine.value((1, 1)) == 3
+
+    def test_far_rows_stay_sparse(self, monkeypatch):
+        """Test that a number far down a column neither grows the dense array nor drops out of ranges."""
+        from services.sheets_formula_engine import SheetEngine, _Column
+
+        monkeypatch.setattr(_Column, "dense_rows", 1000)
+        engine = SheetEngine({"A1": {"value": 2}, "A3": {"value": "x"}})
+        changed = engine.apply([("A50000000", 5, None), ("B1", None, "=SUM(A1:A50000000)"),
+                                ("B2", None, "=COUNTA(A1:A50000000)")])
+
+        assert changed == {"A50000000": 5, "B1": 7, "B2": 3}
+        assert len(engine.columns[1].numbers) <= 1000
+        assert engine.apply([("A50000000", "", None)]) == {"A50000000": None, "B1": 2, "B2": 2}
+
+    def test_rows_past_the_limit_are_rejected(self):
+        """Test that cell edits cannot address rows past SHEETS_MAX_ROWS."""
+        from api.sheets import CellUpdate
+        from core.config import settings
+        from services.sheets_service import SheetsService
+
+        service = SheetsService()
+        assert service._is_valid_cell_ref(f"A{settings.SHEETS_MAX_ROWS}")
+        assert not service._is_valid_cell_ref(f"A{settings.SHEETS_MAX_ROWS + 1}")
+        with pytest.raises(ValueError):
+            CellUpdate(cell_ref="A50000000", value=1)
+
+
+class TestSheetsServiceUpdateCells:
+    """Test update_cells through the engine cache and cell patches."""
+
+    @pytest.mark.asyncio
+    async def test_update_persists_only_changed_cells(self, monkeypatch):
+        """Test that edits and their dependents are written as a patch, and warm edits skip loading data."""
+        import json
+        from services import sheets_formula_engine
+        from services.sheets_service import SheetsService
+
+        monkeypatch.setattr(sheets_formula_engine, "_engine_cache", sheets_formula_engine.SheetEngineCache(4))
+        cells = {f"A{row}": {"value": row, "formula": None, "format": {}} for row in range(2, 1000)}
+        cells.update({"A1": {"value": 1, "formula": None, "format": {}},
+                      "B1": {"value": 2, "formula": "=A1*2", "format": {"bold": True}}})
+        versions = iter([datetime(2026, 1, 2), datetime(2026, 1, 3)])
+        worksheet = SimpleNamespace(id="ws-1", updated_at=datetime(2026, 1, 1))
+        statements = []
+
+        async def execute(statement, params=None):
+            sql = str(statement)
+            statements.append((sql, params))
+            result = MagicMock()
+            if sql.lstrip().startswith("UPDATE"):
+                result.scalar.return_value = next(versions)
+            elif "FOR UPDATE" in sql:
+                result.scalar_one_or_none.return_value = worksheet.updated_at
+            else:
+                result.scalar.return_value = cells
+            return result
+
+        db = MagicMock()
+        db.execute = execute
+        db.commit = AsyncMock()
+        service = SheetsService()
+        monkeypatch.setattr(service, "get_spreadsheet", AsyncMock(return_value=SimpleNamespace(updated_at=None)))
+
+        first = await service.update_cells(db, "s", "ws-1", "u", [{"cell": "A1", "value": 5}])
+        worksheet.updated_at = datetime(2026, 1, 2)
+        second = await service.update_cells(db, "s", "ws-1", "u", [{"cell": "c1", "formula": "=B1+A1"}])
+
+        patches = [json.loads(params["patch"]) for sql, params in statements if sql.lstrip().startswith("UPDATE")]
+        assert first["recalculated"] == {"B1": 10}
+        assert patches[0] == {"A1": {"value": 5, "formula": None, "format": {}}, "B1": {"value": 10}}
+        assert second["cells"]["C1"] == {"value": 15, "formula": "=B1+A1"}
+        assert patches[1] == {"C1": {"value": 15, "formula": "=B1+A1", "format": {}}}
+        assert all(isinstance(params["updated_at"], datetime) and params["updated_at"].tzinfo is None
+                   for sql, params in statements if sql.lstrip().startswith("UPDATE"))
+        assert sum(sql.lstrip().startswith("SELECT data") for sql, _ in statements) == 1
+        assert sum("FOR UPDATE" in sql for sql, _ in statements) == 2
+        assert sheets_formula_engine.get_sheet_engine_cache().get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_edit_never_sees_failed_write(self, monkeypatch):
+        """Test that edits of one worksheet are serialized and a rolled-back edit leaves no trace in the engine."""
+        import asyncio
+
+        from services import sheets_formula_engine
+        from services.sheets_service import SheetsService
+
+        monkeypatch.setattr(sheets_formula_engine, "_engine_cache", sheets_formula_engine.SheetEngineCache(4))
+        cells = {"A1": {"value": 1, "formula": None, "format": {}},
+                 "B1": {"value": 2, "formula": "=A1*2", "format": {}}}
+        worksheet = SimpleNamespace(id="ws-1", updated_at=datetime(2026, 1, 1))
+        data_loads = []
+        commits = []
+
+        async def execute(statement, params=None):
+            sql = str(statement)
+            result = MagicMock()
+            if sql.lstrip().startswith("UPDATE"):
+                result.scalar.return_value = datetime(2026, 1, 2)
+            elif "FOR UPDATE" in sql:
+                result.scalar_one_or_none.return_value = worksheet.updated_at
+            else:
+                data_loads.append(sql)
+                result.scalar.return_value = cells
+            return result
+
+        async def commit():
+            commits.append(True)
+            await asyncio.sleep(0)
+            if len(commits) == 1:
+                raise RuntimeError("deadlock detected")
+
+        db = MagicMock()
+        db.execute = execute
+        db.commit = commit
+        service = SheetsService()
+        monkeypatch.setattr(service, "get_spreadsheet", AsyncMock(return_value=SimpleNamespace(updated_at=None)))
+
+        failed, second = await asyncio.gather(
+            service.update_cells(db, "s", "ws-1", "u", [{"cell": "A1", "value": 5}]),
+            service.update_cells(db, "s", "ws-1", "u", [{"cell": "C1", "formula": "=B1+1"}]),
+            return_exceptions=True
+        )
+
+        assert isinstance(failed, RuntimeError)
+        assert second["cells"]["C1"]["value"] == 3
+        assert len(data_loads) == 2
+        assert not sheets_formula_engine.get_sheet_engine_cache()._locks
+
+    @pytest.mark.asyncio
+    async def test_edit_by_another_worker_rebuilds_engine(self, monkeypatch):
+        """Test that the version is read under a row lock and a write by another worker forces a rebuild."""
+        from services import sheets_formula_engine
+        from services.sheets_service import apply_cell_edits
+
+        monkeypatch.setattr(sheets_formula_engine, "_engine_cache", sheets_formula_engine.SheetEngineCache(4))
+        stored = {"cells": {"A1": {"value": 1}, "B1": {"value": 2, "formula": "=A1*2"}}}
+        row = {"updated_at": datetime(2026, 1, 1)}
+        statements = []
+
+        async def execute(statement, params=None):
+            sql = str(statement).strip()
+            statements.append(sql)
+            result = MagicMock()
+            if sql.startswith("UPDATE"):
+                row["updated_at"] = datetime(2026, 1, 2)
+                result.scalar.return_value = row["updated_at"]
+            elif "FOR UPDATE" in sql:
+                result.scalar_one_or_none.return_value = row["updated_at"]
+            else:
+                result.scalar.return_value = stored["cells"]
+            return result
+
+        db = MagicMock()
+        db.execute = execute
+        db.commit = AsyncMock()
+
+        await apply_cell_edits(db, "s", "ws-1", {"C1": {"value": 1}}, cells_key="cells")
+        # Another worker edits A1 and bumps the version
+        stored["cells"].update({"A1": {"value": 10}, "B1": {"value": 20, "formula": "=A1*2"}})
+        row["updated_at"] = datetime(2026, 1, 3)
+        recalculated, _ = await apply_cell_edits(db, "s", "ws-1", {"A2": {"value": 1}}, cells_key="cells")
+        recalculated, _ = await apply_cell_edits(
+            db, "s", "ws-1", {"C2": {"value": None, "formula": "=B1+1"}}, cells_key="cells"
+        )
+
+        assert recalculated == {"C2": 21}
+        assert "FOR UPDATE" in statements[0]
+        assert sum(sql.startswith("SELECT data") for sql in statements) == 2
@@ -0,0 +1,128 @@
+"""
+Tenant Membership Cache Unit Tests
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+pytestmark = pytest.mark.unit
+
+ROW = SimpleNamespace(
+    tenant_user_id="tu-1",
+    tenant_id="t-1",
+    user_id="u1",
+    role="admin",
+    email="a@example.com",
+    tenant_name="Acme",
+    tenant_mode="external"
+)
+
+
+def _session(row=ROW):
+    result = MagicMock()
+    result.fetchone.return_value = row
+    session = MagicMock()
+    session.info = {}
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    from core import security
+
+    cache = security.TenantRoleCache(max_entries=100, ttl_seconds=30, negative_ttl_seconds=5)
+    monkeypatch.setattr(security, "tenant_role_cache", cache)
+    return cache
+
+
+class TestTenantRoleCache:
+    """Test request-scoped and cross-request caching of tenant membership."""
+
+    @pytest.mark.asyncio
+    async def test_request_queries_database_once(self, fresh_cache):
+        """Test that several dependencies in one request share one lookup."""
+        from core.security import get_user_tenant_role
+
+        db = _session()
+        for _ in range(3):
+            info = await get_user_tenant_role("u1", db, email="a@example.com")
+
+        assert info["tenant_role"] == "admin"
+        assert db.execute.await_count == 1
+        assert fresh_cache.get_stats()["request_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_later_request_served_from_cache(self, fresh_cache):
+        """Test that a new request (new session) hits the worker cache."""
+        from core.security import get_user_tenant_role
+
+        await get_user_tenant_role("u1", _session())
+        db = _session()
+        info = await get_user_tenant_role("u1", db)
+
+        assert info["tenant_id"] == "t-1"
+        assert db.execute.await_count == 0
+        assert fresh_cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_callers_cannot_mutate_cached_entry(self):
+        """Test that each caller gets its own copy of the result."""
+        from core.security import get_user_tenant_role
+
+        info = await get_user_tenant_role("u1", _session())
+        info["tenant_role"] = "member"
+
+        assert (await get_user_tenant_role("u1", _session()))["tenant_role"] == "admin"
+
+    @pytest.mark.asyncio
+    async def test_tenant_write_invalidates(self, fresh_cache):
+        """Test that an UPDATE of tenants drops cached memberships on commit."""
+        from core.security import (
+            _invalidate_after_tenant_membership_write,
+            _watch_tenant_membership_writes,
+            get_user_tenant_role,
+        )
+
+        db = _session()
+        await get_user_tenant_role("u1", db)
+        conn = SimpleNamespace(info={})
+        _watch_tenant_membership_writes(
+            conn, None, "UPDATE workspace.tenants SET is_suspended=true WHERE id = $1", {}, None, False
+        )
+        _invalidate_after_tenant_membership_write(conn)
+
+        await get_user_tenant_role("u1", db)
+
+        assert db.execute.await_count == 2
+        assert fresh_cache.get_stats()["invalidations"] == 2
+
+    def test_unrelated_writes_are_ignored(self, fresh_cache):
+        """Test that writes to other tables keep the cache."""
+        from core.security import _watch_tenant_membership_writes
+
+        conn = SimpleNamespace(info={})
+        for statement in (
+            "SELECT * FROM workspace.tenant_users",
+            "UPDATE workspace.tenant_usage SET used = 1",
+            "INSERT INTO workspace.activity_log (tenant_id) VALUES ($1)",
+        ):
+            _watch_tenant_membership_writes(conn, None, statement, {}, None, False)
+
+        assert conn.info == {}
+        assert fresh_cache.generation == 0
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_tenant(self, fresh_cache):
+        """Test targeted invalidation and negative caching."""
+        from core.security import get_user_tenant_role, invalidate_tenant_role_cache
+
+        await get_user_tenant_role("u1", _session())
+        await get_user_tenant_role("u2", _session(row=None))
+
+        invalidate_tenant_role_cache(tenant_id="t-1")
+
+        stats = fresh_cache.get_stats()
+        assert stats["entries"] == 1
+        assert await get_user_tenant_role("u2", _session()) is None
@@ -0,0 +1,190 @@
+"""
+Workflow Engine Unit Tests
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+pytestmark = pytest.mark.unit
+
+
+def _run(**overrides):
+    fields = {
+        "id": "run-1", "workflow_id": "wf-1", "tenant_id": "t1", "status": "running",
+        "trigger_data": {"subject": "hello"}, "execution_log": [], "context": None,
+        "current_step": 0, "attempts": 0, "max_attempts": 3, "started_at": datetime.utcnow(),
+        "completed_at": None, "duration_ms": None, "error": None, "next_run_at": None,
+        "locked_by": "node", "locked_until": None
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def _workflow(actions, conditions=None):
+    return SimpleNamespace(id="wf-1", tenant_id="t1", actions=actions, conditions=conditions or {})
+
+
+def _db():
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    return db
+
+
+class TestPickRuns:
+    """Test how due runs are chosen against the concurrency limits."""
+
+    def test_limits_per_tenant_and_workflow(self):
+        """Test that runs over a tenant or workflow limit are skipped, oldest first otherwise."""
+        from services.workflow_engine import pick_runs
+
+        candidates = [
+            SimpleNamespace(id=1, tenant_id="a", workflow_id="a1"),
+            SimpleNamespace(id=2, tenant_id="a", workflow_id="a1"),
+            SimpleNamespace(id=3, tenant_id="a", workflow_id="a2"),
+            SimpleNamespace(id=4, tenant_id="b", workflow_id="b1"),
+            SimpleNamespace(id=5, tenant_id="c", workflow_id="c1"),
+        ]
+        running = [("b", "b1", 2)]
+
+        picked = pick_runs(candidates, running, limit=10, tenant_limit=2, workflow_limit=1)
+
+        assert [run.id for run in picked] == [1, 3, 5]
+
+    def test_stops_at_free_slots(self):
+        """Test that no more runs are picked than there are free workers."""
+        from services.workflow_engine import pick_runs
+
+        candidates = [SimpleNamespace(id=n, tenant_id=n, workflow_id=n) for n in range(10)]
+
+        assert len(pick_runs(candidates, [], limit=3, tenant_limit=5, workflow_limit=5)) == 3
+
+
+class TestExecuteRun:
+    """Test step-wise execution of a claimed run."""
+
+    @pytest.mark.asyncio
+    async def test_delay_is_scheduled_and_run_resumes(self):
+        """Test that a delay parks the run and the next execution continues after it."""
+        from services.workflow_service import WorkflowService
+
+        workflow = _workflow([
+            {"type": "notification.send", "config": {"title": "{{trigger.subject}}"}},
+            {"type": "delay", "config": {"duration_seconds": 3600}},
+            {"type": "mail.send", "config": {"subject": "follow up"}},
+        ])
+        run = _run()
+        service = WorkflowService(_db())
+
+        assert await service.execute_run(workflow, run) == "waiting"
+        assert run.current_step == 2
+        assert (run.next_run_at - datetime.utcnow()).total_seconds() > 3500
+        assert run.locked_by is None
+        assert run.context["action_0"]["title"] == "hello"
+
+        run.status = "running"
+        assert await service.execute_run(workflow, run) == "completed"
+        assert [entry["status"] for entry in run.execution_log] == ["completed", "scheduled", "completed"]
+
+    @pytest.mark.asyncio
+    async def test_failure_is_retried_then_fails(self, monkeypatch):
+        """Test that a failing step is requeued with growing backoff until attempts run out."""
+        from services.workflow_service import WorkflowService
+
+        workflow = _workflow([{"type": "mail.send", "config": {}}, {"type": "webhook.call", "config": {}}])
+        run = _run()
+        service = WorkflowService(_db())
+        calls = []
+
+        async def flaky_webhook(config):
+            calls.append(config)
+            raise ConnectionError("refused")
+
+        monkeypatch.setattr(service, "_action_call_webhook", flaky_webhook)
+
+        delays = []
+        for _ in range(3):
+            run.status = "running"
+            with pytest.raises(ConnectionError):
+                await service.execute_run(workflow, run)
+            status = await service.handle_run_failure(run, "refused")
+            if status == "queued":
+                delays.append((run.next_run_at - datetime.utcnow()).total_seconds())
+
+        assert status == "failed"
+        assert run.attempts == 3
+        assert len(calls) == 3
+        assert run.current_step == 1  # mail.send ran once
+        assert delays[1] > delays[0]
+
+
+class TestTriggers:
+    """Test that triggers only enqueue."""
+
+    @pytest.mark.asyncio
+    async def test_trigger_event_enqueues_without_executing(self, monkeypatch):
+        """Test that matching workflows get queued runs in one commit."""
+        from services import workflow_engine
+        from services.workflow_service import WorkflowService
+
+        notify = MagicMock()
+        monkeypatch.setattr(workflow_engine.workflow_engine, "notify", notify)
+        workflows = [
+            SimpleNamespace(id="w1", tenant_id="t1", trigger_config={"subject": "invoice"}),
+            SimpleNamespace(id="w2", tenant_id="t1", trigger_config={"subject": "other"}),
+            SimpleNamespace(id="w3", tenant_id="t1", trigger_config={}),
+        ]
+        db = _db()
+        service = WorkflowService(db)
+        monkeypatch.setattr(service, "find_workflows_for_trigger", AsyncMock(return_value=workflows))
+        monkeypatch.setattr(service, "_execute_action", AsyncMock())
+
+        runs = await service.process_trigger_event("t1", "mail.received", {"subject": "Invoice 42"})
+
+        assert [run.workflow_id for run in runs] == ["w1", "w3"]
+        assert {run.status for run in runs} == {"queued"}
+        assert db.commit.await_count == 1
+        service._execute_action.assert_not_awaited()
+        notify.assert_called_once()
+
+
+class TestWorkflowEngine:
+    """Test the dispatcher and worker pool."""
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_is_bounded_and_drains_queue(self):
+        """Test that no more than `workers` runs execute at once and all queued runs finish."""
+        from services.workflow_engine import WorkflowEngine
+
+        engine = WorkflowEngine(workers=3, tenant_limit=10, workflow_limit=10, poll_interval=0.01, lease_seconds=60)
+        queue = list(range(10))
+        running = set()
+        peak = 0
+
+        async def claim(limit):
+            claimed, queue[:] = queue[:limit], queue[limit:]
+            return claimed
+
+        async def execute(run_id):
+            nonlocal peak
+            running.add(run_id)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.01)
+            running.discard(run_id)
+            return "completed"
+
+        engine._claim = claim
+        engine._execute = execute
+        engine.start()
+        for _ in range(200):
+            if engine.stats["completed"] == 10:
+                break
+            await asyncio.sleep(0.01)
+        await engine.stop()
+
+        assert engine.stats["completed"] == 10
+        assert peak == 3
+        assert engine.get_stats()["runs_per_sec"] > 0
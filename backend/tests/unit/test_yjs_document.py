@@ -0,0 +1,94 @@
+"""
+Yjs Document Engine Unit Tests
+
+Update bytes below are what Yjs 13 emits for a Y.Text named "text" edited
+by client 1.
+"""
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+# insert(0, "abc")
+INSERT_ABC = bytes([1, 1, 1, 0, 4, 1, 4, 116, 101, 120, 116, 3, 97, 98, 99, 0])
+# insert(3, "d"), origin (1, 2)
+INSERT_D = bytes([1, 1, 1, 3, 132, 1, 2, 1, 100, 0])
+# delete(1, 1): delete set only
+DELETE_B = bytes([0, 1, 1, 1, 1, 1])
+# State of "abcd" as a single item
+STATE_ABCD = bytes([1, 1, 1, 0, 4, 1, 4, 116, 101, 120, 116, 4, 97, 98, 99, 100, 0])
+
+
+class TestMergeUpdates:
+    """Test merging and compaction of updates."""
+
+    def test_consecutive_inserts_coalesce(self):
+        """Test that typing merges into one item regardless of arrival order."""
+        from services.yjs_document import merge_updates
+
+        assert merge_updates([INSERT_ABC, INSERT_D]) == STATE_ABCD
+        assert merge_updates([INSERT_D, INSERT_ABC]) == STATE_ABCD
+
+    def test_duplicate_and_overlapping_updates_are_deduplicated(self):
+        """Test that re-sent updates do not duplicate content."""
+        from services.yjs_document import merge_updates
+
+        assert merge_updates([STATE_ABCD, INSERT_ABC, INSERT_D, STATE_ABCD]) == STATE_ABCD
+
+    def test_gc_drops_deleted_content(self):
+        """Test that deleted text is replaced by a deleted-length marker."""
+        from services.yjs_document import merge_updates
+
+        collected = merge_updates([STATE_ABCD, DELETE_B], gc=True)
+
+        assert b"b" not in collected.split(b"text")[1]
+        assert collected.endswith(bytes([1, 1, 1, 1, 1]))
+        # Re-merging already collected state is stable
+        assert merge_updates([collected, INSERT_ABC], gc=True) == collected
+
+    def test_missing_dependency_leaves_gap(self):
+        """Test that a later update without its predecessor is kept behind a skip."""
+        from services.yjs_document import merge_updates, state_vector_from_update
+
+        assert state_vector_from_update(merge_updates([INSERT_D])) == {}
+
+    def test_malformed_update_rejected(self):
+        """Test that truncated bytes raise YjsDecodeError."""
+        from services.yjs_document import YjsDecodeError, merge_updates
+
+        with pytest.raises(YjsDecodeError):
+            merge_updates([INSERT_ABC[:-3]])
+
+
+class TestDiff:
+    """Test state-vector based sync."""
+
+    def test_diff_sends_only_unseen_suffix(self):
+        """Test that a peer at clock 2 receives just "cd"."""
+        from services.yjs_document import diff_update, encode_state_vector
+
+        diff = diff_update(STATE_ABCD, encode_state_vector({1: 2}))
+
+        assert diff == bytes([1, 1, 1, 2, 132, 1, 1, 2, 99, 100, 0])
+
+    def test_diff_for_up_to_date_peer_is_empty(self):
+        """Test that a peer with everything gets no structs."""
+        from services.yjs_document import EMPTY_UPDATE, diff_update, encode_state_vector
+
+        assert diff_update(STATE_ABCD, encode_state_vector({1: 4})) == EMPTY_UPDATE
+
+
+class TestYDocument:
+    """Test the room document wrapper."""
+
+    def test_log_compacts_and_answers_sync(self):
+        """Test that updates accumulate, compact and report a state vector."""
+        from services.yjs_document import YDocument, decode_state_vector
+
+        doc = YDocument(compact_after_updates=2)
+        doc.apply_update(INSERT_ABC)
+        doc.apply_update(INSERT_D)
+
+        assert doc.get_stats()["pending_updates"] == 0
+        assert decode_state_vector(doc.encode_state_vector()) == {1: 4}
+        assert doc.diff(b"") == STATE_ABCD